@@ -0,0 +1,94 @@
+"""
+Backfill de los atributos derivados de los listados en t_usuarios.
+
+name_search y account_status (storage.user_index_attributes) se escriben al
+crear un usuario; los usuarios anteriores no los tienen y no aparecen en la
+búsqueda por nombre ni en el listado de cuentas inactivas (ver README,
+"Listado de usuarios"). Este script recorre la tabla una vez (Scan de a
+páginas, proyección mínima) y hace un update de los usuarios a los que les
+falta algún atributo o lo tienen desactualizado. Se puede volver a ejecutar:
+los usuarios al día no se reescriben. Sólo agrega o corrige atributos: una
+cuenta reactivada a mano debe borrar su account_status.
+
+Uso:
+    python ActualizarIndicesUsuarios.py [--threads 8] [--dry-run]
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import storage
+import structured_logging
+
+log = structured_logging.get_logger('backfill')
+
+# Atributos que se leen de cada usuario
+SCAN_PROJECTION = 'email, name, is_active, name_search, account_status'
+
+
+def pending_update(item):
+    """
+    Atributos a escribir en el usuario (vacío si ya está al día)
+    """
+    expected = storage.user_index_attributes(item)
+    return {name: value for name, value in expected.items() if item.get(name) != value}
+
+
+def backfill(store=None, threads=8, dry_run=False, progress=None):
+    """
+    Recorre t_usuarios y completa los atributos de los índices. Retorna
+    {'scanned', 'updated', 'errors'}
+    """
+    store = store or storage.get_storage()
+    state = {'scanned': 0, 'updated': 0, 'errors': 0}
+
+    def update(item, values):
+        try:
+            store.update(storage.USERS, {'email': item['email']}, values)
+            return True
+        except Exception as e:
+            log.error("Error actualizando usuario", email=item['email'], error=str(e))
+            return False
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = []
+        for item in store.scan(storage.USERS, projection=SCAN_PROJECTION):
+            state['scanned'] += 1
+            values = pending_update(item)
+            if values and not dry_run:
+                futures.append(pool.submit(update, item, values))
+            elif values:
+                state['updated'] += 1
+            if len(futures) >= threads * 50:
+                for future in futures:
+                    state['updated' if future.result() else 'errors'] += 1
+                futures = []
+                if progress:
+                    progress(state)
+        for future in futures:
+            state['updated' if future.result() else 'errors'] += 1
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Backfill de name_search y account_status en t_usuarios')
+    parser.add_argument('--threads', type=int, default=8, help='Updates en paralelo')
+    parser.add_argument('--dry-run', action='store_true', help='Sólo cuenta los usuarios a actualizar')
+    args = parser.parse_args(argv)
+
+    def progress(state):
+        print(f"  {state['scanned']} usuarios leídos, {state['updated']} actualizados", file=sys.stderr)
+
+    started = time.perf_counter()
+    try:
+        report = backfill(threads=args.threads, dry_run=args.dry_run, progress=progress)
+    finally:
+        structured_logging.flush()
+    report['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
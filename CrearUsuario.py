@@ -1,14 +1,15 @@
-import boto3
-import hashlib
 import uuid
 from datetime import datetime
-import json
-import os
-import traceback
 
-# Hashear contraseña
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+import audit_log
+import handler_pipeline
+import invitation_codes
+import metrics
+import storage
+import structured_logging
+from password_hasher import hash_password
+
+log = structured_logging.get_logger('registro')
 
 # Validar y asignar tier de staff (MODIFICADO)
 def validate_staff_tier(tier):
@@ -17,60 +18,6 @@ def validate_staff_tier(tier):
         raise ValueError(f"Tier inválido. Debe ser uno de: {valid_tiers}")
     return tier
 
-# Validar código de invitación para staff
-def validate_invitation_code(code):
-    if not code:
-        return False
-        
-    dynamodb = boto3.resource('dynamodb')
-    # Usar variable de entorno para el nombre de la tabla
-    invitation_table_name = os.environ.get('INVITATION_CODES_TABLE', 'dev-t_invitation_codes')
-    table = dynamodb.Table(invitation_table_name)
-    
-    try:
-        response = table.get_item(Key={'code': code})
-        if 'Item' in response:
-            item = response['Item']
-            
-            # Verificar que esté activo y no haya expirado
-            # Parsear expires_at de manera segura
-            try:
-                expires_at_str = item.get('expires_at')
-                if not expires_at_str:
-                    return False
-                expires_at = datetime.fromisoformat(expires_at_str)
-            except Exception as e:
-                print(f"Error parsing expires_at for code {code}: {e}")
-                return False
-
-            try:
-                used_count = int(item.get('used_count', 0))
-                max_uses = int(item.get('max_uses', 1))
-            except Exception:
-                used_count = 0
-                max_uses = 1
-
-            if (item.get('is_active', False) and 
-                expires_at > datetime.utcnow() and
-                used_count < max_uses):
-
-                # Incrementar contador de usos de forma segura (si no existe, asumir 0)
-                try:
-                    table.update_item(
-                        Key={'code': code},
-                        UpdateExpression='SET used_count = if_not_exists(used_count, :zero) + :inc',
-                        ExpressionAttributeValues={':inc': 1, ':zero': 0}
-                    )
-                except Exception as e:
-                    print(f"Error updating used_count for code {code}: {str(e)}")
-                    return False
-
-                return True
-        return False
-    except Exception as e:
-        print(f"Error validating invitation code: {str(e)}")
-        return False
-
 # Asignar permisos basados en el tier de staff (MODIFICADO)
 def get_staff_permissions(tier):
     permissions = {
@@ -97,211 +44,166 @@ def get_staff_permissions(tier):
     }
     return permissions.get(tier, [])
 
-# Headers CORS para todas las respuestas
-CORS_HEADERS = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'POST, OPTIONS, GET',
-    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, Accept',
-    'Content-Type': 'application/json'
-}
+# Validar tipo de usuario y staff tier (validaciones 3 y 4, compartidas con ImportarUsuarios)
+def validate_user_type_and_tier(user_type, staff_tier):
+    """
+    Retorna el staff_tier normalizado (None para clientes) o lanza ValueError
+    """
+    if user_type not in ['cliente', 'staff']:
+        raise ValueError('Tipo de usuario inválido. Debe ser "cliente" o "staff"')
+    if user_type != 'staff':
+        # Clientes no deben tener staff_tier
+        return None
+    if not staff_tier:
+        raise ValueError('Usuarios staff requieren el campo staff_tier')
+    return validate_staff_tier(staff_tier)
+
+# Construir el item de t_usuarios
+def build_user_item(email, hashed_password, name, phone, gender, user_type, staff_tier,
+                    registration_source, current_time):
+    user_item = {
+        'user_id': str(uuid.uuid4()),
+        'email': email,
+        'password': hashed_password,  
+        'name': name,
+        'phone': phone,
+        'gender': gender,
+        'user_type': user_type,
+        'created_at': current_time,    
+        'updated_at': current_time,    
+        'is_active': True,             
+        'last_login': None,            
+        'registration_source': registration_source
+    }
+    
+    # Agregar campos específicos de staff
+    if user_type == 'staff':
+        user_item['staff_tier'] = staff_tier
+        user_item['permissions'] = get_staff_permissions(staff_tier)
+        user_item['is_verified'] = True
+    else:
+        user_item['is_verified'] = True
+
+    # Atributos de los índices de los listados (name_search, account_status)
+    user_item.update(storage.user_index_attributes(user_item))
+    return user_item
+
+# Errores del registro (serializados una vez al importar)
+handler_pipeline.register_error(
+    'staff_portal_registration_only', 403, 'Acceso denegado. El portal staff es solo para registro de personal'
+)
+handler_pipeline.register_error(
+    'invalid_invitation', 403, 'Código de invitación inválido o expirado. Contacta al administrador.'
+)
+handler_pipeline.register_error(
+    'client_portal_only', 403, 'Acceso denegado. El portal cliente es solo para usuarios clientes'
+)
+handler_pipeline.register_error(
+    'staff_requires_frontend_type', 403, 'Registro de staff requiere especificar frontend_type: staff'
+)
+handler_pipeline.register_error('email_exists', 409, 'El email ya está registrado en el sistema')
 
 # Función principal del Lambda
-def lambda_handler(event, context):
+@handler_pipeline.handler('registro', warmup_steps=('storage', 'password_hash'))
+def lambda_handler(body, event, context):
     """
     Maneja el registro de usuarios para ambos frontends
     """
-    try:
-        print("Event received:", json.dumps(event, indent=2))
-        
-        if 'body' in event:
-            if isinstance(event['body'], str):
-                body = json.loads(event['body'])
-            else:
-                body = event['body']
-        else:
-            body = event
+    password = body.get('password')
+    name = body.get('name')
+    email = body.get('email', '').lower().strip()
+    phone = body.get('phone')
+    gender = body.get('gender')
+    user_type = body.get('user_type', 'cliente')
+    staff_tier = body.get('staff_tier')
+    invitation_code = body.get('invitation_code')
+    frontend_type = body.get('frontend_type', 'client')
+
+    # Validación 1: Campos obligatorios
+    if not email or not password:
+        return handler_pipeline.error_response('missing_credentials')
+
+    # Validación 2: Restricciones por tipo de frontend
+    if frontend_type == 'staff':
+        # Desde staff frontend, solo permitir registro de staff
+        if user_type != 'staff':
+            return handler_pipeline.error_response('staff_portal_registration_only')
+
+        # El código se valida y consume al crear el usuario (ver storage.create_user)
+        if not invitation_code:
+            return handler_pipeline.error_response('invalid_invitation')
 
-        # ✅ Obtener datos del body correctamente
-        password = body.get('password')
-        name = body.get('name')
-        email = body.get('email', '').lower().strip() 
-        phone = body.get('phone')
-        gender = body.get('gender')
-        user_type = body.get('user_type', 'cliente')
-        staff_tier = body.get('staff_tier')
-        invitation_code = body.get('invitation_code')
-        frontend_type = body.get('frontend_type', 'client')
+        # Formato y caches del contenedor: descarta códigos inválidos antes de hashear o escribir
+        if not invitation_codes.precheck(invitation_code):
+            metrics.count('invalid_invitation')
+            return handler_pipeline.error_response('invalid_invitation')
 
-        # Validación 1: Campos obligatorios
-        if not email or not password:
-            return {
-                'statusCode': 400,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({
-                    'error': 'Campos obligatorios faltantes: email y password son requeridos'
-                })
-            }
-        
-        # Validación 2: Restricciones por tipo de frontend
-        if frontend_type == 'staff':
-            # Desde staff frontend, solo permitir registro de staff
-            if user_type != 'staff':
-                return {
-                    'statusCode': 403,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({
-                        'error': 'Acceso denegado. El portal staff es solo para registro de personal'
-                    })
-                }
-            
-            # Validar código de invitación para staff
-            if not validate_invitation_code(invitation_code):
-                return {
-                    'statusCode': 403,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({
-                        'error': 'Código de invitación inválido o expirado. Contacta al administrador.'
-                    })
-                }
-                
-        elif frontend_type == 'client':
-            # Desde cliente frontend, solo permitir clientes
-            if user_type != 'cliente':
-                return {
-                    'statusCode': 403,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({
-                        'error': 'Acceso denegado. El portal cliente es solo para usuarios clientes'
-                    })
-                }
-        else:
-            # Si no se especifica frontend_type, asumimos cliente por defecto
-            frontend_type = 'client'
-            if user_type == 'staff':
-                return {
-                    'statusCode': 403,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({
-                        'error': 'Registro de staff requiere especificar frontend_type: staff'
-                    })
-                }
-        
-        # Validación 3: Tipo de usuario válido
-        if user_type not in ['cliente', 'staff']:
-            return {
-                'statusCode': 400,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({
-                    'error': 'Tipo de usuario inválido. Debe ser "cliente" o "staff"'
-                })
-            }
-        
-        # Validación 4: Staff tier requerido para staff
+    elif frontend_type == 'client':
+        # Desde cliente frontend, solo permitir clientes
+        if user_type != 'cliente':
+            return handler_pipeline.error_response('client_portal_only')
+    else:
+        # Si no se especifica frontend_type, asumimos cliente por defecto
+        frontend_type = 'client'
         if user_type == 'staff':
-            if not staff_tier:
-                return {
-                    'statusCode': 400,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({
-                        'error': 'Usuarios staff requieren el campo staff_tier'
-                    })
-                }
-            try:
-                staff_tier = validate_staff_tier(staff_tier)
-            except ValueError as e:
-                return {
-                    'statusCode': 400,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({'error': str(e)})
-                }
-        else:
-            # Clientes no deben tener staff_tier
-            staff_tier = None
-        
-        dynamodb = boto3.resource('dynamodb')
-        usuarios_table_name = os.environ.get('USUARIOS_TABLE', 'dev-t_usuarios')
-        t_usuarios = dynamodb.Table(usuarios_table_name)
-        
-        # Verificar si el email ya está registrado
-        try:
-            existing_user = t_usuarios.get_item(Key={'email': email})
-            if 'Item' in existing_user:
-                return {
-                    'statusCode': 409,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({
-                        'error': 'El email ya está registrado en el sistema'
-                    })
-                }
-        except Exception as e:
-            print(f"Error checking existing user: {str(e)}")
-        
-        ## REGISTRO
+            return handler_pipeline.error_response('staff_requires_frontend_type')
+
+    # Validaciones 3 y 4: Tipo de usuario válido y staff tier requerido para staff
+    try:
+        staff_tier = validate_user_type_and_tier(user_type, staff_tier)
+    except ValueError as e:
+        return 400, {'error': str(e)}
+
+    store = storage.get_storage()
+
+    ## REGISTRO
+    with metrics.span('hash_password'):
         hashed_password = hash_password(password)
-        current_time = datetime.utcnow().isoformat()
-        
-        # Crear el item completo 
-        user_item = {
-            'user_id': str(uuid.uuid4()),
-            'email': email,
-            'password': hashed_password,  
-            'name': name,
-            'phone': phone,
-            'gender': gender,
-            'user_type': user_type,
-            'created_at': current_time,    
-            'updated_at': current_time,    
-            'is_active': True,             
-            'last_login': None,            
-            'registration_source': frontend_type
-        }
-        
-        # Agregar campos específicos de staff
-        if user_type == 'staff':
-            user_item['staff_tier'] = staff_tier
-            user_item['permissions'] = get_staff_permissions(staff_tier)
-            user_item['is_verified'] = True
-        else:
-            user_item['is_verified'] = True
-           
-        # Guardar usuario en DynamoDB
-        t_usuarios.put_item(Item=user_item)
-        
-        print(f"Usuario registrado exitosamente: {email}, tipo: {user_type}, frontend: {frontend_type}")
+    current_time = datetime.utcnow().isoformat()
 
-        ## RESPONSE
-        response_data = {
-            'message': 'Usuario registrado exitosamente',
-            'user_id': user_item['user_id'],
-            'email': email,
-            'name': name,
-            'user_type': user_type,
-            'is_active': True,
-            'registration_source': frontend_type,
-            'requires_verification': not user_item['is_verified']
-        }
-        
-        # Agregar información específica de staff a la respuesta
-        if user_type == 'staff':
-            response_data['staff_tier'] = staff_tier
-            response_data['permissions'] = user_item['permissions']
-            response_data['is_verified'] = True
-        
-        return {
-            'statusCode': 201,
-            'headers': CORS_HEADERS,
-            'body': json.dumps(response_data)
-        }
+    # Crear el item completo
+    user_item = build_user_item(
+        email, hashed_password, name, phone, gender, user_type, staff_tier,
+        frontend_type, current_time
+    )
+
+    # Guardar usuario (el email duplicado se detecta en la misma escritura;
+    # para staff el código se valida y consume en la misma operación atómica)
+    with metrics.span('create_user'):
+        failure = store.create_user(
+            user_item,
+            invitation_code=invitation_code if user_type == 'staff' else None,
+            now=current_time
+        )
+    if failure:
+        # 'email_exists' o 'invalid_invitation'
+        metrics.count(failure)
+        if failure == 'invalid_invitation':
+            invitation_codes.record_rejection(invitation_code)
+        audit_log.record(audit_log.REGISTRATION_REJECTED, actor=email, email=email, user_type=user_type,
+                         reason=failure, invitation_code=invitation_code)
+        return handler_pipeline.error_response(failure)
+
+    log.info("Usuario registrado exitosamente", email=email, user_type=user_type, frontend_type=frontend_type)
+    audit_log.record(audit_log.REGISTRATION, actor=user_item['user_id'], email=email, user_type=user_type,
+                     staff_tier=staff_tier, frontend_type=frontend_type, invitation_code=invitation_code)
+
+    ## RESPONSE
+    response_data = {
+        'message': 'Usuario registrado exitosamente',
+        'user_id': user_item['user_id'],
+        'email': email,
+        'name': name,
+        'user_type': user_type,
+        'is_active': True,
+        'registration_source': frontend_type,
+        'requires_verification': not user_item['is_verified']
+    }
+
+    # Agregar información específica de staff a la respuesta
+    if user_type == 'staff':
+        response_data['staff_tier'] = staff_tier
+        response_data['permissions'] = user_item['permissions']
+        response_data['is_verified'] = True
 
-    except Exception as e:
-        print("Exception:", str(e))
-        error_response = {
-            'error': 'Error interno del servidor',
-            'code': 'INTERNAL_ERROR'
-        }
-        
-        return {
-            'statusCode': 500,
-            'headers': CORS_HEADERS,
-            'body': json.dumps(error_response)
-        }
\ No newline at end of file
+    return 201, response_data
@@ -1,109 +1,270 @@
-import boto3
+import contextvars
 import json
-import uuid
 import os
+import secrets
+import time
 from datetime import datetime, timedelta
 
-# Headers CORS para todas las respuestas
-CORS_HEADERS = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'POST, OPTIONS, GET',
-    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, Accept',
-    'Content-Type': 'application/json'
-}
+import audit_log
+import auth_helpers
+import handler_pipeline
+import invitation_codes
+import metrics
+import storage
+import structured_logging
+
+log = structured_logging.get_logger('generate-invitation')
+
+# Alfabeto y largo de los códigos (ver invitation_codes.CODE_PATTERN)
+CODE_ALPHABET = invitation_codes.CODE_ALPHABET
+CODE_LENGTH = invitation_codes.CODE_LENGTH
+
+# Máximo de códigos por request y de reintentos ante colisiones
+MAX_CODES_PER_REQUEST = int(os.environ.get('MAX_INVITATION_CODES_PER_REQUEST', '500'))
+MAX_COLLISION_RETRIES = 5
+# Puts condicionales en paralelo al generar varios códigos
+INVITATION_WRITE_CONCURRENCY = int(os.environ.get('INVITATION_WRITE_CONCURRENCY', '16'))
+
+# Permiso requerido para generar códigos (staff admin) cuando INVITATION_REQUIRE_AUTH=true.
+# Por defecto false: el endpoint acepta llamadas sin token (los scripts de onboarding
+# existentes) y created_by viene del body; ver la migración en el README
+INVITATION_PERMISSION = 'generate_invitation_codes'
+INVITATION_REQUIRE_AUTH = os.environ.get('INVITATION_REQUIRE_AUTH', 'false').lower() == 'true'
+
+# Contador de usos repartido en N items (códigos compartidos por muchos registros
+# concurrentes; ver storage.shard_invitation_item). 1 = un solo contador
+DEFAULT_COUNTER_SHARDS = int(os.environ.get('INVITATION_COUNTER_SHARDS', '1'))
+MAX_COUNTER_SHARDS = int(os.environ.get('INVITATION_MAX_COUNTER_SHARDS', '32'))
+# Vigencia máxima de un código
+MAX_EXPIRES_IN_DAYS = int(os.environ.get('INVITATION_MAX_EXPIRES_IN_DAYS', '365'))
+
+handler_pipeline.register_error(
+    'invalid_count', 400, f'count debe ser un entero entre 1 y {MAX_CODES_PER_REQUEST}'
+)
+handler_pipeline.register_error(
+    'invalid_counter_shards', 400, f'counter_shards debe ser un entero entre 1 y {MAX_COUNTER_SHARDS}'
+)
+handler_pipeline.register_error('invalid_max_uses', 400, 'max_uses debe ser un entero mayor o igual a 1')
+handler_pipeline.register_error(
+    'invalid_expires_in_days', 400, f'expires_in_days debe ser un entero entre 1 y {MAX_EXPIRES_IN_DAYS}'
+)
+
+_executor = None
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=INVITATION_WRITE_CONCURRENCY, thread_name_prefix='invitation-put')
+    return _executor
 
 def generate_invitation_code():
     """Generar un código de invitación único"""
     # Generar un código alfanumérico de 8 caracteres
-    return str(uuid.uuid4())[:8].upper()
+    return ''.join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+
+def build_invitation_item(code, max_uses, created_by, current_time, expires_at):
+    return {
+        'code': code,
+        'is_active': True,
+        'expires_at': expires_at.isoformat(),
+        'max_uses': max_uses,
+        'used_count': 0,
+        'created_by': created_by,
+        'created_at': current_time.isoformat(),
+        # Calcular TTL para DynamoDB (48 horas después de la expiración para limpieza)
+        'ttl': int((expires_at + timedelta(days=2)).timestamp())
+    }
 
-def lambda_handler(event, context):
+def is_int_between(value, low, high=None):
+    if not isinstance(value, int) or isinstance(value, bool):
+        return False
+    return low <= value and (high is None or value <= high)
+
+# Guardar un solo código: put condicional, se regenera si el código ya existe.
+# Los shards del contador se escriben después del código (nunca sobre los de otro)
+def put_single_code(item_for_code, counter_shards=1):
+    store = storage.get_storage()
+    for _ in range(MAX_COLLISION_RETRIES):
+        code = generate_invitation_code()
+        items = storage.shard_invitation_item(item_for_code(code), counter_shards)
+        started = time.perf_counter()
+        if not store.put(storage.INVITATION_CODES, items[0], if_not_exists=True):
+            log.warning("Colisión de código de invitación, regenerando", code=code)
+            metrics.count('invitation_collisions')
+            continue
+        batches = [{'size': 1, 'elapsed_ms': round((time.perf_counter() - started) * 1000, 2), 'retries': 0}]
+        if len(items) > 1:
+            batches += store.batch_write(storage.INVITATION_CODES, items[1:])
+        return [code], batches
+    raise RuntimeError('No se pudo generar un código de invitación único')
+
+# Guardar N códigos: un put condicional por código, en paralelo
+def put_code_batch(item_for_code, count, counter_shards=1):
     """
-    Genera un nuevo código de invitación para registro de staff
+    Como put_single_code, cada código se guarda con un put condicional: uno
+    que otro request creó mientras tanto se regenera en lugar de
+    sobrescribirse (batch_write no admite condiciones). Los puts van en
+    paralelo (INVITATION_WRITE_CONCURRENCY) y los shards del contador se
+    escriben después en lote, sólo para los códigos propios.
+
+    Si tras MAX_COLLISION_RETRIES rondas faltan códigos retorna los que se
+    guardaron (el request responde 201 parcial): los ya escritos son
+    válidos y el cliente los recibe, no quedan huérfanos en la tabla.
     """
-    try:
-        print("Generate invitation code event:", json.dumps(event, indent=2))
-        
-        # Parsear el body
-        if 'body' in event:
-            if isinstance(event['body'], str):
-                body = json.loads(event['body'])
+    store = storage.get_storage()
+    codes = []
+    shard_items = []
+    collisions = 0
+    started = time.perf_counter()
+
+    def put_code(items):
+        return store.put(storage.INVITATION_CODES, items[0], if_not_exists=True)
+
+    for _ in range(MAX_COLLISION_RETRIES):
+        candidates = set()
+        while len(codes) + len(candidates) < count:
+            code = generate_invitation_code()
+            if code not in codes:
+                candidates.add(code)
+        candidates = sorted(candidates)
+        item_sets = [storage.shard_invitation_item(item_for_code(code), counter_shards) for code in candidates]
+        # El contextvar de métricas pasa a cada hilo (capacidad consumida)
+        futures = [_get_executor().submit(contextvars.copy_context().run, put_code, items) for items in item_sets]
+        taken = 0
+        for code, items, future in zip(candidates, item_sets, futures):
+            if future.result():
+                codes.append(code)
+                shard_items.extend(items[1:])
             else:
-                body = event['body']
+                taken += 1
+        if taken:
+            log.warning("Colisiones de códigos de invitación, regenerando", count=taken)
+            metrics.count('invitation_collisions', taken)
+            collisions += taken
+        if len(codes) == count:
+            break
+    else:
+        if not codes:
+            raise RuntimeError('No se pudieron generar códigos de invitación únicos')
+        log.error("Códigos de invitación incompletos tras los reintentos", requested=count, generated=len(codes))
+        metrics.count('invitation_codes_missing', count - len(codes))
+
+    batches = [{'size': len(codes), 'elapsed_ms': round((time.perf_counter() - started) * 1000, 2), 'retries': collisions}]
+    if shard_items:
+        batches += store.batch_write(storage.INVITATION_CODES, shard_items)
+    return sorted(codes), batches
+
+def generate_codes(body, created_by):
+    """
+    Genera y guarda los códigos pedidos en body. Retorna (status, payload) o
+    una respuesta de error
+    """
+    # Parámetros configurables desde el request
+    max_uses = body.get('max_uses', 10)  # Número máximo de usos
+    expires_in_days = body.get('expires_in_days', 30)  # Días hasta expiración
+    count = body.get('count', 1)  # Cantidad de códigos a generar
+    counter_shards = body.get('counter_shards', DEFAULT_COUNTER_SHARDS)  # Contador repartido (cohortes grandes)
+
+    if not is_int_between(count, 1, MAX_CODES_PER_REQUEST):
+        return handler_pipeline.error_response('invalid_count')
+    if not is_int_between(max_uses, 1):
+        return handler_pipeline.error_response('invalid_max_uses')
+    if not is_int_between(expires_in_days, 1, MAX_EXPIRES_IN_DAYS):
+        return handler_pipeline.error_response('invalid_expires_in_days')
+    if not is_int_between(counter_shards, 1, MAX_COUNTER_SHARDS):
+        return handler_pipeline.error_response('invalid_counter_shards')
+
+    # Configurar fechas
+    current_time = datetime.utcnow()
+    expires_at = current_time + timedelta(days=expires_in_days)
+
+    def item_for_code(code):
+        return build_invitation_item(code, max_uses, created_by, current_time, expires_at)
+
+    # Generar y guardar los códigos
+    started = time.perf_counter()
+    with metrics.span('write_codes'):
+        if count == 1:
+            codes, batches = put_single_code(item_for_code, counter_shards)
         else:
-            body = {}
-        
-        # Parámetros configurables desde el request
-        max_uses = body.get('max_uses', 10)  # Número máximo de usos
-        expires_in_days = body.get('expires_in_days', 30)  # Días hasta expiración
-        created_by = body.get('created_by', 'system')  # Quién crea el código
-        
-        # Generar código único
-        code = generate_invitation_code()
-        
-        # Configurar fechas
-        current_time = datetime.utcnow()
-        expires_at = current_time + timedelta(days=expires_in_days)
-        
-        # Calcular TTL para DynamoDB (48 horas después de la expiración para limpieza)
-        ttl_timestamp = int((expires_at + timedelta(days=2)).timestamp())
-        
-        # Conectar a DynamoDB
-        dynamodb = boto3.resource('dynamodb')
-        invitation_table_name = os.environ.get('INVITATION_CODES_TABLE', 'dev-t_invitation_codes')
-        table = dynamodb.Table(invitation_table_name)
-        
-        # Crear item del código de invitación
-        invitation_item = {
-            'code': code,
-            'is_active': True,
-            'expires_at': expires_at.isoformat(),
+            codes, batches = put_code_batch(item_for_code, count, counter_shards)
+    metrics.count('codes_generated', len(codes))
+    # Un código recién creado no puede quedar en la cache negativa del registro
+    invitation_codes.forget(codes)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    log.info("Códigos de invitación generados", count=len(codes), elapsed_ms=elapsed_ms)
+    audit_log.record(audit_log.INVITATION_CREATED, actor=created_by, codes=codes, max_uses=max_uses,
+                     expires_at=expires_at.isoformat(), counter_shards=counter_shards)
+
+    if len(codes) < count:
+        message = f'{len(codes)} de {count} códigos de invitación generados (colisiones); reintente los faltantes'
+    elif count == 1:
+        message = 'Código de invitación generado exitosamente'
+    else:
+        message = f'{count} códigos de invitación generados exitosamente'
+    return 201, {
+        'message': message,
+        'invitation_code': codes[0],
+        'invitation_codes': codes,
+        'timing': {
+            'total_ms': elapsed_ms,
+            'batches': batches
+        },
+        'details': {
+            'requested_count': count,
             'max_uses': max_uses,
-            'used_count': 0,
+            'counter_shards': min(counter_shards, max_uses) if counter_shards > 1 else 1,
+            'expires_at': expires_at.isoformat(),
+            'expires_in_days': expires_in_days,
             'created_by': created_by,
-            'created_at': current_time.isoformat(),
-            'ttl': ttl_timestamp  # Para auto-eliminación en DynamoDB
-        }
-        
-        # Guardar en DynamoDB
-        table.put_item(Item=invitation_item)
-        
-        print(f"Código de invitación generado: {code}")
-        
-        # Preparar respuesta
-        response_data = {
-            'message': 'Código de invitación generado exitosamente',
-            'invitation_code': code,
-            'details': {
-                'max_uses': max_uses,
-                'expires_at': expires_at.isoformat(),
-                'expires_in_days': expires_in_days,
-                'created_by': created_by,
-                'created_at': current_time.isoformat()
-            },
-            'usage_instructions': {
-                'para_staff': 'Use este código para registrar nuevo personal staff',
-                'endpoint': '/auth/registro',
-                'campo': 'invitation_code'
-            }
-        }
-        
-        return {
-            'statusCode': 201,
-            'headers': CORS_HEADERS,
-            'body': json.dumps(response_data)
+            'created_at': current_time.isoformat()
+        },
+        'usage_instructions': {
+            'para_staff': 'Use este código para registrar nuevo personal staff',
+            'endpoint': '/auth/registro',
+            'campo': 'invitation_code'
         }
+    }
+
+@handler_pipeline.handler('generate-invitation', warmup_steps=('storage', 'jwt', 'revocation'))
+def lambda_handler(body, event, context):
+    """
+    Genera un nuevo código de invitación para registro de staff. Con
+    INVITATION_REQUIRE_AUTH requiere staff con el permiso generate_invitation_codes
+    """
+    if not INVITATION_REQUIRE_AUTH:
+        return generate_codes(body, body.get('created_by', 'system'))  # Quién crea el código
+
+    payload, error = auth_helpers.require_staff_auth(event, INVITATION_PERMISSION)
+    if error:
+        return dict(error, headers=handler_pipeline.CORS_HEADERS)
+    # El creador es el usuario del token, no un campo del body
+    return generate_codes(body, payload.get('user_id'))
+
+# Uso por línea de comandos:
+#   python GenerarInvitationCode.py --count 50 --max-uses 5 --expires-in-days 7 --created-by onboarding
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Genera códigos de invitación para staff')
+    parser.add_argument('--count', type=int, default=1)
+    parser.add_argument('--max-uses', type=int, default=10)
+    parser.add_argument('--expires-in-days', type=int, default=30)
+    parser.add_argument('--created-by', default='cli')
+    parser.add_argument('--counter-shards', type=int, default=DEFAULT_COUNTER_SHARDS)
+    args = parser.parse_args()
 
-    except Exception as e:
-        print("Exception generating invitation code:", str(e))
-        import traceback
-        print("Traceback:", traceback.format_exc())
-        
-        return {
-            'statusCode': 500,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({
-                'error': 'Error interno del servidor al generar código de invitación',
-                'details': str(e)
-            })
-        }
\ No newline at end of file
+    # Sin JWT: el CLI escribe en la tabla con las credenciales de AWS del operador
+    result = generate_codes({
+        'count': args.count,
+        'max_uses': args.max_uses,
+        'expires_in_days': args.expires_in_days,
+        'counter_shards': args.counter_shards
+    }, args.created_by)
+    if not isinstance(result, dict):
+        result = handler_pipeline.response(*result)
+    audit_log.flush()
+    print(json.dumps(json.loads(result['body']), indent=2, ensure_ascii=False))
+    raise SystemExit(0 if result['statusCode'] == 201 else 1)
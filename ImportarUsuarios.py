@@ -0,0 +1,252 @@
+"""
+Importación masiva de usuarios a t_usuarios.
+
+Lee CSV o JSONL en streaming y procesa los registros por bloques:
+  1. valida con las mismas reglas de CrearUsuario (email/password requeridos,
+     tipo de usuario y staff_tier, permisos de get_staff_permissions)
+  2. descarta emails repetidos en la entrada y los que ya existen en la tabla
+  3. hashea las contraseñas en un pool de procesos
+  4. escribe cada usuario con un put condicional (attribute_not_exists(email)),
+     varios en paralelo: quien se registró por /auth/registro después del
+     paso 2 no se sobrescribe (cuenta como existente)
+  5. guarda un checkpoint con la cantidad de registros procesados
+
+Si se interrumpe, al volver a ejecutar con el mismo --checkpoint continúa
+desde el último bloque completo.
+
+Cada registro acepta los campos del body de /auth/registro (email, password,
+name, phone, gender, user_type, staff_tier). En lugar de `password` puede
+traer `password_hash` con un hash existente, que se guarda tal cual: SHA-256
+del sistema anterior (64 caracteres hex, se migra en el siguiente login) o
+un hash scrypt de password_hasher. Otro formato se rechaza, ya que el
+usuario no podría iniciar sesión.
+
+Uso:
+    python ImportarUsuarios.py usuarios.csv --checkpoint usuarios.ckpt
+    python ImportarUsuarios.py usuarios.jsonl --hash-workers 4 --write-threads 8
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import CrearUsuario
+import storage
+import structured_logging
+from password_hasher import LegacySha256Hasher, hash_password, is_supported_hash
+
+log = structured_logging.get_logger('import')
+
+
+def read_records(path, input_format=None):
+    """
+    Genera (número de registro, dict) sin cargar el archivo completo
+    """
+    input_format = input_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8') as f:
+        if input_format == 'csv':
+            for number, row in enumerate(csv.DictReader(f)):
+                yield number, {k: v for k, v in row.items() if v not in (None, '')}
+        else:
+            number = 0
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield number, record if isinstance(record, dict) else {}
+                number += 1
+
+
+def validate_record(record):
+    """
+    Retorna los campos normalizados del usuario o lanza ValueError
+    """
+    email = str(record.get('email', '')).lower().strip()
+    password = record.get('password')
+    password_hash = record.get('password_hash')
+    if not email or not (password or password_hash):
+        raise ValueError('Campos obligatorios faltantes: email y password son requeridos')
+    if password is not None and not isinstance(password, str):
+        raise ValueError('password debe ser un string')
+    if password_hash:
+        if isinstance(password_hash, str):
+            password_hash = password_hash.strip()
+            # SHA-256 en mayúsculas de otros sistemas: hexdigest() es en minúsculas
+            if LegacySha256Hasher.matches_format(password_hash):
+                password_hash = password_hash.lower()
+        if not is_supported_hash(password_hash):
+            raise ValueError('password_hash inválido: debe ser SHA-256 (64 caracteres hex) o scrypt')
+    user_type = record.get('user_type', 'cliente')
+    staff_tier = CrearUsuario.validate_user_type_and_tier(user_type, record.get('staff_tier'))
+    return {
+        'email': email,
+        'password': password,
+        'password_hash': password_hash,
+        'name': record.get('name'),
+        'phone': record.get('phone'),
+        'gender': record.get('gender'),
+        'user_type': user_type,
+        'staff_tier': staff_tier
+    }
+
+
+def load_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'records_done': 0, 'imported': 0, 'duplicates': 0, 'existing': 0, 'invalid': 0}
+
+
+def save_checkpoint(path, state):
+    if not path:
+        return
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+class UserImporter:
+    def __init__(self, hash_workers=None, write_threads=8, chunk_size=500,
+                 registration_source='import', rejects_path=None):
+        self.chunk_size = chunk_size
+        self.registration_source = registration_source
+        self.store = storage.get_storage()
+        self.hash_pool = ProcessPoolExecutor(max_workers=hash_workers)
+        self.write_pool = ThreadPoolExecutor(max_workers=write_threads)
+        self.write_threads = write_threads
+        self.rejects = open(rejects_path, 'a', encoding='utf-8') if rejects_path else None
+        self.seen_emails = set()
+
+    def close(self):
+        self.hash_pool.shutdown()
+        self.write_pool.shutdown()
+        if self.rejects:
+            self.rejects.close()
+
+    def _reject(self, number, record, reason):
+        if self.rejects:
+            self.rejects.write(json.dumps({'record': number, 'email': record.get('email'), 'error': reason}) + '\n')
+
+    def process_chunk(self, chunk, state):
+        valid = []
+        for number, record in chunk:
+            try:
+                user = validate_record(record)
+            except ValueError as e:
+                state['invalid'] += 1
+                self._reject(number, record, str(e))
+                continue
+            if user['email'] in self.seen_emails:
+                state['duplicates'] += 1
+                self._reject(number, record, 'Email duplicado en la entrada')
+                continue
+            self.seen_emails.add(user['email'])
+            valid.append(user)
+
+        # Emails ya registrados (incluye los escritos antes de un reinicio)
+        existing = {
+            item['email'] for item in self.store.batch_get(
+                storage.USERS, [{'email': user['email']} for user in valid], projection='email'
+            )
+        } if valid else set()
+        if existing:
+            state['existing'] += len(existing)
+            valid = [user for user in valid if user['email'] not in existing]
+
+        # Hash en paralelo (sólo los registros con contraseña en texto plano)
+        to_hash = [user for user in valid if not user['password_hash']]
+        hashes = self.hash_pool.map(hash_password, [user['password'] for user in to_hash], chunksize=16)
+        for user, hashed in zip(to_hash, hashes):
+            user['password_hash'] = hashed
+
+        current_time = datetime.utcnow().isoformat()
+        items = [
+            CrearUsuario.build_user_item(
+                user['email'], user['password_hash'], user['name'], user['phone'], user['gender'],
+                user['user_type'], user['staff_tier'], self.registration_source, current_time
+            )
+            for user in valid
+        ]
+
+        # Put condicional por usuario, en paralelo (batch_write no admite condiciones): un
+        # registro por /auth/registro desde el batch_get no se sobrescribe
+        created = list(self.write_pool.map(
+            lambda item: self.store.put(storage.USERS, item, if_not_exists=True), items
+        ))
+        state['imported'] += created.count(True)
+        state['existing'] += created.count(False)
+        state['records_done'] += len(chunk)
+
+    def run(self, records, checkpoint_path=None, progress=None):
+        state = load_checkpoint(checkpoint_path)
+        skip = state['records_done']
+        started = time.perf_counter()
+        imported_before = state['imported']
+
+        chunk = []
+        for number, record in records:
+            if number < skip:
+                continue
+            chunk.append((number, record))
+            if len(chunk) >= self.chunk_size:
+                self.process_chunk(chunk, state)
+                save_checkpoint(checkpoint_path, state)
+                chunk = []
+                if progress:
+                    progress(state, time.perf_counter() - started)
+        if chunk:
+            self.process_chunk(chunk, state)
+            save_checkpoint(checkpoint_path, state)
+
+        elapsed = time.perf_counter() - started
+        imported = state['imported'] - imported_before
+        report = dict(state)
+        report.update({
+            'elapsed_seconds': round(elapsed, 3),
+            'imported_this_run': imported,
+            'users_per_second': round(imported / elapsed, 1) if elapsed > 0 else None
+        })
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Importación masiva de usuarios a t_usuarios')
+    parser.add_argument('input', help='Archivo CSV o JSONL')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default=None)
+    parser.add_argument('--checkpoint', default=None, help='Archivo de checkpoint para reanudar')
+    parser.add_argument('--rejects', default=None, help='JSONL con los registros rechazados')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--hash-workers', type=int, default=None)
+    parser.add_argument('--write-threads', type=int, default=8)
+    parser.add_argument('--source', default='import', help='Valor de registration_source')
+    args = parser.parse_args(argv)
+
+    importer = UserImporter(
+        hash_workers=args.hash_workers, write_threads=args.write_threads,
+        chunk_size=args.chunk_size, registration_source=args.source, rejects_path=args.rejects
+    )
+
+    def progress(state, elapsed):
+        rate = state['imported'] / elapsed if elapsed else 0
+        print(f"  {state['records_done']} registros procesados, {state['imported']} importados ({rate:.0f} usuarios/s)",
+              file=sys.stderr)
+
+    try:
+        report = importer.run(read_records(args.input, args.format), args.checkpoint, progress)
+    finally:
+        importer.close()
+        structured_logging.flush()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import auth_helpers
+import handler_pipeline
+import metrics
+import structured_logging
+
+log = structured_logging.get_logger('introspect')
+
+# Máximo de tokens por request
+INTROSPECT_MAX_TOKENS = int(os.environ.get('INTROSPECT_MAX_TOKENS', '1000'))
+# Hilos para verificar los tokens que no están en cache: la firma es CPU (GIL), lo que
+# se solapa es la consulta de revocación a DynamoDB
+INTROSPECT_CONCURRENCY = int(os.environ.get('INTROSPECT_CONCURRENCY', '4'))
+# Con menos tokens sin cache se verifican en el hilo del request
+INTROSPECT_PARALLEL_MIN = int(os.environ.get('INTROSPECT_PARALLEL_MIN', '32'))
+# Cache de tokens inválidos: sólo los rechazos definitivos (firma, expiración o
+# revocación no cambian), no un kid desconocido ni un error al obtener el JWKS. Vida y tamaño
+INTROSPECT_NEGATIVE_TTL_SECONDS = float(os.environ.get('INTROSPECT_NEGATIVE_TTL_SECONDS', '300'))
+INTROSPECT_NEGATIVE_CACHE_SIZE = int(os.environ.get('INTROSPECT_NEGATIVE_CACHE_SIZE', '10000'))
+
+_INACTIVE = {'active': False}
+
+_invalid_tokens = OrderedDict()
+_invalid_lock = threading.Lock()
+_executor = None
+
+handler_pipeline.register_error(
+    'invalid_tokens', 400, f'tokens debe ser una lista de 1 a {INTROSPECT_MAX_TOKENS} strings no vacíos'
+)
+handler_pipeline.register_error('invalid_permission', 400, 'required_permission debe ser un string')
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=INTROSPECT_CONCURRENCY, thread_name_prefix='introspect')
+    return _executor
+
+
+def _known_invalid(digest, now):
+    with _invalid_lock:
+        expires_at = _invalid_tokens.get(digest)
+        if expires_at is None:
+            return False
+        if expires_at <= now:
+            del _invalid_tokens[digest]
+            return False
+        _invalid_tokens.move_to_end(digest)
+        return True
+
+
+def _remember_invalid(digest, now):
+    if INTROSPECT_NEGATIVE_TTL_SECONDS <= 0:
+        return
+    with _invalid_lock:
+        _invalid_tokens[digest] = now + INTROSPECT_NEGATIVE_TTL_SECONDS
+        _invalid_tokens.move_to_end(digest)
+        while len(_invalid_tokens) > INTROSPECT_NEGATIVE_CACHE_SIZE:
+            _invalid_tokens.popitem(last=False)
+
+
+def introspect_token(token, required_permission=None, now=None):
+    """
+    Resultado de un token: {'active': False} o los claims con exp, expires_in,
+    is_staff y authorized (misma regla que require_staff_auth)
+    """
+    now = time.time() if now is None else now
+    digest = auth_helpers._token_digest(token)
+    if _known_invalid(digest, now):
+        metrics.count('introspect_negative_hit')
+        return _INACTIVE
+
+    # verify_jwt_token cachea los payloads válidos hasta su 'exp'
+    payload, reason = auth_helpers.verify_jwt_token_with_reason(token)
+    if payload is None:
+        if reason in auth_helpers.DEFINITIVE_FAILURES:
+            _remember_invalid(digest, now)
+        return _INACTIVE
+
+    denial = auth_helpers.staff_denial(payload, required_permission)
+    result = {
+        'active': True,
+        'claims': payload,
+        'is_staff': denial != 'not_staff',
+        'authorized': denial is None
+    }
+    if 'exp' in payload:
+        result['exp'] = int(payload['exp'])
+        result['expires_in'] = max(0, int(payload['exp'] - now))
+    return result
+
+
+def introspect(tokens, required_permission=None):
+    """
+    Resultados en el mismo orden que tokens (los repetidos se verifican una vez).
+    Los tokens en cache se resuelven en este hilo y el resto en paralelo
+    """
+    unique = list(dict.fromkeys(tokens))
+    now = time.time()
+    cached, pending = [], []
+    for token in unique:
+        known = auth_helpers.is_token_cached(token) or _known_invalid(auth_helpers._token_digest(token), now)
+        (cached if known else pending).append(token)
+    by_token = {token: introspect_token(token, required_permission) for token in cached}
+
+    if len(pending) < INTROSPECT_PARALLEL_MIN or INTROSPECT_CONCURRENCY <= 1:
+        by_token.update((token, introspect_token(token, required_permission)) for token in pending)
+    else:
+        # El contextvar de métricas no pasa a los hilos: los contadores por token
+        # de esta parte no se registran
+        chunk = -(-len(pending) // INTROSPECT_CONCURRENCY)
+        parts = _get_executor().map(
+            lambda start: [introspect_token(token, required_permission) for token in pending[start:start + chunk]],
+            range(0, len(pending), chunk)
+        )
+        by_token.update(zip(pending, (result for part in parts for result in part)))
+    return [by_token[token] for token in tokens]
+
+
+def parse_tokens(body):
+    tokens = body.get('tokens')
+    if (not isinstance(tokens, list) or not 1 <= len(tokens) <= INTROSPECT_MAX_TOKENS
+            or not all(isinstance(token, str) and token for token in tokens)):
+        return None
+    return tokens
+
+
+# Función principal del Lambda de introspección: un llamado por lote de requests del gateway
+@handler_pipeline.handler('introspect', warmup_steps=('jwt', 'revocation'))
+def lambda_handler(body, event, context):
+    caller, error = auth_helpers.require_staff_auth(event)
+    if error:
+        return dict(error, headers=handler_pipeline.CORS_HEADERS)
+
+    tokens = parse_tokens(body)
+    if tokens is None:
+        return handler_pipeline.error_response('invalid_tokens')
+    required_permission = body.get('required_permission')
+    if required_permission is not None and not isinstance(required_permission, str):
+        return handler_pipeline.error_response('invalid_permission')
+
+    with metrics.span('introspect'):
+        results = introspect(tokens, required_permission)
+    active = sum(1 for result in results if result['active'])
+    metrics.count('introspected_tokens', len(results))
+    log.info("Tokens verificados", count=len(results), active=active, caller=caller.get('user_id'))
+
+    return 200, {
+        'results': results,
+        'active': active
+    }
+
+
+def reset():
+    """
+    Vacía la cache de tokens inválidos (pruebas y benchmarks)
+    """
+    with _invalid_lock:
+        _invalid_tokens.clear()
@@ -0,0 +1,66 @@
+import auth_helpers
+import handler_pipeline
+import structured_logging
+import user_listing
+
+log = structured_logging.get_logger('users-list')
+
+# Permiso requerido: el dashboard de administración (staff admin)
+USER_LIST_PERMISSION = 'manage_all_profiles'
+
+handler_pipeline.register_error(
+    'invalid_listing_filter', 400,
+    'Filtros inválidos. Usa user_type (cliente o staff) con email_prefix o name_prefix opcional, '
+    'staff_tier, o status=inactive'
+)
+handler_pipeline.register_error(
+    'invalid_limit', 400, f'limit debe ser un entero de 1 a {user_listing.USER_LIST_MAX_LIMIT}'
+)
+handler_pipeline.register_error(
+    'invalid_fields', 400, f'fields admite: {", ".join(user_listing.LISTING_FIELDS)}'
+)
+handler_pipeline.register_error('invalid_cursor', 400, 'Cursor inválido para este listado')
+
+
+def parse_limit(value):
+    if value is None or value == '':
+        return user_listing.USER_LIST_DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return None
+    return limit if 1 <= limit <= user_listing.USER_LIST_MAX_LIMIT else None
+
+
+# Función principal del Lambda del listado de usuarios (dashboard de administración)
+@handler_pipeline.handler('users-list', warmup_steps=('storage', 'jwt', 'revocation'))
+def lambda_handler(body, event, context):
+    payload, error = auth_helpers.require_staff_auth(event, USER_LIST_PERMISSION)
+    if error:
+        return dict(error, headers=handler_pipeline.CORS_HEADERS)
+
+    params = event.get('queryStringParameters') or {}
+    query = user_listing.resolve_query(
+        user_type=params.get('user_type') or None,
+        staff_tier=params.get('staff_tier') or None,
+        status=params.get('status') or None,
+        email_prefix=params.get('email_prefix') or None,
+        name_prefix=params.get('name_prefix') or None
+    )
+    if query is None:
+        return handler_pipeline.error_response('invalid_listing_filter')
+    limit = parse_limit(params.get('limit'))
+    if limit is None:
+        return handler_pipeline.error_response('invalid_limit')
+    fields = user_listing.parse_fields(params.get('fields'))
+    if fields is None:
+        return handler_pipeline.error_response('invalid_fields')
+    start_key = None
+    if params.get('cursor'):
+        start_key = user_listing.decode_cursor(params['cursor'], query)
+        if start_key is None:
+            return handler_pipeline.error_response('invalid_cursor')
+
+    log.info("Listado de usuarios", index=query.index, limit=limit, paged=start_key is not None,
+             caller=payload.get('user_id'))
+    return handler_pipeline.stream_response(200, user_listing.iter_page_json(query, limit, start_key, fields))
@@ -1,47 +1,74 @@
-import boto3
-import hashlib
-import json
-import jwt
+import math
 import os
+import uuid
 from datetime import datetime, timedelta
 
-# Hashear contraseña
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+import audit_log
+import handler_pipeline
+import jwt_keys
+import metrics
+import permission_codec
+import rate_limiter
+import storage
+import structured_logging
+from password_hasher import hash_password, verify_dummy, verify_password
+
+log = structured_logging.get_logger('login')
+
+# Escritura de last_login (configurable por stage):
+#   LAST_LOGIN_WRITE_MODE: 'sync' (antes de responder) o 'deferred' (en segundo plano;
+#     puede perderse, ver _get_login_writer). El re-hash de la contraseña nunca se difiere
+#   LAST_LOGIN_MIN_INTERVAL_SECONDS: no se escribe si el last_login guardado es más reciente
+LAST_LOGIN_WRITE_MODE = os.environ.get('LAST_LOGIN_WRITE_MODE', 'sync')
+LAST_LOGIN_MIN_INTERVAL_SECONDS = int(os.environ.get('LAST_LOGIN_MIN_INTERVAL_SECONDS', '0'))
+
+# Formato de permisos en el JWT: 'compact' (claim 'pm', ver permission_codec),
+# 'legacy' (lista 'permissions') o 'both' (ambos). Por defecto 'both' hasta que
+# todos los consumidores lean 'pm' (ver README, "Permisos en el JWT")
+JWT_PERMISSIONS_FORMAT = os.environ.get('JWT_PERMISSIONS_FORMAT', 'both')
+
+_login_writer = None
 
 # Generar token JWT
 def generate_jwt_token(user_data):
     try:
-        JWT_SECRET = os.environ.get('JWT_SECRET', 'utec')
-        
         # Payload del token
         payload = {
             'user_id': user_data.get('user_id'),
             'email': user_data.get('email'),
             'user_type': user_data.get('user_type'),
             'staff_tier': user_data.get('staff_tier'),
-            'permissions': user_data.get('permissions', []),
             'exp': datetime.utcnow() + timedelta(hours=24),
             'iat': datetime.utcnow(),
+            'jti': uuid.uuid4().hex,  # Identificador para revocación en logout
             'frontend_type': user_data.get('frontend_type', 'client')
         }
         
-        # Generar token JWT
-        token = jwt.encode(payload, JWT_SECRET, algorithm='HS256')
+        # Permisos: bitmask compacto si todos están en el catálogo
+        permissions = list(user_data.get('permissions') or [])
+        compact = permission_codec.encode_permissions(permissions) if JWT_PERMISSIONS_FORMAT != 'legacy' else None
+        if compact is not None:
+            payload['pm'] = compact
+        if compact is None or JWT_PERMISSIONS_FORMAT == 'both':
+            payload['permissions'] = permissions
+        
+        # Firmar (HS256 o la clave activa del keyring, según JWT_ALGORITHM)
+        token = jwt_keys.sign(payload)
         
         return token, payload['exp']
         
     except Exception as e:
-        print(f"Error generating JWT: {str(e)}")
+        log.error("Error generating JWT", error=str(e))
         raise e
 
-# Headers CORS para todas las respuestas
-CORS_HEADERS = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'POST, OPTIONS, GET',
-    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, Accept',
-    'Content-Type': 'application/json'
-}
+# Errores del login (serializados una vez al importar)
+handler_pipeline.register_error('invalid_credentials', 401, 'Credenciales inválidas')
+handler_pipeline.register_error('account_disabled', 403, 'Cuenta desactivada. Contacta al administrador.')
+handler_pipeline.register_error('staff_portal_only', 403, 'Acceso denegado. El portal staff es solo para personal autorizado.')
+handler_pipeline.register_error('staff_requires_staff_portal', 403, 'Acceso denegado. El personal debe usar el portal staff.')
+handler_pipeline.register_error(
+    'too_many_attempts', 429, 'Demasiados intentos de inicio de sesión. Intenta nuevamente más tarde.'
+)
 
 # Función para determinar redirección después del login (MODIFICADA)
 def get_redirect_path(user_type, staff_tier, frontend_type):
@@ -53,175 +80,156 @@ def get_redirect_path(user_type, staff_tier, frontend_type):
     else:  # cliente
         return '/dashboard'
 
-# Función principal del Lambda de Login
-def lambda_handler(event, context):
+def _get_login_writer():
+    """
+    Executor de un hilo para escrituras fuera del camino de respuesta.
+    Best effort: si el contenedor se congela con una escritura pendiente, ésta
+    sólo se completa si el contenedor vuelve a recibir una invocación; si
+    Lambda lo recicla, la escritura se pierde. Por eso sólo se difiere
+    last_login (informativo), nunca el re-hash de la contraseña.
+    """
+    global _login_writer
+    if _login_writer is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _login_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='last-login')
+    return _login_writer
+
+# Determinar si hay que escribir last_login en este login
+def should_write_last_login(stored_last_login, now):
+    if LAST_LOGIN_MIN_INTERVAL_SECONDS <= 0 or not stored_last_login:
+        return True
     try:
-        print("Login event received:", json.dumps(event, indent=2))
-        
-        if 'body' in event:
-            if isinstance(event['body'], str):
-                body = json.loads(event['body'])
-            else:
-                body = event['body']
-        else:
-            body = event
-
-        # ✅ Obtener datos del body correctamente
-        email = body.get('email', '').lower().strip()
-        password = body.get('password')
-        frontend_type = body.get('frontend_type', 'client')
-
-        # Validación 1: Campos obligatorios
-        if not email or not password:
-            return {
-                'statusCode': 400,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({
-                    'error': 'Campos obligatorios faltantes: email y password son requeridos'
-                })
-            }
-
-        dynamodb = boto3.resource('dynamodb')
-        usuarios_table_name = os.environ.get('USUARIOS_TABLE', 'dev-t_usuarios')
-        t_usuarios = dynamodb.Table(usuarios_table_name)
-        
-        # Buscar usuario por email
-        try:
-            response = t_usuarios.get_item(Key={'email': email})
-            if 'Item' not in response:
-                return {
-                    'statusCode': 401,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({
-                        'error': 'Credenciales inválidas'
-                    })
-                }
-            
-            user = response['Item']
-            
-        except Exception as e:
-            print(f"Error fetching user: {str(e)}")
-            return {
-                'statusCode': 500,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({
-                    'error': 'Error interno del servidor'
-                })
-            }
-        
-        # Verificar contraseña
-        hashed_input = hash_password(password)
-        if hashed_input != user.get('password'):
-            return {
-                'statusCode': 401,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({
-                    'error': 'Credenciales inválidas'
-                })
-            }
-        
-        # Verificar que el usuario esté activo
-        if not user.get('is_active', True):
-            return {
-                'statusCode': 403,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({
-                    'error': 'Cuenta desactivada. Contacta al administrador.'
-                })
-            }
-        
-        user_type = user.get('user_type', 'cliente')
-        staff_tier = user.get('staff_tier')
-        
-        # Validaciones de frontend
-        if frontend_type == 'staff' and user_type != 'staff':
-            return {
-                'statusCode': 403,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({
-                    'error': 'Acceso denegado. El portal staff es solo para personal autorizado.'
-                })
-            }
-        elif frontend_type == 'client' and user_type == 'staff':
-            return {
-                'statusCode': 403,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({
-                    'error': 'Acceso denegado. El personal debe usar el portal staff.'
-                })
-            }
-
-        # Actualizar último login
-        current_time = datetime.utcnow().isoformat()
-        try:
-            t_usuarios.update_item(
-                Key={'email': email},
-                UpdateExpression='SET last_login = :login_time, updated_at = :update_time',
-                ExpressionAttributeValues={
-                    ':login_time': current_time,
-                    ':update_time': current_time
-                }
-            )
-        except Exception as e:
-            print(f"Error updating last login: {str(e)}")
-        
-        # Generar token JWT
-        user_token_data = {
-            'user_id': user.get('user_id'),
-            'email': user.get('email'),
-            'user_type': user_type,
-            'staff_tier': staff_tier,
-            'permissions': user.get('permissions', []),
-            'frontend_type': frontend_type
-        }
-        
+        elapsed = now - datetime.fromisoformat(stored_last_login)
+    except (TypeError, ValueError):
+        return True
+    return elapsed.total_seconds() >= LAST_LOGIN_MIN_INTERVAL_SECONDS
+
+# Actualizar último login (y migrar hashes antiguos al algoritmo actual)
+def write_last_login(store, email, login_time, rehash_password=None):
+    values = {
+        'last_login': login_time,
+        'updated_at': login_time
+    }
+    if rehash_password:
+        values['password'] = hash_password(rehash_password)
+    try:
+        store.update(storage.USERS, {'email': email}, values)
+    except Exception as e:
+        log.warning("Error updating last login", error=str(e))
+
+def record_login(store, user, email, password, needs_rehash, now):
+    if not needs_rehash and not should_write_last_login(user.get('last_login'), now):
+        return
+    args = (store, email, now.isoformat(), password if needs_rehash else None)
+    # Con re-hash se escribe antes de responder: una migración perdida deja el hash anterior
+    if LAST_LOGIN_WRITE_MODE == 'deferred' and not needs_rehash:
+        _get_login_writer().submit(write_last_login, *args)
+    else:
+        write_last_login(*args)
+
+# Función principal del Lambda de Login
+@handler_pipeline.handler('login', warmup_steps=('storage', 'password_hash', 'jwt'))
+def lambda_handler(body, event, context):
+    email = body.get('email', '').lower().strip()
+    password = body.get('password')
+    frontend_type = body.get('frontend_type', 'client')
+
+    # Validación 1: Campos obligatorios
+    if not email or not password:
+        return handler_pipeline.error_response('missing_credentials')
+
+    # Límite de intentos por email e IP, antes de leer al usuario o hashear
+    retry_after = rate_limiter.check_login(event, email)
+    if retry_after:
+        audit_log.record(audit_log.LOGIN_FAILURE, actor=email, email=email, reason='too_many_attempts')
+        return handler_pipeline.error_response(
+            'too_many_attempts', headers={'Retry-After': str(max(1, math.ceil(retry_after)))}
+        )
+
+    # Buscar usuario por email
+    store = storage.get_storage()
+    with metrics.span('get_user'):
+        user = store.get(storage.USERS, {'email': email})
+    if user is None:
+        # Mismo costo que una contraseña incorrecta: el tiempo no revela si el email existe
+        with metrics.span('verify_password'):
+            verify_dummy(password)
+        metrics.count('invalid_credentials')
+        audit_log.record(audit_log.LOGIN_FAILURE, actor=email, email=email, reason='unknown_email')
+        return handler_pipeline.error_response('invalid_credentials')
+
+    # Verificar contraseña (comparación en tiempo constante)
+    with metrics.span('verify_password'):
+        password_ok, needs_rehash = verify_password(password, user.get('password'))
+    if not password_ok:
+        metrics.count('invalid_credentials')
+        audit_log.record(audit_log.LOGIN_FAILURE, actor=user.get('user_id'), email=email, reason='invalid_password')
+        return handler_pipeline.error_response('invalid_credentials')
+
+    # Verificar que el usuario esté activo
+    if not user.get('is_active', True):
+        audit_log.record(audit_log.LOGIN_FAILURE, actor=user.get('user_id'), email=email, reason='account_disabled')
+        return handler_pipeline.error_response('account_disabled')
+
+    user_type = user.get('user_type', 'cliente')
+    staff_tier = user.get('staff_tier')
+
+    # Validaciones de frontend
+    portal_error = None
+    if frontend_type == 'staff' and user_type != 'staff':
+        portal_error = 'staff_portal_only'
+    elif frontend_type == 'client' and user_type == 'staff':
+        portal_error = 'staff_requires_staff_portal'
+    if portal_error:
+        audit_log.record(audit_log.LOGIN_FAILURE, actor=user.get('user_id'), email=email, reason=portal_error)
+        return handler_pipeline.error_response(portal_error)
+
+    # Actualizar último login (según LAST_LOGIN_WRITE_MODE / LAST_LOGIN_MIN_INTERVAL_SECONDS)
+    now = datetime.utcnow()
+    current_time = now.isoformat()
+    with metrics.span('record_login'):
+        record_login(store, user, email, password, needs_rehash, now)
+
+    # Generar token JWT
+    user_token_data = {
+        'user_id': user.get('user_id'),
+        'email': user.get('email'),
+        'user_type': user_type,
+        'staff_tier': staff_tier,
+        'permissions': user.get('permissions', []),
+        'frontend_type': frontend_type
+    }
+
+    with metrics.span('jwt_encode'):
         token, expires_at = generate_jwt_token(user_token_data)
+    audit_log.record(audit_log.LOGIN_SUCCESS, actor=user.get('user_id'), email=email,
+                     user_type=user_type, frontend_type=frontend_type)
 
-        # Preparar respuesta
-        user_data = {
-            'user_id': user.get('user_id'),
-            'email': user.get('email'),
-            'name': user.get('name'),
-            'user_type': user_type,
-            'is_active': user.get('is_active', True),
-            'last_login': current_time,
-            'redirect_to': get_redirect_path(user_type, staff_tier, frontend_type)  # MODIFICADO
-        }
-        
-        if user_type == 'staff':
-            user_data['staff_tier'] = staff_tier
-            user_data['permissions'] = user.get('permissions', [])
-            user_data['is_verified'] = user.get('is_verified', True)
-        else:
-            user_data['is_verified'] = user.get('is_verified', False)
-        
-        response_data = {
-            'message': 'Login exitoso',
-            'user': user_data,
-            'token': token,
-            'token_expires': expires_at.isoformat() if hasattr(expires_at, 'isoformat') else expires_at,
-            'session': {
-                'logged_in_at': current_time,
-                'frontend_type': frontend_type
-            }
-        }
-        
-        return {
-            'statusCode': 200,
-            'headers': CORS_HEADERS,
-            'body': json.dumps(response_data)
-        }
+    # Preparar respuesta
+    user_data = {
+        'user_id': user.get('user_id'),
+        'email': user.get('email'),
+        'name': user.get('name'),
+        'user_type': user_type,
+        'is_active': user.get('is_active', True),
+        'last_login': current_time,
+        'redirect_to': get_redirect_path(user_type, staff_tier, frontend_type)  # MODIFICADO
+    }
 
-    except Exception as e:
-        print("Exception in login:", str(e))
-        import traceback
-        print("Traceback:", traceback.format_exc())
-        
-        return {
-            'statusCode': 500,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({
-                'error': 'Internal server error',
-                'details': str(e)
-            })
-        }
\ No newline at end of file
+    if user_type == 'staff':
+        user_data['staff_tier'] = staff_tier
+        user_data['permissions'] = user.get('permissions', [])
+        user_data['is_verified'] = user.get('is_verified', True)
+    else:
+        user_data['is_verified'] = user.get('is_verified', False)
+
+    return 200, {
+        'message': 'Login exitoso',
+        'user': user_data,
+        'token': token,
+        'token_expires': expires_at.isoformat() if hasattr(expires_at, 'isoformat') else expires_at,
+        'session': {
+            'logged_in_at': current_time,
+            'frontend_type': frontend_type
+        }
+    }
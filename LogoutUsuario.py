@@ -1,39 +1,55 @@
 import json
 from datetime import datetime
 
-CORS_HEADERS = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'POST, OPTIONS, GET',
-    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, Accept',
-    'Content-Type': 'application/json'
-}
+import audit_log
+import auth_helpers
+import handler_pipeline
+import metrics
+import structured_logging
+import token_revocation
 
-def lambda_handler(event, context):
-    try:
-        print("Logout event received:", json.dumps(event, indent=2))
-        
-        response_data = {
-            'message': 'Sesión cerrada exitosamente',
-            'timestamp': datetime.utcnow().isoformat(),
-            'note': 'Token eliminado del cliente. El token JWT seguirá siendo válido hasta su expiración natural.'
-        }
-        
-        return {
-            'statusCode': 200,
-            'headers': CORS_HEADERS,
-            'body': json.dumps(response_data)
-        }
+log = structured_logging.get_logger('logout')
 
-    except Exception as e:
-        print("Exception in logout:", str(e))
-        import traceback
-        print("Traceback:", traceback.format_exc())
-        
-        return {
-            'statusCode': 500,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({
-                'error': 'Error interno del servidor',
-                'details': str(e)
-            })
-        }
\ No newline at end of file
+# Obtener el token de la cookie, del header Authorization o del body
+def extract_token(event, body=None):
+    headers = event.get('headers') or {}
+    token = auth_helpers.extract_token_from_cookies(headers.get('Cookie') or headers.get('cookie'))
+    if token:
+        return token
+    authorization = headers.get('Authorization') or headers.get('authorization') or ''
+    if authorization.startswith('Bearer '):
+        return authorization[len('Bearer '):].strip()
+    if body is None:
+        body = event.get('body')
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            body = None
+    if isinstance(body, dict):
+        return body.get('token')
+    return None
+
+# El logout responde 200 aunque el body no sea JSON válido
+@handler_pipeline.handler('logout', strict_body=False, warmup_steps=('jwt', 'revocation'))
+def lambda_handler(body, event, context):
+    # Revocar el token (logout idempotente: sin token válido igual responde 200)
+    revoked = False
+    token = extract_token(event, body)
+    payload = auth_helpers.verify_jwt_token(token) if token else None
+    if payload and payload.get('jti') and token_revocation.is_enabled():
+        with metrics.span('revoke_token'):
+            token_revocation.revoke(payload['jti'], payload['exp'])
+        auth_helpers.revoke_cached_token(token)
+        revoked = True
+        log.info("Token revocado", jti=payload['jti'], user_id=payload.get('user_id'))
+    audit_log.record(audit_log.LOGOUT, actor=payload.get('user_id') if payload else None,
+                     jti=payload.get('jti') if payload else None, token_revoked=revoked)
+
+    return 200, {
+        'message': 'Sesión cerrada exitosamente',
+        'timestamp': datetime.utcnow().isoformat(),
+        'token_revoked': revoked,
+        'note': 'Token revocado: deja de ser aceptado por los servicios.' if revoked
+                else 'Token eliminado del cliente. No se recibió un token válido para revocar.'
+    }
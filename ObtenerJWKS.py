@@ -0,0 +1,47 @@
+import hashlib
+import os
+
+import handler_pipeline
+import jwt_keys
+import structured_logging
+
+log = structured_logging.get_logger('jwks')
+
+# Vida en cache del JWKS para clientes y CDN (debe cubrir el aviso previo de una rotación)
+JWKS_MAX_AGE_SECONDS = int(os.environ.get('JWKS_MAX_AGE_SECONDS', '300'))
+
+_response = None
+
+
+def jwks_response():
+    """
+    Respuesta del JWKS (se arma una vez por contenedor: las claves vienen de la configuración)
+    """
+    global _response
+    if _response is None:
+        body = handler_pipeline.json_dumps(jwt_keys.get_keyring().jwks())
+        _response = {
+            'statusCode': 200,
+            'headers': dict(handler_pipeline.CORS_HEADERS, **{
+                'Cache-Control': f'public, max-age={JWKS_MAX_AGE_SECONDS}',
+                'ETag': '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+            }),
+            'body': body
+        }
+    return _response
+
+
+# Función principal del Lambda del JWKS (claves públicas de firma de los JWT)
+@handler_pipeline.handler('jwks', strict_body=False)
+def lambda_handler(body, event, context):
+    response = jwks_response()
+    headers = event.get('headers') or {}
+    if_none_match = headers.get('If-None-Match') or headers.get('if-none-match')
+    if if_none_match and if_none_match == response['headers']['ETag']:
+        return {'statusCode': 304, 'headers': response['headers'], 'body': ''}
+    return response
+
+
+def reset():
+    global _response
+    _response = None
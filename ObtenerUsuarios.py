@@ -0,0 +1,49 @@
+import os
+
+import auth_helpers
+import handler_pipeline
+import structured_logging
+import user_directory
+
+log = structured_logging.get_logger('users-batch')
+
+# Máximo de user_id por request
+USERS_BATCH_MAX_IDS = int(os.environ.get('USERS_BATCH_MAX_IDS', '500'))
+
+# Permiso requerido en el token staff del servicio que consulta
+USERS_BATCH_PERMISSION = 'view_customers'
+
+handler_pipeline.register_error(
+    'invalid_user_ids', 400,
+    f'user_ids debe ser una lista de 1 a {USERS_BATCH_MAX_IDS} strings no vacíos'
+)
+
+
+def parse_user_ids(body):
+    user_ids = body.get('user_ids')
+    if (not isinstance(user_ids, list) or not 1 <= len(user_ids) <= USERS_BATCH_MAX_IDS
+            or not all(isinstance(user_id, str) and user_id for user_id in user_ids)):
+        return None
+    return user_ids
+
+
+# Función principal del Lambda de consulta de usuarios por user_id
+@handler_pipeline.handler('users-batch', warmup_steps=('storage', 'jwt', 'revocation'))
+def lambda_handler(body, event, context):
+    payload, error = auth_helpers.require_staff_auth(event, USERS_BATCH_PERMISSION)
+    if error:
+        return dict(error, headers=handler_pipeline.CORS_HEADERS)
+
+    user_ids = parse_user_ids(body)
+    if user_ids is None:
+        return handler_pipeline.error_response('invalid_user_ids')
+
+    resolved = user_directory.resolve(user_ids)
+    users = {user_id: user for user_id, user in resolved.items() if user is not None}
+    not_found = [user_id for user_id, user in resolved.items() if user is None]
+    log.info("Usuarios resueltos", requested=len(resolved), found=len(users), caller=payload.get('user_id'))
+
+    return 200, {
+        'users': users,
+        'not_found': not_found
+    }
@@ -0,0 +1,291 @@
+# audit_log.py
+"""
+Registro de auditoría de la autenticación: logins (exitosos y fallidos),
+registros, creación de códigos de invitación y logouts.
+
+    audit_log.record(audit_log.LOGIN_SUCCESS, actor=user_id, email=email)
+
+record() sólo valida el tipo y agrega una tupla al buffer en memoria (unos
+pocos µs, ver benchmarks/bench_audit.py). La escritura es por lotes:
+  - un hilo en segundo plano escribe cuando el buffer llega a AUDIT_BATCH_SIZE
+    o cada AUDIT_FLUSH_INTERVAL_SECONDS (0 desactiva el hilo)
+  - handler_pipeline llama a flush() al terminar cada invocación, antes de
+    que Lambda congele el contenedor (lo pendiente nunca queda en memoria)
+
+Ese flush está en el camino de la respuesta: Lambda (sin extensiones) no
+ejecuta código después de responder, y un flush diferido al hilo o a la
+invocación siguiente se pierde si el contenedor se recicla. Por eso el
+destino por defecto es el log: el flush sólo agrega las líneas al buffer de
+structured_logging, que se escribe a stdout (CloudWatch Logs) en el mismo
+write del resto del log de la invocación, unos µs por request. Con
+AUDIT_SINK=dynamodb (opcional) cada invocación que registra eventos paga un
+BatchWriteItem antes de responder (un round trip, unos ms);
+benchmarks/bench_audit.py mide ambos.
+
+Destino de los eventos (AUDIT_SINK):
+  - 'log' (por defecto): una línea JSON por evento en stdout, con
+    log_type='audit' para filtrarla (suscripción o Logs Insights)
+  - 'jsonl': una línea JSON por evento en AUDIT_LOG_PATH (por defecto
+    /tmp/audit.jsonl: en Lambda el directorio de trabajo es de sólo lectura)
+  - 'dynamodb': batch_write_item en AUDIT_EVENTS_TABLE, con ttl de
+    AUDIT_RETENTION_DAYS
+  - 'stream': stand-in en memoria de un stream (lotes de hasta 500 registros,
+    como PutRecords); pruebas y benchmarks
+  - 'none': descarta los eventos
+
+Un lote que no se puede escribir se vuelca al log estructurado (nivel ERROR)
+para no perder el rastro; los errores del destino nunca llegan al request.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque, namedtuple
+from datetime import datetime, timedelta, timezone
+
+import structured_logging
+
+log = structured_logging.get_logger('audit')
+
+# Tipos de evento
+LOGIN_SUCCESS = 'login_success'
+LOGIN_FAILURE = 'login_failure'
+REGISTRATION = 'registration'
+REGISTRATION_REJECTED = 'registration_rejected'
+INVITATION_CREATED = 'invitation_created'
+LOGOUT = 'logout'
+
+EVENT_TYPES = frozenset([
+    LOGIN_SUCCESS, LOGIN_FAILURE, REGISTRATION, REGISTRATION_REJECTED, INVITATION_CREATED, LOGOUT
+])
+
+# Esquema del evento: actor es el user_id (o el email si no hay usuario), details
+# los atributos propios del tipo (email, reason, invitation_code, ...)
+AuditEvent = namedtuple('AuditEvent', ['event_type', 'timestamp', 'actor', 'source_ip', 'request_id', 'details'])
+
+AUDIT_SINK = os.environ.get('AUDIT_SINK', 'log')
+AUDIT_LOG_PATH = os.environ.get('AUDIT_LOG_PATH', '/tmp/audit.jsonl')
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '100'))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.environ.get('AUDIT_FLUSH_INTERVAL_SECONDS', '1'))
+AUDIT_RETENTION_DAYS = int(os.environ.get('AUDIT_RETENTION_DAYS', '365'))
+
+# deque: append/popleft son atómicos entre hilos
+_buffer = deque()
+_write_lock = threading.Lock()
+_flusher_lock = threading.Lock()
+_wakeup = threading.Event()
+_flusher = None
+_sink = None
+# Request en curso (lo fija handler_pipeline con bind): (request_id, source_ip)
+_request = contextvars.ContextVar('audit_request', default=(None, None))
+
+
+def to_item(event):
+    """
+    Registro serializable del evento (un item por evento en todos los destinos)
+    """
+    moment = datetime.fromtimestamp(event.timestamp, timezone.utc)
+    item = {
+        'event_id': uuid.uuid4().hex,
+        'event_type': event.event_type,
+        'timestamp': moment.isoformat(),
+        'ttl': int((moment + timedelta(days=AUDIT_RETENTION_DAYS)).timestamp())
+    }
+    for name in ('actor', 'source_ip', 'request_id'):
+        value = getattr(event, name)
+        if value is not None:
+            item[name] = value
+    if event.details:
+        item['details'] = event.details
+    return item
+
+
+class LogSink:
+    """
+    Una línea por evento en el log estructurado: sólo se agrega al buffer, la
+    escritura es la de structured_logging.flush() al final de la invocación
+    """
+
+    def write(self, items):
+        for item in items:
+            structured_logging.emit(dict(item, log_type='audit'))
+
+
+class JsonlSink:
+    """
+    Agrega una línea JSON por evento al archivo (abierto una vez por contenedor)
+    """
+
+    def __init__(self, path=None):
+        self.path = path or AUDIT_LOG_PATH
+        self._file = None
+
+    def write(self, items):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(''.join(json.dumps(item, default=str, ensure_ascii=False) + '\n' for item in items))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class DynamoDBSink:
+    """
+    batch_write_item en la tabla de auditoría (lotes de 25 con reintentos)
+    """
+
+    def __init__(self, table_name=None):
+        self.table_name = table_name
+
+    def write(self, items):
+        import dynamo_client
+
+        dynamo_client.batch_write_items(self.table_name or dynamo_client.audit_events_table_name(), items)
+
+
+class StreamSink:
+    """
+    Stand-in de un stream: guarda los lotes en memoria (records/batches)
+    """
+    MAX_RECORDS_PER_PUT = 500
+
+    def __init__(self):
+        self.records = []
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def write(self, items):
+        with self._lock:
+            for start in range(0, len(items), self.MAX_RECORDS_PER_PUT):
+                chunk = items[start:start + self.MAX_RECORDS_PER_PUT]
+                self.batches.append(len(chunk))
+                self.records.extend(chunk)
+
+
+class NullSink:
+    def write(self, items):
+        pass
+
+
+SINKS = {
+    'log': LogSink,
+    'jsonl': JsonlSink,
+    'dynamodb': DynamoDBSink,
+    'stream': StreamSink,
+    'none': NullSink
+}
+
+
+def get_sink():
+    global _sink
+    if _sink is None:
+        if AUDIT_SINK not in SINKS:
+            raise ValueError(f"AUDIT_SINK inválido: {AUDIT_SINK}. Debe ser uno de: {sorted(SINKS)}")
+        _sink = SINKS[AUDIT_SINK]()
+    return _sink
+
+
+def set_sink(sink):
+    """
+    Reemplaza el destino (pruebas, benchmarks o un destino propio con write(items))
+    """
+    global _sink
+    _sink = sink
+
+
+def bind(event, context):
+    """
+    Request id e IP de origen de la invocación actual (lo llama handler_pipeline)
+    """
+    identity = ((event.get('requestContext') or {}).get('identity') or {}) if isinstance(event, dict) else {}
+    _request.set((getattr(context, 'aws_request_id', None), identity.get('sourceIp')))
+
+
+def record(event_type, actor=None, **details):
+    """
+    Agrega un evento al buffer. No hace I/O
+    """
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"Tipo de evento de auditoría desconocido: {event_type}")
+    request_id, source_ip = _request.get()
+    _buffer.append(AuditEvent(event_type, time.time(), actor, source_ip, request_id, details))
+    if _flusher is None and AUDIT_FLUSH_INTERVAL_SECONDS > 0:
+        _ensure_flusher()
+    if len(_buffer) >= AUDIT_BATCH_SIZE:
+        _wakeup.set()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_loop, name='audit-flush', daemon=True)
+                _flusher.start()
+
+
+def _flush_loop():
+    while True:
+        _wakeup.wait(AUDIT_FLUSH_INTERVAL_SECONDS)
+        _wakeup.clear()
+        flush()
+
+
+def _take(limit):
+    batch = []
+    try:
+        while len(batch) < limit:
+            batch.append(_buffer.popleft())
+    except IndexError:
+        pass
+    return batch
+
+
+def flush():
+    """
+    Escribe todo lo pendiente en lotes de AUDIT_BATCH_SIZE. Retorna la
+    cantidad de eventos escritos por esta llamada.
+
+    No espera a otro flush en curso: ese flush vacía el buffer completo,
+    incluidos los eventos agregados mientras escribía (después de soltar el
+    lock vuelve a mirar el buffer). Así los hilos de un mismo proceso no se
+    encolan detrás del destino; en Lambda (una invocación por contenedor y
+    sin hilo en segundo plano) el flush de la invocación siempre escribe.
+    """
+    written = 0
+    while _buffer:
+        if not _write_lock.acquire(blocking=False):
+            break
+        try:
+            while True:
+                batch = _take(AUDIT_BATCH_SIZE)
+                if not batch:
+                    break
+                items = [to_item(event) for event in batch]
+                try:
+                    get_sink().write(items)
+                    written += len(items)
+                except Exception as e:
+                    log.error("Error escribiendo eventos de auditoría", error=str(e), events=items)
+        finally:
+            _write_lock.release()
+    return written
+
+
+def pending():
+    return len(_buffer)
+
+
+def reset():
+    """
+    Descarta los eventos pendientes y el destino (pruebas y benchmarks)
+    """
+    global _sink
+    _buffer.clear()
+    _sink = None
+    _request.set((None, None))
@@ -1,27 +1,317 @@
 # auth_helpers.py
-import jwt
+import hashlib
 import os
 import json
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
-def verify_jwt_token(token):
+import jwt_keys
+import metrics
+import permission_codec
+import structured_logging
+import token_revocation
+
+log = structured_logging.get_logger('auth')
+
+# Cache LRU de payloads ya verificados, indexado por el digest del token.
+# Cada entrada vive como máximo hasta el 'exp' del token. TOKEN_CACHE_SIZE=0 la desactiva.
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', '1024'))
+
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+_token_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_jwt_secret = None
+
+# Verificación de tokens firmados con EdDSA/RS256 (ver jwt_keys):
+#   - claves del keyring local (servicios que comparten JWT_SIGNING_KEYS)
+#   - si no, el JWKS publicado en JWKS_URL, cacheado JWKS_CACHE_SECONDS; un kid
+#     desconocido fuerza una recarga, como máximo cada JWKS_MIN_REFRESH_SECONDS
+# JWT_ACCEPT_HS256=false rechaza los tokens HS256 (servicios sin JWT_SECRET)
+JWKS_URL = os.environ.get('JWKS_URL')
+JWKS_CACHE_SECONDS = float(os.environ.get('JWKS_CACHE_SECONDS', '3600'))
+JWKS_MIN_REFRESH_SECONDS = float(os.environ.get('JWKS_MIN_REFRESH_SECONDS', '30'))
+JWT_ACCEPT_HS256 = os.environ.get('JWT_ACCEPT_HS256', 'true').lower() in ('1', 'true', 'yes')
+
+_jwks_keys = {}
+_jwks_fetched_at = None
+_jwks_lock = threading.Lock()
+
+# Motivo del rechazo (verify_jwt_token_with_reason). Los definitivos no cambian
+# al reintentar con el mismo token; TOKEN_UNVERIFIABLE sí puede (kid que aún no
+# está en el JWKS o JWKS inaccesible, revocación no consultable con
+# REVOCATION_FAIL_MODE=closed, error inesperado)
+TOKEN_INVALID = 'invalid'
+TOKEN_EXPIRED = 'expired'
+TOKEN_REVOKED = 'revoked'
+TOKEN_UNVERIFIABLE = 'unverifiable'
+DEFINITIVE_FAILURES = frozenset([TOKEN_INVALID, TOKEN_EXPIRED, TOKEN_REVOKED])
+
+
+def _get_jwt_secret():
+    global _jwt_secret
+    if _jwt_secret is None:
+        _jwt_secret = jwt_keys.jwt_secret()
+    return _jwt_secret
+
+
+def _fetch_jwks(url):
+    import urllib.request
+
+    with urllib.request.urlopen(url, timeout=2) as response:
+        return json.loads(response.read())
+
+
+def _jwks_key(kid):
     """
-    Verifica si un token JWT es válido
+    (alg, clave pública) del kid según el JWKS cacheado, o None
+    """
+    global _jwks_keys, _jwks_fetched_at
+    import jwt
+
+    now = time.monotonic()
+    with _jwks_lock:
+        entry = _jwks_keys.get(kid)
+        age = None if _jwks_fetched_at is None else now - _jwks_fetched_at
+        if age is not None and (age < JWKS_MIN_REFRESH_SECONDS or (entry and age < JWKS_CACHE_SECONDS)):
+            return entry
+        try:
+            with metrics.span('jwks_fetch'):
+                document = _fetch_jwks(JWKS_URL)
+            keys = {}
+            for jwk in document.get('keys', []):
+                parsed = jwt.PyJWK(jwk)
+                keys[jwk['kid']] = (jwk.get('alg') or parsed.algorithm_name, parsed.key)
+            _jwks_keys = keys
+            log.info("JWKS actualizado", keys=len(keys))
+        except Exception as e:
+            # Se siguen usando las claves anteriores hasta el próximo intento
+            log.error("Error obteniendo JWKS", url=JWKS_URL, error=str(e))
+        _jwks_fetched_at = now
+        return _jwks_keys.get(kid)
+
+
+def _verification_key(header):
+    """
+    (alg, clave) para verificar un token según su header, o None si no se acepta
+    """
+    alg = header.get('alg')
+    kid = header.get('kid')
+    if kid is None:
+        return (alg, _get_jwt_secret()) if alg == 'HS256' and JWT_ACCEPT_HS256 else None
+    entry = jwt_keys.get_keyring().verification_key(kid)
+    if entry is None and JWKS_URL:
+        entry = _jwks_key(kid)
+    # El algoritmo lo fija la clave, no el header (evita confusión de algoritmos)
+    if entry is None or entry[0] != alg:
+        return None
+    return entry
+
+
+def _token_digest(token):
+    return hashlib.sha256(token.encode()).digest()
+
+
+def token_permissions(payload):
+    """
+    Permisos del token como frozenset. Acepta el claim compacto 'pm' y la
+    lista 'permissions' de los tokens anteriores
+    """
+    claim = payload.get('pm')
+    if claim is not None:
+        try:
+            return permission_codec.decode_permissions(claim)
+        except ValueError as e:
+            log.warning("Claim de permisos inválido", error=str(e))
+            return frozenset()
+    return frozenset(payload.get('permissions') or [])
+
+
+def _known_kid(kid):
+    # Sin recargar el JWKS: sólo las claves ya conocidas
+    return jwt_keys.get_keyring().verification_key(kid) is not None or kid in _jwks_keys
+
+
+def _decode_token_with_reason(token):
+    """
+    Decodifica y verifica la firma del token (sin cache). Retorna
+    (payload, None) o (None, motivo)
     """
+    # Import diferido: sólo los requests con cookie necesitan PyJWT
+    import jwt
+
     try:
-        JWT_SECRET = os.environ.get('JWT_SECRET', 'tu-clave-secreta-muy-segura-aqui')
-        payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        return payload
-        
+        header = jwt.get_unverified_header(token)
+        key = _verification_key(header)
+        if key is None:
+            kid = header.get('kid')
+            if kid is not None and not _known_kid(kid):
+                log.warning("Token JWT con kid desconocido", kid=kid)
+                return None, TOKEN_UNVERIFIABLE
+            log.warning("Token JWT con clave o algoritmo no aceptado")
+            return None, TOKEN_INVALID
+        payload = jwt.decode(token, key[1], algorithms=[key[0]])
+        # Compatibilidad: los consumidores de payload['permissions'] siguen funcionando
+        if 'pm' in payload and 'permissions' not in payload:
+            payload['permissions'] = sorted(token_permissions(payload))
+        return payload, None
+
     except jwt.ExpiredSignatureError:
-        print("Token JWT expirado")
-        return None
+        log.info("Token JWT expirado")
+        return None, TOKEN_EXPIRED
     except jwt.InvalidTokenError as e:
-        print(f"Token JWT inválido: {str(e)}")
-        return None
+        log.warning("Token JWT inválido", error=str(e))
+        return None, TOKEN_INVALID
     except Exception as e:
-        print(f"Error verificando token JWT: {str(e)}")
+        log.error("Error verificando token JWT", error=str(e))
+        return None, TOKEN_UNVERIFIABLE
+
+
+def _decode_token(token):
+    """
+    Decodifica y verifica la firma del token (sin cache)
+    """
+    return _decode_token_with_reason(token)[0]
+
+
+def _revocation_failure(payload):
+    """
+    Consulta la lista de revocación (filtro de Bloom local; ver token_revocation).
+    None si el token no está revocado, TOKEN_REVOKED si lo está. Si la consulta
+    falla decide REVOCATION_FAIL_MODE: 'open' (por defecto) acepta el token,
+    'closed' lo rechaza como TOKEN_UNVERIFIABLE (reintentable)
+    """
+    jti = payload.get('jti')
+    if not jti or not token_revocation.is_enabled():
         return None
+    try:
+        with metrics.span('revocation_check'):
+            revoked = token_revocation.is_revoked(jti)
+    except Exception as e:
+        log.error("Error consultando revocación", error=str(e), fail_mode=token_revocation.REVOCATION_FAIL_MODE)
+        metrics.count('revocation_check_error')
+        return TOKEN_UNVERIFIABLE if token_revocation.FAIL_CLOSED else None
+    if revoked:
+        metrics.count('token_revoked')
+        return TOKEN_REVOKED
+    return None
+
+
+def verify_jwt_token(token):
+    """
+    Verifica si un token JWT es válido
+    """
+    return verify_jwt_token_with_reason(token)[0]
+
+
+def verify_jwt_token_with_reason(token):
+    """
+    Como verify_jwt_token, con el motivo del rechazo: (payload, None) o
+    (None, TOKEN_INVALID / TOKEN_EXPIRED / TOKEN_REVOKED / TOKEN_UNVERIFIABLE)
+    """
+    if not token:
+        return None, TOKEN_INVALID
+    if TOKEN_CACHE_SIZE <= 0:
+        payload, reason = _decode_token_with_reason(token)
+        if payload is not None:
+            reason = _revocation_failure(payload)
+        return (None, reason) if reason else (payload, None)
+
+    digest = _token_digest(token)
+    now = time.time()
+    with _token_cache_lock:
+        entry = _token_cache.get(digest)
+        if entry is not None:
+            payload, expires_at = entry
+            if expires_at > now:
+                _token_cache.move_to_end(digest)
+                _token_cache_stats['hits'] += 1
+            else:
+                del _token_cache[digest]
+                _token_cache_stats['evictions'] += 1
+                entry = None
+        if entry is None:
+            _token_cache_stats['misses'] += 1
+
+    if entry is not None:
+        metrics.count('token_cache_hit')
+        # La revocación se revisa también en los hits (puede venir de otro contenedor)
+        reason = _revocation_failure(payload)
+        if reason == TOKEN_REVOKED:
+            revoke_cached_token(token)
+        if reason:
+            return None, reason
+        return dict(payload), None
+
+    metrics.count('token_cache_miss')
+    with metrics.span('jwt_decode'):
+        payload, reason = _decode_token_with_reason(token)
+    if payload is None:
+        return None, reason
+    reason = _revocation_failure(payload)
+    if reason:
+        return None, reason
+    if 'exp' not in payload:
+        return payload, None
+
+    with _token_cache_lock:
+        _token_cache[digest] = (payload, float(payload['exp']))
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+            _token_cache_stats['evictions'] += 1
+    return dict(payload), None
+
+
+def is_token_cached(token):
+    """
+    True si el payload del token está en la cache (sin verificarlo ni tocar estadísticas)
+    """
+    with _token_cache_lock:
+        return _token_digest(token) in _token_cache
+
+
+def revoke_cached_token(token):
+    """
+    Hook de revocación: elimina un token de la cache
+    """
+    with _token_cache_lock:
+        if _token_cache.pop(_token_digest(token), None) is not None:
+            _token_cache_stats['evictions'] += 1
+
+
+def purge_token_cache(predicate=None):
+    """
+    Elimina de la cache los payloads que cumplan predicate(payload)
+    (todos si no se indica), por ejemplo al desactivar un usuario
+    """
+    with _token_cache_lock:
+        digests = [d for d, (payload, _) in _token_cache.items() if predicate is None or predicate(payload)]
+        for digest in digests:
+            del _token_cache[digest]
+        _token_cache_stats['evictions'] += len(digests)
+    return len(digests)
+
+
+def reset_jwks_cache():
+    """
+    Descarta el JWKS cacheado (pruebas y benchmarks)
+    """
+    global _jwks_keys, _jwks_fetched_at
+    with _jwks_lock:
+        _jwks_keys = {}
+        _jwks_fetched_at = None
+
+
+def get_token_cache_stats():
+    """
+    Contadores de la cache (hits, misses, evictions) y su tamaño actual
+    """
+    with _token_cache_lock:
+        stats = dict(_token_cache_stats)
+        stats['size'] = len(_token_cache)
+    return stats
+
 
 def extract_token_from_cookies(cookie_header):
     """
@@ -49,10 +339,28 @@ def require_auth(event):
     
     payload = verify_jwt_token(token)
     if not payload:
+        structured_logging.flush()
         return None, {'statusCode': 401, 'body': json.dumps({'error': 'Token inválido o expirado'})}
     
     return payload, None
 
+# Motivos de rechazo de staff_denial -> mensaje del 403
+STAFF_DENIAL_MESSAGES = {
+    'not_staff': 'Acceso denegado. Solo para staff.',
+    'missing_permission': 'Permisos insuficientes'
+}
+
+def staff_denial(payload, required_permission=None):
+    """
+    None si el payload es de staff (y tiene el permiso pedido), o el motivo:
+    'not_staff' / 'missing_permission'
+    """
+    if payload.get('user_type') != 'staff':
+        return 'not_staff'
+    if required_permission and required_permission not in token_permissions(payload):
+        return 'missing_permission'
+    return None
+
 def require_staff_auth(event, required_permission=None):
     """
     Función helper que verifica autenticación Y que sea staff
@@ -61,16 +369,11 @@ def require_staff_auth(event, required_permission=None):
     if error:
         return None, error
     
-    if payload.get('user_type') != 'staff':
-        return None, {
-            'statusCode': 403, 
-            'body': json.dumps({'error': 'Acceso denegado. Solo para staff.'})
-        }
-    
-    if required_permission and required_permission not in payload.get('permissions', []):
+    denial = staff_denial(payload, required_permission)
+    if denial:
         return None, {
             'statusCode': 403,
-            'body': json.dumps({'error': 'Permisos insuficientes'})
+            'body': json.dumps({'error': STAFF_DENIAL_MESSAGES[denial]})
         }
     
     return payload, None
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Costo del registro de auditoría (audit_log).
+
+Mide:
+  - record(): µs por evento en el camino del request (sólo el buffer en
+    memoria) frente a una llamada vacía; falla si supera --budget-us
+  - record() + flush: costo total por evento incluyendo la serialización del
+    lote (lo que hace el hilo en segundo plano o el flush de la invocación)
+  - flush al final de la invocación: µs para escribir el evento de un request
+    en cada destino (log, jsonl, stream, DynamoDB stand-in con --latency-ms)
+  - throughput del flush por lotes: eventos por segundo en cada destino
+  - request completo (handler_pipeline, un evento por request como el
+    login, stdout a /dev/null): µs que agrega cada destino frente a
+    AUDIT_SINK=none. Falla si el destino por defecto ('log') agrega más de
+    --request-budget-us por request. 'dynamodb' (opcional) es síncrono y
+    cuesta un round trip por request; falla si hace más de un
+    BatchWriteItem por request
+
+Uso:
+    python benchmarks/bench_audit.py [--events 200000] [--budget-us 5] [--latency-ms 3] [--request-budget-us 30]
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ['AUDIT_SINK'] = 'none'
+os.environ['AUDIT_EVENTS_TABLE'] = 'bench-t_audit_events'
+# Sin hilo en segundo plano: los flush son explícitos y se miden aparte
+os.environ['AUDIT_FLUSH_INTERVAL_SECONDS'] = '0'
+os.environ['METRICS_ENABLED'] = 'false'
+
+import audit_log  # noqa: E402
+import dynamo_client  # noqa: E402
+import handler_pipeline  # noqa: E402
+import structured_logging  # noqa: E402
+from local_dynamodb import LocalDynamoDB  # noqa: E402
+
+
+def noop(event_type, actor=None, **details):
+    pass
+
+
+def per_call_us(fn, events, chunk=100):
+    # De a un lote por vez: el buffer no crece más que en un contenedor real
+    elapsed = 0.0
+    for _ in range(events // chunk):
+        started = time.perf_counter()
+        for i in range(chunk):
+            fn(audit_log.LOGIN_SUCCESS, actor='c0a8012e', email='cliente@example.com', user_type='cliente')
+        elapsed += time.perf_counter() - started
+        if fn is audit_log.record:
+            audit_log._buffer.clear()
+    return elapsed / (events // chunk * chunk) * 1e6
+
+
+def record_and_flush(event_type, actor=None, **details):
+    audit_log.record(event_type, actor, **details)
+    if audit_log.pending() >= audit_log.AUDIT_BATCH_SIZE:
+        audit_log.flush()
+
+
+def bench_record(events, repeat=5):
+    audit_log.reset()
+    audit_log.set_sink(audit_log.NullSink())
+    baseline = statistics.median(per_call_us(noop, events) for _ in range(repeat))
+    record = statistics.median(per_call_us(audit_log.record, events) for _ in range(repeat))
+    total = statistics.median(per_call_us(record_and_flush, events) for _ in range(repeat))
+    audit_log.flush()
+    return baseline, record, total
+
+
+def sinks(latency_ms, tmp):
+    db = LocalDynamoDB(latency=latency_ms / 1000)
+    db.create_table('bench-t_audit_events', 'event_id')
+    dynamo_client.reset_clients()
+    dynamo_client._resource = db
+    return {
+        'log': audit_log.LogSink(),
+        'jsonl': audit_log.JsonlSink(os.path.join(tmp, 'audit.jsonl')),
+        'stream': audit_log.StreamSink(),
+        'dynamodb': audit_log.DynamoDBSink(),
+    }
+
+
+@contextlib.contextmanager
+def quiet_stdout():
+    # El destino 'log' y el log del handler escriben a stdout: se descarta, pero el write se mide
+    saved = sys.stdout
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            yield
+        finally:
+            structured_logging.flush()
+            sys.stdout = saved
+
+
+def bench_invocation_flush(sink, invocations=200):
+    audit_log.reset()
+    audit_log.set_sink(sink)
+    timings = []
+    with quiet_stdout():
+        for i in range(invocations):
+            audit_log.record(audit_log.LOGOUT, actor=f'u{i}', token_revoked=True)
+            started = time.perf_counter()
+            audit_log.flush()
+            structured_logging.flush()
+            timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+
+def bench_batch_flush(sink, events=10000):
+    audit_log.reset()
+    audit_log.set_sink(sink)
+    # Sin el hilo en segundo plano: se mide un flush explícito de todo el buffer
+    for i in range(events):
+        audit_log._buffer.append(audit_log.AuditEvent(
+            audit_log.LOGIN_FAILURE, time.time(), f'u{i}', '203.0.113.7', None, {'reason': 'invalid_password'}
+        ))
+    with quiet_stdout():
+        started = time.perf_counter()
+        audit_log.flush()
+        structured_logging.flush()
+        elapsed = time.perf_counter() - started
+    return events / elapsed
+
+
+@handler_pipeline.handler('bench-audit')
+def audited_handler(body, event, context):
+    # Lo que hace un login: un evento de auditoría por request
+    audit_log.record(audit_log.LOGIN_SUCCESS, actor=body.get('user_id'), email='cliente@example.com')
+    return 200, {'ok': True}
+
+
+def bench_request(sink, requests=500):
+    audit_log.reset()
+    audit_log.set_sink(sink)
+    event = {'body': '{"user_id": "c0a8012e"}', 'requestContext': {'identity': {'sourceIp': '203.0.113.7'}}}
+    timings = []
+    with quiet_stdout():
+        for _ in range(requests):
+            started = time.perf_counter()
+            audited_handler(event, None)
+            timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--budget-us', type=float, default=5.0)
+    parser.add_argument('--latency-ms', type=float, default=3.0)
+    parser.add_argument('--request-budget-us', type=float, default=30.0)
+    args = parser.parse_args()
+
+    baseline, record, total = bench_record(args.events)
+    overhead = record - baseline
+    print(f"record(): {record:.2f} µs/evento (llamada vacía {baseline:.2f} µs, "
+          f"overhead {overhead:.2f} µs, presupuesto {args.budget_us} µs)")
+    print(f"record() + flush por lotes: {total:.2f} µs/evento (fuera del camino del request)")
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, sink in sinks(args.latency_ms, tmp).items():
+            print(f"{name:9s} flush por invocación={bench_invocation_flush(sink):9.1f} µs  "
+                  f"flush por lotes={bench_batch_flush(sink):10.0f} eventos/s")
+
+        requests = 500
+        baseline_us = bench_request(audit_log.NullSink(), requests)
+        print(f"request completo, AUDIT_SINK=none: {baseline_us:.1f} µs")
+        for name, sink in sinks(args.latency_ms, tmp).items():
+            db = dynamo_client._resource
+            db.reset_counters()
+            added_us = bench_request(sink, requests) - baseline_us
+            writes = db.round_trips['BatchWriteItem'] / requests
+            print(f"request completo, AUDIT_SINK={name}: +{added_us:.1f} µs por request "
+                  f"({writes:.0f} BatchWriteItem por request)")
+            if name == 'log' and added_us > args.request_budget_us:
+                failures.append(f"AUDIT_SINK=log agrega {added_us:.1f} µs > {args.request_budget_us} µs por request")
+            if writes > 1:
+                failures.append(f"AUDIT_SINK={name} hace {writes:.1f} BatchWriteItem por request (> 1)")
+    audit_log.reset()
+
+    if overhead > args.budget_us:
+        failures.append(f"record() agrega {overhead:.2f} µs > {args.budget_us} µs")
+    for failure in failures:
+        print(f"FALLA: {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
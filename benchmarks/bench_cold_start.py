@@ -0,0 +1,75 @@
+"""
+Benchmark de cold start por handler.
+
+Cada repetición lanza un intérprete nuevo que mide:
+  - import_ms: tiempo de `import <Handler>`
+  - first_call_ms: latencia de la primera invocación con un evento que no
+    necesita red (respuesta de validación o logout)
+  - módulos pesados cargados (boto3 / jwt) después de esa invocación
+
+Uso:
+    python benchmarks/bench_cold_start.py [repeticiones]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Evento de primera invocación por handler (None = sólo se mide el import)
+HANDLERS = {
+    'CrearUsuario': {'body': json.dumps({'email': '', 'password': ''})},
+    'LoginUsuario': {'body': json.dumps({'email': '', 'password': ''})},
+    'LogoutUsuario': {'body': '{}'},
+    'GenerarInvitationCode': None,
+}
+
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+module = __import__(sys.argv[1])
+import_ms = (time.perf_counter() - start) * 1000
+event = json.loads(sys.argv[2])
+first_call_ms = None
+status = None
+if event is not None:
+    start = time.perf_counter()
+    status = module.lambda_handler(event, None)['statusCode']
+    first_call_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    'import_ms': import_ms,
+    'first_call_ms': first_call_ms,
+    'status': status,
+    'boto3_loaded': 'boto3' in sys.modules,
+    'jwt_loaded': 'jwt' in sys.modules,
+}))
+'''
+
+
+def run_once(handler, event):
+    env = dict(os.environ, AUDIT_SINK='none', AWS_DEFAULT_REGION=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+    out = subprocess.run(
+        [sys.executable, '-c', PROBE, handler, json.dumps(event)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"repeticiones: {repetitions}")
+    for handler, event in HANDLERS.items():
+        runs = [run_once(handler, event) for _ in range(repetitions)]
+        import_ms = statistics.median(r['import_ms'] for r in runs)
+        line = f"{handler:24s} import={import_ms:8.2f} ms"
+        if event is not None:
+            first_ms = statistics.median(r['first_call_ms'] for r in runs)
+            line += f"  first_call={first_ms:8.2f} ms (HTTP {runs[0]['status']})"
+        line += f"  boto3={runs[0]['boto3_loaded']} jwt={runs[0]['jwt_loaded']}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: overhead por invocación al obtener la tabla de DynamoDB.
+
+Compara el patrón anterior (boto3.resource('dynamodb').Table(...) en cada
+request) con la tabla compartida de dynamo_client. No hace llamadas de red:
+mide sólo la construcción de sesión, cliente y recurso.
+
+Uso:
+    python benchmarks/bench_dynamo_client.py [iteraciones]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import boto3  # noqa: E402
+
+import dynamo_client  # noqa: E402
+
+
+def per_invocation():
+    dynamodb = boto3.resource('dynamodb')
+    return dynamodb.Table(os.environ.get('USUARIOS_TABLE', 'dev-t_usuarios'))
+
+
+def shared():
+    return dynamo_client.usuarios_table()
+
+
+def measure(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'mean_ms': sum(samples) / len(samples),
+        'p50_ms': samples[len(samples) // 2],
+        'p99_ms': samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    }
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    # Primer uso (equivalente al cold start del contenedor)
+    start = time.perf_counter()
+    shared()
+    first_ms = (time.perf_counter() - start) * 1000
+
+    before = measure(per_invocation, iterations)
+    after = measure(shared, iterations)
+
+    print(f"iteraciones: {iterations}")
+    print(f"primer uso dynamo_client: {first_ms:.3f} ms")
+    for label, stats in (('boto3.resource() por request', before), ('dynamo_client compartido', after)):
+        print(f"{label:32s} mean={stats['mean_ms']:.4f} ms  p50={stats['p50_ms']:.4f} ms  p99={stats['p99_ms']:.4f} ms")
+    print(f"ahorro por invocación: {before['mean_ms'] - after['mean_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Throughput de /auth/introspect con lotes de 1 a 1000 tokens.
+
+Verifica un pool de tokens (10% con firma inválida o expirados) llamando al
+handler con lotes de distintos tamaños, con las caches vacías (frío) y con
+los mismos tokens ya verificados (caliente). El lote de 1 equivale a un
+llamado del gateway por request.
+
+Uso:
+    python benchmarks/bench_introspection.py [--tokens 2000] [--sizes 1 10 100 1000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ['AUDIT_SINK'] = 'none'
+os.environ.setdefault('TOKEN_CACHE_SIZE', '20000')
+
+import jwt  # noqa: E402
+
+import auth_helpers  # noqa: E402
+import IntrospectarTokens  # noqa: E402
+
+
+def make_tokens(count):
+    secret = auth_helpers._get_jwt_secret()
+    now = int(time.time())
+    tokens = []
+    for i in range(count):
+        payload = {'user_id': f'u{i}', 'email': f'u{i}@example.com', 'user_type': 'cliente',
+                   'permissions': ['view_orders'], 'exp': now + 3600, 'jti': f'{i:032x}'}
+        if i % 20 == 0:
+            payload['exp'] = now - 10
+        tokens.append(jwt.encode(payload, 'otra-clave' if i % 20 == 10 else secret, algorithm='HS256'))
+    return tokens
+
+
+def run(tokens, size, caller):
+    started = time.perf_counter()
+    for start in range(0, len(tokens), size):
+        response = IntrospectarTokens.lambda_handler({
+            'headers': {'Cookie': f'auth_token={caller}'},
+            'body': json.dumps({'tokens': tokens[start:start + size]})
+        }, None)
+        assert response['statusCode'] == 200, response
+    elapsed = time.perf_counter() - started
+    return len(tokens) / elapsed, -(-len(tokens) // size) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tokens', type=int, default=2000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.tokens)
+    caller = jwt.encode({'user_id': 'gateway', 'user_type': 'staff', 'exp': int(time.time()) + 3600},
+                        auth_helpers._get_jwt_secret(), algorithm='HS256')
+
+    print(f"{args.tokens} tokens (10% inválidos o expirados), hilos={IntrospectarTokens.INTROSPECT_CONCURRENCY}")
+    print(f"{'lote':>6}{'tokens/s frío':>16}{'tokens/s caliente':>20}{'llamados/s caliente':>22}")
+    for size in args.sizes:
+        IntrospectarTokens.reset()
+        auth_helpers.purge_token_cache()
+        cold, _ = run(tokens, size, caller)
+        warm, calls = run(tokens, size, caller)
+        print(f"{size:>6}{cold:>16.0f}{warm:>20.0f}{calls:>22.1f}")
+
+
+if __name__ == '__main__':
+    main()
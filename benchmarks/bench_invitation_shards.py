@@ -0,0 +1,108 @@
+"""
+Prueba de carga del contador de usos repartido de los códigos de invitación.
+
+Una cohorte registra staff con un mismo código contra el stand-in local de
+DynamoDB, que encola las escrituras a un mismo item (--item-write-ms por
+escritura, simula el límite de throughput de la partición de una clave
+caliente) y agrega --latency-ms de red por llamada. Para cada cantidad de
+shards mide registros por segundo y la latencia p50/p99 de
+storage.create_user, y verifica que no se superó max_uses.
+
+Uso:
+    python benchmarks/bench_invitation_shards.py [--registrations 2000] [--workers 32]
+        [--item-write-ms 2] [--latency-ms 3] [--shards 1 2 4 8 16 32]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ['STORAGE_BACKEND'] = 'dynamodb'
+os.environ['USUARIOS_TABLE'] = 'bench-t_usuarios'
+os.environ['INVITATION_CODES_TABLE'] = 'bench-t_invitation_codes'
+
+import dynamo_client  # noqa: E402
+import storage  # noqa: E402
+from local_dynamodb import LocalDynamoDB  # noqa: E402
+
+CODE = 'COHORT01'
+
+
+def setup(shards, max_uses, item_write_ms, latency_ms):
+    db = LocalDynamoDB()
+    db.create_table('bench-t_usuarios', 'email')
+    db.create_table('bench-t_invitation_codes', 'code')
+    items = storage.shard_invitation_item({
+        'code': CODE, 'is_active': True, 'max_uses': max_uses, 'used_count': 0,
+        'expires_at': (datetime.utcnow() + timedelta(days=1)).isoformat()
+    }, shards)
+    for item in items:
+        db.Table('bench-t_invitation_codes').put_item(Item=item)
+    db.item_write_interval = item_write_ms / 1000
+    db.latency = latency_ms / 1000
+    dynamo_client.reset_clients()
+    storage.reset_storage()
+    dynamo_client._resource = db
+    return db
+
+
+def run(shards, args):
+    # max_uses deja un 10% de registros sin cupo: también se mide el rechazo
+    max_uses = int(args.registrations * 0.9)
+    db = setup(shards, max_uses, args.item_write_ms, args.latency_ms)
+    store = storage.get_storage()
+    # Primer registro fuera de la medición: descubre los shards del código
+    store.create_user({'email': 'warm@example.com', 'user_id': 'warm'}, invitation_code=CODE)
+
+    def register(i):
+        started = time.perf_counter()
+        result = store.create_user({'email': f'staff{i}@example.com', 'user_id': f'id-{i}'}, invitation_code=CODE)
+        return result, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(register, range(args.registrations)))
+    elapsed = time.perf_counter() - started
+
+    created = sum(1 for result, _ in results if result is None) + 1
+    used = store.get_invitation_code(CODE)['used_count']
+    assert created == used <= max_uses, (created, used, max_uses)
+    latencies = sorted(ms for _, ms in results)
+    return {
+        'shards': shards,
+        'per_second': len(results) / elapsed,
+        'p50_ms': statistics.median(latencies),
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1],
+        'created': created,
+        'max_uses': max_uses,
+        'transactions': db.round_trips['TransactWriteItems']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--registrations', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--item-write-ms', type=float, default=2.0)
+    parser.add_argument('--latency-ms', type=float, default=3.0)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    print(f"registros: {args.registrations}  hilos: {args.workers}  "
+          f"escritura por item: {args.item_write_ms} ms  latencia: {args.latency_ms} ms")
+    for shards in args.shards:
+        r = run(shards, args)
+        print(f"shards={r['shards']:3d}  {r['per_second']:8.1f} registros/s  p50={r['p50_ms']:7.2f} ms  "
+              f"p99={r['p99_ms']:8.2f} ms  creados={r['created']}/{r['max_uses']}  "
+              f"transacciones={r['transactions']}")
+
+
+if __name__ == '__main__':
+    main()
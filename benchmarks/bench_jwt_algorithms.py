@@ -0,0 +1,62 @@
+"""
+Firmas y verificaciones por segundo de los JWT con HS256, EdDSA y RS256.
+
+Firma con jwt_keys.sign (payload del login) y verifica con
+auth_helpers._decode_token (sin la cache de tokens): header, búsqueda de la
+clave por kid y verificación de la firma. Informa también el tamaño del token.
+
+Uso:
+    python benchmarks/bench_jwt_algorithms.py [segundos por medición]
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+import auth_helpers  # noqa: E402
+import jwt_keys  # noqa: E402
+
+PAYLOAD = {
+    'user_id': str(uuid.uuid4()),
+    'email': 'trabajador@example.com',
+    'user_type': 'staff',
+    'staff_tier': 'trabajador',
+    'exp': datetime.utcnow() + timedelta(hours=24),
+    'iat': datetime.utcnow(),
+    'jti': uuid.uuid4().hex,
+    'frontend_type': 'staff',
+    'pm': 'AB8'
+}
+
+
+def rate(fn, seconds):
+    fn()
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for _ in range(20):
+            fn()
+        count += 20
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    keyring = jwt_keys.get_keyring()
+    print(f"{'algoritmo':<10}{'firmas/s':>12}{'verif./s':>12}{'µs firma':>11}{'µs verif.':>11}{'bytes':>8}")
+    for alg in jwt_keys.SUPPORTED_ALGORITHMS:
+        if alg != 'HS256':
+            keyring.rotate(alg)
+        token = jwt_keys.sign(PAYLOAD, algorithm=alg)
+        assert auth_helpers._decode_token(token) is not None
+        signs = rate(lambda: jwt_keys.sign(PAYLOAD, algorithm=alg), seconds)
+        verifies = rate(lambda: auth_helpers._decode_token(token), seconds)
+        print(f"{alg:<10}{signs:>12.0f}{verifies:>12.0f}{1e6 / signs:>11.1f}{1e6 / verifies:>11.1f}{len(token):>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark de logging: print(json.dumps(event, indent=2)) vs structured_logging.
+
+Mide el costo por request de registrar un evento realista de API Gateway
+(headers + body) y la latencia del handler de login en su camino de
+validación, con la salida redirigida a /dev/null.
+
+Uso:
+    python benchmarks/bench_logging.py [iteraciones]
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ['AUDIT_SINK'] = 'none'
+
+import LoginUsuario  # noqa: E402
+import structured_logging  # noqa: E402
+
+EVENT = {
+    'resource': '/auth/login',
+    'path': '/auth/login',
+    'httpMethod': 'POST',
+    'headers': {
+        'Accept': 'application/json',
+        'Content-Type': 'application/json',
+        'Cookie': 'auth_token=eyJhbGciOiJIUzI1NiJ9.' + 'x' * 300,
+        'Host': 'example.execute-api.us-east-1.amazonaws.com',
+        'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
+        'X-Forwarded-For': '203.0.113.10',
+    },
+    'requestContext': {'requestId': 'c6af9ac6-7b61-11e6-9a41-93e8deadbeef', 'identity': {'sourceIp': '203.0.113.10'}},
+    'body': json.dumps({'email': 'cliente@example.com', 'password': 'secreto123', 'frontend_type': 'client'}),
+}
+
+# Mismo evento pero sin password: el handler responde 400 sin tocar DynamoDB
+HANDLER_EVENT = dict(EVENT, body=json.dumps({'email': 'cliente@example.com'}))
+
+
+def old_logging(event):
+    print("Login event received:", json.dumps(event, indent=2))
+
+
+def new_logging(event):
+    log = structured_logging.get_logger('login')
+    log.log_event(event)
+    structured_logging.flush()
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        old_us = timed(lambda: old_logging(EVENT), iterations)
+        new_us = timed(lambda: new_logging(EVENT), iterations)
+        handler_us = timed(lambda: LoginUsuario.lambda_handler(HANDLER_EVENT, None), iterations)
+
+        # Con muestreo al 10% (LOG_SAMPLE_RATES=login=0.1)
+        logger = structured_logging.get_logger('login')
+        logger.sample_rate = 0.1
+        sampled_us = timed(lambda: (logger.log_event(EVENT), structured_logging.flush()), iterations)
+
+    print(f"iteraciones: {iterations}")
+    print(f"print(json.dumps(indent=2))       {old_us:8.2f} us/request")
+    print(f"structured_logging (100%)         {new_us:8.2f} us/request")
+    print(f"structured_logging (muestreo 10%) {sampled_us:8.2f} us/request")
+    print(f"LoginUsuario 400 (con logging)    {handler_us:8.2f} us/request")
+
+
+if __name__ == '__main__':
+    main()
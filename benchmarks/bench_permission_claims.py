@@ -0,0 +1,77 @@
+"""
+Tamaño del token y throughput del chequeo de permisos: lista vs bitmask.
+
+Compara un token de admin con la lista 'permissions' (formato anterior)
+contra el claim compacto 'pm' (y ambos, el formato del rollout), y el chequeo `permiso in lista` contra la
+membresía en el frozenset decodificado por auth_helpers.token_permissions.
+
+Uso:
+    python benchmarks/bench_permission_claims.py [iteraciones]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import auth_helpers  # noqa: E402
+import CrearUsuario  # noqa: E402
+import LoginUsuario  # noqa: E402
+import permission_codec  # noqa: E402
+
+USER = {
+    'user_id': '7d3c1f0e-2b4a-4c55-9b1e-6f7a8b9c0d1e',
+    'email': 'admin@example.com',
+    'user_type': 'staff',
+    'staff_tier': 'admin',
+    'permissions': CrearUsuario.get_staff_permissions('admin'),
+    'frontend_type': 'staff'
+}
+
+
+def token_with_format(fmt):
+    LoginUsuario.JWT_PERMISSIONS_FORMAT = fmt
+    token, _ = LoginUsuario.generate_jwt_token(USER)
+    return token
+
+
+def checks_per_second(check, iterations):
+    # Peor caso de la lista: el último permiso del tier admin
+    permission = USER['permissions'][-1]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        check(permission)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    # El catálogo debe cubrir todos los permisos de todos los tiers
+    for tier in ('trabajador', 'admin'):
+        assert permission_codec.encode_permissions(CrearUsuario.get_staff_permissions(tier)) is not None
+
+    legacy = token_with_format('legacy')
+    compact = token_with_format('compact')
+    cookie_legacy = len(f"auth_token={legacy}")
+    cookie_compact = len(f"auth_token={compact}")
+    print(f"token admin legacy:  {len(legacy):5d} bytes (cookie {cookie_legacy})")
+    print(f"token admin compact: {len(compact):5d} bytes (cookie {cookie_compact})  "
+          f"-{cookie_legacy - cookie_compact} bytes por request")
+    both = token_with_format('both')
+    print(f"token admin both:    {len(both):5d} bytes (cookie {len(f'auth_token={both}')})  "
+          f"formato por defecto durante el rollout")
+
+    legacy_payload = {'permissions': list(USER['permissions'])}
+    compact_payload = {'pm': permission_codec.encode_permissions(USER['permissions'])}
+    legacy_rate = checks_per_second(lambda p: p in legacy_payload.get('permissions', []), iterations)
+    decoded = auth_helpers.token_permissions(compact_payload)
+    set_rate = checks_per_second(lambda p: p in decoded, iterations)
+    compact_rate = checks_per_second(lambda p: p in auth_helpers.token_permissions(compact_payload), iterations)
+    print(f"chequeo lista (in list):                {legacy_rate:14,.0f} /s")
+    print(f"chequeo frozenset decodificado:         {set_rate:14,.0f} /s")
+    print(f"chequeo token_permissions(payload) + in: {compact_rate:13,.0f} /s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Overhead por request del pipeline común (handler_pipeline) frente al código
+que repetía cada handler: parseo del body, dict CORS propio, try/except-500 y
+json.dumps de cada cuerpo de error.
+
+Los dos handlers de prueba tienen la misma lógica (validación, usuario
+inexistente, respuesta exitosa con los datos del usuario) y no tocan el
+storage, así que se mide solo el costo de la envoltura. El pipeline se mide
+con el encoder disponible (orjson, de requirements.txt) y forzando json, el
+respaldo si orjson no está instalado.
+
+Uso:
+    python benchmarks/bench_pipeline.py [iteraciones]
+"""
+import json
+import os
+import sys
+import time
+import traceback
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ['AUDIT_SINK'] = 'none'
+
+import handler_pipeline  # noqa: E402
+import structured_logging  # noqa: E402
+
+log = structured_logging.get_logger('bench')
+
+USER = {
+    'user_id': 'c0a8012e-6f1b-4e3a-9d2c-5b7a1e9f4d30',
+    'email': 'cliente@example.com',
+    'user_type': 'cliente',
+    'staff_tier': None,
+    'permissions': ['view_orders', 'create_orders', 'view_profile'],
+    'frontend_type': 'client',
+}
+RESPONSE = {
+    'message': 'Login exitoso',
+    'token': 'eyJhbGciOiJIUzI1NiJ9.' + 'x' * 300,
+    'expires_at': '2026-10-18T12:00:00',
+    'user': USER,
+    'redirect_path': '/dashboard',
+}
+
+EVENTS = {
+    '400 campos faltantes': {'body': json.dumps({'email': 'cliente@example.com'})},
+    '401 credenciales': {'body': json.dumps({'email': 'otro@example.com', 'password': 'secreto123'})},
+    '200 login': {'body': json.dumps({'email': 'cliente@example.com', 'password': 'secreto123'})},
+}
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST, OPTIONS, GET',
+    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, Accept',
+    'Content-Type': 'application/json'
+}
+
+
+def legacy_handler(event, context):
+    # Patrón anterior de los handlers
+    try:
+        log.log_event(event)
+        if 'body' in event:
+            if isinstance(event['body'], str):
+                body = json.loads(event['body'])
+            else:
+                body = event['body']
+        else:
+            body = event
+
+        email = body.get('email', '').lower().strip()
+        password = body.get('password')
+        if not email or not password:
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({
+                    'error': 'Campos obligatorios faltantes: email y password son requeridos'
+                })
+            }
+        if email != USER['email']:
+            return {
+                'statusCode': 401,
+                'headers': CORS_HEADERS,
+                'body': json.dumps({
+                    'error': 'Credenciales inválidas'
+                })
+            }
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': json.dumps(RESPONSE)
+        }
+    except Exception as e:
+        log.error("Exception", error=str(e), traceback=traceback.format_exc())
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': f'Error interno del servidor: {str(e)}'})
+        }
+    finally:
+        structured_logging.flush()
+
+
+handler_pipeline.register_error('bench_invalid_credentials', 401, 'Credenciales inválidas')
+
+
+@handler_pipeline.handler('bench')
+def pipeline_handler(body, event, context):
+    email = body.get('email', '').lower().strip()
+    if not email or not body.get('password'):
+        return handler_pipeline.error_response('missing_credentials')
+    if email != USER['email']:
+        return handler_pipeline.error_response('bench_invalid_credentials')
+    return 200, RESPONSE
+
+
+def measure(handler, event, iterations):
+    handler(event, None)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        handler(event, None)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    encoder = (handler_pipeline.json_dumps, handler_pipeline.json_loads)
+    variants = [('anterior', legacy_handler, None), (f'pipeline ({handler_pipeline.JSON_ENCODER})', pipeline_handler, None)]
+    if handler_pipeline.JSON_ENCODER != 'json':
+        variants.append(('pipeline (json)', pipeline_handler, (json.JSONEncoder(
+            default=handler_pipeline._default, separators=(', ', ': ')).encode, json.loads)))
+
+    if handler_pipeline.JSON_ENCODER == 'json':
+        print("orjson no está instalado (pip install -r requirements.txt): el pipeline usa json")
+    print(f"{iterations} requests por caso, µs por request")
+    print(f"{'caso':<22}" + ''.join(f"{name:>18}" for name, _, _ in variants))
+    for case, event in EVENTS.items():
+        row = []
+        for _, handler, override in variants:
+            handler_pipeline.json_dumps, handler_pipeline.json_loads = override or encoder
+            row.append(measure(handler, event, iterations))
+        handler_pipeline.json_dumps, handler_pipeline.json_loads = encoder
+        print(f"{case:<22}" + ''.join(f"{us:>18.2f}" for us in row))
+
+
+if __name__ == '__main__':
+    main()
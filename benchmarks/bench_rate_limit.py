@@ -0,0 +1,107 @@
+"""
+Carga sobre el backend durante un ataque a /auth/login, con y sin límite de intentos.
+
+Escenarios (una cuenta real con contraseña conocida por nadie):
+  - fuerza bruta: un email, una IP
+  - credential stuffing: emails distintos, una IP
+  - distribuido: un email, IPs distintas
+
+Para cada tamaño de ataque cuenta las llamadas a DynamoDB (stand-in local) y
+las verificaciones de contraseña (incluidas las del hash fijo de los emails
+inexistentes, password_hasher.verify_dummy). Con el limiter la carga queda acotada por
+los límites de la ventana, no por el tamaño del ataque.
+
+Uso:
+    python benchmarks/bench_rate_limit.py [tamaños...]
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ['AUDIT_SINK'] = 'none'
+os.environ.setdefault('PASSWORD_HASH_N', '1024')
+os.environ['STORAGE_BACKEND'] = 'dynamodb'
+os.environ['USUARIOS_TABLE'] = 'bench-t_usuarios'
+os.environ['RATE_LIMITS_TABLE'] = 'bench-t_rate_limits'
+
+import dynamo_client  # noqa: E402
+import LoginUsuario  # noqa: E402
+import password_hasher  # noqa: E402
+import rate_limiter  # noqa: E402
+import storage  # noqa: E402
+from local_dynamodb import LocalDynamoDB  # noqa: E402
+
+SCENARIOS = {
+    'fuerza bruta': lambda i: ('victima@example.com', '203.0.113.7'),
+    'credential stuffing': lambda i: (f'user{i}@example.com', '203.0.113.7'),
+    'distribuido': lambda i: ('victima@example.com', f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}')
+}
+
+verifications = [0]
+_verify = password_hasher.verify_password
+_verify_dummy = password_hasher.verify_dummy
+
+
+def counting_verify(password, stored):
+    verifications[0] += 1
+    return _verify(password, stored)
+
+
+def counting_verify_dummy(password):
+    verifications[0] += 1
+    return _verify_dummy(password)
+
+
+LoginUsuario.verify_password = counting_verify
+LoginUsuario.verify_dummy = counting_verify_dummy
+
+
+def run(scenario, attempts, enabled):
+    db = LocalDynamoDB()
+    db.create_table('bench-t_usuarios', 'email')
+    db.create_table('bench-t_rate_limits', 'key')
+    db.Table('bench-t_usuarios').put_item(Item={
+        'email': 'victima@example.com', 'user_id': 'u1', 'user_type': 'cliente',
+        'password': password_hasher.hash_password('una-contraseña-larga'), 'is_active': True
+    })
+    dynamo_client.reset_clients()
+    dynamo_client._resource = db
+    storage.reset_storage()
+    rate_limiter.reset()
+    rate_limiter.LOGIN_RATE_LIMIT_ENABLED = enabled
+    verifications[0] = 0
+
+    target = SCENARIOS[scenario]
+    started = time.perf_counter()
+    throttled = 0
+    for i in range(attempts):
+        email, ip = target(i)
+        response = LoginUsuario.lambda_handler({
+            'body': json.dumps({'email': email, 'password': f'intento-{i}'}),
+            'requestContext': {'identity': {'sourceIp': ip}}
+        }, None)
+        throttled += response['statusCode'] == 429
+    elapsed = time.perf_counter() - started
+    return sum(db.round_trips.values()), verifications[0], throttled, elapsed
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [200, 1000, 5000]
+    print(f"límites: email={rate_limiter.LOGIN_EMAIL_LIMIT} ip={rate_limiter.LOGIN_IP_LIMIT} "
+          f"por {rate_limiter.LOGIN_RATE_WINDOW_SECONDS} s")
+    print(f"{'escenario':<21}{'intentos':>9}{'limiter':>9}{'llamadas DB':>13}{'hashes':>8}{'429':>7}{'tiempo':>9}")
+    for scenario in SCENARIOS:
+        for attempts in sizes:
+            for enabled in (False, True):
+                calls, hashes, throttled, elapsed = run(scenario, attempts, enabled)
+                print(f"{scenario:<21}{attempts:>9}{'sí' if enabled else 'no':>9}{calls:>13}{hashes:>8}"
+                      f"{throttled:>7}{elapsed:>8.2f}s")
+
+
+if __name__ == '__main__':
+    main()
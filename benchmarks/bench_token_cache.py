@@ -0,0 +1,62 @@
+"""
+Throughput de verify_jwt_token con y sin la cache de tokens verificados.
+
+Simula sesiones que reenvían la misma cookie muchas veces: se generan
+`sessions` tokens distintos y se verifican en orden aleatorio.
+
+Uso:
+    python benchmarks/bench_token_cache.py [requests] [sessions]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import jwt  # noqa: E402
+
+import auth_helpers  # noqa: E402
+
+
+def make_tokens(sessions):
+    secret = auth_helpers._get_jwt_secret()
+    exp = int(time.time()) + 3600
+    return [
+        jwt.encode({
+            'user_id': f'user-{i}',
+            'email': f'user{i}@example.com',
+            'user_type': 'staff',
+            'permissions': ['view_products', 'view_orders', 'update_order_status'],
+            'exp': exp
+        }, secret, algorithm='HS256')
+        for i in range(sessions)
+    ]
+
+
+def run(verify, workload):
+    start = time.perf_counter()
+    for token in workload:
+        verify(token)
+    return len(workload) / (time.perf_counter() - start)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    tokens = make_tokens(sessions)
+    workload = [random.choice(tokens) for _ in range(requests)]
+
+    uncached = run(auth_helpers._decode_token, workload)
+    cached = run(auth_helpers.verify_jwt_token, workload)
+    stats = auth_helpers.get_token_cache_stats()
+
+    print(f"requests={requests} sesiones={sessions} TOKEN_CACHE_SIZE={auth_helpers.TOKEN_CACHE_SIZE}")
+    print(f"sin cache: {uncached:12,.0f} verificaciones/s")
+    print(f"con cache: {cached:12,.0f} verificaciones/s  (x{cached / uncached:.1f})")
+    hit_rate = stats['hits'] / max(1, stats['hits'] + stats['misses'])
+    print(f"hits={stats['hits']} misses={stats['misses']} evictions={stats['evictions']} hit_rate={hit_rate:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Listados del dashboard de administración (GET /auth/users) con 100k usuarios.
+
+Siembra --users usuarios (90% clientes, 10% staff, 2% inactivos) en SQLite,
+cuyos índices (atributo clave, atributo de ordenamiento, clave) hacen lo mismo
+que los GSI de t_usuarios, y mide con el handler completo (sin la
+verificación del JWT, cacheada tras el primer request):
+  - primera página de cada listado (clientes, staff por tier, inactivos,
+    prefijo de email y de nombre): p50/p99 en ms
+  - paginación profunda: ms por página recorriendo --deep-pages páginas con
+    el cursor (la primera y la última deben costar lo mismo)
+  - el mismo listado sin índices: leer todos los usuarios, filtrar y ordenar
+    (lo que haría un Scan de la tabla)
+  - memoria: pico de tracemalloc de una página de 1000 usuarios enviada en
+    fragmentos (local_server), concatenada (Lambda) o armando la lista de
+    usuarios y serializándola de una vez
+
+Uso:
+    python benchmarks/bench_user_listing.py [--users 100000] [--limit 50] [--repeat 50] [--deep-pages 200]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ['METRICS_ENABLED'] = 'false'
+os.environ['AUDIT_SINK'] = 'none'
+os.environ['JWT_SECRET'] = 'bench-secret'
+
+import jwt  # noqa: E402
+
+import handler_pipeline  # noqa: E402
+import ListarUsuarios  # noqa: E402
+import storage  # noqa: E402
+import user_listing  # noqa: E402
+
+FIRST_NAMES = ['Ana', 'José', 'María', 'Lucía', 'Martín', 'Sofía', 'Íñigo', 'Valentina', 'Mateo', 'Renata']
+LAST_NAMES = ['Pérez', 'García', 'Rodríguez', 'Álvarez', 'Núñez', 'Quispe', 'Huamán', 'Torres', 'Flores', 'Díaz']
+
+
+class Context:
+    # Lambda (sin streaming) o local_server (con streaming)
+    def __init__(self, streaming):
+        self.response_streaming = streaming
+        self.aws_request_id = 'bench'
+
+
+def seed(store, users, rng):
+    batch = []
+    for i in range(users):
+        staff = rng.random() < 0.1
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        item = {
+            'email': f'user{i:06d}@example.com', 'user_id': f'id-{i:06d}', 'name': name,
+            'password': 'scrypt$16384$8$1$' + 'x' * 88, 'phone': '+51999999999', 'gender': 'F',
+            'user_type': 'staff' if staff else 'cliente', 'created_at': f'2024-01-01T00:00:00.{i:06d}',
+            'updated_at': None, 'last_login': None, 'is_active': rng.random() >= 0.02,
+            'registration_source': 'bench', 'is_verified': True
+        }
+        if staff:
+            item['staff_tier'] = 'admin' if rng.random() < 0.2 else 'trabajador'
+            item['permissions'] = ['view_products', 'view_orders']
+        item.update(storage.user_index_attributes(item))
+        batch.append(item)
+        if len(batch) == 5000:
+            store.batch_write(storage.USERS, batch)
+            batch = []
+    if batch:
+        store.batch_write(storage.USERS, batch)
+
+
+def event(token, **params):
+    return {'httpMethod': 'GET', 'headers': {'Cookie': f'auth_token={token}'},
+            'queryStringParameters': params, 'body': None}
+
+
+def timed(token, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = ListarUsuarios.lambda_handler(event(token, **params), Context(False))
+        timings.append((time.perf_counter() - started) * 1000)
+    assert response['statusCode'] == 200, response['body']
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.99) - 1], json.loads(response['body'])
+
+
+def deep_pages(token, limit, pages):
+    timings = []
+    cursor = None
+    for _ in range(pages):
+        params = {'user_type': 'cliente', 'limit': str(limit)}
+        if cursor:
+            params['cursor'] = cursor
+        started = time.perf_counter()
+        response = ListarUsuarios.lambda_handler(event(token, **params), Context(False))
+        timings.append((time.perf_counter() - started) * 1000)
+        cursor = json.loads(response['body'])['next_cursor']
+        if not cursor:
+            break
+    return timings
+
+
+def scan_listing(store, limit):
+    # Sin índices: todos los usuarios, filtro y orden en memoria
+    started = time.perf_counter()
+    rows = store._connection().execute(f'SELECT item FROM "{storage.USERS}"')
+    clients = [item for item in (json.loads(row[0]) for row in rows) if item.get('user_type') == 'cliente']
+    clients.sort(key=lambda item: (item['created_at'], item['email']), reverse=True)
+    handler_pipeline.json_dumps({'users': [
+        {name: item[name] for name in user_listing.LISTING_FIELDS if name in item} for item in clients[:limit]
+    ]})
+    return (time.perf_counter() - started) * 1000
+
+
+def peak_kib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def memory(token, limit):
+    params = {'user_type': 'cliente', 'limit': str(limit)}
+
+    def streamed():
+        response = ListarUsuarios.lambda_handler(event(token, **params), Context(True))
+        for _ in response['body']:
+            pass
+
+    def joined():
+        ListarUsuarios.lambda_handler(event(token, **params), Context(False))
+
+    def as_list():
+        query = user_listing.resolve_query(user_type='cliente')
+        items = storage.get_storage().query_range(storage.USERS, query.index, query.value, descending=True,
+                                                  page_size=storage.RANGE_QUERY_PAGE_SIZE)
+        users = [item for _, item in zip(range(limit), items)]
+        handler_pipeline.json_dumps({'users': users, 'count': len(users)})
+
+    return {name: peak_kib(fn) for name, fn in (('fragmentos', streamed), ('concatenada', joined), ('lista', as_list))}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--deep-pages', type=int, default=200)
+    parser.add_argument('--memory-limit', type=int, default=1000)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['STORAGE_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = os.path.join(tmp.name, 'auth.db')
+    storage.reset_storage()
+    store = storage.get_storage()
+    started = time.perf_counter()
+    seed(store, args.users, random.Random(1))
+    print(f"usuarios: {args.users} (sembrados en {time.perf_counter() - started:.1f} s)  "
+          f"limit: {args.limit}  storage: sqlite")
+
+    token = jwt.encode({'user_id': 'admin', 'user_type': 'staff', 'permissions': ['manage_all_profiles'],
+                        'exp': int(time.time()) + 3600}, 'bench-secret', algorithm='HS256')
+    limit = str(args.limit)
+    listings = {
+        'clientes': {'user_type': 'cliente', 'limit': limit},
+        'staff admin': {'staff_tier': 'admin', 'limit': limit},
+        'inactivos': {'status': 'inactive', 'limit': limit},
+        'email user01': {'user_type': 'cliente', 'email_prefix': 'user01', 'limit': limit},
+        'nombre josé p': {'user_type': 'cliente', 'name_prefix': 'josé p', 'limit': limit},
+        'clientes fields': {'user_type': 'cliente', 'limit': limit, 'fields': 'email,name'},
+    }
+    for name, params in listings.items():
+        p50, p99, page = timed(token, params, args.repeat)
+        print(f"{name:16s} p50={p50:7.2f} ms  p99={p99:7.2f} ms  usuarios={page['count']}")
+
+    pages = deep_pages(token, args.limit, args.deep_pages)
+    print(f"paginación       {len(pages)} páginas  primera={pages[0]:.2f} ms  "
+          f"mediana={statistics.median(pages):.2f} ms  última={pages[-1]:.2f} ms")
+    print(f"sin índices      {scan_listing(store, args.limit):9.2f} ms por página (lee los {args.users} usuarios)")
+
+    peaks = memory(token, args.memory_limit)
+    print(f"memoria, página de {args.memory_limit}: " + '  '.join(f"{k}={v:.0f} KiB" for k, v in peaks.items()))
+    storage.reset_storage()
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Latencia de /auth/users/batch para lotes de 10, 100 y 500 user_id.
+
+Corre el handler contra el stand-in local de DynamoDB con una latencia fija
+por llamada (--latency-ms, simula el round trip de un Query al GSI) y mide:
+  - secuencial: un Query tras otro (INDEX_QUERY_CONCURRENCY=1)
+  - fan-out: Query en paralelo con INDEX_QUERY_CONCURRENCY hilos
+  - cache: el mismo lote repetido dentro del TTL (sin llamadas a DynamoDB)
+
+Uso:
+    python benchmarks/bench_users_batch.py [--latency-ms 5] [--repeat 5] [--concurrency 16 32]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ['AUDIT_SINK'] = 'none'
+os.environ['STORAGE_BACKEND'] = 'dynamodb'
+os.environ['USUARIOS_TABLE'] = 'bench-t_usuarios'
+
+import jwt  # noqa: E402
+
+import auth_helpers  # noqa: E402
+import dynamo_client  # noqa: E402
+import ObtenerUsuarios  # noqa: E402
+import storage  # noqa: E402
+import user_directory  # noqa: E402
+from local_dynamodb import LocalDynamoDB  # noqa: E402
+
+USERS = 2000
+SIZES = (10, 100, 500)
+
+
+def setup(latency_ms):
+    db = LocalDynamoDB()
+    db.create_table('bench-t_usuarios', 'email')
+    for index, (attribute, sort_attribute, projected) in storage.INDEXES[storage.USERS].items():
+        db.create_index('bench-t_usuarios', index, attribute, sort_attribute, projection=list(projected))
+    for i in range(USERS):
+        db.Table('bench-t_usuarios').put_item(Item={
+            'email': f'user{i}@example.com', 'user_id': f'id-{i}', 'name': f'Usuario {i}',
+            'user_type': 'cliente', 'password': 'hash', 'is_active': True
+        })
+    db.latency = latency_ms / 1000
+    dynamo_client.reset_clients()
+    dynamo_client._resource = db
+    return db
+
+
+def event(size, offset):
+    cookie = jwt.encode({'user_id': 'bench', 'user_type': 'staff', 'permissions': ['view_customers'],
+                         'exp': int(time.time()) + 3600}, auth_helpers._get_jwt_secret(), algorithm='HS256')
+    ids = [f'id-{(offset + i) % USERS}' for i in range(size)]
+    return {'headers': {'Cookie': f'auth_token={cookie}'}, 'body': json.dumps({'user_ids': ids})}
+
+
+def measure(db, size, repeat, warm):
+    samples = []
+    queries = 0
+    for run in range(repeat):
+        request = event(size, run * size)
+        user_directory.clear_cache()
+        if warm:
+            ObtenerUsuarios.lambda_handler(request, None)
+        db.reset_counters()
+        started = time.perf_counter()
+        response = ObtenerUsuarios.lambda_handler(request, None)
+        samples.append((time.perf_counter() - started) * 1000)
+        queries += db.round_trips['Query']
+        assert response['statusCode'] == 200, response
+    return statistics.median(samples), queries // repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 32])
+    args = parser.parse_args()
+
+    db = setup(args.latency_ms)
+    variants = [('secuencial', 1, False)]
+    variants += [(f'fan-out x{c}', c, False) for c in args.concurrency]
+    variants.append(('cache', args.concurrency[0], True))
+
+    print(f"{USERS} usuarios, {args.latency_ms} ms por Query, mediana de {args.repeat} requests")
+    print(f"{'variante':<15}{'ids':>6}{'Query':>8}{'ms':>10}")
+    for name, concurrency, warm in variants:
+        storage.INDEX_QUERY_CONCURRENCY = concurrency
+        storage.reset_storage()
+        for size in SIZES:
+            elapsed, queries = measure(db, size, args.repeat, warm)
+            print(f"{name:<15}{size:>6}{queries:>8}{elapsed:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
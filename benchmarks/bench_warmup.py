@@ -0,0 +1,130 @@
+"""
+Benchmark del priming: latencia del primer request real de un contenedor.
+
+Cada repetición lanza un intérprete nuevo (un contenedor) en uno de tres modos:
+  - cold: el primer request real llega sin warm-up
+  - ping: antes llega un ping de warm-up ({"warmup": true})
+  - init: WARMUP_ON_INIT=true, el priming corre al importar el handler
+    (lo mismo que con concurrencia aprovisionada)
+y mide el import, el ping, el primer request real (login exitoso o registro
+de un cliente) y un segundo request como referencia de contenedor caliente.
+
+Por defecto el storage es SQLite (abrir la conexión es parte del priming);
+con --dynamodb-endpoint se usa DynamoDB (p. ej. DynamoDB Local) con las tablas
+de USUARIOS_TABLE / RATE_LIMITS_TABLE ya creadas.
+
+Uso:
+    python benchmarks/bench_warmup.py [--repetitions 10] [--dynamodb-endpoint URL]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+EMAIL = 'cliente@example.com'
+PASSWORD = 'Password123!'
+
+HANDLERS = {
+    'LoginUsuario': {'email': EMAIL, 'password': PASSWORD, 'frontend_type': 'client'},
+    'CrearUsuario': {'email': 'nuevo{n}@example.com', 'password': PASSWORD, 'name': 'Nuevo',
+                     'user_type': 'cliente', 'frontend_type': 'client'},
+}
+
+PROBE = r'''
+import json, sys, time
+mode = sys.argv[2]
+body = sys.argv[3]
+start = time.perf_counter()
+module = __import__(sys.argv[1])
+import_ms = (time.perf_counter() - start) * 1000
+ping_ms = None
+if mode == 'ping':
+    start = time.perf_counter()
+    module.lambda_handler({'warmup': True}, None)
+    ping_ms = (time.perf_counter() - start) * 1000
+timings = []
+for n in range(2):
+    event = {'body': body.replace('{n}', str(n))}
+    start = time.perf_counter()
+    status = module.lambda_handler(event, None)['statusCode']
+    timings.append((time.perf_counter() - start) * 1000)
+print(json.dumps({
+    'import_ms': import_ms, 'ping_ms': ping_ms,
+    'first_ms': timings[0], 'second_ms': timings[1], 'status': status
+}))
+'''
+
+
+def seed(env):
+    """
+    Crea el usuario del login en el storage configurado en env
+    """
+    saved = dict(os.environ)
+    os.environ.update(env)
+    try:
+        import storage
+        from password_hasher import hash_password
+
+        storage.reset_storage()
+        store = storage.get_storage()
+        store.put(storage.USERS, {
+            'email': EMAIL, 'user_id': 'c0a8012e-6f1b-4e3a-9d2c-5b7a1e9f4d30', 'name': 'Cliente',
+            'user_type': 'cliente', 'password': hash_password(PASSWORD), 'is_active': True
+        })
+        storage.reset_storage()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+def run_once(handler, mode, body, env):
+    env = dict(env, WARMUP_ON_INIT='true' if mode == 'init' else 'false')
+    out = subprocess.run(
+        [sys.executable, '-c', PROBE, handler, mode, json.dumps(body)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repetitions', type=int, default=10)
+    parser.add_argument('--dynamodb-endpoint')
+    args = parser.parse_args()
+
+    env = dict(os.environ, LOG_LEVEL='ERROR', METRICS_ENABLED='false', AUDIT_SINK='none',
+               AWS_DEFAULT_REGION=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+    tmp = None
+    if args.dynamodb_endpoint:
+        env.update(STORAGE_BACKEND='dynamodb', DYNAMODB_ENDPOINT_URL=args.dynamodb_endpoint)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        env.update(STORAGE_BACKEND='sqlite', SQLITE_PATH=os.path.join(tmp.name, 'auth.db'))
+    print(f"storage: {env['STORAGE_BACKEND']}  repeticiones: {args.repetitions}")
+
+    for handler, body in HANDLERS.items():
+        for mode in ('cold', 'ping', 'init'):
+            runs = []
+            for _ in range(args.repetitions):
+                seed(env)
+                runs.append(run_once(handler, mode, body, env))
+                if tmp is not None:
+                    os.remove(env['SQLITE_PATH'])
+            line = (f"{handler:14s} {mode:5s} import={statistics.median(r['import_ms'] for r in runs):8.2f} ms"
+                    f"  first={statistics.median(r['first_ms'] for r in runs):8.2f} ms"
+                    f"  second={statistics.median(r['second_ms'] for r in runs):7.2f} ms")
+            if mode == 'ping':
+                line += f"  ping={statistics.median(r['ping_ms'] for r in runs):8.2f} ms"
+            print(line + f"  (HTTP {runs[0]['status']})")
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
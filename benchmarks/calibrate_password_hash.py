@@ -0,0 +1,77 @@
+"""
+Calibración de los parámetros de scrypt para un tiempo objetivo por hash.
+
+Lambda asigna CPU proporcional a memorySize (1 vCPU completa a 1769 MB), así
+que el tiempo medido localmente se escala por 1769 / memorySize cuando la
+función tiene menos de una vCPU. memorySize se lee de serverless.yml si no se
+indica.
+
+Uso:
+    python benchmarks/calibrate_password_hash.py [--target-ms 100] [--memory-size 1024]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from password_hasher import ScryptHasher  # noqa: E402
+
+FULL_VCPU_MEMORY_MB = 1769
+
+
+def serverless_memory_size():
+    with open(os.path.join(ROOT, 'serverless.yml')) as f:
+        match = re.search(r'^\s*memorySize:\s*(\d+)', f.read(), re.MULTILINE)
+    return int(match.group(1)) if match else 1024
+
+
+def time_hash(hasher, samples):
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash('calibration-password')
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target-ms', type=float, default=100.0)
+    parser.add_argument('--memory-size', type=int, default=None)
+    parser.add_argument('--r', type=int, default=8)
+    parser.add_argument('--p', type=int, default=1)
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args()
+
+    memory_size = args.memory_size or serverless_memory_size()
+    cpu_factor = max(1.0, FULL_VCPU_MEMORY_MB / memory_size)
+    print(f"memorySize={memory_size} MB  factor CPU={cpu_factor:.2f}  objetivo={args.target_ms:.0f} ms")
+
+    chosen = None
+    for log_n in range(12, 21):
+        n = 2 ** log_n
+        # scrypt necesita 128 * n * r bytes de memoria
+        if 128 * n * args.r > memory_size * 1024 * 1024 // 4:
+            break
+        local_ms = time_hash(ScryptHasher(n=n, r=args.r, p=args.p), args.samples)
+        lambda_ms = local_ms * cpu_factor
+        print(f"n=2^{log_n:<2d} ({n:>7d})  local={local_ms:8.1f} ms  estimado Lambda={lambda_ms:8.1f} ms")
+        if lambda_ms <= args.target_ms:
+            chosen = n
+        else:
+            break
+
+    if chosen is None:
+        print("Ningún parámetro cumple el objetivo; usar n=4096 o aumentar memorySize")
+        return
+    print("\nParámetros recomendados (custom.passwordHash.<stage> en serverless.yml):")
+    print(f"  n: {chosen}\n  r: {args.r}\n  p: {args.p}")
+
+
+if __name__ == '__main__':
+    main()
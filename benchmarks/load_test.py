@@ -0,0 +1,350 @@
+"""
+Prueba de carga local de los cuatro handlers (reemplaza los scripts curl).
+
+Ejecuta los lambda_handler en el mismo proceso contra un storage local y
+mide latencia y throughput por endpoint y por fase:
+
+  1. invitaciones: generate-invitation (un código por request)
+  2. registro:     registro de clientes y de staff con los códigos generados
+  3. login:        logins de los usuarios registrados (con contraseñas erróneas)
+  4. mixto:        mezcla ponderada de login, registro, logout y generate-invitation
+
+Cada respuesta se valida contra los status esperados. Reporta p50/p95/p99 y
+requests/s, escribe los resultados en JSON (--output) y compara con un
+baseline guardado (--baseline): sale con código 1 si hay respuestas
+inesperadas o si el p95 o el throughput empeoran más que --tolerance.
+
+Backends (--backend): memory, sqlite (archivo temporal) o dynamodb (el
+stand-in de test/local_dynamodb.py, con --latency-ms por llamada).
+
+Uso:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --backend dynamodb --latency-ms 3 --concurrency 32
+    python benchmarks/load_test.py --output resultados.json --save-baseline
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load_test_baseline.json')
+DEFAULT_MIX = 'login=70,registro=15,logout=10,generate-invitation=5'
+PASSWORD = 'secreto123'
+# Con menos muestras el p95 es prácticamente el máximo: no se compara contra el baseline
+MIN_SAMPLES_FOR_BASELINE = 50
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga local de los handlers de auth')
+    parser.add_argument('--backend', choices=['memory', 'sqlite', 'dynamodb'], default='memory')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latencia por llamada (backend dynamodb)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--codes', type=int, default=50, help='Requests de la fase invitaciones')
+    parser.add_argument('--users', type=int, default=200, help='Registros de la fase registro')
+    parser.add_argument('--staff-ratio', type=float, default=0.2)
+    parser.add_argument('--logins', type=int, default=400, help='Requests de la fase login')
+    parser.add_argument('--bad-password-ratio', type=float, default=0.1)
+    parser.add_argument('--requests', type=int, default=400, help='Requests de la fase mixto')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Pesos de la fase mixto')
+    # Costo bajo por defecto para que el tiempo de scrypt no tape las regresiones del resto;
+    # con --hash-n 16384 se mide la latencia realista de prod
+    parser.add_argument('--hash-n', type=int, default=1024, help='Costo de scrypt (PASSWORD_HASH_N)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=None, help='Archivo JSON con los resultados')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Guarda los resultados como baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Degradación admitida respecto al baseline (0.5 = 50%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='Diferencia mínima de p95 para considerarla regresión')
+    return parser.parse_args(argv)
+
+
+def configure_environment(args, workdir):
+    """
+    Variables de entorno antes de importar los handlers (se leen al importar)
+    """
+    os.environ.setdefault('LOG_LEVEL', 'ERROR')
+    os.environ.setdefault('JWT_SECRET', 'load-test-secret')
+    os.environ['LAST_LOGIN_WRITE_MODE'] = 'sync'
+    if args.hash_n:
+        os.environ['PASSWORD_HASH_N'] = str(args.hash_n)
+    os.environ['STORAGE_BACKEND'] = args.backend
+    os.environ['AUDIT_SINK'] = 'jsonl'
+    os.environ['AUDIT_LOG_PATH'] = os.path.join(workdir, 'audit.jsonl')
+    if args.backend == 'sqlite':
+        os.environ['SQLITE_PATH'] = os.path.join(workdir, 'auth.db')
+    if args.backend != 'dynamodb':
+        os.environ.pop('REVOKED_TOKENS_TABLE', None)
+        return None
+
+    import dynamo_client
+    from local_dynamodb import LocalDynamoDB
+
+    os.environ['USUARIOS_TABLE'] = 'load-t_usuarios'
+    os.environ['INVITATION_CODES_TABLE'] = 'load-t_invitation_codes'
+    os.environ['REVOKED_TOKENS_TABLE'] = 'load-t_revoked_tokens'
+    os.environ['RATE_LIMITS_TABLE'] = 'load-t_rate_limits'
+    db = LocalDynamoDB(latency=args.latency_ms / 1000)
+    db.create_table('load-t_usuarios', 'email')
+    db.create_table('load-t_invitation_codes', 'code')
+    db.create_table('load-t_revoked_tokens', 'jti')
+    db.create_table('load-t_rate_limits', 'key')
+    db.create_index('load-t_revoked_tokens', 'bucket-revoked_at-index', 'bucket', 'revoked_at')
+    dynamo_client.reset_clients()
+    dynamo_client._resource = db
+    return db
+
+
+def percentile(sorted_values, pct):
+    """
+    Percentil por rango más cercano
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample['ms'] for sample in samples)
+    errors = [sample for sample in samples if not sample['ok']]
+    return {
+        'requests': len(samples),
+        'errors': len(errors),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 3) if latencies else None,
+        'max_ms': round(latencies[-1], 3) if latencies else None,
+        'unexpected_statuses': sorted({sample['status'] for sample in errors})
+    }
+
+
+class LoadTest:
+    def __init__(self, args):
+        import CrearUsuario
+        import GenerarInvitationCode
+        import LoginUsuario
+        import LogoutUsuario
+
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.handlers = {
+            'registro': CrearUsuario.lambda_handler,
+            'login': LoginUsuario.lambda_handler,
+            'logout': LogoutUsuario.lambda_handler,
+            'generate-invitation': GenerarInvitationCode.lambda_handler
+        }
+        self.codes = []
+        self.users = []
+        self.tokens = []
+        self.phases = {}
+        # Token staff con generate_invitation_codes (lo exige INVITATION_REQUIRE_AUTH=true)
+        admin_token, _ = LoginUsuario.generate_jwt_token({
+            'user_id': 'load-test-admin', 'email': 'admin@example.com', 'user_type': 'staff',
+            'staff_tier': 'admin', 'permissions': ['generate_invitation_codes'], 'frontend_type': 'staff'
+        })
+        self.admin_headers = {'Cookie': f'auth_token={admin_token}'}
+
+    def call(self, endpoint, body, expected, headers=None):
+        started = time.perf_counter()
+        event = {'body': json.dumps(body)}
+        if headers:
+            event['headers'] = headers
+        response = self.handlers[endpoint](event, None)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        status = response['statusCode']
+        return {
+            'endpoint': endpoint,
+            'status': status,
+            'ok': status in expected,
+            'ms': elapsed_ms,
+            'body': json.loads(response['body']) if status in expected else None
+        }
+
+    # --- operaciones ---
+    def generate_code(self):
+        sample = self.call('generate-invitation', {'max_uses': 1000, 'expires_in_days': 1}, (201,),
+                           headers=self.admin_headers)
+        if sample['ok']:
+            self.codes.append(sample['body']['invitation_code'])
+        return sample
+
+    def register(self, staff=False):
+        email = f"user-{uuid.uuid4().hex[:12]}@example.com"
+        body = {'email': email, 'password': PASSWORD, 'name': 'Load Test'}
+        if staff and self.codes:
+            body.update({'user_type': 'staff', 'staff_tier': 'trabajador', 'frontend_type': 'staff',
+                         'invitation_code': self.random.choice(self.codes)})
+        else:
+            staff = False
+            body.update({'user_type': 'cliente', 'frontend_type': 'client'})
+        sample = self.call('registro', body, (201,))
+        if sample['ok']:
+            self.users.append((email, 'staff' if staff else 'client'))
+        return sample
+
+    def login(self, bad_password=False):
+        email, frontend_type = self.random.choice(self.users)
+        password = PASSWORD + 'x' if bad_password else PASSWORD
+        sample = self.call('login', {'email': email, 'password': password, 'frontend_type': frontend_type},
+                           (401,) if bad_password else (200,))
+        if sample['ok'] and not bad_password:
+            self.tokens.append(sample['body']['token'])
+        return sample
+
+    def logout(self):
+        token = self.tokens.pop() if self.tokens else None
+        return self.call('logout', {'token': token} if token else {}, (200,))
+
+    # --- fases ---
+    def run_phase(self, name, operations):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as pool:
+            samples = list(pool.map(lambda operation: operation(), operations))
+        elapsed = time.perf_counter() - started
+
+        by_endpoint = defaultdict(list)
+        for sample in samples:
+            by_endpoint[sample['endpoint']].append(sample)
+        self.phases[name] = {
+            'elapsed_seconds': round(elapsed, 3),
+            'total': summarize(samples, elapsed),
+            'endpoints': {endpoint: summarize(items, elapsed) for endpoint, items in sorted(by_endpoint.items())}
+        }
+        return samples
+
+    def mixed_operations(self, count):
+        weights = {}
+        for part in self.args.mix.split(','):
+            endpoint, weight = part.split('=')
+            weights[endpoint.strip()] = float(weight)
+        unknown = set(weights) - set(self.handlers)
+        if unknown:
+            raise SystemExit(f"Endpoints desconocidos en --mix: {sorted(unknown)}")
+        factories = {
+            'login': lambda: lambda: self.login(self.random.random() < self.args.bad_password_ratio),
+            'registro': lambda: lambda: self.register(self.random.random() < self.args.staff_ratio),
+            'logout': lambda: self.logout,
+            'generate-invitation': lambda: self.generate_code
+        }
+        endpoints = self.random.choices(list(weights), weights=list(weights.values()), k=count)
+        return [factories[endpoint]() for endpoint in endpoints]
+
+    def run(self):
+        args = self.args
+        self.run_phase('invitaciones', [self.generate_code] * args.codes)
+        self.run_phase('registro', [
+            (lambda staff: lambda: self.register(staff))(self.random.random() < args.staff_ratio)
+            for _ in range(args.users)
+        ])
+        if self.users:
+            self.run_phase('login', [
+                (lambda bad: lambda: self.login(bad))(self.random.random() < args.bad_password_ratio)
+                for _ in range(args.logins)
+            ])
+            self.run_phase('mixto', self.mixed_operations(args.requests))
+
+        endpoints = defaultdict(list)
+        for phase in self.phases.values():
+            for endpoint, summary in phase['endpoints'].items():
+                endpoints[endpoint].append(summary)
+        return {
+            'config': {
+                'backend': args.backend,
+                'latency_ms': args.latency_ms,
+                'concurrency': args.concurrency,
+                'mix': args.mix,
+                'password_hash_n': os.environ.get('PASSWORD_HASH_N'),
+                'seed': args.seed
+            },
+            'phases': self.phases
+        }
+
+
+def compare_with_baseline(results, baseline, tolerance, min_delta_ms=0.0):
+    """
+    Regresiones por fase y endpoint: p95 mayor o throughput menor que el
+    baseline más allá de la tolerancia (sólo con MIN_SAMPLES_FOR_BASELINE
+    requests o más)
+    """
+    regressions = []
+    for phase_name, phase in results['phases'].items():
+        base_phase = baseline.get('phases', {}).get(phase_name)
+        if not base_phase:
+            continue
+        for endpoint, summary in phase['endpoints'].items():
+            base = base_phase['endpoints'].get(endpoint)
+            if not base or summary['requests'] < MIN_SAMPLES_FOR_BASELINE:
+                continue
+            limit = max(base['p95_ms'] * (1 + tolerance), base['p95_ms'] + min_delta_ms)
+            if summary['p95_ms'] > limit:
+                regressions.append(f"{phase_name}/{endpoint}: p95 {summary['p95_ms']} ms > baseline {base['p95_ms']} ms")
+        base_rps = base_phase['total']['throughput_rps']
+        if base_rps and phase['total']['requests'] >= MIN_SAMPLES_FOR_BASELINE and phase['total']['throughput_rps'] < base_rps * (1 - tolerance):
+            regressions.append(f"{phase_name}: {phase['total']['throughput_rps']} req/s < baseline {base_rps} req/s")
+    return regressions
+
+
+def print_report(results):
+    print(f"{'fase':<14}{'endpoint':<22}{'req':>6}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for phase_name, phase in results['phases'].items():
+        rows = list(phase['endpoints'].items()) + [('(total)', phase['total'])]
+        for endpoint, s in rows:
+            print(f"{phase_name:<14}{endpoint:<22}{s['requests']:>6}{s['errors']:>5}{s['throughput_rps']:>9}"
+                  f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='load-test-')
+    try:
+        configure_environment(args, workdir)
+        results = LoadTest(args).run()
+    finally:
+        import storage
+
+        storage.reset_storage()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    failures = [
+        f"{phase_name}/{endpoint}: {s['errors']} respuestas inesperadas {s['unexpected_statuses']}"
+        for phase_name, phase in results['phases'].items()
+        for endpoint, s in phase['endpoints'].items() if s['errors']
+    ]
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline guardado en {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != results['config']:
+            print("Aviso: el baseline se midió con otra configuración", file=sys.stderr)
+        failures += compare_with_baseline(results, baseline, args.tolerance, args.min_delta_ms)
+
+    for failure in failures:
+        print(f"FALLA: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
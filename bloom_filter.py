@@ -0,0 +1,50 @@
+# bloom_filter.py
+"""
+Filtro de Bloom en memoria (sin dependencias externas).
+
+Responde "seguro que no está" o "posiblemente está"; la tasa de falsos
+positivos se fija al construirlo a partir de la capacidad esperada.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity debe ser > 0 y error_rate estar en (0, 1)")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Tamaño y número de funciones hash óptimos para (n, p)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Doble hashing (Kirsch-Mitzenmacher) sobre un solo digest de 128 bits
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hash_count)]
+
+    def add(self, key):
+        bits = self.bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def is_saturated(self):
+        return self.count > self.capacity
@@ -0,0 +1,73 @@
+"""
+Construye las layers de Lambda de serverless.yml (una por archivo
+layers/<nombre>/requirements.txt) antes de `serverless deploy`.
+
+Cada función declara sólo las layers que usa (custom.functionLayers en
+serverless.yml): el registro no carga PyJWT ni cryptography, los JWKS no
+cargan PyJWT y, con HS256, ninguna función carga cryptography. Los paquetes
+se instalan en layers/<nombre>/python (el directorio que Lambda agrega al
+sys.path) con wheels para el runtime del deploy, así no hace falta Docker.
+
+Uso:
+    python build_layers.py [--python-version 3.13] [--platform manylinux2014_x86_64] [layer ...]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+LAYERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layers')
+
+
+def layer_names():
+    return sorted(name for name in os.listdir(LAYERS_DIR)
+                  if os.path.isfile(os.path.join(LAYERS_DIR, name, 'requirements.txt')))
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def build(name, python_version, platform):
+    """
+    Instala las dependencias de la layer y retorna su tamaño descomprimido en bytes
+    """
+    layer = os.path.join(LAYERS_DIR, name)
+    target = os.path.join(layer, 'python')
+    shutil.rmtree(target, ignore_errors=True)
+    subprocess.run([
+        sys.executable, '-m', 'pip', 'install', '--quiet', '--no-compile',
+        '--requirement', os.path.join(layer, 'requirements.txt'),
+        '--target', target,
+        '--platform', platform,
+        '--python-version', python_version,
+        '--implementation', 'cp',
+        '--only-binary=:all:',
+    ], check=True)
+    # Como el slim del plugin: sin caches de bytecode
+    for root, dirs, _ in os.walk(target):
+        for cache in [d for d in dirs if d == '__pycache__']:
+            shutil.rmtree(os.path.join(root, cache))
+            dirs.remove(cache)
+    return directory_size(target)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Construye las layers de Lambda de serverless.yml')
+    parser.add_argument('layers', nargs='*', help='Layers a construir (por defecto todas)')
+    parser.add_argument('--python-version', default='3.13', help='Versión del runtime (provider.runtime)')
+    parser.add_argument('--platform', default='manylinux2014_x86_64', help='Plataforma de los wheels')
+    args = parser.parse_args(argv)
+
+    available = layer_names()
+    unknown = sorted(set(args.layers) - set(available))
+    if unknown:
+        parser.error(f"layers desconocidas: {', '.join(unknown)} (disponibles: {', '.join(available)})")
+    for name in args.layers or available:
+        size = build(name, args.python_version, args.platform)
+        print(f"{name:<8} {size / 1024 / 1024:6.1f} MiB  layers/{name}/python")
+
+
+if __name__ == '__main__':
+    main()
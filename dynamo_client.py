@@ -0,0 +1,204 @@
+# dynamo_client.py
+"""
+Capa compartida de acceso a DynamoDB.
+
+Los recursos y tablas se crean una sola vez por contenedor y se reutilizan en
+todas las invocaciones "warm", en lugar de construir una sesión nueva de boto3
+(credenciales, endpoint, pool HTTP) en cada request.
+
+boto3 se importa recién en el primer acceso, así los caminos que no tocan
+DynamoDB (validaciones, logout) no pagan su importación en el cold start.
+"""
+import os
+import threading
+import time
+
+import metrics
+
+# Límites de la API de DynamoDB
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_GET_MAX_KEYS = 100
+BATCH_MAX_ATTEMPTS = int(os.environ.get('DYNAMODB_BATCH_MAX_ATTEMPTS', '6'))
+
+
+def _build_config():
+    """
+    Configuración del cliente (ajustable por variables de entorno)
+    """
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=int(os.environ.get('DYNAMODB_MAX_POOL_CONNECTIONS', '50')),
+        connect_timeout=float(os.environ.get('DYNAMODB_CONNECT_TIMEOUT', '1')),
+        read_timeout=float(os.environ.get('DYNAMODB_READ_TIMEOUT', '3')),
+        tcp_keepalive=True,
+        retries={
+            'max_attempts': int(os.environ.get('DYNAMODB_MAX_ATTEMPTS', '3')),
+            'mode': 'standard'
+        }
+    )
+
+
+_lock = threading.RLock()
+_resource = None
+_tables = {}
+
+
+def get_resource():
+    """
+    Retorna el recurso DynamoDB del contenedor (se crea en el primer uso)
+    """
+    global _resource
+    if _resource is None:
+        with _lock:
+            if _resource is None:
+                import boto3
+
+                # DYNAMODB_ENDPOINT_URL permite apuntar a DynamoDB Local (on-prem / pruebas de carga)
+                _resource = boto3.session.Session().resource(
+                    'dynamodb',
+                    config=_build_config(),
+                    endpoint_url=os.environ.get('DYNAMODB_ENDPOINT_URL') or None
+                )
+    return _resource
+
+
+def get_client():
+    """
+    Cliente de bajo nivel que comparte el pool de conexiones del recurso
+    """
+    return get_resource().meta.client
+
+
+def get_table(table_name):
+    """
+    Retorna un objeto Table cacheado por nombre
+    """
+    table = _tables.get(table_name)
+    if table is None:
+        with _lock:
+            table = _tables.get(table_name)
+            if table is None:
+                table = get_resource().Table(table_name)
+                _tables[table_name] = table
+    return table
+
+
+def usuarios_table_name():
+    return os.environ.get('USUARIOS_TABLE', 'dev-t_usuarios')
+
+
+def invitation_codes_table_name():
+    return os.environ.get('INVITATION_CODES_TABLE', 'dev-t_invitation_codes')
+
+
+def rate_limits_table_name():
+    return os.environ.get('RATE_LIMITS_TABLE', 'dev-t_rate_limits')
+
+
+def audit_events_table_name():
+    return os.environ.get('AUDIT_EVENTS_TABLE', 'dev-t_audit_events')
+
+
+def usuarios_table():
+    return get_table(usuarios_table_name())
+
+
+def invitation_codes_table():
+    return get_table(invitation_codes_table_name())
+
+
+def serialize(values):
+    """
+    Convierte un dict de valores Python al formato tipado del cliente
+    """
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+    return {k: serializer.serialize(v) for k, v in values.items()}
+
+
+def deserialize(item):
+    from boto3.dynamodb.types import TypeDeserializer
+
+    deserializer = TypeDeserializer()
+    return {k: deserializer.deserialize(v) for k, v in item.items()}
+
+
+def _backoff(attempt):
+    time.sleep(min(1.0, 0.05 * (2 ** attempt)))
+
+
+def batch_write_items(table_name, items):
+    """
+    Escribe los items en lotes de 25 con batch_write_item, reintentando los
+    UnprocessedItems con backoff exponencial. Retorna una lista con el tamaño
+    y el tiempo (ms) de cada lote.
+    """
+    client = get_client()
+    batches = []
+    for start in range(0, len(items), BATCH_WRITE_MAX_ITEMS):
+        chunk = items[start:start + BATCH_WRITE_MAX_ITEMS]
+        request = {table_name: [{'PutRequest': {'Item': serialize(item)}} for item in chunk]}
+        started = time.perf_counter()
+        attempt = 0
+        while request:
+            response = client.batch_write_item(RequestItems=request, **metrics.capacity_kwargs())
+            metrics.record_capacity(response)
+            request = response.get('UnprocessedItems') or {}
+            if request:
+                attempt += 1
+                if attempt >= BATCH_MAX_ATTEMPTS:
+                    pending = sum(len(r) for r in request.values())
+                    raise RuntimeError(f"batch_write_item: {pending} items sin procesar tras {attempt} intentos")
+                _backoff(attempt)
+        batches.append({
+            'size': len(chunk),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+            'retries': attempt
+        })
+    return batches
+
+
+def batch_get_items(table_name, keys, projection=None):
+    """
+    Lee los items de las claves dadas en lotes de 100 con batch_get_item,
+    reintentando las UnprocessedKeys. Retorna los items encontrados.
+    """
+    client = get_client()
+    found = []
+    for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        spec = {'Keys': [serialize(key) for key in keys[start:start + BATCH_GET_MAX_KEYS]]}
+        if projection:
+            spec['ProjectionExpression'] = projection
+        request = {table_name: spec}
+        attempt = 0
+        while request:
+            response = client.batch_get_item(RequestItems=request, **metrics.capacity_kwargs())
+            metrics.record_capacity(response)
+            found.extend(deserialize(item) for item in response.get('Responses', {}).get(table_name, []))
+            request = response.get('UnprocessedKeys') or {}
+            if request:
+                attempt += 1
+                if attempt >= BATCH_MAX_ATTEMPTS:
+                    raise RuntimeError(f"batch_get_item: claves sin procesar tras {attempt} intentos")
+                _backoff(attempt)
+    return found
+
+
+def error_code(error):
+    """
+    Código de error de DynamoDB de una excepción de botocore (None si no aplica)
+    """
+    response = getattr(error, 'response', None) or {}
+    return response.get('Error', {}).get('Code')
+
+
+def reset_clients():
+    """
+    Descarta los clientes cacheados (útil en benchmarks y pruebas)
+    """
+    global _resource
+    with _lock:
+        _resource = None
+        _tables.clear()
@@ -0,0 +1,244 @@
+# handler_pipeline.py
+"""
+Pipeline común de request/response de los handlers.
+
+    @handler_pipeline.handler('login')
+    def lambda_handler(body, event, context):
+        if not body.get('email'):
+            return handler_pipeline.error_response('missing_credentials')
+        return 200, {'message': 'ok'}
+
+El decorador arma el lambda_handler(event, context) con los pasos que antes
+repetía cada handler:
+  - log del evento (muestreado) y métricas de la invocación
+  - parseo del body (string JSON, dict o el evento mismo) -> 400 si no es JSON
+  - serialización del resultado (status, payload[, headers]) con los CORS_HEADERS;
+    un body en fragmentos (stream_response) se concatena salvo que el runtime
+    admita streaming
+  - errores: HttpError -> su respuesta; cualquier otra excepción -> 500
+  - flush de los eventos de auditoría y de los logs al terminar (antes de
+    que Lambda congele el contenedor). Es parte del tiempo de respuesta: el
+    span 'audit_flush' de las métricas mide la escritura de auditoría
+
+Los eventos de warm-up se responden antes de todo lo anterior, después de
+ejecutar los pasos de priming del handler (ver warmup.py).
+
+Las respuestas de error se registran por nombre y se serializan una sola vez
+al importar (ERRORS / register_error). El JSON usa orjson (requirements.txt);
+json estándar queda como respaldo si no está instalado, más lento en las
+respuestas grandes (ver benchmarks/bench_pipeline.py).
+"""
+import functools
+import io
+import json
+import time
+import traceback
+from decimal import Decimal
+
+import audit_log
+import metrics
+import structured_logging
+import warmup
+
+# Headers CORS para todas las respuestas
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST, OPTIONS, GET',
+    'Access-Control-Allow-Headers': 'Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token, Accept',
+    'Content-Type': 'application/json'
+}
+
+
+def _default(value):
+    # Números de DynamoDB y otros tipos que el JSON estándar no serializa
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+try:
+    import orjson
+
+    def json_dumps(value):
+        return orjson.dumps(value, default=_default).decode('utf-8')
+
+    json_loads = orjson.loads
+    JSON_ENCODER = 'orjson'
+except ImportError:
+    _encoder = json.JSONEncoder(default=_default, separators=(', ', ': '))
+
+    json_dumps = _encoder.encode
+    json_loads = json.loads
+    JSON_ENCODER = 'json'
+
+
+# Respuestas de error precalculadas: nombre -> response de API Gateway (no modificar)
+ERRORS = {}
+
+
+def register_error(name, status_code, message, **extra):
+    """
+    Registra (y serializa una vez) una respuesta de error
+    """
+    payload = {'error': message}
+    payload.update(extra)
+    ERRORS[name] = {
+        'statusCode': status_code,
+        'headers': CORS_HEADERS,
+        'body': json_dumps(payload)
+    }
+    return ERRORS[name]
+
+
+def error_response(name, headers=None):
+    """
+    Respuesta de error registrada; con headers extra se retorna una copia
+    """
+    response = ERRORS[name]
+    if headers:
+        response = dict(response, headers=dict(CORS_HEADERS, **headers))
+    return response
+
+
+class HttpError(Exception):
+    """
+    Corta el handler y responde con un error registrado
+    """
+
+    def __init__(self, name, headers=None):
+        super().__init__(name)
+        self.response = error_response(name, headers)
+
+
+register_error('invalid_json', 400, 'El body debe ser un objeto JSON válido')
+register_error('missing_credentials', 400, 'Campos obligatorios faltantes: email y password son requeridos')
+register_error('internal_error', 500, 'Error interno del servidor', code='INTERNAL_ERROR')
+
+
+def response(status_code, payload, headers=None):
+    return {
+        'statusCode': status_code,
+        'headers': dict(CORS_HEADERS, **headers) if headers else CORS_HEADERS,
+        'body': json_dumps(payload)
+    }
+
+
+def stream_response(status_code, chunks, headers=None):
+    """
+    Respuesta con el body como iterador de fragmentos de texto. Con un runtime
+    que admite streaming (context.response_streaming, p. ej. local_server) se
+    envía tal cual; si no, el pipeline la concatena antes de responder
+    """
+    return {
+        'statusCode': status_code,
+        'headers': dict(CORS_HEADERS, **headers) if headers else CORS_HEADERS,
+        'body': chunks
+    }
+
+
+def _materialize(response, context):
+    body = response.get('body')
+    if body is None or isinstance(body, (str, bytes)) or getattr(context, 'response_streaming', False):
+        return response
+    # Sin streaming (API Gateway + Lambda): un solo string, sin lista intermedia de fragmentos
+    buffer = io.StringIO()
+    for chunk in body:
+        buffer.write(chunk)
+    return dict(response, body=buffer.getvalue())
+
+
+def parse_body(event):
+    """
+    Body del evento como dict: string JSON (API Gateway), dict (invocación
+    directa) o el evento completo si no trae 'body'
+    """
+    if not isinstance(event, dict):
+        raise HttpError('invalid_json')
+    if 'body' not in event:
+        return event
+    body = event['body']
+    if body is None or body == '':
+        return {}
+    if isinstance(body, (str, bytes)):
+        try:
+            body = json_loads(body)
+        except ValueError:
+            raise HttpError('invalid_json')
+    if not isinstance(body, dict):
+        raise HttpError('invalid_json')
+    return body
+
+
+def _to_response(result):
+    # Respuesta ya armada (p. ej. error_response) o (status, payload[, headers])
+    if isinstance(result, dict):
+        return result
+    return response(*result)
+
+
+def warmup_response(endpoint, steps):
+    """
+    Respuesta a un ping de warm-up: ejecuta el priming pendiente, sin log del
+    evento ni métricas de la invocación
+    """
+    start = time.perf_counter()
+    cold_start = metrics.consume_cold_start()
+    primed = warmup.prime(steps)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    structured_logging.get_logger(endpoint).info(
+        "Warm-up", cold_start=cold_start, primed=primed, elapsed_ms=elapsed_ms
+    )
+    structured_logging.flush()
+    return response(200, {'warmup': True, 'primed': primed})
+
+
+def handler(endpoint, strict_body=True, warmup_steps=()):
+    """
+    Decorador: fn(body, event, context) -> lambda_handler(event, context).
+    Con strict_body=False un body inválido se trata como {} en lugar de 400.
+    warmup_steps: pasos de warmup.prime para los pings de warm-up y el
+    hook de inicialización (concurrencia aprovisionada / SnapStart)
+    """
+    log = structured_logging.get_logger(endpoint)
+    warmup.init_hook(warmup_steps)
+
+    def decorator(fn):
+        @metrics.instrumented(endpoint)
+        def run(event, context):
+            try:
+                audit_log.bind(event, context)
+                log.log_event(event)
+                with metrics.span('parse_body'):
+                    try:
+                        body = parse_body(event)
+                    except HttpError:
+                        if strict_body:
+                            raise
+                        body = {}
+                return _materialize(_to_response(fn(body, event, context)), context)
+            except HttpError as e:
+                return e.response
+            except Exception as e:
+                log.error("Exception", error=str(e), traceback=traceback.format_exc())
+                return ERRORS['internal_error']
+            finally:
+                # Antes del flush del log: con AUDIT_SINK=log (por defecto) las líneas salen en
+                # el mismo write; con AUDIT_SINK=dynamodb es un BatchWriteItem antes de responder
+                if audit_log.pending():
+                    with metrics.span('audit_flush'):
+                        audit_log.flush()
+                structured_logging.flush()
+
+        @functools.wraps(fn)
+        def lambda_handler(event, context):
+            # Antes del log, el parseo y las métricas: un ping no es un request
+            if warmup.is_warmup_event(event):
+                return warmup_response(endpoint, warmup_steps)
+            return run(event, context)
+
+        return lambda_handler
+    return decorator
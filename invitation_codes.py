@@ -0,0 +1,180 @@
+# invitation_codes.py
+"""
+Formato de los códigos de invitación y caches por contenedor del registro de staff.
+
+El registro valida y consume el código en una sola operación atómica
+(storage.create_user). Antes de hashear la contraseña y escribir, precheck()
+descarta sin tocar el storage:
+  - códigos con formato inválido (CODE_PATTERN)
+  - códigos que no existen (cache negativa, INVITATION_NEGATIVE_CACHE_TTL_SECONDS)
+  - códigos cuya metadata cacheada ya los hace inutilizables: expirados,
+    inactivos o sin usos (cache positiva, INVITATION_CACHE_TTL_SECONDS)
+
+La metadata cacheada sólo sirve para rechazar: un código que parece usable
+siempre pasa por la verificación atómica del storage. Las caches se llenan
+con record_rejection(), que lee el código (una vez) cuando el storage lo
+rechaza, así el camino exitoso sigue siendo una sola escritura. En los
+códigos con contador repartido used_count es la suma de los shards.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import metrics
+import storage
+import structured_logging
+
+log = structured_logging.get_logger('invitation-codes')
+
+# Alfabeto y largo de los códigos (36^8 ≈ 2.8e12 combinaciones)
+CODE_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+CODE_LENGTH = 8
+CODE_PATTERN = re.compile(rf'^[0-9A-Z]{{{CODE_LENGTH}}}$')
+
+INVITATION_NEGATIVE_CACHE_TTL_SECONDS = float(os.environ.get('INVITATION_NEGATIVE_CACHE_TTL_SECONDS', '60'))
+INVITATION_NEGATIVE_CACHE_SIZE = int(os.environ.get('INVITATION_NEGATIVE_CACHE_SIZE', '10000'))
+INVITATION_CACHE_TTL_SECONDS = float(os.environ.get('INVITATION_CACHE_TTL_SECONDS', '300'))
+INVITATION_CACHE_SIZE = int(os.environ.get('INVITATION_CACHE_SIZE', '1000'))
+
+# Atributos del código que se guardan en la cache positiva
+METADATA_ATTRIBUTES = ('is_active', 'expires_at', 'max_uses', 'used_count')
+
+_MISS = object()
+
+
+class TTLCache:
+    """
+    LRU acotada con vencimiento por entrada
+    """
+
+    def __init__(self, ttl_seconds, max_size):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return _MISS
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._items[key]
+                return _MISS
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, now):
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = (value, now + self.ttl_seconds)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+_missing_codes = TTLCache(INVITATION_NEGATIVE_CACHE_TTL_SECONDS, INVITATION_NEGATIVE_CACHE_SIZE)
+_code_metadata = TTLCache(INVITATION_CACHE_TTL_SECONDS, INVITATION_CACHE_SIZE)
+_stats_lock = threading.Lock()
+_stats = {'malformed': 0, 'negative_hits': 0, 'positive_hits': 0, 'misses': 0}
+
+
+def _record(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def is_well_formed(code):
+    return isinstance(code, str) and CODE_PATTERN.match(code) is not None
+
+
+def precheck(code, now=None):
+    """
+    False si ya se sabe que el código no sirve (sin tocar el storage).
+    True no garantiza nada: el uso se valida en storage.create_user
+    """
+    if not is_well_formed(code):
+        _record('malformed')
+        metrics.count('invitation_malformed')
+        return False
+
+    clock = time.monotonic()
+    if _missing_codes.get(code, clock) is not _MISS:
+        _record('negative_hits')
+        metrics.count('invitation_cache_hit')
+        return False
+    metadata = _code_metadata.get(code, clock)
+    if metadata is _MISS:
+        _record('misses')
+        metrics.count('invitation_cache_miss')
+        return True
+
+    _record('positive_hits')
+    metrics.count('invitation_cache_hit')
+    return storage.invitation_usable(metadata, now or datetime.utcnow().isoformat())
+
+
+def record_rejection(code):
+    """
+    Cachea por qué el storage rechazó el código: inexistente (cache negativa)
+    o su metadata (cache positiva). Los errores se registran y se ignoran
+    """
+    if not is_well_formed(code):
+        return
+    try:
+        with metrics.span('invitation_lookup'):
+            item = storage.get_storage().get_invitation_code(code)
+    except Exception as e:
+        log.warning("Error leyendo código de invitación", code=code, error=str(e))
+        return
+    clock = time.monotonic()
+    if item is None:
+        _missing_codes.set(code, True, clock)
+    else:
+        _code_metadata.set(code, {name: item.get(name) for name in METADATA_ATTRIBUTES}, clock)
+
+
+def forget(codes):
+    """
+    Descarta los códigos de ambas caches (p. ej. al crearlos en este contenedor)
+    """
+    for code in codes:
+        _missing_codes.discard(code)
+        _code_metadata.discard(code)
+
+
+def get_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['negative_hits'] + stats['positive_hits'] + stats['misses']
+    stats['hit_rate'] = round((stats['negative_hits'] + stats['positive_hits']) / lookups, 4) if lookups else 0.0
+    stats['negative_size'] = len(_missing_codes)
+    stats['positive_size'] = len(_code_metadata)
+    return stats
+
+
+def reset():
+    """
+    Vacía las caches y los contadores (pruebas y benchmarks)
+    """
+    _missing_codes.clear()
+    _code_metadata.clear()
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,334 @@
+"""
+Servidor HTTP asyncio que aloja todos los handlers de auth en un proceso.
+
+Para entornos on-prem y pruebas de carga, fuera de API Gateway y Lambda:
+  - convierte cada request HTTP en el evento de API Gateway (proxy) que
+    esperan las funciones lambda_handler y devuelve su respuesta tal cual
+    (statusCode, headers con CORS_HEADERS y body); un body en fragmentos
+    (handler_pipeline.stream_response) se envía con Transfer-Encoding: chunked
+  - ejecuta los handlers (hash de contraseñas, llamadas a DynamoDB) en un
+    pool de hilos acotado, con backpressure sobre las conexiones
+  - admite varios procesos worker compartiendo el puerto (SO_REUSEPORT)
+  - GET /__stats devuelve requests/s y requests por segundo de CPU del worker
+
+Para DynamoDB Local definir DYNAMODB_ENDPOINT_URL; sin AWS, STORAGE_BACKEND=sqlite
+o memory (ver storage.py). Un error del servidor responde el 500 genérico de
+los handlers; con LOCAL_SERVER_DEBUG=true incluye el mensaje de la excepción.
+
+Uso:
+    python local_server.py --port 8080 --workers 4 --threads 16
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+import structured_logging
+# Mismos headers que los handlers (API Gateway responde el preflight con cors: true)
+from handler_pipeline import CORS_HEADERS, ERRORS
+
+log = structured_logging.get_logger('local-server')
+
+# Rutas equivalentes a las de serverless.yml: (método, path) -> módulo del handler
+ROUTES = {
+    ('POST', '/auth/registro'): 'CrearUsuario',
+    ('POST', '/auth/login'): 'LoginUsuario',
+    ('POST', '/auth/logout'): 'LogoutUsuario',
+    ('POST', '/auth/generate-invitation'): 'GenerarInvitationCode',
+    ('POST', '/auth/users/batch'): 'ObtenerUsuarios',
+    ('GET', '/auth/users'): 'ListarUsuarios',
+    ('POST', '/auth/introspect'): 'IntrospectarTokens',
+    ('GET', '/auth/.well-known/jwks.json'): 'ObtenerJWKS',
+}
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_SECONDS = 15
+DEBUG_ERRORS = os.environ.get('LOCAL_SERVER_DEBUG', 'false').lower() in ('1', 'true', 'yes')
+
+
+class LambdaContext:
+    """
+    Subconjunto del objeto context de Lambda que puede usar un handler
+    """
+    # Las respuestas con el body en fragmentos (handler_pipeline.stream_response)
+    # se envían con Transfer-Encoding: chunked
+    response_streaming = True
+
+    def __init__(self, function_name, timeout_seconds=20):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def build_event(method, target, headers, body, source_ip):
+    """
+    Request HTTP -> evento de API Gateway (integración proxy REST)
+    """
+    parts = urlsplit(target)
+    query = dict(parse_qsl(parts.query)) or None
+    return {
+        'resource': parts.path,
+        'path': parts.path,
+        'httpMethod': method,
+        'headers': headers,
+        'queryStringParameters': query,
+        'body': body if body else None,
+        'isBase64Encoded': False,
+        'requestContext': {
+            'requestId': str(uuid.uuid4()),
+            'stage': 'local',
+            'httpMethod': method,
+            'path': parts.path,
+            'identity': {'sourceIp': source_ip}
+        }
+    }
+
+
+def parse_content_length(value):
+    """
+    Largo del body según Content-Length (0 si falta); None si no es un entero >= 0
+    """
+    if not value:
+        return 0
+    return int(value) if value.isdigit() else None
+
+
+def load_handler(module_name):
+    return importlib.import_module(module_name).lambda_handler
+
+
+class AuthServer:
+    def __init__(self, threads=16, queue_factor=4, routes=None):
+        self.routes = dict(ROUTES if routes is None else routes)
+        self.handlers = {}
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='handler')
+        # Máximo de requests en vuelo: el resto espera (backpressure)
+        self.slots = asyncio.Semaphore(threads * queue_factor)
+        self.started = time.monotonic()
+        self.cpu_started = time.process_time()
+        self.requests = 0
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        cpu = time.process_time() - self.cpu_started
+        return {
+            'pid': os.getpid(),
+            'requests': self.requests,
+            'uptime_seconds': round(elapsed, 3),
+            'requests_per_second': round(self.requests / elapsed, 1) if elapsed else 0,
+            'cpu_seconds': round(cpu, 3),
+            'requests_per_cpu_second': round(self.requests / cpu, 1) if cpu else None
+        }
+
+    def _handler_for(self, module_name):
+        handler = self.handlers.get(module_name)
+        if handler is None:
+            handler = self.handlers[module_name] = load_handler(module_name)
+        return handler
+
+    async def dispatch(self, method, target, headers, body, source_ip):
+        path = urlsplit(target).path.rstrip('/') or '/'
+        if method == 'GET' and path == '/__stats':
+            return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': json.dumps(self.stats())}
+        if method == 'OPTIONS' and any(route_path == path for _, route_path in self.routes):
+            return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': ''}
+        module_name = self.routes.get((method, path))
+        if module_name is None:
+            status = 405 if any(route_path == path for _, route_path in self.routes) else 404
+            return {'statusCode': status, 'headers': CORS_HEADERS,
+                    'body': json.dumps({'error': HTTPStatus(status).phrase})}
+
+        handler = self._handler_for(module_name)
+        event = build_event(method, target, headers, body, source_ip)
+        context = LambdaContext(module_name)
+        async with self.slots:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self.executor, handler, event, context)
+        self.requests += 1
+        return response
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        source_ip = peer[0] if peer else '127.0.0.1'
+        try:
+            while True:
+                try:
+                    raw = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_SECONDS)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, {'statusCode': 431, 'headers': CORS_HEADERS, 'body': ''}, False)
+                    break
+
+                lines = raw.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._write(writer, {'statusCode': 400, 'headers': CORS_HEADERS, 'body': ''}, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip()] = value.strip()
+                lower = {k.lower(): v for k, v in headers.items()}
+
+                length = parse_content_length(lower.get('content-length'))
+                if length is None:
+                    # Sin un largo válido no se sabe dónde termina el body: se cierra la conexión
+                    await self._write(writer, {'statusCode': 400, 'headers': CORS_HEADERS, 'body': ''}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._write(writer, {'statusCode': 413, 'headers': CORS_HEADERS, 'body': ''}, False)
+                    break
+                body = (await reader.readexactly(length)).decode('utf-8') if length else ''
+
+                keep_alive = lower.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    response = await self.dispatch(method.upper(), target, headers, body, source_ip)
+                except Exception as e:
+                    log.error("Exception", error=str(e), traceback=traceback.format_exc())
+                    structured_logging.flush()
+                    response = ERRORS['internal_error']
+                    if DEBUG_ERRORS:
+                        payload = dict(json.loads(response['body']), details=str(e))
+                        response = dict(response, body=json.dumps(payload))
+                if isinstance(response.get('body'), (str, bytes, type(None))):
+                    await self._write(writer, response, keep_alive)
+                else:
+                    await self._write_stream(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _head(response, framing, keep_alive):
+        status = int(response.get('statusCode', 200))
+        try:
+            phrase = HTTPStatus(status).phrase
+        except ValueError:
+            phrase = ''
+        head = [f"HTTP/1.1 {status} {phrase}"]
+        for name, value in (response.get('headers') or {}).items():
+            head.append(f"{name}: {value}")
+        head.append(framing)
+        head.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1')
+
+    @classmethod
+    async def _write(cls, writer, response, keep_alive):
+        body = response.get('body') or ''
+        payload = body.encode('utf-8') if isinstance(body, str) else body
+        writer.write(cls._head(response, f"Content-Length: {len(payload)}", keep_alive) + payload)
+        await writer.drain()
+
+    async def _write_stream(self, writer, response, keep_alive):
+        """
+        Body en fragmentos: cada uno se pide en el pool de hilos (puede leer
+        del storage) y se envía apenas está, sin armar el body completo
+        """
+        chunks = iter(response['body'])
+        loop = asyncio.get_running_loop()
+        writer.write(self._head(response, 'Transfer-Encoding: chunked', keep_alive))
+        try:
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+                if chunk is None:
+                    break
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                if data:
+                    writer.write(f"{len(data):x}\r\n".encode('latin-1') + data + b'\r\n')
+                    await writer.drain()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def serve(self, host, port, sock=None, ready=None):
+        if sock is not None:
+            server = await asyncio.start_server(self.handle_connection, sock=sock, limit=MAX_HEADER_BYTES)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        if ready is not None:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+
+def _bind(host, port, reuse_port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+def run_worker(host, port, threads, reuse_port):
+    server = AuthServer(threads=threads)
+    sock = _bind(host, port, reuse_port)
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(server.serve(host, port, sock=sock))
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, task.cancel)
+    try:
+        loop.run_until_complete(task)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        print(json.dumps({'worker_stats': server.stats()}), flush=True)
+        server.executor.shutdown(wait=False)
+        loop.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor HTTP local para los handlers de auth')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=1, help='Procesos worker (SO_REUSEPORT)')
+    parser.add_argument('--threads', type=int, default=16, help='Hilos por worker para los handlers')
+    args = parser.parse_args(argv)
+
+    reuse_port = args.workers > 1 and hasattr(socket, 'SO_REUSEPORT')
+    workers = args.workers if reuse_port else 1
+    print(f"Escuchando en http://{args.host}:{args.port} con {workers} worker(s) x {args.threads} hilos", flush=True)
+    if workers == 1:
+        run_worker(args.host, args.port, args.threads, False)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.host, args.port, args.threads, True))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+# metrics.py
+"""
+Métricas por fase de cada invocación en CloudWatch Embedded Metric Format.
+
+    @metrics.instrumented('login')
+    def lambda_handler(event, context):
+        with metrics.span('get_user'):
+            ...
+        metrics.count('invalid_credentials')
+
+Al terminar la invocación se escribe una línea JSON (EMF) con la duración en
+ms de cada span, los contadores y la capacidad consumida de DynamoDB. Las
+dimensiones son Endpoint y ColdStart; el status HTTP va como propiedad.
+
+Con METRICS_ENABLED desactivado (por defecto) instrumented() retorna el
+handler sin envolver y span()/count() no hacen nada.
+"""
+import contextvars
+import functools
+import os
+import threading
+import time
+
+import structured_logging
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'AuthApi')
+
+_current = contextvars.ContextVar('metrics_recorder', default=None)
+_cold_start = True
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('recorder', 'name', 'started')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.add_timing(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+class Recorder:
+    """
+    Métricas de una invocación
+    """
+
+    def __init__(self, endpoint, cold_start):
+        self.endpoint = endpoint
+        self.cold_start = cold_start
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.counters = {}
+        self.consumed_capacity = 0.0
+        self._capacity_lock = threading.Lock()
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def add_timing(self, name, elapsed_ms):
+        # Un span repetido acumula su duración
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed_ms
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_capacity(self, units):
+        # Los contadores de rate_limiter la suman desde otro hilo
+        with self._capacity_lock:
+            self.consumed_capacity += units
+
+    def to_emf(self, status_code=None):
+        self.add_timing('total', (time.perf_counter() - self.started) * 1000)
+        definitions = [{'Name': name, 'Unit': 'Milliseconds'} for name in self.timings]
+        definitions += [{'Name': name, 'Unit': 'Count'} for name in self.counters]
+        definitions.append({'Name': 'ConsumedCapacity', 'Unit': 'Count'})
+
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['Endpoint', 'ColdStart']],
+                    'Metrics': definitions
+                }]
+            },
+            'Endpoint': self.endpoint,
+            'ColdStart': 'true' if self.cold_start else 'false',
+            'ConsumedCapacity': round(self.consumed_capacity, 2)
+        }
+        record.update({name: round(value, 3) for name, value in self.timings.items()})
+        record.update(self.counters)
+        if status_code is not None:
+            record['StatusCode'] = status_code
+        return record
+
+
+def enabled():
+    return METRICS_ENABLED
+
+
+def start(endpoint):
+    """
+    Abre el recorder de la invocación en el contexto actual
+    """
+    global _cold_start
+    recorder = Recorder(endpoint, _cold_start)
+    _cold_start = False
+    return recorder, _current.set(recorder)
+
+
+def consume_cold_start():
+    """
+    True si el contenedor no atendió invocaciones aún; las siguientes ya no
+    son cold start (lo usan los warm-ups, que no emiten métricas)
+    """
+    global _cold_start
+    cold_start, _cold_start = _cold_start, False
+    return cold_start
+
+
+def finish(recorder, token, status_code=None):
+    _current.reset(token)
+    structured_logging.emit(recorder.to_emf(status_code))
+
+
+def span(name):
+    recorder = _current.get()
+    return recorder.span(name) if recorder is not None else _NULL_SPAN
+
+
+def count(name, value=1):
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.count(name, value)
+
+
+def record_capacity(response):
+    """
+    Suma el ConsumedCapacity de una respuesta de DynamoDB (dict o lista)
+    """
+    recorder = _current.get()
+    if recorder is None or not response:
+        return
+    consumed = response.get('ConsumedCapacity')
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    for entry in consumed or []:
+        recorder.add_capacity(float(entry.get('CapacityUnits', 0)))
+
+
+def capacity_kwargs():
+    """
+    Parámetros para que DynamoDB informe la capacidad consumida (vacío si está desactivado)
+    """
+    return {'ReturnConsumedCapacity': 'TOTAL'} if METRICS_ENABLED else {}
+
+
+def instrumented(endpoint):
+    """
+    Decorador de lambda_handler: emite las métricas de cada invocación
+    """
+    def decorator(handler):
+        if not METRICS_ENABLED:
+            return handler
+
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            recorder, token = start(endpoint)
+            response = None
+            try:
+                response = handler(event, context)
+                return response
+            finally:
+                finish(recorder, token, (response or {}).get('statusCode'))
+                structured_logging.flush()
+
+        return wrapper
+    return decorator
@@ -0,0 +1,210 @@
+# password_hasher.py
+"""
+Hash de contraseñas con formato autodescriptivo.
+
+Formato almacenado:
+    scrypt$n=16384,r=8,p=1$<salt base64>$<hash base64>
+
+Los hashes antiguos (SHA-256 sin sal, 64 caracteres hex) se siguen aceptando
+y verify_password indica que deben re-hashearse tras un login exitoso.
+
+Para un email inexistente el login verifica contra un hash fijo
+(verify_dummy), así tarda lo mismo que con un usuario existente y el tiempo
+de respuesta no revela qué cuentas existen.
+
+Parámetros de costo por variable de entorno (definidos por stage en
+serverless.yml): PASSWORD_HASH_N, PASSWORD_HASH_R, PASSWORD_HASH_P.
+Usar benchmarks/calibrate_password_hash.py para elegirlos.
+"""
+import base64
+import hashlib
+import hmac
+import os
+
+
+def _b64encode(raw):
+    return base64.b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _b64decode(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+class PasswordHasher:
+    """
+    Interfaz de un algoritmo de hash de contraseñas
+    """
+    algorithm = None
+    _dummy = None
+
+    def hash(self, password):
+        raise NotImplementedError
+
+    def verify(self, password, stored):
+        raise NotImplementedError
+
+    def needs_rehash(self, stored):
+        return True
+
+    def dummy_hash(self):
+        """
+        Hash de una contraseña aleatoria con los parámetros de este hasher
+        (se calcula una vez por contenedor)
+        """
+        if self._dummy is None:
+            self._dummy = self.hash(_b64encode(os.urandom(16)))
+        return self._dummy
+
+
+class ScryptHasher(PasswordHasher):
+    """
+    scrypt (memory-hard) con sal aleatoria por contraseña
+    """
+    algorithm = 'scrypt'
+
+    def __init__(self, n=16384, r=8, p=1, salt_size=16, dklen=32):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.salt_size = salt_size
+        self.dklen = dklen
+
+    def _derive(self, password, salt, n, r, p, dklen):
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p,
+            maxmem=256 * n * r * p + 1024 * 1024, dklen=dklen
+        )
+
+    def hash(self, password):
+        salt = os.urandom(self.salt_size)
+        digest = self._derive(password, salt, self.n, self.r, self.p, self.dklen)
+        params = f"n={self.n},r={self.r},p={self.p}"
+        return f"{self.algorithm}${params}${_b64encode(salt)}${_b64encode(digest)}"
+
+    def _parse(self, stored):
+        algorithm, params, salt, digest = stored.split('$')
+        if algorithm != self.algorithm:
+            raise ValueError(f"Algoritmo no soportado: {algorithm}")
+        values = dict(part.split('=') for part in params.split(','))
+        return (
+            {'n': int(values['n']), 'r': int(values['r']), 'p': int(values['p'])},
+            _b64decode(salt),
+            _b64decode(digest)
+        )
+
+    def matches_format(self, stored):
+        try:
+            params, salt, digest = self._parse(stored)
+        except (ValueError, KeyError):
+            return False
+        return min(params.values()) > 0 and bool(salt) and bool(digest)
+
+    def verify(self, password, stored):
+        try:
+            params, salt, expected = self._parse(stored)
+        except (ValueError, KeyError):
+            return False
+        actual = self._derive(password, salt, dklen=len(expected), **params)
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, stored):
+        try:
+            params, salt, _ = self._parse(stored)
+        except (ValueError, KeyError):
+            return True
+        return params != {'n': self.n, 'r': self.r, 'p': self.p} or len(salt) < self.salt_size
+
+
+class LegacySha256Hasher(PasswordHasher):
+    """
+    SHA-256 sin sal (formato original). Sólo se usa para verificar
+    """
+    algorithm = 'sha256'
+
+    def hash(self, password):
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password, stored):
+        return hmac.compare_digest(self.hash(password), stored)
+
+    @staticmethod
+    def matches_format(stored):
+        return len(stored) == 64 and '$' not in stored
+
+    @staticmethod
+    def is_hex_digest(stored):
+        # hexdigest() en minúsculas: otro contenido nunca coincide al verificar
+        return len(stored) == 64 and all(c in '0123456789abcdef' for c in stored)
+
+
+HASHERS = {
+    ScryptHasher.algorithm: ScryptHasher,
+}
+
+_default_hasher = None
+
+
+def get_hasher():
+    """
+    Hasher configurado para este stage (se construye una vez por contenedor)
+    """
+    global _default_hasher
+    if _default_hasher is None:
+        algorithm = os.environ.get('PASSWORD_HASH_ALGORITHM', 'scrypt')
+        if algorithm not in HASHERS:
+            raise ValueError(f"PASSWORD_HASH_ALGORITHM inválido: {algorithm}")
+        _default_hasher = HASHERS[algorithm](
+            n=int(os.environ.get('PASSWORD_HASH_N', '16384')),
+            r=int(os.environ.get('PASSWORD_HASH_R', '8')),
+            p=int(os.environ.get('PASSWORD_HASH_P', '1'))
+        )
+    return _default_hasher
+
+
+def is_supported_hash(stored):
+    """
+    True si verify_password puede verificar stored: SHA-256 antiguo (64
+    caracteres hex) o un hash de HASHERS bien formado
+    """
+    if not isinstance(stored, str) or not stored:
+        return False
+    if LegacySha256Hasher.matches_format(stored):
+        return LegacySha256Hasher.is_hex_digest(stored)
+    hasher_class = HASHERS.get(stored.split('$', 1)[0])
+    return hasher_class is not None and hasher_class().matches_format(stored)
+
+
+def hash_password(password):
+    return get_hasher().hash(password)
+
+
+def verify_password(password, stored):
+    """
+    Retorna (es_valida, requiere_rehash)
+    """
+    if not password or not isinstance(stored, str) or not stored:
+        return False, False
+
+    if LegacySha256Hasher.matches_format(stored):
+        valid = LegacySha256Hasher().verify(password, stored)
+        return valid, valid
+
+    algorithm = stored.split('$', 1)[0]
+    hasher = get_hasher()
+    if algorithm == hasher.algorithm:
+        valid = hasher.verify(password, stored)
+        return valid, valid and hasher.needs_rehash(stored)
+    if algorithm in HASHERS:
+        valid = HASHERS[algorithm]().verify(password, stored)
+        return valid, valid
+    return False, False
+
+
+def verify_dummy(password):
+    """
+    Verificación con el mismo costo que la de un usuario existente, contra un
+    hash que ninguna contraseña satisface. Retorna (False, False)
+    """
+    hasher = get_hasher()
+    hasher.verify(password or '', hasher.dummy_hash())
+    return False, False
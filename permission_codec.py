@@ -0,0 +1,63 @@
+# permission_codec.py
+"""
+Codificación compacta de permisos en el JWT.
+
+En lugar de la lista completa de strings, el token lleva el claim
+    'pm': '<versión>.<bitmask en hex>'
+donde el bit i corresponde al permiso i del catálogo de esa versión.
+
+Los catálogos son append-only: nunca reordenar ni quitar entradas de una
+versión publicada; para cambios incompatibles agregar una versión nueva.
+El catálogo cubre todos los permisos de CrearUsuario.get_staff_permissions.
+"""
+from functools import lru_cache
+
+PERMISSION_CATALOGS = {
+    1: (
+        'view_products',
+        'view_orders',
+        'update_order_status',
+        'view_customers',
+        'manage_own_profile',
+        'manage_products',
+        'manage_orders',
+        'manage_staff_trabajador',
+        'view_reports',
+        'manage_inventory',
+        'generate_invitation_codes',
+        'manage_all_profiles'
+    )
+}
+CURRENT_VERSION = 1
+
+_BITS = {
+    version: {name: 1 << index for index, name in enumerate(catalog)}
+    for version, catalog in PERMISSION_CATALOGS.items()
+}
+
+
+def encode_permissions(permissions, version=CURRENT_VERSION):
+    """
+    Retorna el claim compacto, o None si algún permiso no está en el catálogo
+    """
+    bits = _BITS[version]
+    mask = 0
+    for permission in permissions or []:
+        if permission not in bits:
+            return None
+        mask |= bits[permission]
+    return f"{version}.{mask:x}"
+
+
+@lru_cache(maxsize=256)
+def decode_permissions(claim):
+    """
+    Claim compacto -> frozenset de permisos (ValueError si es inválido)
+    """
+    try:
+        version, mask = claim.split('.', 1)
+        catalog = PERMISSION_CATALOGS[int(version)]
+        mask = int(mask, 16)
+    except (AttributeError, KeyError, ValueError):
+        raise ValueError(f"Claim de permisos inválido: {claim!r}")
+    return frozenset(name for index, name in enumerate(catalog) if mask >> index & 1)
@@ -0,0 +1,232 @@
+# rate_limiter.py
+"""
+Límite de intentos de login por email y por IP de origen.
+
+Dos niveles, evaluados antes de buscar al usuario o hashear la contraseña:
+  1. Token bucket en memoria del contenedor (capacidad = límite de la
+     ventana, recarga límite/ventana por segundo). Un burst contra el mismo
+     contenedor se corta sin tocar el storage. Se revisan los buckets de
+     todas las claves antes de consumir: un intento que rechaza la IP no
+     gasta un token del email (ni al revés).
+  2. Contador atómico compartido por ventana fija (storage.increment sobre
+     t_rate_limits, con TTL) para el estado entre contenedores. Cuando un
+     contador supera el límite, la clave queda bloqueada localmente hasta el
+     fin de la ventana y los intentos siguientes tampoco llegan al storage.
+     Los contadores de email e IP se incrementan en paralelo: el login espera
+     un solo round trip a t_rate_limits, no uno por clave. Es un costo de cada
+     login permitido (2 UpdateItem, 2 WCU); LOGIN_RATE_SHARED=false lo evita
+     a cambio de límites sólo por contenedor.
+
+Si el storage falla se deja pasar el intento (fail-open) y se registra el error.
+
+Configuración:
+  LOGIN_RATE_LIMIT_ENABLED     'true' / 'false'
+  LOGIN_RATE_WINDOW_SECONDS    ventana de los contadores (300)
+  LOGIN_EMAIL_LIMIT            intentos por email por ventana (10)
+  LOGIN_IP_LIMIT               intentos por IP por ventana (100)
+  LOGIN_RATE_SHARED            'false' desactiva los contadores compartidos
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+import storage
+import structured_logging
+
+log = structured_logging.get_logger('rate-limit')
+
+LOGIN_RATE_LIMIT_ENABLED = os.environ.get('LOGIN_RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LOGIN_RATE_WINDOW_SECONDS = int(os.environ.get('LOGIN_RATE_WINDOW_SECONDS', '300'))
+LOGIN_EMAIL_LIMIT = int(os.environ.get('LOGIN_EMAIL_LIMIT', '10'))
+LOGIN_IP_LIMIT = int(os.environ.get('LOGIN_IP_LIMIT', '100'))
+LOGIN_RATE_SHARED = os.environ.get('LOGIN_RATE_SHARED', 'true').lower() in ('1', 'true', 'yes')
+# Claves con estado local (LRU)
+MAX_LOCAL_KEYS = int(os.environ.get('RATE_LIMIT_LOCAL_KEYS', '10000'))
+
+
+class TokenBucket:
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, capacity, rate, now):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.updated = now
+        # Fin de ventana si el contador compartido ya superó el límite
+        self.blocked_until = 0.0
+
+    def wait(self, now):
+        """
+        Recarga el bucket. Retorna 0 si hay un token, o los segundos hasta el próximo
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        """
+        Consume un token. Retorna 0 si había, o los segundos hasta el próximo
+        """
+        wait = self.wait(now)
+        if not wait:
+            self.tokens -= 1
+        return wait
+
+
+class RateLimiter:
+    def __init__(self, limits, window_seconds, shared=True, max_keys=MAX_LOCAL_KEYS, store=None):
+        """
+        limits: {tipo de clave: intentos por ventana}, p. ej. {'email': 10, 'ip': 100}
+        """
+        self.limits = dict(limits)
+        self.window_seconds = window_seconds
+        self.shared = shared
+        self.max_keys = max_keys
+        self._store = store
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, name, now):
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            kind = name.split(':', 1)[0]
+            limit = self.limits[kind]
+            bucket = self._buckets[name] = TokenBucket(limit, limit / self.window_seconds, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(name)
+        return bucket
+
+    def _shared_count(self, name, window):
+        store = self._store or storage.get_storage()
+        window_end = (window + 1) * self.window_seconds
+        return store.increment(
+            storage.RATE_LIMITS, {'key': f'login:{name}:{window}'}, 'attempts', ttl=window_end + 60
+        )
+
+    def _try_shared_count(self, name, window):
+        # None si el storage falla (fail-open)
+        try:
+            return self._shared_count(name, window)
+        except Exception as e:
+            log.error("Error en el contador de intentos", key=name, error=str(e))
+            return None
+
+    def _shared_counts(self, names, window):
+        """
+        Incrementa los contadores de todas las claves a la vez: la primera en
+        este hilo y el resto en el executor (con el contexto de métricas)
+        """
+        futures = [
+            _get_executor().submit(contextvars.copy_context().run, self._try_shared_count, name, window)
+            for name in names[1:]
+        ]
+        counts = [self._try_shared_count(name, window) for name in names[:1]]
+        return counts + [future.result() for future in futures]
+
+    def check(self, keys, now=None):
+        """
+        Registra un intento para cada clave ({tipo: valor}; los valores vacíos
+        se ignoran). Retorna None si se permite o los segundos a esperar
+        """
+        now = time.time() if now is None else now
+        names = [f'{kind}:{value}' for kind, value in keys.items() if value and kind in self.limits]
+
+        # 1. Token buckets locales: todos con token o no se consume ninguno
+        with self._lock:
+            buckets = [self._bucket(name, now) for name in names]
+            wait = max([bucket.wait(now) for bucket in buckets], default=0)
+            if wait:
+                metrics.count('throttled_local')
+                return wait
+            for bucket in buckets:
+                bucket.tokens -= 1
+        if not self.shared:
+            return None
+
+        # 2. Contadores compartidos de la ventana actual (en paralelo)
+        window = int(now // self.window_seconds)
+        window_end = (window + 1) * self.window_seconds
+        with metrics.span('rate_limit_counter'):
+            counts = self._shared_counts(names, window)
+        for name, attempts in zip(names, counts):
+            if attempts is None:
+                continue
+            if attempts > self.limits[name.split(':', 1)[0]]:
+                with self._lock:
+                    self._bucket(name, now).blocked_until = window_end
+                metrics.count('throttled_shared')
+                log.warning("Intentos de login limitados", key=name, attempts=int(attempts))
+                return window_end - now
+        return None
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+_lock = threading.Lock()
+_login_limiter = None
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='rate-limit')
+    return _executor
+
+
+def get_login_limiter():
+    """
+    Limiter de login del contenedor (None si está desactivado)
+    """
+    global _login_limiter
+    if not LOGIN_RATE_LIMIT_ENABLED:
+        return None
+    if _login_limiter is None:
+        with _lock:
+            if _login_limiter is None:
+                _login_limiter = RateLimiter(
+                    {'email': LOGIN_EMAIL_LIMIT, 'ip': LOGIN_IP_LIMIT},
+                    LOGIN_RATE_WINDOW_SECONDS, shared=LOGIN_RATE_SHARED
+                )
+    return _login_limiter
+
+
+def source_ip(event):
+    """
+    IP de origen del evento de API Gateway
+    """
+    identity = ((event.get('requestContext') or {}).get('identity') or {}) if isinstance(event, dict) else {}
+    return identity.get('sourceIp')
+
+
+def check_login(event, email):
+    """
+    None si el intento de login se permite, o los segundos a esperar
+    """
+    limiter = get_login_limiter()
+    if limiter is None:
+        return None
+    return limiter.check({'email': email, 'ip': source_ip(event)})
+
+
+def reset():
+    """
+    Descarta el limiter del contenedor (pruebas y benchmarks)
+    """
+    global _login_limiter
+    with _lock:
+        _login_limiter = None
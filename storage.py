@@ -0,0 +1,997 @@
+# storage.py
+"""
+Capa de almacenamiento de t_usuarios y t_invitation_codes.
+
+Los handlers usan las operaciones de esta interfaz en lugar de llamar a
+boto3 directamente, así pueden ejecutarse y medirse sin AWS:
+  - get / put (condicional con if_not_exists) / update (SET de atributos)
+  - increment: contador atómico (crea el item si no existe)
+  - batch_get / batch_write
+  - query_index: items de un índice secundario para una lista de valores
+  - query_range: items de un índice secundario ordenados por su atributo de
+    ordenamiento (con prefijo y desde una posición), leídos de a páginas
+  - scan: todos los items de la tabla, de a páginas (sólo scripts de
+    mantenimiento, nunca en un request)
+  - create_user: alta de usuario que, para staff, consume atómicamente un
+    uso del código de invitación
+  - get_invitation_code: código con el uso sumado de sus shards
+
+Backends (STORAGE_BACKEND):
+  - 'dynamodb' (por defecto): las tablas de serverless.yml vía dynamo_client
+  - 'memory': dicts en memoria protegidos por un lock (un proceso)
+  - 'sqlite': archivo SQLite en modo WAL (SQLITE_PATH), compartible entre
+    procesos de la misma máquina
+
+Las tablas se nombran de forma lógica (USERS, INVITATION_CODES); cada una
+tiene una sola clave de partición (TABLE_KEYS); los índices secundarios
+están en INDEXES (los de los listados tienen atributo de ordenamiento y sus
+atributos derivados salen de user_index_attributes).
+
+Contador repartido (códigos de invitación con muchos usos): el item del
+código lleva counter_shards=N y los usos se cuentan en N items 'CODIGO#i'
+(shard_of, is_active, expires_at, max_uses y used_count propios). max_uses
+se reparte entre los shards (split_uses), así cada registro consume un uso
+de un shard elegido al azar con la misma condición atómica y la suma nunca
+supera el total. Las escrituras se distribuyen en N claves de partición en
+lugar de una sola (ver shard_invitation_item).
+
+Cada shard guarda su copia de is_active, expires_at y ttl, y el registro
+sólo lee el shard: verificar también el item del código (un ConditionCheck
+en la transacción) volvería a serializar todos los registros en esa clave.
+Por eso los cambios a esos atributos van por update_invitation_code, que los
+escribe en el código y en todos sus shards; un update directo al item del
+código no alcanza a los shards.
+"""
+import copy
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import dynamo_client
+import metrics
+import structured_logging
+
+log = structured_logging.get_logger('storage')
+
+USERS = 'usuarios'
+INVITATION_CODES = 'invitation_codes'
+RATE_LIMITS = 'rate_limits'
+
+# Tabla lógica -> atributo clave
+TABLE_KEYS = {
+    USERS: 'email',
+    INVITATION_CODES: 'code',
+    RATE_LIMITS: 'key'
+}
+
+USER_ID_INDEX = 'user_id-index'
+# Listados del dashboard de administración (user_listing.py)
+USER_TYPE_CREATED_INDEX = 'user_type-created_at-index'
+STAFF_TIER_CREATED_INDEX = 'staff_tier-created_at-index'
+ACCOUNT_STATUS_CREATED_INDEX = 'account_status-created_at-index'
+USER_TYPE_EMAIL_INDEX = 'user_type-email-index'
+USER_TYPE_NAME_INDEX = 'user_type-name_search-index'
+
+# Atributos de un usuario en los listados. Ni last_login ni updated_at: el login
+# los actualiza y, proyectados, cada login escribiría también en los índices
+LISTING_ATTRIBUTES = ('user_id', 'name', 'user_type', 'staff_tier', 'is_active', 'created_at')
+
+# Valor de account_status de las cuentas desactivadas (las activas no lo tienen:
+# el índice de cuentas inactivas es sparse)
+INACTIVE_STATUS = 'inactive'
+
+
+def _listing_projection(*keys):
+    return tuple(name for name in LISTING_ATTRIBUTES if name not in keys)
+
+
+# Índices secundarios: tabla lógica -> {índice: (atributo clave, atributo de
+# ordenamiento o None, atributos proyectados)}. Proyección mínima (como los GSI
+# de serverless.yml); la clave de la tabla siempre se incluye
+INDEXES = {
+    USERS: {
+        USER_ID_INDEX: ('user_id', None, ('name', 'user_type', 'staff_tier', 'is_active')),
+        USER_TYPE_CREATED_INDEX: ('user_type', 'created_at', _listing_projection('user_type', 'created_at')),
+        STAFF_TIER_CREATED_INDEX: ('staff_tier', 'created_at', _listing_projection('staff_tier', 'created_at')),
+        ACCOUNT_STATUS_CREATED_INDEX: ('account_status', 'created_at', _listing_projection('created_at')),
+        USER_TYPE_EMAIL_INDEX: ('user_type', 'email', _listing_projection('user_type')),
+        USER_TYPE_NAME_INDEX: ('user_type', 'name_search', _listing_projection('user_type'))
+    }
+}
+
+# Tamaño de página de query_range en DynamoDB y SQLite (items por llamada)
+RANGE_QUERY_PAGE_SIZE = int(os.environ.get('RANGE_QUERY_PAGE_SIZE', '200'))
+
+# Consultas en paralelo de query_index en DynamoDB (un Query por valor)
+INDEX_QUERY_CONCURRENCY = int(os.environ.get('INDEX_QUERY_CONCURRENCY', '16'))
+
+# Tabla lógica -> nombre de la tabla DynamoDB (se resuelve en cada llamada por las variables de entorno)
+DYNAMODB_TABLE_NAMES = {
+    USERS: dynamo_client.usuarios_table_name,
+    INVITATION_CODES: dynamo_client.invitation_codes_table_name,
+    RATE_LIMITS: dynamo_client.rate_limits_table_name
+}
+
+
+# Separador de la clave de los shards del contador de usos ('ABCD1234#3')
+SHARD_SEPARATOR = '#'
+
+
+# Atributos del código que cada shard copia (update_invitation_code los mantiene iguales)
+SHARD_COPIED_ATTRIBUTES = ('is_active', 'expires_at', 'ttl')
+
+
+def shard_key(code, index):
+    return f'{code}{SHARD_SEPARATOR}{index}'
+
+
+def split_uses(max_uses, shards):
+    """
+    Reparte max_uses entre los shards (los primeros reciben el resto)
+    """
+    base, extra = divmod(max_uses, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def shard_invitation_item(code_item, shards):
+    """
+    Items a escribir para un código con contador repartido: el código (sin
+    used_count, con counter_shards) y sus shards. Con shards <= 1 el código
+    queda como está
+    """
+    shards = min(shards, code_item['max_uses'])
+    if shards <= 1:
+        return [code_item]
+    parent = {name: value for name, value in code_item.items() if name != 'used_count'}
+    parent['counter_shards'] = shards
+    items = [parent]
+    for i, max_uses in enumerate(split_uses(code_item['max_uses'], shards)):
+        shard = {name: code_item[name] for name in SHARD_COPIED_ATTRIBUTES if name in code_item}
+        shard.update({
+            'code': shard_key(code_item['code'], i),
+            'shard_of': code_item['code'],
+            'max_uses': max_uses,
+            'used_count': 0
+        })
+        items.append(shard)
+    return items
+
+
+def _shard_order(code, shards):
+    # Orden al azar: los registros concurrentes se reparten entre las claves
+    keys = [shard_key(code, i) for i in range(int(shards))]
+    random.shuffle(keys)
+    return keys
+
+
+def _select_invitation(read, code, now):
+    """
+    Item del que se consume el uso (el código o un shard con usos
+    disponibles) o None si el código no sirve. read(clave) -> item o None
+    """
+    if SHARD_SEPARATOR in code:
+        return None
+    item = read(code)
+    if item is not None and 'counter_shards' in item:
+        candidates = (read(key) for key in _shard_order(code, item['counter_shards']))
+        return next((shard for shard in candidates if invitation_usable(shard, now)), None)
+    return item if invitation_usable(item, now) else None
+
+
+def invitation_usable(code_item, now):
+    """
+    Código activo, no expirado y con usos disponibles (now: ISO 8601 UTC)
+    """
+    return (
+        code_item is not None
+        and code_item.get('is_active') is True
+        and code_item.get('expires_at', '') > now
+        and code_item.get('used_count', 0) < code_item.get('max_uses', 0)
+    )
+
+
+def _utc_now(now=None):
+    return now or datetime.utcnow().isoformat()
+
+
+def _project(item, projection):
+    if not projection:
+        return item
+    names = [name.strip() for name in projection.split(',')]
+    return {name: item[name] for name in names if name in item}
+
+
+def _index_projection(table, index):
+    attribute, sort_attribute, projected = INDEXES[table][index]
+    keys = (TABLE_KEYS[table], attribute) + ((sort_attribute,) if sort_attribute else ())
+    return ', '.join(dict.fromkeys(keys + projected))
+
+
+def index_key(table, index, item):
+    """
+    Clave de un item en el índice (clave de la tabla y del índice): la
+    posición desde la que sigue un query_range (start_key)
+    """
+    attribute, sort_attribute, _ = INDEXES[table][index]
+    names = (TABLE_KEYS[table], attribute) + ((sort_attribute,) if sort_attribute else ())
+    return {name: item[name] for name in names}
+
+
+def search_text(value):
+    """
+    Texto normalizado para la búsqueda por prefijo: minúsculas, sin tildes
+    ni espacios repetidos ('José  Pérez' -> 'jose perez')
+    """
+    import unicodedata
+
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.lower().split())
+
+
+def user_index_attributes(user_item):
+    """
+    Atributos derivados que indexan los listados: name_search (búsqueda por
+    nombre) y account_status (sólo en cuentas inactivas). Se escriben junto
+    con el usuario y cuando cambian name o is_active
+    """
+    attributes = {}
+    if user_item.get('name'):
+        attributes['name_search'] = search_text(user_item['name'])
+    if user_item.get('is_active') is False:
+        attributes['account_status'] = INACTIVE_STATUS
+    return attributes
+
+
+class StorageBackend:
+    """
+    Interfaz común. Los items son dicts planos; get/batch_get retornan copias.
+    """
+    name = None
+
+    def get(self, table, key):
+        """Item con la clave dada (dict {atributo_clave: valor}) o None"""
+        raise NotImplementedError
+
+    def put(self, table, item, if_not_exists=False):
+        """Guarda el item. Con if_not_exists retorna False si la clave ya existía"""
+        raise NotImplementedError
+
+    def update(self, table, key, values):
+        """SET de los atributos dados (crea el item si no existe)"""
+        raise NotImplementedError
+
+    def increment(self, table, key, attribute, amount=1, ttl=None):
+        """
+        Suma amount al atributo de forma atómica y retorna el nuevo valor.
+        ttl (epoch en segundos) se guarda en el atributo 'ttl' al crear el item
+        """
+        raise NotImplementedError
+
+    def batch_get(self, table, keys, projection=None):
+        """Items encontrados para las claves (projection: 'a, b' como en DynamoDB)"""
+        raise NotImplementedError
+
+    def batch_write(self, table, items):
+        """Escribe los items en lotes; retorna [{'size', 'elapsed_ms', 'retries'}] por lote"""
+        raise NotImplementedError
+
+    def query_index(self, table, index, values):
+        """
+        Items del índice (INDEXES) cuyo atributo clave está en values, con la
+        proyección del índice. El orden del resultado no está definido
+        """
+        raise NotImplementedError
+
+    def query_range(self, table, index, value, prefix=None, descending=False, start_key=None, page_size=None):
+        """
+        Items del índice con value en su atributo clave, ordenados por el
+        atributo de ordenamiento (y la clave de la tabla), con la proyección
+        del índice. prefix: sólo los que empiezan así (begins_with);
+        start_key (index_key del último item leído): sigue desde ahí, sin
+        incluirlo. Generador: lee de a page_size items a medida que se
+        consumen (RANGE_QUERY_PAGE_SIZE por defecto)
+        """
+        raise NotImplementedError
+
+    def scan(self, table, projection=None, page_size=None):
+        """
+        Todos los items de la tabla (projection: 'a, b'), leídos de a
+        page_size. Generador; sólo para scripts de mantenimiento
+        """
+        raise NotImplementedError
+
+    def create_user(self, user_item, invitation_code=None, now=None):
+        """
+        Crea el usuario si el email no existe. Con invitation_code consume un
+        uso del código en la misma operación atómica. Retorna None si se creó,
+        o el motivo del rechazo: 'email_exists' o 'invalid_invitation'.
+        """
+        raise NotImplementedError
+
+    def get_invitation_code(self, code):
+        """
+        Código de invitación o None; con contador repartido used_count es la
+        suma de los shards
+        """
+        item = self.get(INVITATION_CODES, {'code': code})
+        if item is None or 'counter_shards' not in item:
+            return item
+        keys = [{'code': shard_key(code, i)} for i in range(int(item['counter_shards']))]
+        shards = self.batch_get(INVITATION_CODES, keys, projection='used_count')
+        item['used_count'] = sum(shard.get('used_count', 0) for shard in shards)
+        return item
+
+    def update_invitation_code(self, code, values):
+        """
+        Actualiza el código (p. ej. is_active o expires_at) y, con contador
+        repartido, la copia de SHARD_COPIED_ATTRIBUTES en cada shard, así
+        desactivarlo o acortar su vigencia también corta los registros por
+        sus shards. Retorna False si el código no existe
+        """
+        item = None if SHARD_SEPARATOR in code else self.get(INVITATION_CODES, {'code': code})
+        if item is None:
+            return False
+        self.update(INVITATION_CODES, {'code': code}, values)
+        copied = {name: value for name, value in values.items() if name in SHARD_COPIED_ATTRIBUTES}
+        if copied and 'counter_shards' in item:
+            for i in range(int(item['counter_shards'])):
+                self.update(INVITATION_CODES, {'code': shard_key(code, i)}, copied)
+        return True
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _key_value(table, key_or_item):
+        return key_or_item[TABLE_KEYS[table]]
+
+
+class DynamoDBStorage(StorageBackend):
+    name = 'dynamodb'
+
+    # Condición atómica para consumir un uso del código de invitación
+    # (un código con contador repartido se consume en sus shards, no en el item del código)
+    INVITATION_USABLE_CONDITION = (
+        'is_active = :true AND expires_at > :now AND attribute_not_exists(counter_shards) AND '
+        '(attribute_not_exists(used_count) OR used_count < max_uses)'
+    )
+    # Códigos con contador repartido conocidos por el contenedor (código -> shards)
+    # y shards agotados
+    COUNTER_SHARDS_CACHE_SIZE = 10000
+
+    def __init__(self):
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._counter_shards = {}
+        self._exhausted_shards = set()
+
+    @staticmethod
+    def _table_name(table):
+        return DYNAMODB_TABLE_NAMES[table]()
+
+    def _table(self, table):
+        return dynamo_client.get_table(self._table_name(table))
+
+    def get(self, table, key):
+        response = self._table(table).get_item(Key=key, **metrics.capacity_kwargs())
+        metrics.record_capacity(response)
+        return response.get('Item')
+
+    def put(self, table, item, if_not_exists=False):
+        kwargs = {'Item': item, **metrics.capacity_kwargs()}
+        if if_not_exists:
+            kwargs['ConditionExpression'] = 'attribute_not_exists(#key)'
+            kwargs['ExpressionAttributeNames'] = {'#key': TABLE_KEYS[table]}
+        try:
+            metrics.record_capacity(self._table(table).put_item(**kwargs))
+        except Exception as e:
+            if if_not_exists and dynamo_client.error_code(e) == 'ConditionalCheckFailedException':
+                return False
+            raise
+        return True
+
+    def update(self, table, key, values):
+        names = {f'#a{i}': name for i, name in enumerate(values)}
+        response = self._table(table).update_item(
+            Key=key,
+            UpdateExpression='SET ' + ', '.join(f'#a{i} = :v{i}' for i in range(len(values))),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues={f':v{i}': value for i, value in enumerate(values.values())},
+            **metrics.capacity_kwargs()
+        )
+        metrics.record_capacity(response)
+
+    def increment(self, table, key, attribute, amount=1, ttl=None):
+        update = 'ADD #attr :amount'
+        names = {'#attr': attribute}
+        values = {':amount': amount}
+        if ttl is not None:
+            update += ' SET #ttl = if_not_exists(#ttl, :ttl)'
+            names['#ttl'] = 'ttl'
+            values[':ttl'] = int(ttl)
+        response = self._table(table).update_item(
+            Key=key,
+            UpdateExpression=update,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues='UPDATED_NEW',
+            **metrics.capacity_kwargs()
+        )
+        metrics.record_capacity(response)
+        return response['Attributes'][attribute]
+
+    def batch_get(self, table, keys, projection=None):
+        return dynamo_client.batch_get_items(self._table_name(table), keys, projection=projection)
+
+    def batch_write(self, table, items):
+        return dynamo_client.batch_write_items(self._table_name(table), items)
+
+    def _query_value(self, table_name, index, attribute, value, capacity):
+        # Un Query por valor (los GSI no admiten batch_get_item); cliente de bajo nivel, thread-safe
+        client = dynamo_client.get_client()
+        kwargs = {
+            'TableName': table_name,
+            'IndexName': index,
+            'KeyConditionExpression': '#key = :value',
+            'ExpressionAttributeNames': {'#key': attribute},
+            'ExpressionAttributeValues': dynamo_client.serialize({':value': value}),
+            **capacity
+        }
+        items = []
+        while True:
+            response = client.query(**kwargs)
+            items.extend(dynamo_client.deserialize(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items, response
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _query_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._executor = ThreadPoolExecutor(max_workers=INDEX_QUERY_CONCURRENCY,
+                                                        thread_name_prefix='index-query')
+        return self._executor
+
+    def query_index(self, table, index, values):
+        attribute = INDEXES[table][index][0]
+        table_name = self._table_name(table)
+        # El recorder de métricas vive en un contextvar: la capacidad se suma en este hilo
+        capacity = metrics.capacity_kwargs()
+        values = list(dict.fromkeys(values))
+        if len(values) <= 1 or INDEX_QUERY_CONCURRENCY <= 1:
+            results = [self._query_value(table_name, index, attribute, value, capacity) for value in values]
+        else:
+            executor = self._query_executor()
+            results = list(executor.map(
+                lambda value: self._query_value(table_name, index, attribute, value, capacity), values
+            ))
+        found = []
+        for items, response in results:
+            metrics.record_capacity(response)
+            found.extend(items)
+        return found
+
+    def query_range(self, table, index, value, prefix=None, descending=False, start_key=None, page_size=None):
+        attribute, sort_attribute, _ = INDEXES[table][index]
+        kwargs = {
+            'TableName': self._table_name(table),
+            'IndexName': index,
+            'KeyConditionExpression': '#key = :value',
+            'ExpressionAttributeNames': {'#key': attribute},
+            'ExpressionAttributeValues': {':value': value},
+            'ScanIndexForward': not descending,
+            'Limit': page_size or RANGE_QUERY_PAGE_SIZE,
+            **metrics.capacity_kwargs()
+        }
+        if prefix:
+            kwargs['KeyConditionExpression'] += ' AND begins_with(#sort, :prefix)'
+            kwargs['ExpressionAttributeNames']['#sort'] = sort_attribute
+            kwargs['ExpressionAttributeValues'][':prefix'] = prefix
+        kwargs['ExpressionAttributeValues'] = dynamo_client.serialize(kwargs['ExpressionAttributeValues'])
+        if start_key:
+            kwargs['ExclusiveStartKey'] = dynamo_client.serialize(start_key)
+        client = dynamo_client.get_client()
+        while True:
+            response = client.query(**kwargs)
+            metrics.record_capacity(response)
+            for item in response.get('Items', []):
+                yield dynamo_client.deserialize(item)
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def scan(self, table, projection=None, page_size=None):
+        kwargs = {'TableName': self._table_name(table), 'Limit': page_size or RANGE_QUERY_PAGE_SIZE}
+        if projection:
+            names = [name.strip() for name in projection.split(',')]
+            kwargs['ProjectionExpression'] = ', '.join(f'#p{i}' for i in range(len(names)))
+            kwargs['ExpressionAttributeNames'] = {f'#p{i}': name for i, name in enumerate(names)}
+        client = dynamo_client.get_client()
+        while True:
+            response = client.scan(**kwargs)
+            for item in response.get('Items', []):
+                yield dynamo_client.deserialize(item)
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def create_user(self, user_item, invitation_code=None, now=None):
+        # Clientes: put condicional sobre attribute_not_exists(email)
+        if invitation_code is None:
+            return None if self.put(USERS, user_item, if_not_exists=True) else 'email_exists'
+        if SHARD_SEPARATOR in invitation_code:
+            return 'invalid_invitation'
+
+        # Staff: transacción que consume el código y crea el usuario. Un código con
+        # contador repartido no cumple la condición (counter_shards) y devuelve su item
+        shards = self._counter_shards.get(invitation_code)
+        if shards is None:
+            result, code_item = self._consume_invitation(invitation_code, user_item, now)
+            if result != 'invalid_invitation' or code_item is None or 'counter_shards' not in code_item:
+                return result
+            shards = int(code_item['counter_shards'])
+            if len(self._counter_shards) >= self.COUNTER_SHARDS_CACHE_SIZE:
+                self._counter_shards.clear()
+            self._counter_shards[invitation_code] = shards
+
+        # Se prueba cada shard (al azar) hasta que uno tenga usos disponibles; los
+        # agotados se recuerdan (max_uses no cambia) y no se vuelven a intentar
+        for key in _shard_order(invitation_code, shards):
+            if key in self._exhausted_shards:
+                continue
+            result, shard = self._consume_invitation(key, user_item, now)
+            if result != 'invalid_invitation':
+                return result
+            if shard is None:
+                continue
+            if shard.get('used_count', 0) < shard.get('max_uses', 0):
+                # Inactivo o expirado: vale para todos los shards
+                return 'invalid_invitation'
+            if len(self._exhausted_shards) >= self.COUNTER_SHARDS_CACHE_SIZE:
+                self._exhausted_shards.clear()
+            self._exhausted_shards.add(key)
+        return 'invalid_invitation'
+
+    def _consume_invitation(self, code, user_item, now):
+        """
+        Transacción: un uso del item del código (o del shard) y el Put del
+        usuario. Retorna (motivo del rechazo o None, item del código si la
+        condición del código falló)
+        """
+        try:
+            response = dynamo_client.get_client().transact_write_items(**metrics.capacity_kwargs(), TransactItems=[
+                {
+                    'Update': {
+                        'TableName': self._table_name(INVITATION_CODES),
+                        'Key': dynamo_client.serialize({'code': code}),
+                        'UpdateExpression': 'SET used_count = if_not_exists(used_count, :zero) + :inc',
+                        'ConditionExpression': self.INVITATION_USABLE_CONDITION,
+                        'ExpressionAttributeValues': dynamo_client.serialize({
+                            ':true': True,
+                            ':now': _utc_now(now),
+                            ':zero': 0,
+                            ':inc': 1
+                        }),
+                        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+                    }
+                },
+                {
+                    'Put': {
+                        'TableName': self._table_name(USERS),
+                        'Item': dynamo_client.serialize(user_item),
+                        'ConditionExpression': 'attribute_not_exists(email)'
+                    }
+                }
+            ])
+            metrics.record_capacity(response)
+            return None, None
+        except Exception as e:
+            if dynamo_client.error_code(e) != 'TransactionCanceledException':
+                raise
+            reasons = e.response.get('CancellationReasons', [])
+            codes = [reason.get('Code') for reason in reasons]
+            log.info("Registro de staff rechazado", code=code, reasons=codes)
+            if codes and codes[0] == 'ConditionalCheckFailed':
+                item = reasons[0].get('Item')
+                return 'invalid_invitation', dynamo_client.deserialize(item) if item else None
+            if len(codes) > 1 and codes[1] == 'ConditionalCheckFailed':
+                return 'email_exists', None
+            raise
+
+
+class MemoryStorage(StorageBackend):
+    """
+    Dicts por tabla protegidos por un único lock. Los items se copian al
+    entrar y al salir para que nadie modifique el estado compartido.
+    """
+    name = 'memory'
+    # Cada cuántos increment() con ttl se descartan los items expirados
+    PURGE_EVERY = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {table: {} for table in TABLE_KEYS}
+        self._increments = 0
+
+    def get(self, table, key):
+        with self._lock:
+            item = self._data[table].get(self._key_value(table, key))
+            return copy.deepcopy(item) if item is not None else None
+
+    def put(self, table, item, if_not_exists=False):
+        key_value = self._key_value(table, item)
+        with self._lock:
+            if if_not_exists and key_value in self._data[table]:
+                return False
+            self._data[table][key_value] = copy.deepcopy(item)
+        return True
+
+    def update(self, table, key, values):
+        key_value = self._key_value(table, key)
+        with self._lock:
+            item = self._data[table].setdefault(key_value, dict(key))
+            item.update(copy.deepcopy(values))
+
+    def increment(self, table, key, attribute, amount=1, ttl=None):
+        key_value = self._key_value(table, key)
+        with self._lock:
+            item = self._data[table].setdefault(key_value, dict(key))
+            item[attribute] = item.get(attribute, 0) + amount
+            if ttl is not None:
+                item.setdefault('ttl', int(ttl))
+                self._increments += 1
+                if self._increments % self.PURGE_EVERY == 0:
+                    self._purge_expired(table)
+            return item[attribute]
+
+    def _purge_expired(self, table):
+        # Equivalente al TTL de DynamoDB para los contadores (se llama con el lock tomado)
+        now = time.time()
+        rows = self._data[table]
+        for key_value in [k for k, item in rows.items() if item.get('ttl', now + 1) < now]:
+            del rows[key_value]
+
+    def batch_get(self, table, keys, projection=None):
+        with self._lock:
+            rows = self._data[table]
+            found = [rows[k] for k in (self._key_value(table, key) for key in keys) if k in rows]
+            return [copy.deepcopy(_project(item, projection)) for item in found]
+
+    def query_index(self, table, index, values):
+        attribute = INDEXES[table][index][0]
+        wanted = set(values)
+        projection = _index_projection(table, index)
+        with self._lock:
+            found = [item for item in self._data[table].values() if item.get(attribute) in wanted]
+            return [copy.deepcopy(_project(item, projection)) for item in found]
+
+    def scan(self, table, projection=None, page_size=None):
+        with self._lock:
+            items = [copy.deepcopy(_project(item, projection)) for item in self._data[table].values()]
+        yield from items
+
+    def query_range(self, table, index, value, prefix=None, descending=False, start_key=None, page_size=None):
+        # Recorre la tabla en cada llamada (backend de pruebas); el orden es el de DynamoDB
+        attribute, sort_attribute, _ = INDEXES[table][index]
+        key = TABLE_KEYS[table]
+        projection = _index_projection(table, index)
+        with self._lock:
+            found = [
+                item for item in self._data[table].values()
+                if item.get(attribute) == value and item.get(sort_attribute) is not None
+                and (not prefix or str(item[sort_attribute]).startswith(prefix))
+            ]
+            found.sort(key=lambda item: (item[sort_attribute], item[key]), reverse=descending)
+            if start_key:
+                position = (start_key[sort_attribute], start_key[key])
+                found = [
+                    item for item in found
+                    if ((item[sort_attribute], item[key]) < position if descending
+                        else (item[sort_attribute], item[key]) > position)
+                ]
+            items = [copy.deepcopy(_project(item, projection)) for item in found]
+        yield from items
+
+    def batch_write(self, table, items):
+        batches = []
+        for start in range(0, len(items), dynamo_client.BATCH_WRITE_MAX_ITEMS):
+            chunk = items[start:start + dynamo_client.BATCH_WRITE_MAX_ITEMS]
+            started = time.perf_counter()
+            with self._lock:
+                for item in chunk:
+                    self._data[table][self._key_value(table, item)] = copy.deepcopy(item)
+            batches.append({
+                'size': len(chunk),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+                'retries': 0
+            })
+        return batches
+
+    def create_user(self, user_item, invitation_code=None, now=None):
+        with self._lock:
+            users = self._data[USERS]
+            if invitation_code is not None:
+                code_item = _select_invitation(self._data[INVITATION_CODES].get, invitation_code, _utc_now(now))
+                if code_item is None:
+                    return 'invalid_invitation'
+            if user_item['email'] in users:
+                return 'email_exists'
+            if invitation_code is not None:
+                code_item['used_count'] = code_item.get('used_count', 0) + 1
+            users[user_item['email']] = copy.deepcopy(user_item)
+        return None
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Una tabla SQLite por tabla lógica: (pk TEXT PRIMARY KEY, item TEXT JSON).
+    WAL permite lectores concurrentes con un escritor; las operaciones de
+    lectura-modificación-escritura usan BEGIN IMMEDIATE para tomar el lock de
+    escritura antes de leer. Una conexión por hilo.
+    """
+    name = 'sqlite'
+
+    def __init__(self, path=None, busy_timeout_ms=5000):
+        self.path = path or os.environ.get('SQLITE_PATH', 'auth.db')
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        with self._transaction() as conn:
+            for table in TABLE_KEYS:
+                conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (pk TEXT PRIMARY KEY, item TEXT NOT NULL)')
+            # Índices secundarios sobre los atributos del JSON (con el de ordenamiento y la
+            # clave de la tabla, como el orden de un GSI)
+            for table, indexes in INDEXES.items():
+                for index, (attribute, sort_attribute, _) in indexes.items():
+                    if sort_attribute is None:
+                        conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_{attribute}" '
+                                     f'ON "{table}" (json_extract(item, \'$.{attribute}\'))')
+                    else:
+                        conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_{attribute}_{sort_attribute}" '
+                                     f'ON "{table}" (json_extract(item, \'$.{attribute}\'), '
+                                     f'json_extract(item, \'$.{sort_attribute}\'), pk)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Import diferido: el backend DynamoDB no necesita sqlite3 en el cold start
+            import sqlite3
+
+            # isolation_level=None: las transacciones se abren explícitamente
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    class _Transaction:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __enter__(self):
+            self.conn.execute('BEGIN IMMEDIATE')
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            self.conn.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+            return False
+
+    def _transaction(self):
+        return self._Transaction(self._connection())
+
+    @staticmethod
+    def _dump(item):
+        return json.dumps(item, default=_json_default, separators=(',', ':'))
+
+    @staticmethod
+    def _read(conn, table, key_value):
+        row = conn.execute(f'SELECT item FROM "{table}" WHERE pk = ?', (key_value,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, conn, table, item):
+        conn.execute(f'INSERT OR REPLACE INTO "{table}" (pk, item) VALUES (?, ?)',
+                     (self._key_value(table, item), self._dump(item)))
+
+    def get(self, table, key):
+        return self._read(self._connection(), table, self._key_value(table, key))
+
+    def put(self, table, item, if_not_exists=False):
+        verb = 'INSERT OR IGNORE' if if_not_exists else 'INSERT OR REPLACE'
+        cursor = self._connection().execute(
+            f'{verb} INTO "{table}" (pk, item) VALUES (?, ?)', (self._key_value(table, item), self._dump(item))
+        )
+        return cursor.rowcount == 1 or not if_not_exists
+
+    def update(self, table, key, values):
+        with self._transaction() as conn:
+            item = self._read(conn, table, self._key_value(table, key)) or dict(key)
+            item.update(values)
+            self._write(conn, table, item)
+
+    def increment(self, table, key, attribute, amount=1, ttl=None):
+        with self._transaction() as conn:
+            item = self._read(conn, table, self._key_value(table, key)) or dict(key)
+            item[attribute] = item.get(attribute, 0) + amount
+            if ttl is not None:
+                item.setdefault('ttl', int(ttl))
+            self._write(conn, table, item)
+            return item[attribute]
+
+    def batch_get(self, table, keys, projection=None):
+        conn = self._connection()
+        found = []
+        # Mismo tamaño de lote que batch_get_item (y bajo el límite de parámetros de SQLite)
+        for start in range(0, len(keys), dynamo_client.BATCH_GET_MAX_KEYS):
+            chunk = [self._key_value(table, key) for key in keys[start:start + dynamo_client.BATCH_GET_MAX_KEYS]]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = conn.execute(f'SELECT item FROM "{table}" WHERE pk IN ({placeholders})', chunk)
+            found.extend(_project(json.loads(row[0]), projection) for row in rows)
+        return found
+
+    def query_index(self, table, index, values):
+        attribute = INDEXES[table][index][0]
+        projection = _index_projection(table, index)
+        values = list(dict.fromkeys(values))
+        conn = self._connection()
+        found = []
+        for start in range(0, len(values), dynamo_client.BATCH_GET_MAX_KEYS):
+            chunk = values[start:start + dynamo_client.BATCH_GET_MAX_KEYS]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = conn.execute(
+                f'SELECT item FROM "{table}" WHERE json_extract(item, \'$.{attribute}\') IN ({placeholders})', chunk
+            )
+            found.extend(_project(json.loads(row[0]), projection) for row in rows)
+        return found
+
+    def scan(self, table, projection=None, page_size=None):
+        page_size = page_size or RANGE_QUERY_PAGE_SIZE
+        conn = self._connection()
+        last = None
+        while True:
+            if last is None:
+                rows = conn.execute(f'SELECT pk, item FROM "{table}" ORDER BY pk LIMIT ?', (page_size,)).fetchall()
+            else:
+                rows = conn.execute(f'SELECT pk, item FROM "{table}" WHERE pk > ? ORDER BY pk LIMIT ?',
+                                    (last, page_size)).fetchall()
+            for row in rows:
+                yield _project(json.loads(row[1]), projection)
+            if len(rows) < page_size:
+                return
+            last = rows[-1][0]
+
+    def query_range(self, table, index, value, prefix=None, descending=False, start_key=None, page_size=None):
+        attribute, sort_attribute, _ = INDEXES[table][index]
+        projection = _index_projection(table, index)
+        sort_expression = f"json_extract(item, '$.{sort_attribute}')"
+        where = [f"json_extract(item, '$.{attribute}') = ?", f'{sort_expression} IS NOT NULL']
+        params = [value]
+        if prefix:
+            # Rango en lugar de LIKE: usa el índice (attribute, sort_attribute, pk)
+            where.append(f'{sort_expression} >= ? AND {sort_expression} < ?')
+            params += [prefix, prefix + '\U0010ffff']
+        order = 'DESC' if descending else 'ASC'
+        page_size = page_size or RANGE_QUERY_PAGE_SIZE
+        conn = self._connection()
+        position = (start_key[sort_attribute], start_key[TABLE_KEYS[table]]) if start_key else None
+        while True:
+            clauses = list(where)
+            args = list(params)
+            if position is not None:
+                # (sort, pk) después de la posición; el primer término es un rango sobre el índice
+                op = '<' if descending else '>'
+                clauses.append(f'{sort_expression} {op}= ? AND ({sort_expression} {op} ? OR pk {op} ?)')
+                args += [position[0], position[0], position[1]]
+            rows = conn.execute(
+                f'SELECT item, {sort_expression}, pk FROM "{table}" WHERE {" AND ".join(clauses)} '
+                f'ORDER BY {sort_expression} {order}, pk {order} LIMIT ?', args + [page_size]
+            ).fetchall()
+            for row in rows:
+                yield _project(json.loads(row[0]), projection)
+            if len(rows) < page_size:
+                return
+            position = (rows[-1][1], rows[-1][2])
+
+    def batch_write(self, table, items):
+        batches = []
+        for start in range(0, len(items), dynamo_client.BATCH_WRITE_MAX_ITEMS):
+            chunk = items[start:start + dynamo_client.BATCH_WRITE_MAX_ITEMS]
+            started = time.perf_counter()
+            with self._transaction() as conn:
+                conn.executemany(
+                    f'INSERT OR REPLACE INTO "{table}" (pk, item) VALUES (?, ?)',
+                    [(self._key_value(table, item), self._dump(item)) for item in chunk]
+                )
+            batches.append({
+                'size': len(chunk),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+                'retries': 0
+            })
+        return batches
+
+    def create_user(self, user_item, invitation_code=None, now=None):
+        with self._transaction() as conn:
+            if invitation_code is not None:
+                code_item = _select_invitation(
+                    lambda key: self._read(conn, INVITATION_CODES, key), invitation_code, _utc_now(now)
+                )
+                if code_item is None:
+                    return 'invalid_invitation'
+            if self._read(conn, USERS, user_item['email']) is not None:
+                return 'email_exists'
+            if invitation_code is not None:
+                code_item['used_count'] = code_item.get('used_count', 0) + 1
+                self._write(conn, INVITATION_CODES, code_item)
+            self._write(conn, USERS, user_item)
+        return None
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+BACKENDS = {
+    'dynamodb': DynamoDBStorage,
+    'memory': MemoryStorage,
+    'sqlite': SQLiteStorage
+}
+
+_lock = threading.Lock()
+_storage = None
+
+
+def create_storage(backend=None, **kwargs):
+    backend = backend or os.environ.get('STORAGE_BACKEND', 'dynamodb')
+    if backend not in BACKENDS:
+        raise ValueError(f"STORAGE_BACKEND inválido: {backend}. Debe ser uno de: {sorted(BACKENDS)}")
+    return BACKENDS[backend](**kwargs)
+
+
+def get_storage():
+    """
+    Backend del contenedor según STORAGE_BACKEND (se crea en el primer uso)
+    """
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def reset_storage():
+    """
+    Descarta el backend cacheado (pruebas y benchmarks)
+    """
+    global _storage
+    with _lock:
+        if _storage is not None:
+            _storage.close()
+        _storage = None
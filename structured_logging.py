@@ -0,0 +1,178 @@
+# structured_logging.py
+"""
+Logging estructurado (JSON lines) para los handlers.
+
+- Nivel configurable con LOG_LEVEL (DEBUG, INFO, WARNING, ERROR).
+- Muestreo por endpoint del log de eventos con LOG_SAMPLE_RATES, por ejemplo
+  "login=0.05,registro=0.5"; LOG_SAMPLE_RATE es la tasa por defecto.
+- Redacción de campos sensibles (password, Cookie, cualquier clave con "token",
+  ...) en headers y body.
+- Las líneas se acumulan en memoria y se escriben en un solo write al final de
+  la invocación (flush) o al llenar el buffer.
+"""
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+# Claves que nunca se escriben en los logs (comparación en minúsculas)
+SENSITIVE_KEYS = frozenset([
+    'password', 'new_password', 'cookie', 'set-cookie', 'authorization',
+    'x-api-key'
+])
+# También se redacta toda clave que contenga alguno de estos textos (tokens,
+# auth_token, refresh_token, x-amz-security-token, ...)
+SENSITIVE_SUBSTRINGS = ('token',)
+REDACTED = '[REDACTED]'
+
+# deque: append/popleft son atómicos, así el buffer es seguro entre hilos
+_buffer = deque()
+
+
+def _parse_sample_rates(raw):
+    rates = {}
+    for part in (raw or '').split(','):
+        if '=' not in part:
+            continue
+        endpoint, rate = part.split('=', 1)
+        try:
+            rates[endpoint.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+LOG_LEVEL = LEVELS.get(os.environ.get('LOG_LEVEL', 'INFO').upper(), LEVELS['INFO'])
+BUFFER_SIZE = int(os.environ.get('LOG_BUFFER_SIZE', '64'))
+DEFAULT_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1.0'))
+SAMPLE_RATES = _parse_sample_rates(os.environ.get('LOG_SAMPLE_RATES', ''))
+
+
+def is_sensitive(key):
+    key = str(key).lower()
+    return key in SENSITIVE_KEYS or any(part in key for part in SENSITIVE_SUBSTRINGS)
+
+
+def redact(value):
+    """
+    Copia del valor con los campos sensibles reemplazados
+    """
+    if isinstance(value, dict):
+        return {k: (REDACTED if is_sensitive(k) else redact(v)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+
+def summarize_event(event):
+    """
+    Resumen redactado de un evento de API Gateway (sin volcar todo el request)
+    """
+    if not isinstance(event, dict):
+        return {'event_type': type(event).__name__}
+
+    summary = {}
+    for key in ('httpMethod', 'path', 'resource'):
+        if key in event:
+            summary[key] = event[key]
+
+    request_context = event.get('requestContext') or {}
+    if request_context.get('requestId'):
+        summary['request_id'] = request_context['requestId']
+    source_ip = (request_context.get('identity') or {}).get('sourceIp')
+    if source_ip:
+        summary['source_ip'] = source_ip
+
+    if event.get('headers'):
+        summary['headers'] = redact(event['headers'])
+
+    body = event.get('body', event if 'httpMethod' not in event else None)
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            body = {'raw_length': len(body)}
+    if isinstance(body, dict):
+        summary['body'] = redact(body)
+    return summary
+
+
+def _write(lines):
+    sys.stdout.write('\n'.join(lines) + '\n')
+    sys.stdout.flush()
+
+
+def flush():
+    """
+    Escribe las líneas pendientes (llamar al final de cada invocación)
+    """
+    if not _buffer:
+        return
+    lines = []
+    try:
+        for _ in range(len(_buffer)):
+            lines.append(_buffer.popleft())
+    except IndexError:
+        pass
+    if lines:
+        _write(lines)
+
+
+def emit(record):
+    """
+    Agrega una línea ya armada (sin nivel ni redacción), p. ej. métricas EMF
+    """
+    _buffer.append(json.dumps(record, separators=(',', ':'), default=str, ensure_ascii=False))
+    if len(_buffer) >= BUFFER_SIZE:
+        flush()
+
+
+class Logger:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.sample_rate = SAMPLE_RATES.get(endpoint, DEFAULT_SAMPLE_RATE)
+
+    def _log(self, level, message, fields, redacted=False):
+        if LEVELS[level] < LOG_LEVEL:
+            return
+        record = {
+            'ts': round(time.time(), 3),
+            'level': level,
+            'endpoint': self.endpoint,
+            'msg': message
+        }
+        if fields:
+            record.update(fields if redacted else redact(fields))
+        _buffer.append(json.dumps(record, separators=(',', ':'), default=str, ensure_ascii=False))
+        if len(_buffer) >= BUFFER_SIZE or LEVELS[level] >= LEVELS['ERROR']:
+            flush()
+
+    def debug(self, message, **fields):
+        self._log('DEBUG', message, fields)
+
+    def info(self, message, **fields):
+        self._log('INFO', message, fields)
+
+    def warning(self, message, **fields):
+        self._log('WARNING', message, fields)
+
+    def error(self, message, **fields):
+        self._log('ERROR', message, fields)
+
+    def log_event(self, event):
+        """
+        Log muestreado del evento recibido, redactado y sin indentación
+        """
+        if LEVELS['INFO'] < LOG_LEVEL:
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self._log('INFO', 'event received', {'event': summarize_event(event)}, redacted=True)
+
+
+def get_logger(endpoint):
+    return Logger(endpoint)
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import audit_log  # noqa: E402
+import dynamo_client  # noqa: E402
+import invitation_codes  # noqa: E402
+import password_hasher  # noqa: E402
+import rate_limiter  # noqa: E402
+import storage  # noqa: E402
+from local_dynamodb import LocalDynamoDB  # noqa: E402
+
+USUARIOS_TABLE = 'test-t_usuarios'
+INVITATION_CODES_TABLE = 'test-t_invitation_codes'
+RATE_LIMITS_TABLE = 'test-t_rate_limits'
+
+
+@pytest.fixture
+def local_dynamodb(monkeypatch):
+    """
+    DynamoDB local con las tablas del servicio, inyectado en dynamo_client
+    """
+    monkeypatch.setenv('USUARIOS_TABLE', USUARIOS_TABLE)
+    monkeypatch.setenv('INVITATION_CODES_TABLE', INVITATION_CODES_TABLE)
+    monkeypatch.setenv('RATE_LIMITS_TABLE', RATE_LIMITS_TABLE)
+
+    db = LocalDynamoDB()
+    db.create_table(USUARIOS_TABLE, 'email')
+    for index, (attribute, sort_attribute, projected) in storage.INDEXES[storage.USERS].items():
+        db.create_index(USUARIOS_TABLE, index, attribute, sort_attribute, projection=list(projected))
+    db.create_table(INVITATION_CODES_TABLE, 'code')
+    db.create_table(RATE_LIMITS_TABLE, 'key')
+
+    monkeypatch.setenv('STORAGE_BACKEND', 'dynamodb')
+    dynamo_client.reset_clients()
+    storage.reset_storage()
+    monkeypatch.setattr(dynamo_client, '_resource', db)
+    yield db
+    dynamo_client.reset_clients()
+    storage.reset_storage()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    # El limiter de login guarda token buckets por contenedor
+    rate_limiter.reset()
+    yield
+    rate_limiter.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_invitation_caches():
+    # Caches de códigos de invitación por contenedor
+    invitation_codes.reset()
+    yield
+    invitation_codes.reset()
+
+
+@pytest.fixture(autouse=True)
+def audit_sink():
+    # Eventos de auditoría en memoria (sin archivo audit.jsonl)
+    audit_log.reset()
+    sink = audit_log.StreamSink()
+    audit_log.set_sink(sink)
+    yield sink
+    audit_log.reset()
+
+
+@pytest.fixture(autouse=True)
+def fast_password_hasher(monkeypatch):
+    # Costo mínimo de scrypt para que las pruebas no dependan de la CPU
+    monkeypatch.setattr(password_hasher, '_default_hasher', password_hasher.ScryptHasher(n=16, r=1, p=1))
@@ -0,0 +1,636 @@
+"""
+Stand-in local de DynamoDB para pruebas y benchmarks.
+
+Implementa en memoria el subconjunto de la API que usan los handlers, tanto a
+nivel de recurso (Table con valores Python) como de cliente (valores tipados):
+get_item, put_item, update_item, delete_item, query, scan (con índices
+secundarios), transact_write_items, batch_write_item y batch_get_item, con
+condition/update expressions reales.
+
+Todas las operaciones son atómicas (un lock global) y se cuentan en
+`round_trips` para poder medir llamadas por request. `latency` agrega una
+espera por llamada (fuera del lock) para simular la red y `unprocessed_rate`
+devuelve esa fracción de cada batch_write_item como UnprocessedItems.
+`item_write_interval` simula el límite de throughput de una clave caliente:
+las escrituras (put, update, transacciones) a un mismo item se encolan y
+cada una lo ocupa esa cantidad de segundos.
+"""
+import random
+import re
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+_TOKEN_RE = re.compile(r"\s*(<>|<=|>=|=|<|>|\(|\)|,|\+|-|\[\d+\]|\.|:[A-Za-z0-9_]+|#[A-Za-z0-9_]+|[A-Za-z_][A-Za-z0-9_]*)")
+
+_MISSING = object()
+
+
+def _normalize(value):
+    """
+    Mismo tipo de valores que devuelve boto3 (números como Decimal)
+    """
+    return _deserializer.deserialize(_serializer.serialize(value))
+
+
+def _sort_value(value):
+    if isinstance(value, (int, Decimal)):
+        return (0, value, '')
+    return (1, 0, '' if value is None else str(value))
+
+
+def _serialize_item(item):
+    return {k: _serializer.serialize(v) for k, v in item.items()}
+
+
+def _deserialize_item(item):
+    return {k: _deserializer.deserialize(v) for k, v in item.items()}
+
+
+def _client_error(code, message, operation, **extra):
+    response = {'Error': {'Code': code, 'Message': message}}
+    response.update(extra)
+    return ClientError(response, operation)
+
+
+class _Expression:
+    """
+    Parser recursivo de condition y update expressions
+    """
+
+    def __init__(self, text, names, values):
+        self.tokens = _TOKEN_RE.findall(text or '')
+        self.pos = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, token):
+        actual = self.next()
+        if actual is None or actual.upper() != token:
+            raise ValueError(f"Se esperaba {token!r} y se encontró {actual!r}")
+
+    # --- operandos ---
+    def path(self):
+        token = self.next()
+        name = self.names[token] if token.startswith('#') else token
+        return ('path', name)
+
+    def operand(self):
+        token = self.peek()
+        if token.startswith(':'):
+            self.next()
+            return ('value', self.values[token])
+        if token in ('if_not_exists', 'size'):
+            self.next()
+            self.expect('(')
+            first = self.path()
+            if token == 'size':
+                self.expect(')')
+                return ('size', first)
+            self.expect(',')
+            default = self.operand()
+            self.expect(')')
+            return ('if_not_exists', first, default)
+        return self.path()
+
+    def arithmetic(self):
+        left = self.operand()
+        while self.peek() in ('+', '-'):
+            op = self.next()
+            left = (op, left, self.operand())
+        return left
+
+    # --- condiciones ---
+    def condition(self):
+        left = self.conjunction()
+        while self.peek() and self.peek().upper() == 'OR':
+            self.next()
+            left = ('or', left, self.conjunction())
+        return left
+
+    def conjunction(self):
+        left = self.negation()
+        while self.peek() and self.peek().upper() == 'AND':
+            self.next()
+            left = ('and', left, self.negation())
+        return left
+
+    def negation(self):
+        if self.peek() and self.peek().upper() == 'NOT':
+            self.next()
+            return ('not', self.negation())
+        return self.primary()
+
+    def primary(self):
+        token = self.peek()
+        if token == '(':
+            self.next()
+            inner = self.condition()
+            self.expect(')')
+            return inner
+        if token in ('attribute_exists', 'attribute_not_exists', 'begins_with', 'contains'):
+            self.next()
+            self.expect('(')
+            path = self.path()
+            arg = None
+            if token in ('begins_with', 'contains'):
+                self.expect(',')
+                arg = self.operand()
+            self.expect(')')
+            return (token, path, arg)
+        left = self.operand()
+        op = self.next()
+        if op.upper() == 'BETWEEN':
+            low = self.operand()
+            self.expect('AND')
+            return ('between', left, low, self.operand())
+        if op.upper() == 'IN':
+            self.expect('(')
+            options = [self.operand()]
+            while self.peek() == ',':
+                self.next()
+                options.append(self.operand())
+            self.expect(')')
+            return ('in', left, options)
+        return ('cmp', op, left, self.operand())
+
+    # --- update expression ---
+    def update_actions(self):
+        actions = []
+        while self.peek() is not None:
+            clause = self.next().upper()
+            while True:
+                path = self.path()
+                if clause == 'SET':
+                    self.expect('=')
+                    actions.append(('set', path[1], self.arithmetic()))
+                elif clause == 'REMOVE':
+                    actions.append(('remove', path[1], None))
+                elif clause == 'ADD':
+                    actions.append(('add', path[1], self.operand()))
+                else:
+                    raise ValueError(f"Cláusula no soportada: {clause}")
+                if self.peek() != ',':
+                    break
+                self.next()
+        return actions
+
+
+def _resolve(node, item):
+    kind = node[0]
+    if kind == 'value':
+        return node[1]
+    if kind == 'path':
+        return item.get(node[1], _MISSING)
+    if kind == 'if_not_exists':
+        current = item.get(node[1][1], _MISSING)
+        return _resolve(node[2], item) if current is _MISSING else current
+    if kind == 'size':
+        current = item.get(node[1][1], _MISSING)
+        return _MISSING if current is _MISSING else Decimal(len(current))
+    left, right = _resolve(node[1], item), _resolve(node[2], item)
+    return left + right if kind == '+' else left - right
+
+
+def _compare(op, left, right):
+    if left is _MISSING or right is _MISSING:
+        return op == '<>' and not (left is _MISSING and right is _MISSING)
+    try:
+        return {
+            '=': lambda: left == right,
+            '<>': lambda: left != right,
+            '<': lambda: left < right,
+            '<=': lambda: left <= right,
+            '>': lambda: left > right,
+            '>=': lambda: left >= right,
+        }[op]()
+    except TypeError:
+        return False
+
+
+def _evaluate(node, item):
+    kind = node[0]
+    if kind == 'or':
+        return _evaluate(node[1], item) or _evaluate(node[2], item)
+    if kind == 'and':
+        return _evaluate(node[1], item) and _evaluate(node[2], item)
+    if kind == 'not':
+        return not _evaluate(node[1], item)
+    if kind == 'attribute_exists':
+        return node[1][1] in item
+    if kind == 'attribute_not_exists':
+        return node[1][1] not in item
+    if kind == 'begins_with':
+        value = item.get(node[1][1])
+        return isinstance(value, str) and value.startswith(_resolve(node[2], item))
+    if kind == 'contains':
+        value = item.get(node[1][1])
+        return value is not None and _resolve(node[2], item) in value
+    if kind == 'between':
+        value = _resolve(node[1], item)
+        return _compare('>=', value, _resolve(node[2], item)) and _compare('<=', value, _resolve(node[3], item))
+    if kind == 'in':
+        value = _resolve(node[1], item)
+        return any(_compare('=', value, _resolve(option, item)) for option in node[2])
+    return _compare(node[1], _resolve(node[2], item), _resolve(node[3], item))
+
+
+def condition_matches(expression, item, names=None, values=None):
+    if not expression:
+        return True
+    return _evaluate(_Expression(expression, names, values).condition(), item)
+
+
+def apply_update(expression, item, names=None, values=None):
+    updated = dict(item)
+    for action, name, operand in _Expression(expression, names, values).update_actions():
+        if action == 'set':
+            updated[name] = _resolve(operand, item)
+        elif action == 'remove':
+            updated.pop(name, None)
+        else:
+            current = item.get(name, _MISSING)
+            delta = _resolve(operand, item)
+            if isinstance(delta, set):
+                updated[name] = (set() if current is _MISSING else set(current)) | delta
+            else:
+                updated[name] = delta if current is _MISSING else current + delta
+    return updated
+
+
+class LocalDynamoDB:
+    """
+    Reemplazo del recurso boto3 DynamoDB (ver dynamo_client.get_resource)
+    """
+
+    def __init__(self, latency=0.0, unprocessed_rate=0.0, item_write_interval=0.0):
+        self.latency = latency
+        self.unprocessed_rate = unprocessed_rate
+        self.item_write_interval = item_write_interval
+        self._item_free_at = {}
+        self._item_lock = threading.Lock()
+        self.lock = threading.RLock()
+        self.schemas = {}
+        self.indexes = {}
+        self.data = {}
+        self.round_trips = Counter()
+        self.meta = type('Meta', (), {})()
+        self.meta.client = LocalDynamoDBClient(self)
+
+    def create_table(self, name, hash_key, range_key=None):
+        with self.lock:
+            self.schemas[name] = (hash_key, range_key)
+            self.data.setdefault(name, {})
+        return self.Table(name)
+
+    def create_index(self, table, index_name, hash_key, range_key=None, projection=None):
+        """
+        Índice secundario. projection: None (ALL) o lista de atributos
+        (INCLUDE; las claves siempre se proyectan). Es sparse: los items sin
+        la clave del índice no aparecen.
+        """
+        with self.lock:
+            self.indexes[(table, index_name)] = (hash_key, range_key, projection)
+
+    def Table(self, name):
+        return LocalTable(self, name)
+
+    def reset_counters(self):
+        self.round_trips.clear()
+
+    # --- primitivas compartidas por Table y el cliente ---
+    def _call(self, operation):
+        self.round_trips[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _wait_items(self, keys):
+        """
+        Reserva el próximo turno de escritura de cada item (table, key) y
+        espera al más lejano (fuera del lock global)
+        """
+        if not self.item_write_interval:
+            return
+        now = time.monotonic()
+        start = now
+        with self._item_lock:
+            for table, key in keys:
+                slot = (table, tuple(sorted(key.items())))
+                turn = max(now, self._item_free_at.get(slot, now))
+                self._item_free_at[slot] = turn + self.item_write_interval
+                start = max(start, turn)
+        time.sleep(start - now + self.item_write_interval)
+
+    def _key(self, table, key_or_item):
+        if table not in self.schemas:
+            raise _client_error('ResourceNotFoundException', f'Tabla no encontrada: {table}', 'GetItem')
+        hash_key, range_key = self.schemas[table]
+        return (key_or_item[hash_key], key_or_item.get(range_key) if range_key else None)
+
+    def _key_dict(self, table, key_or_item):
+        self._key(table, key_or_item)
+        hash_key, range_key = self.schemas[table]
+        names = (hash_key, range_key) if range_key else (hash_key,)
+        return {name: key_or_item[name] for name in names}
+
+    def _check(self, table, key, condition, names, values, operation):
+        current = self.data[table].get(self._key(table, key), {})
+        if not condition_matches(condition, current, names, values):
+            raise _client_error('ConditionalCheckFailedException', 'The conditional request failed', operation)
+        return current
+
+    def _put(self, table, item, condition=None, names=None, values=None):
+        self._check(table, item, condition, names, values, 'PutItem')
+        self.data[table][self._key(table, item)] = _normalize(item)
+
+    def _update(self, table, key, update, condition=None, names=None, values=None, return_values='NONE'):
+        current = self._check(table, key, condition, names, values, 'UpdateItem')
+        base = dict(current) if current else dict(key)
+        updated = _normalize(apply_update(update, base, names, values))
+        self.data[table][self._key(table, key)] = updated
+        if return_values == 'ALL_NEW':
+            return dict(updated)
+        if return_values == 'UPDATED_NEW':
+            return {k: v for k, v in updated.items() if current.get(k, _MISSING) != v}
+        return None
+
+    def _delete(self, table, key, condition=None, names=None, values=None):
+        self._check(table, key, condition, names, values, 'DeleteItem')
+        self.data[table].pop(self._key(table, key), None)
+
+    def _get(self, table, key):
+        item = self.data[table].get(self._key(table, key))
+        return dict(item) if item is not None else None
+
+    def _read(self, table, index_name, key_condition, filter_expression, names, values, limit,
+              start_key, forward, projection_expression):
+        table_hash, table_range = self.schemas[table]
+        if index_name:
+            hash_key, range_key, projection = self.indexes[(table, index_name)]
+        else:
+            hash_key, range_key, projection = table_hash, table_range, None
+        key_attrs = [a for a in (table_hash, table_range, hash_key, range_key) if a]
+        # Las expresiones se parsean una vez por llamada, no por item
+        key_node = _Expression(key_condition, names, values).condition() if key_condition else None
+        filter_node = _Expression(filter_expression, names, values).condition() if filter_expression else None
+
+        # Query: igualdad sobre la clave de partición (primer término del KeyConditionExpression)
+        partition = key_node[1] if key_node and key_node[0] == 'and' else key_node
+        rows = self.data[table].values()
+        if partition and partition[:3] == ('cmp', '=', ('path', hash_key)) and partition[3][0] == 'value':
+            rows = [item for item in rows if item.get(hash_key) == partition[3][1]]
+
+        candidates = [
+            item for item in rows
+            if hash_key in item and (not range_key or range_key in item)
+            and (key_node is None or _evaluate(key_node, item))
+        ]
+        if range_key or key_condition is None:
+            sort_attrs = [a for a in (range_key, table_hash, table_range) if a]
+            candidates.sort(key=lambda item: tuple(_sort_value(item.get(a)) for a in sort_attrs),
+                            reverse=not forward)
+
+        if start_key:
+            start = tuple(start_key.get(a) for a in key_attrs)
+            for position, item in enumerate(candidates):
+                if tuple(item.get(a) for a in key_attrs) == start:
+                    candidates = candidates[position + 1:]
+                    break
+
+        evaluated = candidates[:limit] if limit else candidates
+        last_key = None
+        if limit and len(candidates) > limit:
+            last_key = {a: evaluated[-1][a] for a in key_attrs if a in evaluated[-1]}
+
+        items = [dict(item) for item in evaluated if filter_node is None or _evaluate(filter_node, item)]
+        if projection is not None:
+            keep = set(projection) | set(key_attrs)
+            items = [{k: v for k, v in item.items() if k in keep} for item in items]
+        if projection_expression:
+            wanted = [(names or {}).get(name.strip(), name.strip()) for name in projection_expression.split(',')]
+            items = [{k: item[k] for k in wanted if k in item} for item in items]
+
+        response = {'Items': items, 'Count': len(items), 'ScannedCount': len(evaluated)}
+        if last_key:
+            response['LastEvaluatedKey'] = last_key
+        return response
+
+
+def _consumed(kwargs, table, units):
+    """
+    ConsumedCapacity aproximado (1 unidad por item, 0.5 en lecturas eventuales)
+    cuando el request pide ReturnConsumedCapacity
+    """
+    if kwargs.get('ReturnConsumedCapacity') in ('TOTAL', 'INDEXES'):
+        return {'ConsumedCapacity': {'TableName': table, 'CapacityUnits': units}}
+    return {}
+
+
+class LocalTable:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.table_name = name
+        self.meta = db.meta
+
+    def get_item(self, Key, **kwargs):
+        self.db._call('GetItem')
+        with self.db.lock:
+            item = self.db._get(self.name, Key)
+        response = _consumed(kwargs, self.name, 1.0 if kwargs.get('ConsistentRead') else 0.5)
+        if item is not None:
+            response['Item'] = item
+        return response
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, **kwargs):
+        self.db._call('PutItem')
+        self.db._wait_items([(self.name, self.db._key_dict(self.name, Item))])
+        with self.db.lock:
+            self.db._put(self.name, Item, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+        return _consumed(kwargs, self.name, 1.0)
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues='NONE', **kwargs):
+        self.db._call('UpdateItem')
+        self.db._wait_items([(self.name, Key)])
+        with self.db.lock:
+            attributes = self.db._update(self.name, Key, UpdateExpression, ConditionExpression,
+                                         ExpressionAttributeNames, ExpressionAttributeValues, ReturnValues)
+        response = _consumed(kwargs, self.name, 1.0)
+        if attributes is not None:
+            response['Attributes'] = attributes
+        return response
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, **kwargs):
+        self.db._call('DeleteItem')
+        with self.db.lock:
+            self.db._delete(self.name, Key, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+        return {}
+
+    def query(self, KeyConditionExpression, IndexName=None, FilterExpression=None,
+              ExpressionAttributeNames=None, ExpressionAttributeValues=None, Limit=None,
+              ExclusiveStartKey=None, ScanIndexForward=True, ProjectionExpression=None, **kwargs):
+        self.db._call('Query')
+        with self.db.lock:
+            return self.db._read(self.name, IndexName, KeyConditionExpression, FilterExpression,
+                                 ExpressionAttributeNames, ExpressionAttributeValues, Limit,
+                                 ExclusiveStartKey, ScanIndexForward, ProjectionExpression)
+
+    def scan(self, IndexName=None, FilterExpression=None, ExpressionAttributeNames=None,
+             ExpressionAttributeValues=None, Limit=None, ExclusiveStartKey=None,
+             ProjectionExpression=None, **kwargs):
+        self.db._call('Scan')
+        with self.db.lock:
+            return self.db._read(self.name, IndexName, None, FilterExpression,
+                                 ExpressionAttributeNames, ExpressionAttributeValues, Limit,
+                                 ExclusiveStartKey, True, ProjectionExpression)
+
+
+class LocalDynamoDBClient:
+    """
+    API de cliente (valores tipados) sobre el mismo almacenamiento
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def _values(values):
+        return _deserialize_item(values) if values else None
+
+    def get_item(self, TableName, Key, **kwargs):
+        self.db._call('GetItem')
+        with self.db.lock:
+            item = self.db._get(TableName, _deserialize_item(Key))
+        return {'Item': _serialize_item(item)} if item is not None else {}
+
+    def put_item(self, TableName, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, **kwargs):
+        self.db._call('PutItem')
+        self.db._wait_items([(TableName, self.db._key_dict(TableName, _deserialize_item(Item)))])
+        with self.db.lock:
+            self.db._put(TableName, _deserialize_item(Item), ConditionExpression,
+                         ExpressionAttributeNames, self._values(ExpressionAttributeValues))
+        return {}
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        self.db._call('TransactWriteItems')
+        keys = []
+        for entry in TransactItems:
+            (action, spec), = entry.items()
+            key = _deserialize_item(spec['Item'] if action == 'Put' else spec['Key'])
+            keys.append((spec['TableName'], self.db._key_dict(spec['TableName'], key)))
+        self.db._wait_items(keys)
+        with self.db.lock:
+            reasons = []
+            for entry, (table, key) in zip(TransactItems, keys):
+                (action, spec), = entry.items()
+                try:
+                    self.db._check(table, key, spec.get('ConditionExpression'),
+                                   spec.get('ExpressionAttributeNames'),
+                                   self._values(spec.get('ExpressionAttributeValues')), 'TransactWriteItems')
+                    reasons.append({'Code': 'None'})
+                except ClientError:
+                    reason = {'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'}
+                    current = self.db._get(table, key)
+                    if spec.get('ReturnValuesOnConditionCheckFailure') == 'ALL_OLD' and current is not None:
+                        reason['Item'] = _serialize_item(current)
+                    reasons.append(reason)
+            if any(reason['Code'] != 'None' for reason in reasons):
+                raise _client_error('TransactionCanceledException', 'Transaction cancelled',
+                                    'TransactWriteItems', CancellationReasons=reasons)
+
+            for entry in TransactItems:
+                (action, spec), = entry.items()
+                table = spec['TableName']
+                if action == 'Put':
+                    self.db._put(table, _deserialize_item(spec['Item']))
+                elif action == 'Update':
+                    self.db._update(table, _deserialize_item(spec['Key']), spec['UpdateExpression'],
+                                    names=spec.get('ExpressionAttributeNames'),
+                                    values=self._values(spec.get('ExpressionAttributeValues')))
+                elif action == 'Delete':
+                    self.db._delete(table, _deserialize_item(spec['Key']))
+        if kwargs.get('ReturnConsumedCapacity') in ('TOTAL', 'INDEXES'):
+            # Las transacciones consumen el doble por item
+            units = {}
+            for entry in TransactItems:
+                (_, spec), = entry.items()
+                units[spec['TableName']] = units.get(spec['TableName'], 0) + 2.0
+            return {'ConsumedCapacity': [{'TableName': t, 'CapacityUnits': u} for t, u in units.items()]}
+        return {}
+
+    def query(self, TableName, KeyConditionExpression, IndexName=None, FilterExpression=None,
+              ExpressionAttributeNames=None, ExpressionAttributeValues=None, Limit=None,
+              ExclusiveStartKey=None, ScanIndexForward=True, ProjectionExpression=None, **kwargs):
+        self.db._call('Query')
+        with self.db.lock:
+            response = self.db._read(TableName, IndexName, KeyConditionExpression, FilterExpression,
+                                     ExpressionAttributeNames, self._values(ExpressionAttributeValues), Limit,
+                                     self._values(ExclusiveStartKey), ScanIndexForward, ProjectionExpression)
+        response['Items'] = [_serialize_item(item) for item in response['Items']]
+        if 'LastEvaluatedKey' in response:
+            response['LastEvaluatedKey'] = _serialize_item(response['LastEvaluatedKey'])
+        response.update(_consumed(kwargs, TableName, 0.5))
+        return response
+
+    def scan(self, TableName, IndexName=None, FilterExpression=None, ExpressionAttributeNames=None,
+             ExpressionAttributeValues=None, Limit=None, ExclusiveStartKey=None, ProjectionExpression=None,
+             **kwargs):
+        self.db._call('Scan')
+        with self.db.lock:
+            response = self.db._read(TableName, IndexName, None, FilterExpression, ExpressionAttributeNames,
+                                     self._values(ExpressionAttributeValues), Limit,
+                                     self._values(ExclusiveStartKey), True, ProjectionExpression)
+        response['Items'] = [_serialize_item(item) for item in response['Items']]
+        if 'LastEvaluatedKey' in response:
+            response['LastEvaluatedKey'] = _serialize_item(response['LastEvaluatedKey'])
+        response.update(_consumed(kwargs, TableName, 0.5))
+        return response
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self.db._call('BatchWriteItem')
+        unprocessed = {}
+        with self.db.lock:
+            for table, requests in RequestItems.items():
+                for request in requests:
+                    if self.db.unprocessed_rate and random.random() < self.db.unprocessed_rate:
+                        unprocessed.setdefault(table, []).append(request)
+                    elif 'PutRequest' in request:
+                        self.db._put(table, _deserialize_item(request['PutRequest']['Item']))
+                    else:
+                        self.db._delete(table, _deserialize_item(request['DeleteRequest']['Key']))
+        return {'UnprocessedItems': unprocessed}
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self.db._call('BatchGetItem')
+        responses = {}
+        with self.db.lock:
+            for table, spec in RequestItems.items():
+                found = []
+                projection = [name.strip() for name in spec.get('ProjectionExpression', '').split(',') if name.strip()]
+                for key in spec['Keys']:
+                    item = self.db._get(table, _deserialize_item(key))
+                    if item is not None:
+                        if projection:
+                            item = {name: item[name] for name in projection if name in item}
+                        found.append(_serialize_item(item))
+                responses[table] = found
+        return {'Responses': responses, 'UnprocessedKeys': {}}
@@ -0,0 +1,149 @@
+import json
+import os
+import time
+
+import pytest
+
+import audit_log
+import LoginUsuario
+import LogoutUsuario
+import structured_logging
+from conftest import USUARIOS_TABLE
+from password_hasher import hash_password
+from test_invitation_codes import generate
+from test_registration_concurrency import create_code, register
+
+
+class Context:
+    aws_request_id = 'req-1'
+
+
+def login(email, password, source_ip='203.0.113.7'):
+    event = {
+        'body': json.dumps({'email': email, 'password': password, 'frontend_type': 'client'}),
+        'requestContext': {'identity': {'sourceIp': source_ip}}
+    }
+    return LoginUsuario.lambda_handler(event, Context())
+
+
+def test_login_events_are_flushed_at_end_of_invocation(local_dynamodb, audit_sink):
+    local_dynamodb.Table(USUARIOS_TABLE).put_item(Item={
+        'email': 'ana@example.com', 'user_id': 'u1', 'user_type': 'cliente',
+        'password': hash_password('secreto123'), 'is_active': True
+    })
+    assert login('ana@example.com', 'otra')['statusCode'] == 401
+    assert login('ana@example.com', 'secreto123')['statusCode'] == 200
+    assert login('nadie@example.com', 'x')['statusCode'] == 401
+
+    assert audit_log.pending() == 0
+    records = audit_sink.records
+    assert [(r['event_type'], r['details']['reason'] if 'reason' in r['details'] else None) for r in records] == [
+        (audit_log.LOGIN_FAILURE, 'invalid_password'),
+        (audit_log.LOGIN_SUCCESS, None),
+        (audit_log.LOGIN_FAILURE, 'unknown_email'),
+    ]
+    assert records[1]['actor'] == 'u1'
+    assert records[1]['source_ip'] == '203.0.113.7'
+    assert records[1]['request_id'] == 'req-1'
+    assert len({r['event_id'] for r in records}) == 3
+
+
+def test_registration_invitation_and_logout_events(local_dynamodb, audit_sink):
+    create_code(local_dynamodb, 'ABCD1234', max_uses=1)
+    assert register('a@example.com', 'ABCD1234') == 201
+    assert register('b@example.com', 'ABCD1234') == 403
+    assert generate({'created_by': 'admin'}, token='')['statusCode'] == 201
+    assert LogoutUsuario.lambda_handler({'headers': {}}, None)['statusCode'] == 200
+
+    types = [r['event_type'] for r in audit_sink.records]
+    assert types == [audit_log.REGISTRATION, audit_log.REGISTRATION_REJECTED,
+                     audit_log.INVITATION_CREATED, audit_log.LOGOUT]
+    rejected = audit_sink.records[1]['details']
+    assert rejected['reason'] == 'invalid_invitation'
+    assert audit_sink.records[2]['actor'] == 'admin'
+    assert audit_sink.records[3]['details']['token_revoked'] is False
+
+
+def test_unknown_event_type_is_rejected():
+    with pytest.raises(ValueError):
+        audit_log.record('password_reset')
+
+
+def test_flush_writes_in_batches(monkeypatch, audit_sink):
+    monkeypatch.setattr(audit_log, 'AUDIT_BATCH_SIZE', 10)
+    batches = []
+    monkeypatch.setattr(audit_sink, 'write', lambda items: batches.append(len(items)))
+    # El hilo en segundo plano no escribe durante la prueba: el flush es explícito
+    flush = audit_log.flush
+    monkeypatch.setattr(audit_log, 'flush', lambda: 0)
+    for i in range(25):
+        audit_log.record(audit_log.LOGOUT, actor=f'u{i}')
+    assert flush() == 25
+    assert batches == [10, 10, 5]
+
+
+def test_flush_does_not_wait_for_flush_in_progress(monkeypatch, audit_sink):
+    monkeypatch.setattr(audit_log, 'AUDIT_FLUSH_INTERVAL_SECONDS', 0)
+    audit_log.record(audit_log.LOGOUT, actor='u1')
+    with audit_log._write_lock:
+        # Otro flush está escribiendo: éste no se bloquea y deja el evento en el buffer
+        assert audit_log.flush() == 0
+        assert audit_log.pending() == 1
+    assert audit_log.flush() == 1
+    assert [r['actor'] for r in audit_sink.records] == ['u1']
+
+
+def test_background_flush_when_batch_is_full(monkeypatch, audit_sink):
+    monkeypatch.setattr(audit_log, 'AUDIT_BATCH_SIZE', 5)
+    for i in range(5):
+        audit_log.record(audit_log.LOGOUT, actor=f'u{i}')
+    deadline = time.monotonic() + 2
+    while len(audit_sink.records) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(audit_sink.records) == 5
+
+
+def test_sink_errors_fall_back_to_log(capsys):
+    def broken(items):
+        raise RuntimeError('sin red')
+
+    audit_log.set_sink(type('Broken', (), {'write': staticmethod(broken)})())
+    audit_log.record(audit_log.LOGOUT, actor='u1')
+    assert audit_log.flush() == 0
+    # El lote queda en el log estructurado
+    structured_logging.flush()
+    assert 'u1' in capsys.readouterr().out
+
+
+def test_jsonl_sink(tmp_path):
+    path = tmp_path / 'audit.jsonl'
+    audit_log.set_sink(audit_log.JsonlSink(str(path)))
+    audit_log.record(audit_log.LOGIN_FAILURE, actor='a@example.com', reason='unknown_email')
+    audit_log.flush()
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[0])['details'] == {'reason': 'unknown_email'}
+
+
+def test_dynamodb_sink(local_dynamodb):
+    local_dynamodb.create_table('dev-t_audit_events', 'event_id')
+    audit_log.set_sink(audit_log.DynamoDBSink())
+    for i in range(30):
+        audit_log.record(audit_log.LOGOUT, actor=f'u{i}')
+    audit_log.flush()
+    assert len(local_dynamodb.data['dev-t_audit_events']) == 30
+    assert local_dynamodb.round_trips['BatchWriteItem'] == 2
+
+
+def test_default_sink_writes_to_the_log(monkeypatch):
+    assert audit_log.AUDIT_SINK == 'log'
+    assert os.path.isabs(audit_log.AUDIT_LOG_PATH)
+    lines = []
+    monkeypatch.setattr(structured_logging, '_write', lambda batch: lines.extend(batch))
+    audit_log.set_sink(audit_log.LogSink())
+    audit_log.record(audit_log.LOGOUT, actor='u1', token_revoked=True)
+    audit_log.flush()
+    # Sólo se agrega al buffer del log: sale con el flush del log de la invocación
+    assert lines == []
+    structured_logging.flush()
+    record = json.loads(lines[0])
+    assert (record['log_type'], record['event_type'], record['actor']) == ('audit', audit_log.LOGOUT, 'u1')
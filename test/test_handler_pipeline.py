@@ -0,0 +1,51 @@
+import json
+
+import handler_pipeline
+import LoginUsuario
+import LogoutUsuario
+
+
+def test_invalid_json_body_returns_400():
+    for body in ('{no es json', '[1, 2]'):
+        response = LoginUsuario.lambda_handler({'body': body}, None)
+        assert response['statusCode'] == 400
+        assert response['headers'] == handler_pipeline.CORS_HEADERS
+        assert 'error' in json.loads(response['body'])
+
+
+def test_registered_errors_are_shared_and_headers_copied():
+    first = LoginUsuario.lambda_handler({'body': json.dumps({'email': 'a@example.com'})}, None)
+    second = LoginUsuario.lambda_handler({'body': {'password': 'x'}}, None)
+    assert first is second is handler_pipeline.ERRORS['missing_credentials']
+
+    throttled = handler_pipeline.error_response('too_many_attempts', {'Retry-After': '30'})
+    assert throttled['headers']['Retry-After'] == '30'
+    assert 'Retry-After' not in handler_pipeline.CORS_HEADERS
+    assert throttled['body'] == handler_pipeline.ERRORS['too_many_attempts']['body']
+
+
+def test_unexpected_exception_returns_generic_500():
+    @handler_pipeline.handler('test')
+    def lambda_handler(body, event, context):
+        raise RuntimeError('detalle interno')
+
+    response = lambda_handler({'body': '{}'}, None)
+    assert response['statusCode'] == 500
+    assert 'detalle interno' not in response['body']
+    assert json.loads(response['body'])['code'] == 'INTERNAL_ERROR'
+
+
+def test_tuple_results_are_serialized():
+    @handler_pipeline.handler('test')
+    def lambda_handler(body, event, context):
+        return 201, {'echo': body}, {'Location': '/x'}
+
+    response = lambda_handler({'email': 'a@example.com'}, None)
+    assert response['statusCode'] == 201
+    assert response['headers']['Location'] == '/x'
+    assert json.loads(response['body']) == {'echo': {'email': 'a@example.com'}}
+
+
+def test_logout_tolerates_invalid_body():
+    response = LogoutUsuario.lambda_handler({'body': 'token=abc', 'headers': {}}, None)
+    assert response['statusCode'] == 200
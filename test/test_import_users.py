@@ -0,0 +1,191 @@
+import hashlib
+import json
+
+import pytest
+
+import ImportarUsuarios
+import LoginUsuario
+import password_hasher
+import storage
+
+LEGACY_HASH = hashlib.sha256('secreta'.encode()).hexdigest()
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'memory')
+    storage.reset_storage()
+    yield storage.get_storage()
+    storage.reset_storage()
+
+
+@pytest.fixture
+def run_import(memory_store, tmp_path):
+    def run(records, checkpoint_path=None, **kwargs):
+        kwargs.setdefault('hash_workers', 1)
+        kwargs.setdefault('write_threads', 2)
+        kwargs.setdefault('rejects_path', str(tmp_path / 'rechazados.jsonl'))
+        importer = ImportarUsuarios.UserImporter(**kwargs)
+        try:
+            return importer.run(records, checkpoint_path)
+        finally:
+            importer.close()
+    return run
+
+
+def rejects(tmp_path):
+    path = tmp_path / 'rechazados.jsonl'
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def numbered(records):
+    return list(enumerate(records))
+
+
+def test_read_csv_drops_empty_fields(tmp_path):
+    path = tmp_path / 'usuarios.csv'
+    path.write_text('email,password,name,phone\n'
+                    'a@example.com,secreta,Ana,\n'
+                    'b@example.com,otra,,+51999\n', encoding='utf-8')
+    assert list(ImportarUsuarios.read_records(str(path))) == [
+        (0, {'email': 'a@example.com', 'password': 'secreta', 'name': 'Ana'}),
+        (1, {'email': 'b@example.com', 'password': 'otra', 'phone': '+51999'}),
+    ]
+
+
+def test_read_jsonl_skips_blank_lines_and_keeps_numbering(tmp_path):
+    path = tmp_path / 'usuarios.txt'
+    path.write_text('{"email": "a@example.com", "password": "x"}\n'
+                    '\n'
+                    'no es json\n'
+                    '[1, 2]\n'
+                    '{"email": "b@example.com", "password_hash": "h"}\n', encoding='utf-8')
+    assert list(ImportarUsuarios.read_records(str(path), 'jsonl')) == [
+        (0, {'email': 'a@example.com', 'password': 'x'}),
+        (1, {}),
+        (2, {}),
+        (3, {'email': 'b@example.com', 'password_hash': 'h'}),
+    ]
+
+
+def test_import_validates_and_hashes(run_import, memory_store, tmp_path):
+    report = run_import(numbered([
+        {'email': ' Ana@Example.com ', 'password': 'secreta', 'name': 'Ana'},
+        {'email': 'staff@example.com', 'password': 'secreta', 'user_type': 'staff', 'staff_tier': 'admin'},
+        {'email': 'sin-password@example.com'},
+        {'email': 'x@example.com', 'password': 'secreta', 'user_type': 'staff', 'staff_tier': 'jefe'},
+    ]))
+    assert (report['imported'], report['invalid']) == (2, 2)
+
+    ana = memory_store.get(storage.USERS, {'email': 'ana@example.com'})
+    assert ana['registration_source'] == 'import'
+    assert password_hasher.verify_password('secreta', ana['password']) == (True, False)
+    staff = memory_store.get(storage.USERS, {'email': 'staff@example.com'})
+    assert 'generate_invitation_codes' in staff['permissions']
+    assert [r['record'] for r in rejects(tmp_path)] == [2, 3]
+
+
+def test_duplicates_in_input_and_table_are_skipped(run_import, memory_store, tmp_path):
+    memory_store.put(storage.USERS, {'email': 'existe@example.com', 'user_id': 'u0', 'password': 'original'})
+    report = run_import(numbered([
+        {'email': 'a@example.com', 'password': 'uno'},
+        {'email': 'A@example.com', 'password': 'dos'},
+        {'email': 'existe@example.com', 'password': 'tres'},
+        {'email': 'b@example.com', 'password': 'cuatro'},
+        {'email': 'a@example.com', 'password': 'cinco'},
+    ]), chunk_size=2)
+    assert (report['imported'], report['duplicates'], report['existing']) == (2, 2, 1)
+    # El primero gana y el usuario existente no se sobrescribe
+    a = memory_store.get(storage.USERS, {'email': 'a@example.com'})
+    assert password_hasher.verify_password('uno', a['password'])[0]
+    assert memory_store.get(storage.USERS, {'email': 'existe@example.com'})['password'] == 'original'
+    assert [r['error'] for r in rejects(tmp_path)] == ['Email duplicado en la entrada'] * 2
+
+
+def test_resume_from_checkpoint(run_import, memory_store, tmp_path):
+    checkpoint = str(tmp_path / 'usuarios.ckpt')
+    records = numbered([{'email': f'u{i}@example.com', 'password': f'p{i}'} for i in range(7)])
+
+    def interrupted():
+        for number, record in records:
+            if number == 5:
+                raise KeyboardInterrupt
+            yield number, record
+
+    with pytest.raises(KeyboardInterrupt):
+        run_import(interrupted(), checkpoint, chunk_size=2)
+    # Dos bloques completos guardados; el registro 4 quedó en un bloque sin terminar
+    assert ImportarUsuarios.load_checkpoint(checkpoint)['records_done'] == 4
+
+    writes = []
+    original = memory_store.put
+
+    def put(table, item, if_not_exists=False):
+        writes.append(item)
+        return original(table, item, if_not_exists)
+
+    memory_store.put = put
+    report = run_import(iter(records), checkpoint, chunk_size=2)
+    assert [item['email'] for item in writes] == ['u4@example.com', 'u5@example.com', 'u6@example.com']
+    assert (report['records_done'], report['imported'], report['imported_this_run']) == (7, 7, 3)
+    assert all(memory_store.get(storage.USERS, {'email': f'u{i}@example.com'}) for i in range(7))
+
+
+def test_password_hash_passthrough(run_import, memory_store):
+    scrypt_hash = password_hasher.hash_password('otra')
+    report = run_import(numbered([
+        {'email': 'legado@example.com', 'password_hash': LEGACY_HASH},
+        {'email': 'mayus@example.com', 'password_hash': LEGACY_HASH.upper()},
+        {'email': 'scrypt@example.com', 'password_hash': scrypt_hash},
+    ]))
+    assert report['imported'] == 3
+    assert memory_store.get(storage.USERS, {'email': 'legado@example.com'})['password'] == LEGACY_HASH
+    assert memory_store.get(storage.USERS, {'email': 'mayus@example.com'})['password'] == LEGACY_HASH
+    assert memory_store.get(storage.USERS, {'email': 'scrypt@example.com'})['password'] == scrypt_hash
+
+    # El hash importado sirve para iniciar sesión (y el SHA-256 se migra)
+    response = LoginUsuario.lambda_handler({'body': json.dumps({'email': 'legado@example.com', 'password': 'secreta'})},
+                                           None)
+    assert response['statusCode'] == 200
+    assert memory_store.get(storage.USERS, {'email': 'legado@example.com'})['password'].startswith('scrypt$')
+
+
+def test_user_registered_during_the_import_is_not_overwritten(run_import, memory_store):
+    original = memory_store.batch_get
+
+    def batch_get_then_register(table, keys, projection=None):
+        # El usuario se registra por /auth/registro entre el batch_get y la escritura
+        found = original(table, keys, projection)
+        memory_store.create_user({'email': 'carrera@example.com', 'user_id': 'u-web', 'password': 'web'})
+        return found
+
+    memory_store.batch_get = batch_get_then_register
+    report = run_import(numbered([
+        {'email': 'carrera@example.com', 'password': 'importada'},
+        {'email': 'otro@example.com', 'password': 'importada'},
+    ]))
+    assert (report['imported'], report['existing']) == (1, 1)
+    assert memory_store.get(storage.USERS, {'email': 'carrera@example.com'}) == {
+        'email': 'carrera@example.com', 'user_id': 'u-web', 'password': 'web'
+    }
+
+
+def test_non_string_password_is_rejected_per_record(run_import, memory_store, tmp_path):
+    report = run_import(numbered([
+        {'email': 'a@example.com', 'password': 12345},
+        {'email': 'b@example.com', 'password': {'texto': 'x'}},
+        {'email': 'c@example.com', 'password': 'secreta'},
+    ]))
+    assert (report['imported'], report['invalid']) == (1, 2)
+    assert [r['error'] for r in rejects(tmp_path)] == ['password debe ser un string'] * 2
+
+
+@pytest.mark.parametrize('password_hash', [
+    'texto-plano', 'g' * 64, 'a' * 63, 'scrypt$n=16,r=1,p=1$sal', 'scrypt$n=0,r=1,p=1$c2Fs$aGFzaA',
+    'bcrypt$2b$12$abc', 12345,
+])
+def test_invalid_password_hash_is_rejected(run_import, memory_store, tmp_path, password_hash):
+    report = run_import(numbered([{'email': 'a@example.com', 'password_hash': password_hash}]))
+    assert (report['imported'], report['invalid']) == (0, 1)
+    assert memory_store.get(storage.USERS, {'email': 'a@example.com'}) is None
+    assert rejects(tmp_path)[0]['error'].startswith('password_hash inválido')
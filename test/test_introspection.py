@@ -0,0 +1,139 @@
+import json
+import time
+
+import jwt
+import pytest
+
+import auth_helpers
+import IntrospectarTokens
+import jwt_keys
+import structured_logging
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    IntrospectarTokens.reset()
+    auth_helpers.purge_token_cache()
+    yield
+    IntrospectarTokens.reset()
+    auth_helpers.purge_token_cache()
+    jwt_keys.reset_keyring()
+    auth_helpers.reset_jwks_cache()
+
+
+def token(user_type='staff', permissions=('view_orders',), expires_in=3600, secret=None, **claims):
+    payload = {'user_id': f'u-{user_type}', 'user_type': user_type, 'permissions': list(permissions),
+               'exp': int(time.time()) + expires_in}
+    payload.update(claims)
+    return jwt.encode(payload, secret or auth_helpers._get_jwt_secret(), algorithm='HS256')
+
+
+def call(tokens, caller=None, **extra):
+    caller = token() if caller is None else caller
+    body = dict(extra, tokens=tokens)
+    return IntrospectarTokens.lambda_handler({
+        'headers': {'Cookie': f'auth_token={caller}'} if caller else {},
+        'body': json.dumps(body)
+    }, None)
+
+
+def test_requires_staff_caller():
+    assert call([token()], caller='')['statusCode'] == 401
+    assert call([token()], caller=token(user_type='cliente'))['statusCode'] == 403
+
+
+def test_results_follow_input_order():
+    staff, client = token(), token(user_type='cliente', permissions=())
+    expired, forged = token(expires_in=-10), token(secret='otra-clave')
+    response = call([client, expired, staff, forged, client], required_permission='view_orders')
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    results = body['results']
+
+    assert [r['active'] for r in results] == [True, False, True, False, True]
+    assert results[0] == results[4]
+    assert results[0]['claims']['user_type'] == 'cliente'
+    assert (results[0]['is_staff'], results[0]['authorized']) == (False, False)
+    assert (results[2]['is_staff'], results[2]['authorized']) == (True, True)
+    assert 0 < results[2]['expires_in'] <= 3600
+    assert results[1] == {'active': False}
+    assert body['active'] == 3
+
+
+def test_missing_permission_is_not_authorized():
+    result = IntrospectarTokens.introspect([token(permissions=('view_orders',))], 'manage_products')[0]
+    assert result['active'] and result['is_staff'] and not result['authorized']
+
+
+def test_invalid_tokens_are_cached(monkeypatch):
+    forged = token(secret='otra-clave')
+    assert IntrospectarTokens.introspect([forged]) == [{'active': False}]
+    calls = []
+    monkeypatch.setattr(auth_helpers, 'verify_jwt_token_with_reason', lambda t: calls.append(t))
+    assert IntrospectarTokens.introspect([forged] * 3) == [{'active': False}] * 3
+    assert calls == []
+
+
+def test_rejection_reasons():
+    assert auth_helpers.verify_jwt_token_with_reason(token(secret='otra-clave')) == (None, auth_helpers.TOKEN_INVALID)
+    assert auth_helpers.verify_jwt_token_with_reason('no-es-un-jwt') == (None, auth_helpers.TOKEN_INVALID)
+    assert auth_helpers.verify_jwt_token_with_reason(token(expires_in=-10)) == (None, auth_helpers.TOKEN_EXPIRED)
+    payload, reason = auth_helpers.verify_jwt_token_with_reason(token())
+    assert payload['user_type'] == 'staff' and reason is None
+
+
+def test_unknown_kid_is_not_cached_while_jwks_is_unavailable(monkeypatch):
+    # Token firmado con una clave nueva que el servicio todavía no conoce
+    new_key = jwt_keys.Keyring()
+    kid = new_key.rotate('EdDSA')
+    rotated = jwt.encode({'user_id': 'u1', 'user_type': 'staff', 'exp': int(time.time()) + 3600},
+                         new_key.signing_key()[2], algorithm='EdDSA', headers={'kid': kid})
+    jwks = {'document': None}
+
+    def fetch(url):
+        if jwks['document'] is None:
+            raise OSError('timeout')
+        return jwks['document']
+
+    monkeypatch.setattr(auth_helpers, 'JWKS_URL', 'https://auth.example.com/auth/.well-known/jwks.json')
+    monkeypatch.setattr(auth_helpers, 'JWKS_MIN_REFRESH_SECONDS', 0)
+    monkeypatch.setattr(auth_helpers, '_fetch_jwks', fetch)
+
+    assert auth_helpers.verify_jwt_token_with_reason(rotated) == (None, auth_helpers.TOKEN_UNVERIFIABLE)
+    assert IntrospectarTokens.introspect([rotated]) == [{'active': False}]
+    assert len(IntrospectarTokens._invalid_tokens) == 0
+
+    # Cuando el JWKS vuelve a responder el token es válido, sin esperar la cache negativa
+    jwks['document'] = new_key.jwks()
+    result, = IntrospectarTokens.introspect([rotated])
+    assert result['active'] and result['claims']['user_id'] == 'u1'
+
+
+def test_parallel_batches_match_sequential(monkeypatch):
+    tokens = [token(user_id=f'u{i}') for i in range(100)] + [token(expires_in=-1)]
+    monkeypatch.setattr(IntrospectarTokens, 'INTROSPECT_PARALLEL_MIN', 1)
+    parallel = IntrospectarTokens.introspect(tokens)
+    assert [r['claims']['user_id'] for r in parallel[:100]] == [f'u{i}' for i in range(100)]
+    assert parallel[100] == {'active': False}
+
+
+def test_rejects_invalid_batches():
+    for tokens in ([], 'abc', [1], [''], ['x'] * (IntrospectarTokens.INTROSPECT_MAX_TOKENS + 1)):
+        assert call(tokens)['statusCode'] == 400
+    assert call([token()], required_permission=5)['statusCode'] == 400
+
+
+def test_logged_event_redacts_the_tokens(monkeypatch):
+    lines = []
+    monkeypatch.setattr(structured_logging, '_write', lambda batch: lines.extend(batch))
+    caller, introspected = token(), token(user_type='cliente', permissions=())
+    assert call([introspected], caller=caller, refresh_token=introspected)['statusCode'] == 200
+
+    logged = [json.loads(line) for line in lines]
+    event = next(line['event'] for line in logged if line['msg'] == 'event received')
+    assert event['body'] == {'tokens': structured_logging.REDACTED, 'refresh_token': structured_logging.REDACTED}
+    assert event['headers'] == {'Cookie': structured_logging.REDACTED}
+    # Ningún JWT (ni partes de él) llega a los logs
+    output = '\n'.join(lines)
+    for jwt_token in (caller, introspected):
+        assert all(part not in output for part in jwt_token.split('.'))
@@ -0,0 +1,180 @@
+import json
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+
+import auth_helpers
+import GenerarInvitationCode
+import invitation_codes
+import storage
+from conftest import INVITATION_CODES_TABLE
+from test_registration_concurrency import create_code, register
+
+
+def staff_token(user_id='admin-1', user_type='staff', permissions=('generate_invitation_codes',)):
+    payload = {'user_id': user_id, 'user_type': user_type, 'permissions': list(permissions),
+               'exp': int(time.time()) + 3600}
+    return jwt.encode(payload, auth_helpers._get_jwt_secret(), algorithm='HS256')
+
+
+def generate(body, token=None):
+    token = staff_token() if token is None else token
+    return GenerarInvitationCode.lambda_handler({
+        'headers': {'Cookie': f'auth_token={token}'} if token else {},
+        'body': json.dumps(body)
+    }, None)
+
+
+def test_malformed_codes_are_rejected_without_storage(local_dynamodb):
+    local_dynamodb.reset_counters()
+    for code in ('INVALID_CODE_123', 'abcd1234', 'ABC123', 'ABCD12345', 'ABCD-123'):
+        assert register('staff@example.com', code) == 403
+    assert dict(local_dynamodb.round_trips) == {}
+    assert invitation_codes.get_cache_stats()['malformed'] == 5
+
+
+def test_missing_code_is_read_once_then_cached(local_dynamodb):
+    local_dynamodb.reset_counters()
+    assert register('a@example.com', 'MISSING1') == 403
+    assert dict(local_dynamodb.round_trips) == {'TransactWriteItems': 1, 'GetItem': 1}
+
+    local_dynamodb.reset_counters()
+    for i in range(20):
+        assert register(f's{i}@example.com', 'MISSING1') == 403
+    assert dict(local_dynamodb.round_trips) == {}
+
+    stats = invitation_codes.get_cache_stats()
+    assert stats['negative_hits'] == 20
+    assert stats['hit_rate'] == round(20 / 21, 4)
+
+
+def test_exhausted_code_is_rejected_from_metadata_cache(local_dynamodb):
+    create_code(local_dynamodb, 'ONEUSE01', max_uses=1)
+    assert register('first@example.com', 'ONEUSE01') == 201
+    assert register('second@example.com', 'ONEUSE01') == 403
+
+    local_dynamodb.reset_counters()
+    assert register('third@example.com', 'ONEUSE01') == 403
+    assert dict(local_dynamodb.round_trips) == {}
+    assert invitation_codes.get_cache_stats()['positive_hits'] == 1
+
+
+def test_cached_metadata_never_skips_atomic_check(local_dynamodb):
+    create_code(local_dynamodb, 'TWOUSES1', max_uses=2)
+    create_code(local_dynamodb, 'EXPIRED1', expires_in=timedelta(days=-1))
+    assert register('x@example.com', 'EXPIRED1') == 403
+    # Metadata usable en cache (used_count=0) pero el código ya está agotado en la tabla
+    invitation_codes._code_metadata.set('TWOUSES1', {
+        'is_active': True, 'expires_at': '9999-01-01T00:00:00', 'max_uses': 2, 'used_count': 0
+    }, time.monotonic())
+    local_dynamodb.Table('test-t_invitation_codes').update_item(
+        Key={'code': 'TWOUSES1'}, UpdateExpression='SET used_count = :n', ExpressionAttributeValues={':n': 2}
+    )
+    assert invitation_codes.precheck('TWOUSES1')
+    assert register('y@example.com', 'TWOUSES1') == 403
+
+
+def test_generated_codes_leave_negative_cache(local_dynamodb):
+    invitation_codes._missing_codes.set('NEWCODE1', True, time.monotonic())
+    assert not invitation_codes.precheck('NEWCODE1')
+    invitation_codes.forget(['NEWCODE1'])
+    assert invitation_codes.precheck('NEWCODE1')
+
+
+def test_generate_sharded_code(local_dynamodb):
+    response = generate({'max_uses': 50, 'counter_shards': 4})
+    assert response['statusCode'] == 201
+    body = json.loads(response['body'])
+    assert body['details']['counter_shards'] == 4
+    code = body['invitation_code']
+    assert storage.get_storage().get_invitation_code(code)['counter_shards'] == 4
+    assert local_dynamodb.Table(INVITATION_CODES_TABLE).get_item(Key={'code': f'{code}#3'})['Item']['max_uses'] == 12
+
+    invalid = generate({'counter_shards': 0})
+    assert invalid['statusCode'] == 400
+
+
+def test_generation_without_token_by_default(local_dynamodb):
+    # Scripts existentes: sin cookie y created_by en el body
+    response = generate({'count': 2, 'created_by': 'onboarding'}, token='')
+    assert response['statusCode'] == 201
+    assert json.loads(response['body'])['details']['created_by'] == 'onboarding'
+    assert json.loads(generate({}, token='')['body'])['details']['created_by'] == 'system'
+
+
+def test_generation_requires_staff_with_permission(local_dynamodb, monkeypatch):
+    monkeypatch.setattr(GenerarInvitationCode, 'INVITATION_REQUIRE_AUTH', True)
+    local_dynamodb.reset_counters()
+    assert generate({'count': 500, 'counter_shards': 32, 'max_uses': 1000}, token='')['statusCode'] == 401
+    assert generate({}, token=staff_token(user_type='cliente'))['statusCode'] == 403
+    assert generate({}, token=staff_token(permissions=('view_orders',)))['statusCode'] == 403
+    assert local_dynamodb.round_trips['PutItem'] == 0
+    assert local_dynamodb.round_trips['BatchWriteItem'] == 0
+
+    # El creador es el usuario del token, no el campo del body
+    response = generate({'created_by': 'otro'})
+    assert response['statusCode'] == 201
+    assert json.loads(response['body'])['details']['created_by'] == 'admin-1'
+
+
+def test_bulk_generation_never_overwrites_existing_codes(local_dynamodb, monkeypatch):
+    create_code(local_dynamodb, 'TAKEN001', max_uses=5)
+    local_dynamodb.Table(INVITATION_CODES_TABLE).update_item(
+        Key={'code': 'TAKEN001'}, UpdateExpression='SET used_count = :n', ExpressionAttributeValues={':n': 3}
+    )
+    # El generador repite un código existente (otro request lo creó después de generarlo)
+    sequence = iter(['TAKEN001', 'FRESH001', 'FRESH002', 'FRESH003'])
+    monkeypatch.setattr(GenerarInvitationCode, 'generate_invitation_code', lambda: next(sequence))
+
+    local_dynamodb.reset_counters()
+    response = generate({'count': 3, 'max_uses': 10, 'counter_shards': 2})
+    assert response['statusCode'] == 201
+    # Un put condicional por código (sin batch_get previo); los shards en lote
+    assert local_dynamodb.round_trips['PutItem'] == 4
+    assert local_dynamodb.round_trips['BatchGetItem'] == 0
+    body = json.loads(response['body'])
+    assert body['invitation_codes'] == ['FRESH001', 'FRESH002', 'FRESH003']
+    assert body['timing']['batches'][0]['retries'] == 1
+
+    taken = local_dynamodb.Table(INVITATION_CODES_TABLE).get_item(Key={'code': 'TAKEN001'})['Item']
+    assert (taken['used_count'], taken['max_uses']) == (3, 5)
+    assert 'Item' not in local_dynamodb.Table(INVITATION_CODES_TABLE).get_item(Key={'code': 'TAKEN001#1'})
+    for code in body['invitation_codes']:
+        assert storage.get_storage().get_invitation_code(code)['counter_shards'] == 2
+
+
+def test_exhausted_retries_return_the_written_codes(local_dynamodb, monkeypatch):
+    create_code(local_dynamodb, 'TAKEN001', max_uses=5)
+    sequence = iter(['FRESH001', 'FRESH002'])
+    monkeypatch.setattr(GenerarInvitationCode, 'generate_invitation_code', lambda: next(sequence, 'TAKEN001'))
+
+    response = generate({'count': 3, 'max_uses': 10, 'counter_shards': 2})
+    # 201 parcial: los códigos guardados se devuelven (no quedan huérfanos) y se informa el faltante
+    assert response['statusCode'] == 201
+    body = json.loads(response['body'])
+    assert body['invitation_codes'] == ['FRESH001', 'FRESH002']
+    assert body['details']['requested_count'] == 3
+    assert body['message'].startswith('2 de 3')
+    for code in body['invitation_codes']:
+        assert storage.get_storage().get_invitation_code(code)['counter_shards'] == 2
+
+
+@pytest.mark.parametrize('params, error', [
+    ({'max_uses': '10'}, 'invalid_max_uses'),
+    ({'max_uses': 0}, 'invalid_max_uses'),
+    ({'max_uses': True}, 'invalid_max_uses'),
+    ({'expires_in_days': '30'}, 'invalid_expires_in_days'),
+    ({'expires_in_days': 0}, 'invalid_expires_in_days'),
+    ({'expires_in_days': 10 ** 9}, 'invalid_expires_in_days'),
+    ({'expires_in_days': 1.5}, 'invalid_expires_in_days'),
+    ({'count': '2'}, 'invalid_count'),
+    ({'counter_shards': '2'}, 'invalid_counter_shards'),
+])
+def test_invalid_parameters_are_rejected(local_dynamodb, params, error):
+    local_dynamodb.reset_counters()
+    response = generate(params)
+    assert response['statusCode'] == 400
+    assert response['body'] == GenerarInvitationCode.handler_pipeline.ERRORS[error]['body']
+    assert local_dynamodb.round_trips['PutItem'] == 0
@@ -0,0 +1,128 @@
+import json
+import time
+
+import jwt
+import pytest
+
+import auth_helpers
+import jwt_keys
+import LoginUsuario
+import ObtenerJWKS
+
+
+@pytest.fixture(autouse=True)
+def clean_keys(monkeypatch):
+    monkeypatch.delenv('JWT_SIGNING_KEYS', raising=False)
+    monkeypatch.delenv('JWT_ACTIVE_KID', raising=False)
+    jwt_keys.reset_keyring()
+    auth_helpers.reset_jwks_cache()
+    auth_helpers.purge_token_cache()
+    ObtenerJWKS.reset()
+    yield
+    jwt_keys.reset_keyring()
+    auth_helpers.reset_jwks_cache()
+    auth_helpers.purge_token_cache()
+    ObtenerJWKS.reset()
+
+
+def payload(**extra):
+    claims = {'user_id': 'u1', 'user_type': 'staff', 'exp': int(time.time()) + 3600}
+    claims.update(extra)
+    return claims
+
+
+@pytest.mark.parametrize('alg', ['EdDSA', 'RS256'])
+def test_asymmetric_tokens_carry_kid_and_verify(alg):
+    token = jwt_keys.sign(payload(), algorithm=alg)
+    header = jwt.get_unverified_header(token)
+    assert header['alg'] == alg
+    assert header['kid'] == jwt_keys.get_keyring().signing_key()[0]
+    assert auth_helpers.verify_jwt_token(token)['user_id'] == 'u1'
+
+
+def test_rotation_keeps_old_tokens_valid():
+    keyring = jwt_keys.get_keyring()
+    old = jwt_keys.sign(payload(user_id='viejo'), algorithm='EdDSA')
+    old_kid = keyring.signing_key()[0]
+    new_kid = keyring.rotate('EdDSA')
+    new = jwt_keys.sign(payload(user_id='nuevo'), algorithm='EdDSA')
+
+    assert jwt.get_unverified_header(new)['kid'] == new_kid != old_kid
+    assert auth_helpers.verify_jwt_token(old)['user_id'] == 'viejo'
+    assert auth_helpers.verify_jwt_token(new)['user_id'] == 'nuevo'
+
+    auth_helpers.purge_token_cache()
+    keyring.retire(old_kid)
+    assert auth_helpers.verify_jwt_token(old) is None
+
+
+def test_keys_load_from_configuration(monkeypatch):
+    key = jwt_keys.generate_private_key('EdDSA')
+    monkeypatch.setenv('JWT_SIGNING_KEYS', json.dumps([
+        {'kid': 'k-retirada', 'alg': 'RS256', 'public_key': jwt_keys._pem_public(
+            jwt_keys.generate_private_key('RS256').public_key())},
+        {'kid': 'k-activa', 'alg': 'EdDSA', 'private_key': jwt_keys._pem_private(key)},
+    ]))
+    keyring = jwt_keys.get_keyring()
+    assert keyring.signing_key()[0] == 'k-activa'
+    assert sorted(jwk['kid'] for jwk in keyring.jwks()['keys']) == ['k-activa', 'k-retirada']
+
+
+def test_downstream_verifies_with_cached_jwks(monkeypatch):
+    token = jwt_keys.sign(payload(), algorithm='EdDSA')
+    document = jwt_keys.get_keyring().jwks()
+    # Servicio sin claves locales: sólo el JWKS publicado
+    jwt_keys.reset_keyring()
+    fetches = []
+    monkeypatch.setattr(auth_helpers, 'JWKS_URL', 'https://auth.example.com/auth/.well-known/jwks.json')
+    monkeypatch.setattr(auth_helpers, '_fetch_jwks', lambda url: fetches.append(url) or document)
+    monkeypatch.setattr(auth_helpers, 'TOKEN_CACHE_SIZE', 0)
+
+    for _ in range(5):
+        assert auth_helpers.verify_jwt_token(token)['user_id'] == 'u1'
+    assert len(fetches) == 1
+
+    # Un kid desconocido recarga el JWKS como máximo cada JWKS_MIN_REFRESH_SECONDS
+    unknown = jwt_keys.Keyring()
+    unknown.rotate('EdDSA')
+    forged = jwt.encode(payload(), unknown.signing_key()[2], algorithm='EdDSA',
+                        headers={'kid': unknown.signing_key()[0]})
+    assert auth_helpers.verify_jwt_token(forged) is None
+    assert auth_helpers.verify_jwt_token(forged) is None
+    assert len(fetches) == 1
+
+
+def test_algorithm_confusion_and_hs256_switch_are_rejected(monkeypatch):
+    jwt_keys.get_keyring().rotate('RS256')
+    kid = jwt_keys.get_keyring().signing_key()[0]
+    # HS256 con el kid de una clave RS256
+    confused = jwt.encode(payload(), 'cualquier-secreto', algorithm='HS256', headers={'kid': kid})
+    assert auth_helpers.verify_jwt_token(confused) is None
+
+    hs256 = jwt_keys.sign(payload(), algorithm='HS256')
+    assert auth_helpers.verify_jwt_token(hs256) is not None
+    auth_helpers.purge_token_cache()
+    monkeypatch.setattr(auth_helpers, 'JWT_ACCEPT_HS256', False)
+    assert auth_helpers.verify_jwt_token(hs256) is None
+
+
+def test_login_and_verification_share_the_hs256_default(monkeypatch):
+    monkeypatch.delenv('JWT_SECRET', raising=False)
+    monkeypatch.setattr(auth_helpers, '_jwt_secret', None)
+    token, _ = LoginUsuario.generate_jwt_token({'user_id': 'u1', 'email': 'a@example.com', 'user_type': 'cliente'})
+    assert auth_helpers.verify_jwt_token(token)['email'] == 'a@example.com'
+
+
+def test_jwks_endpoint_publishes_public_keys_with_cache_headers():
+    jwt_keys.get_keyring().rotate('EdDSA')
+    jwt_keys.get_keyring().rotate('RS256')
+    response = ObtenerJWKS.lambda_handler({'httpMethod': 'GET', 'body': None, 'headers': {}}, None)
+    assert response['statusCode'] == 200
+    assert response['headers']['Cache-Control'] == f'public, max-age={ObtenerJWKS.JWKS_MAX_AGE_SECONDS}'
+    keys = json.loads(response['body'])['keys']
+    assert sorted(k['kty'] for k in keys) == ['OKP', 'RSA']
+    assert not any(private in k for k in keys for private in ('d', 'p', 'q'))
+
+    etag = response['headers']['ETag']
+    cached = ObtenerJWKS.lambda_handler({'body': None, 'headers': {'If-None-Match': etag}}, None)
+    assert cached['statusCode'] == 304
@@ -0,0 +1,120 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import LoginUsuario
+import password_hasher
+import storage
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+class RecordingStore:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, table, key, values):
+        self.updates.append((table, key, values))
+
+
+class DeferredWriter:
+    """
+    Executor que guarda las escrituras sin ejecutarlas (contenedor congelado)
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, fn, *args):
+        self.pending.append((fn, args))
+
+    def run(self):
+        for fn, args in self.pending:
+            fn(*args)
+        self.pending = []
+
+
+@pytest.fixture
+def deferred(monkeypatch):
+    writer = DeferredWriter()
+    monkeypatch.setattr(LoginUsuario, 'LAST_LOGIN_WRITE_MODE', 'deferred')
+    monkeypatch.setattr(LoginUsuario, '_get_login_writer', lambda: writer)
+    return writer
+
+
+@pytest.mark.parametrize('interval, stored, expected', [
+    (0, (NOW - timedelta(seconds=1)).isoformat(), True),
+    (300, None, True),
+    (300, '', True),
+    (300, 'no-es-una-fecha', True),
+    (300, (NOW - timedelta(seconds=299)).isoformat(), False),
+    (300, (NOW - timedelta(seconds=300)).isoformat(), True),
+    (300, (NOW - timedelta(days=2)).isoformat(), True),
+])
+def test_should_write_last_login(monkeypatch, interval, stored, expected):
+    monkeypatch.setattr(LoginUsuario, 'LAST_LOGIN_MIN_INTERVAL_SECONDS', interval)
+    assert LoginUsuario.should_write_last_login(stored, NOW) is expected
+
+
+def test_sync_mode_writes_before_returning(monkeypatch):
+    monkeypatch.setattr(LoginUsuario, 'LAST_LOGIN_WRITE_MODE', 'sync')
+    store = RecordingStore()
+    LoginUsuario.record_login(store, {}, 'a@example.com', 'secreta', False, NOW)
+    assert store.updates == [
+        (storage.USERS, {'email': 'a@example.com'}, {'last_login': NOW.isoformat(), 'updated_at': NOW.isoformat()})
+    ]
+
+
+def test_recent_login_skips_the_write(monkeypatch):
+    monkeypatch.setattr(LoginUsuario, 'LAST_LOGIN_MIN_INTERVAL_SECONDS', 300)
+    store = RecordingStore()
+    user = {'last_login': (NOW - timedelta(seconds=10)).isoformat()}
+    LoginUsuario.record_login(store, user, 'a@example.com', 'secreta', False, NOW)
+    assert store.updates == []
+
+
+def test_deferred_mode_writes_after_the_response(deferred):
+    store = RecordingStore()
+    LoginUsuario.record_login(store, {}, 'a@example.com', 'secreta', False, NOW)
+    assert store.updates == []
+    assert len(deferred.pending) == 1
+
+    deferred.run()
+    assert store.updates[0][2] == {'last_login': NOW.isoformat(), 'updated_at': NOW.isoformat()}
+
+
+def test_rehash_is_never_deferred(deferred, monkeypatch):
+    # Aunque el último login sea reciente, la migración del hash se escribe antes de responder
+    monkeypatch.setattr(LoginUsuario, 'LAST_LOGIN_MIN_INTERVAL_SECONDS', 300)
+    store = RecordingStore()
+    user = {'last_login': (NOW - timedelta(seconds=10)).isoformat()}
+    LoginUsuario.record_login(store, user, 'a@example.com', 'secreta', True, NOW)
+
+    assert deferred.pending == []
+    values = store.updates[0][2]
+    assert values['last_login'] == NOW.isoformat()
+    assert password_hasher.verify_password('secreta', values['password']) == (True, False)
+
+
+def test_write_errors_do_not_fail_the_login():
+    class BrokenStore:
+        def update(self, table, key, values):
+            raise RuntimeError('sin conexión')
+
+    LoginUsuario.write_last_login(BrokenStore(), 'a@example.com', NOW.isoformat(), 'secreta')
+
+
+def test_deferred_login_upgrades_legacy_hash_before_responding(local_dynamodb, deferred):
+    store = storage.get_storage()
+    store.put(storage.USERS, {
+        'email': 'legado@example.com', 'user_id': 'u1', 'user_type': 'cliente', 'is_active': True,
+        'password': hashlib.sha256('secreta'.encode()).hexdigest()
+    })
+    response = LoginUsuario.lambda_handler({'body': json.dumps({'email': 'legado@example.com', 'password': 'secreta'})},
+                                           None)
+    assert response['statusCode'] == 200
+    # El contenedor se congela sin ejecutar lo diferido: el hash ya está migrado
+    assert deferred.pending == []
+    assert store.get(storage.USERS, {'email': 'legado@example.com'})['password'].startswith('scrypt$')
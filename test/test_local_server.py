@@ -0,0 +1,123 @@
+import asyncio
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+import LoginUsuario
+import LogoutUsuario
+import local_server
+from local_server import CORS_HEADERS, AuthServer
+
+
+@pytest.fixture
+def server_port():
+    ready = threading.Event()
+    state = {}
+
+    def on_ready(server):
+        state['port'] = server.sockets[0].getsockname()[1]
+        ready.set()
+
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(AuthServer(threads=4).serve('127.0.0.1', 0, ready=on_ready))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+        loop.run_until_complete(close_connections())
+        loop.close()
+
+    async def close_connections():
+        # Conexiones que seguían abiertas al detener el servidor
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for connection in pending:
+            connection.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    yield state['port']
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    data = response.read().decode()
+    conn.close()
+    return response.status, dict(response.getheaders()), data
+
+
+def test_same_response_as_lambda_handler(server_port):
+    body = {'email': 'a@example.com'}
+    status, headers, data = request(server_port, 'POST', '/auth/login', body)
+    expected = LoginUsuario.lambda_handler({'body': json.dumps(body)}, None)
+
+    assert status == expected['statusCode'] == 400
+    assert json.loads(data) == json.loads(expected['body'])
+    for name, value in CORS_HEADERS.items():
+        assert headers[name] == value
+
+
+def test_logout_and_preflight(server_port):
+    status, _, data = request(server_port, 'POST', '/auth/logout', {})
+    assert status == 200
+    assert json.loads(data)['message'] == json.loads(LogoutUsuario.lambda_handler({'body': '{}'}, None)['body'])['message']
+
+    status, headers, _ = request(server_port, 'OPTIONS', '/auth/registro')
+    assert status == 200
+    assert headers['Access-Control-Allow-Origin'] == '*'
+
+
+def test_unknown_route_and_stats(server_port):
+    assert request(server_port, 'POST', '/auth/nada', {})[0] == 404
+    assert request(server_port, 'GET', '/auth/login')[0] == 405
+
+    status, _, data = request(server_port, 'GET', '/__stats')
+    assert status == 200
+    assert json.loads(data)['requests'] >= 0
+
+
+def raw_request(port, content_length):
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as conn:
+        conn.sendall(f'POST /auth/login HTTP/1.1\r\nHost: x\r\nContent-Length: {content_length}\r\n\r\n{{}}'
+                     .encode())
+        data = b''
+        while chunk := conn.recv(4096):
+            data += chunk
+    return data.decode('latin-1')
+
+
+@pytest.mark.parametrize('content_length', ['abc', '-2', '1.5', '0x10'])
+def test_invalid_content_length_is_rejected(server_port, content_length):
+    # 400 y la conexión se cierra (recv termina) en lugar de cortarla sin respuesta
+    assert raw_request(server_port, content_length).startswith('HTTP/1.1 400 ')
+    assert request(server_port, 'POST', '/auth/login', {'email': 'a@example.com'})[0] == 400
+
+
+async def failing_dispatch(self, method, target, headers, body, source_ip):
+    raise RuntimeError('detalle interno: /srv/secreto')
+
+
+def test_server_error_hides_details(server_port, monkeypatch):
+    monkeypatch.setattr(AuthServer, 'dispatch', failing_dispatch)
+    status, _, data = request(server_port, 'POST', '/auth/login', {})
+    assert status == 500
+    assert json.loads(data) == {'error': 'Error interno del servidor', 'code': 'INTERNAL_ERROR'}
+
+
+def test_server_error_details_behind_debug_flag(server_port, monkeypatch):
+    monkeypatch.setattr(AuthServer, 'dispatch', failing_dispatch)
+    monkeypatch.setattr(local_server, 'DEBUG_ERRORS', True)
+    status, _, data = request(server_port, 'POST', '/auth/login', {})
+    assert status == 500
+    assert json.loads(data)['details'] == 'detalle interno: /srv/secreto'
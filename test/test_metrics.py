@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import CrearUsuario
+import LoginUsuario
+import metrics
+import structured_logging
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    """
+    Habilita las métricas y captura las líneas EMF escritas
+    """
+    monkeypatch.setattr(metrics, 'METRICS_ENABLED', True)
+    monkeypatch.setattr(metrics, '_cold_start', True)
+    lines = []
+    monkeypatch.setattr(structured_logging, '_write', lambda batch: lines.extend(batch))
+
+    def records():
+        return [json.loads(line) for line in lines if '"_aws"' in line]
+    return records
+
+
+def call(handler, endpoint, body):
+    return metrics.instrumented(endpoint)(handler)({'body': json.dumps(body)}, None)
+
+
+def test_disabled_mode_returns_handler_unchanged():
+    def handler(event, context):
+        return {'statusCode': 200}
+
+    assert metrics.instrumented('login')(handler) is handler
+    assert metrics.span('x') is metrics._NULL_SPAN
+    assert metrics.capacity_kwargs() == {}
+    metrics.count('x')
+
+
+def test_login_emits_phase_timings_and_capacity(local_dynamodb, emitted):
+    register = call(CrearUsuario.lambda_handler, 'registro', {'email': 'a@example.com', 'password': 'secreto123'})
+    assert register['statusCode'] == 201
+    login = call(LoginUsuario.lambda_handler, 'login', {'email': 'a@example.com', 'password': 'secreto123'})
+    assert login['statusCode'] == 200
+
+    registro, login_record = emitted()
+    assert registro['ColdStart'] == 'true'
+    assert login_record['ColdStart'] == 'false'
+
+    definition = login_record['_aws']['CloudWatchMetrics'][0]
+    assert definition['Dimensions'] == [['Endpoint', 'ColdStart']]
+    names = {metric['Name'] for metric in definition['Metrics']}
+    for phase in ('parse_body', 'get_user', 'verify_password', 'record_login', 'jwt_encode', 'total'):
+        assert phase in names
+        assert login_record[phase] >= 0
+    assert login_record['Endpoint'] == 'login'
+    assert login_record['StatusCode'] == 200
+    # contador de intentos por email (1) + get_item (0.5) + update_item de last_login (1)
+    assert login_record['ConsumedCapacity'] == 2.5
+    assert registro['ConsumedCapacity'] == 1.0
+
+
+def test_counters_for_rejections(local_dynamodb, emitted):
+    call(LoginUsuario.lambda_handler, 'login', {'email': 'nadie@example.com', 'password': 'x'})
+    record, = emitted()
+    assert record['invalid_credentials'] == 1
+    assert record['StatusCode'] == 401
+    # Email inexistente: se verifica igual contra el hash fijo (sin enumeración de cuentas)
+    assert record['verify_password'] >= 0
@@ -0,0 +1,106 @@
+import hashlib
+import json
+
+import pytest
+
+import LoginUsuario
+import password_hasher
+import storage
+from password_hasher import LegacySha256Hasher, ScryptHasher, verify_password
+
+
+def login(email, password):
+    event = {
+        'body': json.dumps({'email': email, 'password': password}),
+        'requestContext': {'identity': {'sourceIp': '203.0.113.7'}}
+    }
+    return LoginUsuario.lambda_handler(event, None)
+
+
+def put_user(email, stored):
+    storage.get_storage().put(storage.USERS, {
+        'email': email, 'user_id': 'u1', 'user_type': 'cliente', 'password': stored, 'is_active': True
+    })
+
+
+def test_scrypt_round_trip():
+    stored = password_hasher.hash_password('secreta')
+    assert stored.startswith('scrypt$n=16,r=1,p=1$')
+    assert verify_password('secreta', stored) == (True, False)
+    assert verify_password('otra', stored) == (False, False)
+    # Sal aleatoria: dos hashes de la misma contraseña son distintos
+    assert password_hasher.hash_password('secreta') != stored
+
+
+def test_legacy_sha256_is_accepted_and_flagged_for_rehash():
+    stored = hashlib.sha256('secreta'.encode()).hexdigest()
+    assert LegacySha256Hasher.matches_format(stored)
+    assert verify_password('secreta', stored) == (True, True)
+    assert verify_password('otra', stored) == (False, False)
+
+
+def test_login_upgrades_legacy_hash(local_dynamodb):
+    put_user('legado@example.com', hashlib.sha256('secreta'.encode()).hexdigest())
+
+    assert login('legado@example.com', 'secreta')['statusCode'] == 200
+    stored = storage.get_storage().get(storage.USERS, {'email': 'legado@example.com'})['password']
+    assert stored.startswith('scrypt$')
+    assert verify_password('secreta', stored) == (True, False)
+    assert login('legado@example.com', 'secreta')['statusCode'] == 200
+
+
+def test_needs_rehash_when_parameters_change():
+    stored = ScryptHasher(n=16, r=1, p=1).hash('secreta')
+    assert not ScryptHasher(n=16, r=1, p=1).needs_rehash(stored)
+    assert ScryptHasher(n=32, r=1, p=1).needs_rehash(stored)
+    assert ScryptHasher(n=16, r=2, p=1).needs_rehash(stored)
+    assert ScryptHasher(n=16, r=1, p=1, salt_size=32).needs_rehash(stored)
+
+    # verify_password lo reporta sólo si la contraseña es correcta
+    hasher = ScryptHasher(n=32, r=1, p=1)
+    password_hasher._default_hasher = hasher
+    assert verify_password('secreta', stored) == (True, True)
+    assert verify_password('otra', stored) == (False, False)
+    assert not hasher.needs_rehash(hasher.hash('secreta'))
+
+
+@pytest.mark.parametrize('stored', [
+    None, '', 12345, 'texto-plano', 'scrypt$n=16,r=1,p=1$sal', 'scrypt$n=16,r=1$c2Fs$aGFzaA',
+    'scrypt$n=x,r=1,p=1$c2Fs$aGFzaA', 'scrypt$n=16,r=1,p=1$***$aGFzaA', 'bcrypt$2b$12$abc', 'a' * 63,
+])
+def test_malformed_stored_values_are_rejected(stored):
+    assert verify_password('secreta', stored) == (False, False)
+    if isinstance(stored, str):
+        assert ScryptHasher(n=16, r=1, p=1).needs_rehash(stored)
+
+
+def test_empty_password_is_rejected():
+    assert verify_password('', password_hasher.hash_password('secreta')) == (False, False)
+    assert verify_password(None, hashlib.sha256(b'').hexdigest()) == (False, False)
+
+
+def test_unknown_email_costs_one_verification(local_dynamodb, monkeypatch):
+    put_user('existe@example.com', password_hasher.hash_password('secreta'))
+    derivations = []
+    original = ScryptHasher._derive
+    monkeypatch.setattr(ScryptHasher, '_derive', lambda self, *a, **kw: derivations.append(1) or original(self, *a, **kw))
+    password_hasher.get_hasher().dummy_hash()
+
+    derivations.clear()
+    assert login('existe@example.com', 'incorrecta')['statusCode'] == 401
+    known = len(derivations)
+
+    derivations.clear()
+    response = login('no-existe@example.com', 'incorrecta')
+    # Mismo trabajo (un scrypt) y la misma respuesta con o sin cuenta
+    assert known == 1
+    assert len(derivations) == known
+    assert response['statusCode'] == 401
+    assert response['body'] == login('existe@example.com', 'otra')['body']
+
+
+def test_dummy_hash_never_matches():
+    hasher = password_hasher.get_hasher()
+    assert hasher.dummy_hash() is hasher.dummy_hash()
+    assert password_hasher.verify_dummy('') == (False, False)
+    assert password_hasher.verify_dummy('cualquiera') == (False, False)
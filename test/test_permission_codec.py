@@ -0,0 +1,80 @@
+import jwt
+import pytest
+
+import auth_helpers
+import CrearUsuario
+import LoginUsuario
+import permission_codec
+
+USER = {'user_id': 'u1', 'email': 'admin@example.com', 'user_type': 'staff', 'staff_tier': 'admin'}
+
+
+def issued_payload(permissions, fmt, monkeypatch):
+    monkeypatch.setattr(LoginUsuario, 'JWT_PERMISSIONS_FORMAT', fmt)
+    token, _ = LoginUsuario.generate_jwt_token(dict(USER, permissions=permissions))
+    return jwt.decode(token, options={'verify_signature': False})
+
+
+@pytest.mark.parametrize('tier', ['trabajador', 'admin'])
+def test_round_trip_of_every_staff_tier(tier):
+    permissions = CrearUsuario.get_staff_permissions(tier)
+    claim = permission_codec.encode_permissions(permissions)
+    assert claim.startswith(f'{permission_codec.CURRENT_VERSION}.')
+    assert permission_codec.decode_permissions(claim) == frozenset(permissions)
+
+
+def test_round_trip_of_each_catalog_entry():
+    catalog = permission_codec.PERMISSION_CATALOGS[permission_codec.CURRENT_VERSION]
+    for name in catalog:
+        assert permission_codec.decode_permissions(permission_codec.encode_permissions([name])) == {name}
+    assert permission_codec.encode_permissions([]) == '1.0'
+    assert permission_codec.decode_permissions('1.0') == frozenset()
+
+
+def test_unknown_permission_is_not_encoded():
+    assert permission_codec.encode_permissions(['view_products', 'permiso_nuevo']) is None
+
+
+@pytest.mark.parametrize('claim', [12, '', '1', 'x.ff', '99.ff', '1.zz'])
+def test_invalid_claim(claim):
+    with pytest.raises(ValueError):
+        permission_codec.decode_permissions(claim)
+    # auth_helpers no autoriza nada con un claim inválido (ni cae a la lista)
+    assert auth_helpers.token_permissions({'pm': claim, 'permissions': ['view_products']}) == frozenset()
+
+
+def test_default_format_carries_both_claims(monkeypatch):
+    assert LoginUsuario.JWT_PERMISSIONS_FORMAT == 'both'
+    permissions = CrearUsuario.get_staff_permissions('admin')
+    payload = issued_payload(permissions, 'both', monkeypatch)
+    # Un consumidor con el auth_helpers anterior sólo lee 'permissions'
+    assert payload['permissions'] == permissions
+    assert permission_codec.decode_permissions(payload['pm']) == frozenset(permissions)
+
+
+def test_compact_and_legacy_formats(monkeypatch):
+    permissions = CrearUsuario.get_staff_permissions('trabajador')
+    compact = issued_payload(permissions, 'compact', monkeypatch)
+    assert 'permissions' not in compact
+    assert auth_helpers.token_permissions(compact) == frozenset(permissions)
+
+    legacy = issued_payload(permissions, 'legacy', monkeypatch)
+    assert 'pm' not in legacy
+    assert auth_helpers.token_permissions(legacy) == frozenset(permissions)
+
+
+def test_unknown_permission_falls_back_to_list(monkeypatch):
+    permissions = ['view_products', 'permiso_nuevo']
+    payload = issued_payload(permissions, 'compact', monkeypatch)
+    assert 'pm' not in payload
+    assert payload['permissions'] == permissions
+    assert auth_helpers.token_permissions(payload) == frozenset(permissions)
+
+
+def test_verified_compact_token_exposes_permissions_list(monkeypatch):
+    monkeypatch.setattr(LoginUsuario, 'JWT_PERMISSIONS_FORMAT', 'compact')
+    permissions = CrearUsuario.get_staff_permissions('admin')
+    token, _ = LoginUsuario.generate_jwt_token(dict(USER, permissions=permissions))
+    auth_helpers.purge_token_cache()
+    payload = auth_helpers.verify_jwt_token(token)
+    assert payload['permissions'] == sorted(permissions)
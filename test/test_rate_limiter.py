@@ -0,0 +1,125 @@
+import json
+import time
+
+import LoginUsuario
+import password_hasher
+import rate_limiter
+import storage
+from rate_limiter import RateLimiter
+
+
+def login(email, password='incorrecta', ip='203.0.113.7'):
+    event = {
+        'body': json.dumps({'email': email, 'password': password}),
+        'requestContext': {'identity': {'sourceIp': ip}}
+    }
+    return LoginUsuario.lambda_handler(event, None)
+
+
+def test_throttled_login_skips_lookup_and_hashing(local_dynamodb, monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'LOGIN_EMAIL_LIMIT', 5)
+    hashes = []
+    original_verify = password_hasher.verify_password
+    monkeypatch.setattr(LoginUsuario, 'verify_password', lambda *a: hashes.append(1) or original_verify(*a))
+
+    statuses = [login('victima@example.com')['statusCode'] for _ in range(50)]
+    assert statuses[:5] == [401] * 5
+    assert set(statuses[5:]) == {429}
+
+    local_dynamodb.reset_counters()
+    hashes.clear()
+    response = login('victima@example.com')
+    assert response['statusCode'] == 429
+    assert int(response['headers']['Retry-After']) >= 1
+    assert dict(local_dynamodb.round_trips) == {}
+    assert hashes == []
+
+
+def test_ip_limit_applies_across_emails(local_dynamodb, monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'LOGIN_IP_LIMIT', 20)
+    statuses = [login(f'user{i}@example.com')['statusCode'] for i in range(40)]
+    assert statuses.count(401) == 20
+    assert statuses.count(429) == 20
+    # Otra IP no está afectada
+    assert login('user0@example.com', ip='198.51.100.1')['statusCode'] == 401
+
+
+def test_shared_counter_limits_across_containers():
+    store = storage.create_storage('memory')
+    containers = [RateLimiter({'email': 6}, 300, store=store) for _ in range(3)]
+    now = 1000.0
+
+    allowed = [c.check({'email': 'a@example.com'}, now=now) is None for _ in range(4) for c in containers]
+    assert allowed.count(True) == 6
+
+    # Una vez bloqueada, la clave no vuelve a tocar el storage en esa ventana
+    before = store.get(storage.RATE_LIMITS, {'key': 'login:email:a@example.com:3'})['attempts']
+    for c in containers:
+        assert c.check({'email': 'a@example.com'}, now=now + 1) is not None
+    assert store.get(storage.RATE_LIMITS, {'key': 'login:email:a@example.com:3'})['attempts'] == before
+
+    # En la ventana siguiente vuelve a permitir
+    assert containers[0].check({'email': 'a@example.com'}, now=1200.0) is None
+
+
+def test_local_bucket_refills():
+    limiter = RateLimiter({'email': 3}, 30, shared=False)
+    assert all(limiter.check({'email': 'a'}, now=0) is None for _ in range(3))
+    wait = limiter.check({'email': 'a'}, now=0)
+    assert wait == 10
+    assert limiter.check({'email': 'a'}, now=10) is None
+
+
+def test_attempt_denied_by_ip_does_not_spend_the_email_token():
+    limiter = RateLimiter({'email': 3, 'ip': 1}, 300, shared=False)
+    assert limiter.check({'email': 'a', 'ip': '203.0.113.7'}, now=0) is None
+    # La IP está agotada: los intentos siguientes no consumen del bucket del email
+    assert all(limiter.check({'email': 'a', 'ip': '203.0.113.7'}, now=0) for _ in range(5))
+    assert [limiter.check({'email': 'a', 'ip': f'198.51.100.{i}'}, now=0) for i in range(3)] == [None, None, 100]
+
+
+def test_storage_errors_fail_open():
+    class BrokenStore:
+        def increment(self, *args, **kwargs):
+            raise RuntimeError('sin conexión')
+
+    limiter = RateLimiter({'email': 2}, 300, store=BrokenStore())
+    assert limiter.check({'email': 'a'}, now=0) is None
+
+
+def test_email_and_ip_counters_cost_one_round_trip(local_dynamodb):
+    local_dynamodb.latency = 0.05
+    limiter = RateLimiter({'email': 10, 'ip': 100}, 300)
+
+    started = time.perf_counter()
+    assert limiter.check({'email': 'a@example.com', 'ip': '203.0.113.7'}) is None
+    elapsed = time.perf_counter() - started
+
+    # Dos UpdateItem en paralelo: el intento espera una latencia, no dos
+    assert local_dynamodb.round_trips['UpdateItem'] == 2
+    assert elapsed < 0.09
+    window = int(time.time() // 300)
+    store = storage.get_storage()
+    assert store.get(storage.RATE_LIMITS, {'key': f'login:ip:203.0.113.7:{window}'})['attempts'] == 1
+    assert store.get(storage.RATE_LIMITS, {'key': f'login:email:a@example.com:{window}'})['attempts'] == 1
+
+
+def test_one_failing_counter_does_not_skip_the_other():
+    class HalfBrokenStore:
+        def __init__(self):
+            self.counts = {}
+
+        def increment(self, table, key, attribute, ttl=None):
+            if ':ip:' in key['key']:
+                raise RuntimeError('sin conexión')
+            self.counts[key['key']] = self.counts.get(key['key'], 0) + 1
+            return self.counts[key['key']]
+
+    store = HalfBrokenStore()
+    limiter = RateLimiter({'email': 2, 'ip': 100}, 300, store=store)
+    assert limiter.check({'email': 'a', 'ip': '1.2.3.4'}, now=0) is None
+    assert store.counts == {'login:email:a:0': 1}
+
+    # El contador de email sigue limitando aunque el de IP falle
+    store.counts['login:email:a:0'] = 2
+    assert limiter.check({'email': 'a', 'ip': '1.2.3.4'}, now=1) == 299
@@ -0,0 +1,130 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import CrearUsuario
+import storage
+from conftest import INVITATION_CODES_TABLE, USUARIOS_TABLE
+
+
+def register(email, invitation_code=None):
+    body = {'email': email, 'password': 'secreto123', 'name': 'Test'}
+    if invitation_code:
+        body.update({
+            'user_type': 'staff',
+            'staff_tier': 'trabajador',
+            'frontend_type': 'staff',
+            'invitation_code': invitation_code
+        })
+    else:
+        body.update({'user_type': 'cliente', 'frontend_type': 'client'})
+    return CrearUsuario.lambda_handler({'body': json.dumps(body)}, None)['statusCode']
+
+
+def create_code(db, code, max_uses=5, is_active=True, expires_in=timedelta(days=1)):
+    db.Table(INVITATION_CODES_TABLE).put_item(Item={
+        'code': code,
+        'is_active': is_active,
+        'expires_at': (datetime.utcnow() + expires_in).isoformat(),
+        'max_uses': max_uses,
+        'used_count': 0
+    })
+
+
+def run_concurrently(fn, args, workers=16):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda a: fn(*a), args))
+
+
+def test_concurrent_signups_with_same_email_create_one_user(local_dynamodb):
+    local_dynamodb.latency = 0.002
+    statuses = run_concurrently(register, [('same@example.com',)] * 20)
+
+    assert statuses.count(201) == 1
+    assert statuses.count(409) == 19
+    assert len(local_dynamodb.data[USUARIOS_TABLE]) == 1
+
+
+def test_invitation_max_uses_holds_under_concurrency(local_dynamodb):
+    local_dynamodb.latency = 0.002
+    create_code(local_dynamodb, 'ABCD1234', max_uses=5)
+
+    statuses = run_concurrently(register, [(f'staff{i}@example.com', 'ABCD1234') for i in range(30)])
+
+    assert statuses.count(201) == 5
+    assert statuses.count(403) == 25
+    code = local_dynamodb.Table(INVITATION_CODES_TABLE).get_item(Key={'code': 'ABCD1234'})['Item']
+    assert code['used_count'] == 5
+    assert len(local_dynamodb.data[USUARIOS_TABLE]) == 5
+
+
+def test_expired_or_inactive_code_creates_nothing(local_dynamodb):
+    create_code(local_dynamodb, 'EXPIRED1', expires_in=timedelta(days=-1))
+    create_code(local_dynamodb, 'INACTIVE', is_active=False)
+
+    assert register('a@example.com', 'EXPIRED1') == 403
+    assert register('b@example.com', 'INACTIVE') == 403
+    assert register('c@example.com', 'MISSING1') == 403
+    assert local_dynamodb.data[USUARIOS_TABLE] == {}
+
+
+def test_duplicate_staff_email_does_not_consume_invitation(local_dynamodb):
+    create_code(local_dynamodb, 'ABCD1234', max_uses=5)
+
+    assert register('dup@example.com', 'ABCD1234') == 201
+    assert register('dup@example.com', 'ABCD1234') == 409
+    code = local_dynamodb.Table(INVITATION_CODES_TABLE).get_item(Key={'code': 'ABCD1234'})['Item']
+    assert code['used_count'] == 1
+
+
+def test_registration_is_a_single_round_trip(local_dynamodb):
+    create_code(local_dynamodb, 'ABCD1234')
+    local_dynamodb.reset_counters()
+    assert register('client@example.com') == 201
+    assert dict(local_dynamodb.round_trips) == {'PutItem': 1}
+
+    local_dynamodb.reset_counters()
+    assert register('staff@example.com', 'ABCD1234') == 201
+    assert dict(local_dynamodb.round_trips) == {'TransactWriteItems': 1}
+
+
+def test_sharded_code_spreads_writes_and_caches_shard_count(local_dynamodb):
+    items = storage.shard_invitation_item({
+        'code': 'COHORT01', 'is_active': True, 'max_uses': 40, 'used_count': 0,
+        'expires_at': (datetime.utcnow() + timedelta(days=1)).isoformat()
+    }, 8)
+    table = local_dynamodb.Table(INVITATION_CODES_TABLE)
+    for item in items:
+        table.put_item(Item=item)
+
+    # El primer registro descubre los shards con el item devuelto por la condición fallida
+    assert register('staff0@example.com', 'COHORT01') == 201
+    local_dynamodb.reset_counters()
+    assert register('staff1@example.com', 'COHORT01') == 201
+    assert dict(local_dynamodb.round_trips) == {'TransactWriteItems': 1}
+
+    statuses = run_concurrently(register, [(f'staff{i}@example.com', 'COHORT01') for i in range(2, 50)])
+    assert statuses.count(201) == 38
+    shards = [table.get_item(Key={'code': f'COHORT01#{i}'})['Item'] for i in range(8)]
+    assert all(shard['used_count'] == shard['max_uses'] == 5 for shard in shards)
+    assert 'used_count' not in table.get_item(Key={'code': 'COHORT01'})['Item']
+
+
+def test_deactivated_sharded_code_stops_registrations(local_dynamodb):
+    items = storage.shard_invitation_item({
+        'code': 'COHORT02', 'is_active': True, 'max_uses': 40, 'used_count': 0,
+        'expires_at': (datetime.utcnow() + timedelta(days=1)).isoformat()
+    }, 8)
+    table = local_dynamodb.Table(INVITATION_CODES_TABLE)
+    for item in items:
+        table.put_item(Item=item)
+    assert register('staff0@example.com', 'COHORT02') == 201
+
+    # El contenedor ya conoce los shards (no vuelve a leer el código): la copia en
+    # cada shard corta el registro
+    assert storage.get_storage().update_invitation_code('COHORT02', {'is_active': False})
+    local_dynamodb.reset_counters()
+    assert register('staff1@example.com', 'COHORT02') == 403
+    assert local_dynamodb.round_trips['TransactWriteItems'] == 1
+    assert 'Item' not in local_dynamodb.Table(USUARIOS_TABLE).get_item(Key={'email': 'staff1@example.com'})
+    assert sum(table.get_item(Key={'code': f'COHORT02#{i}'})['Item']['used_count'] for i in range(8)) == 1
@@ -0,0 +1,232 @@
+"""
+Misma batería de pruebas para cada backend de storage
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+import storage
+from storage import INVITATION_CODES, USERS
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'dynamodb'])
+def store(request, tmp_path):
+    if request.param == 'dynamodb':
+        request.getfixturevalue('local_dynamodb')
+        backend = storage.create_storage('dynamodb')
+    elif request.param == 'sqlite':
+        backend = storage.create_storage('sqlite', path=str(tmp_path / 'auth.db'))
+    else:
+        backend = storage.create_storage('memory')
+    yield backend
+    backend.close()
+
+
+def user(email, **extra):
+    item = {'email': email, 'user_id': email.split('@')[0], 'is_active': True, 'permissions': ['view_orders']}
+    item.update(extra)
+    return item
+
+
+def code(value, max_uses=3, is_active=True, expires_in=timedelta(days=1)):
+    return {
+        'code': value,
+        'is_active': is_active,
+        'expires_at': (datetime.utcnow() + expires_in).isoformat(),
+        'max_uses': max_uses,
+        'used_count': 0
+    }
+
+
+def run_concurrently(fn, args, workers=16):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda a: fn(*a), args))
+
+
+def test_get_missing_returns_none(store):
+    assert store.get(USERS, {'email': 'nadie@example.com'}) is None
+
+
+def test_put_and_get_roundtrip(store):
+    assert store.put(USERS, user('a@example.com', name='Ana'))
+    item = store.get(USERS, {'email': 'a@example.com'})
+    assert item == user('a@example.com', name='Ana')
+
+    # El item retornado es una copia
+    item['name'] = 'Otra'
+    assert store.get(USERS, {'email': 'a@example.com'})['name'] == 'Ana'
+
+
+def test_put_overwrites_unless_conditional(store):
+    store.put(USERS, user('a@example.com', name='Ana'))
+    assert store.put(USERS, user('a@example.com', name='Beto'))
+    assert not store.put(USERS, user('a@example.com', name='Carla'), if_not_exists=True)
+    assert store.get(USERS, {'email': 'a@example.com'})['name'] == 'Beto'
+
+
+def test_conditional_put_has_one_winner(store):
+    results = run_concurrently(
+        lambda i: store.put(USERS, user('same@example.com', name=str(i)), if_not_exists=True),
+        [(i,) for i in range(20)]
+    )
+    assert results.count(True) == 1
+
+
+def test_update_sets_attributes(store):
+    store.put(USERS, user('a@example.com', last_login=None))
+    store.update(USERS, {'email': 'a@example.com'}, {'last_login': '2024-01-01T00:00:00', 'updated_at': 'x'})
+    item = store.get(USERS, {'email': 'a@example.com'})
+    assert item['last_login'] == '2024-01-01T00:00:00'
+    assert item['updated_at'] == 'x'
+    assert item['permissions'] == ['view_orders']
+
+
+def test_increment_is_atomic(store):
+    key = {'code': 'COUNTER1'}
+    assert store.increment(INVITATION_CODES, key, 'used_count') == 1
+    run_concurrently(lambda: store.increment(INVITATION_CODES, key, 'used_count', 2), [()] * 50)
+    assert store.get(INVITATION_CODES, key)['used_count'] == 101
+
+
+def test_increment_sets_ttl_once(store):
+    key = {'key': 'login:email:a@example.com:1'}
+    store.increment(storage.RATE_LIMITS, key, 'attempts', ttl=1000)
+    assert store.increment(storage.RATE_LIMITS, key, 'attempts', ttl=2000) == 2
+    assert store.get(storage.RATE_LIMITS, key)['ttl'] == 1000
+
+
+def test_batch_write_and_get(store):
+    items = [user(f'u{i}@example.com') for i in range(60)]
+    batches = store.batch_write(USERS, items)
+    assert [batch['size'] for batch in batches] == [25, 25, 10]
+
+    keys = [{'email': f'u{i}@example.com'} for i in range(0, 120, 2)]
+    found = store.batch_get(USERS, keys, projection='email')
+    assert sorted(item['email'] for item in found) == sorted(f'u{i}@example.com' for i in range(0, 60, 2))
+    assert all(set(item) == {'email'} for item in found)
+
+
+def test_query_index_by_user_id(store):
+    store.batch_write(USERS, [user(f'u{i}@example.com', name=f'U{i}', user_type='cliente') for i in range(150)])
+    store.put(USERS, {'email': 'sin-id@example.com', 'name': 'Sin id'})
+
+    wanted = [f'u{i}' for i in range(0, 300, 2)] + ['u0']
+    found = store.query_index(USERS, storage.USER_ID_INDEX, wanted)
+    assert sorted(item['user_id'] for item in found) == sorted(f'u{i}' for i in range(0, 150, 2))
+    # Proyección del índice: sin password ni permisos
+    assert found[0].keys() == {'email', 'user_id', 'name', 'user_type', 'is_active'}
+    assert store.query_index(USERS, storage.USER_ID_INDEX, []) == []
+
+
+def test_query_range_orders_pages_and_filters_by_prefix(store):
+    users = [
+        user(f'u{i:03d}@example.com', user_type='cliente' if i % 3 else 'staff',
+             created_at=f'2024-01-{i % 28 + 1:02d}T00:00:00', password='hash')
+        for i in range(120)
+    ]
+    store.batch_write(USERS, users)
+    clients = [item for item in users if item['user_type'] == 'cliente']
+    expected = sorted(clients, key=lambda item: (item['created_at'], item['email']), reverse=True)
+
+    # Páginas chicas: el resultado es el mismo que de una sola vez
+    found = list(store.query_range(USERS, storage.USER_TYPE_CREATED_INDEX, 'cliente', descending=True, page_size=7))
+    assert [item['email'] for item in found] == [item['email'] for item in expected]
+    assert 'password' not in found[0]
+
+    start_key = storage.index_key(USERS, storage.USER_TYPE_CREATED_INDEX, found[29])
+    rest = store.query_range(USERS, storage.USER_TYPE_CREATED_INDEX, 'cliente', descending=True,
+                             start_key=start_key, page_size=7)
+    assert [item['email'] for item in rest] == [item['email'] for item in expected[30:]]
+
+    prefixed = store.query_range(USERS, storage.USER_TYPE_EMAIL_INDEX, 'staff', prefix='u01')
+    assert [item['email'] for item in prefixed] == [f'u0{i}@example.com' for i in (12, 15, 18)]
+
+
+def test_query_range_skips_items_without_sort_attribute(store):
+    store.put(USERS, user('a@example.com', account_status=storage.INACTIVE_STATUS, created_at='2024-01-01'))
+    store.put(USERS, user('b@example.com', account_status=storage.INACTIVE_STATUS))
+    store.put(USERS, user('c@example.com', created_at='2024-01-02'))
+    found = store.query_range(USERS, storage.ACCOUNT_STATUS_CREATED_INDEX, storage.INACTIVE_STATUS)
+    assert [item['email'] for item in found] == ['a@example.com']
+
+
+def test_scan_reads_every_item_in_pages(store):
+    store.batch_write(USERS, [user(f'u{i}@example.com', name=f'U{i}') for i in range(45)])
+    found = list(store.scan(USERS, projection='email, name', page_size=10))
+    assert sorted(item['email'] for item in found) == sorted(f'u{i}@example.com' for i in range(45))
+    assert all(set(item) == {'email', 'name'} for item in found)
+
+
+def test_create_user_rejects_duplicate_email(store):
+    assert store.create_user(user('a@example.com')) is None
+    assert store.create_user(user('a@example.com')) == 'email_exists'
+
+
+def test_create_user_consumes_invitation_up_to_max_uses(store):
+    store.put(INVITATION_CODES, code('ABCD1234', max_uses=3))
+    results = run_concurrently(
+        lambda i: store.create_user(user(f's{i}@example.com'), invitation_code='ABCD1234'),
+        [(i,) for i in range(10)]
+    )
+    assert results.count(None) == 3
+    assert results.count('invalid_invitation') == 7
+    assert store.get(INVITATION_CODES, {'code': 'ABCD1234'})['used_count'] == 3
+
+
+def test_create_user_with_unusable_invitation(store):
+    store.put(INVITATION_CODES, code('EXPIRED1', expires_in=timedelta(days=-1)))
+    store.put(INVITATION_CODES, code('INACTIVE', is_active=False))
+    for value in ('EXPIRED1', 'INACTIVE', 'MISSING1'):
+        assert store.create_user(user('s@example.com'), invitation_code=value) == 'invalid_invitation'
+    assert store.get(USERS, {'email': 's@example.com'}) is None
+
+
+def test_duplicate_email_does_not_consume_invitation(store):
+    store.put(INVITATION_CODES, code('ABCD1234'))
+    assert store.create_user(user('s@example.com'), invitation_code='ABCD1234') is None
+    assert store.create_user(user('s@example.com'), invitation_code='ABCD1234') == 'email_exists'
+    assert store.get(INVITATION_CODES, {'code': 'ABCD1234'})['used_count'] == 1
+
+
+def test_sharded_invitation_never_exceeds_max_uses(store):
+    items = storage.shard_invitation_item(code('ABCD1234', max_uses=10), 4)
+    assert [item['max_uses'] for item in items[1:]] == [3, 3, 2, 2]
+    store.batch_write(INVITATION_CODES, items)
+
+    results = run_concurrently(
+        lambda i: store.create_user(user(f's{i}@example.com'), invitation_code='ABCD1234'),
+        [(i,) for i in range(25)]
+    )
+    assert results.count(None) == 10
+    assert results.count('invalid_invitation') == 15
+    aggregated = store.get_invitation_code('ABCD1234')
+    assert aggregated['used_count'] == 10 and aggregated['max_uses'] == 10
+    assert not storage.invitation_usable(aggregated, datetime.utcnow().isoformat())
+    # Un shard no se puede usar como código
+    assert store.create_user(user('x@example.com'), invitation_code='ABCD1234#0') == 'invalid_invitation'
+
+
+def test_sharded_invitation_follows_the_code(store):
+    store.batch_write(INVITATION_CODES, storage.shard_invitation_item(code('ABCD1234', max_uses=10), 4))
+    assert store.create_user(user('s0@example.com'), invitation_code='ABCD1234') is None
+
+    # Desactivar el código corta los registros por sus shards
+    assert store.update_invitation_code('ABCD1234', {'is_active': False})
+    assert all(not store.get(INVITATION_CODES, {'code': f'ABCD1234#{i}'})['is_active'] for i in range(4))
+    assert store.create_user(user('s1@example.com'), invitation_code='ABCD1234') == 'invalid_invitation'
+    # Igual al acortar su vigencia
+    past = (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+    assert store.update_invitation_code('ABCD1234', {'is_active': True, 'expires_at': past})
+    assert store.create_user(user('s2@example.com'), invitation_code='ABCD1234') == 'invalid_invitation'
+    assert not store.update_invitation_code('NOEXISTE', {'is_active': False})
+    assert not store.update_invitation_code('ABCD1234#0', {'is_active': True})
+
+    assert store.get(USERS, {'email': 's1@example.com'}) is None
+    assert store.get(USERS, {'email': 's2@example.com'}) is None
+    assert store.get_invitation_code('ABCD1234')['used_count'] == 1
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        storage.create_storage('cassandra')
@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+import structured_logging
+
+REDACTED = structured_logging.REDACTED
+
+
+@pytest.fixture
+def lines(monkeypatch):
+    captured = []
+    structured_logging.flush()
+    monkeypatch.setattr(structured_logging, '_write', lambda batch: captured.extend(batch))
+    monkeypatch.setattr(structured_logging, 'LOG_LEVEL', structured_logging.LEVELS['INFO'])
+    yield captured
+    structured_logging.flush()
+
+
+def logged(lines):
+    structured_logging.flush()
+    return [json.loads(line) for line in lines]
+
+
+def test_redact_nested_keys():
+    value = {
+        'email': 'a@example.com',
+        'password': 'secreta',
+        'profile': {'name': 'Ana', 'new_password': 'otra', 'settings': {'refresh_token': 'r', 'theme': 'dark'}},
+    }
+    assert structured_logging.redact(value) == {
+        'email': 'a@example.com',
+        'password': REDACTED,
+        'profile': {'name': 'Ana', 'new_password': REDACTED, 'settings': {'refresh_token': REDACTED, 'theme': 'dark'}},
+    }
+    # No modifica el original
+    assert value['password'] == 'secreta'
+
+
+@pytest.mark.parametrize('header', [
+    'Cookie', 'cookie', 'COOKIE', 'Set-Cookie', 'Authorization', 'authorization', 'X-Api-Key',
+    'X-Amz-Security-Token', 'x-amz-security-token',
+])
+def test_redact_headers_case_insensitive(header):
+    redacted = structured_logging.redact({header: 'secreto', 'Content-Type': 'application/json'})
+    assert redacted == {header: REDACTED, 'Content-Type': 'application/json'}
+
+
+def test_redact_list_bodies():
+    body = [
+        {'email': 'a@example.com', 'password': 'uno'},
+        {'email': 'b@example.com', 'password_hash': 'h', 'tokens': ['t1', 't2']},
+        [{'auth_token': 'x'}],
+        'texto',
+    ]
+    assert structured_logging.redact(body) == [
+        {'email': 'a@example.com', 'password': REDACTED},
+        {'email': 'b@example.com', 'password_hash': 'h', 'tokens': REDACTED},
+        [{'auth_token': REDACTED}],
+        'texto',
+    ]
+
+
+def test_summarize_event_redacts_headers_and_json_body():
+    event = {
+        'httpMethod': 'POST',
+        'path': '/auth/login',
+        'headers': {'cookie': 'auth_token=abc', 'User-Agent': 'pytest'},
+        'requestContext': {'requestId': 'req-1', 'identity': {'sourceIp': '10.0.0.1'}},
+        'body': json.dumps({'email': 'a@example.com', 'password': 'secreta'}),
+    }
+    assert structured_logging.summarize_event(event) == {
+        'httpMethod': 'POST',
+        'path': '/auth/login',
+        'request_id': 'req-1',
+        'source_ip': '10.0.0.1',
+        'headers': {'cookie': REDACTED, 'User-Agent': 'pytest'},
+        'body': {'email': 'a@example.com', 'password': REDACTED},
+    }
+    # Un body que no es JSON sólo deja su largo
+    assert structured_logging.summarize_event({'httpMethod': 'POST', 'body': 'password=x'})['body'] == {
+        'raw_length': 10
+    }
+
+
+def test_logger_fields_are_redacted(lines):
+    structured_logging.get_logger('login').info("Login", email='a@example.com', token='abc',
+                                                 headers={'Authorization': 'Bearer abc'})
+    record = logged(lines)[0]
+    assert (record['token'], record['headers']) == (REDACTED, {'Authorization': REDACTED})
+    assert record['email'] == 'a@example.com'
+
+
+def test_parse_sample_rates():
+    assert structured_logging._parse_sample_rates(' login=0.1, registro = 0.5,jwks=2,logout=-1,mal,x=abc') == {
+        'login': 0.1, 'registro': 0.5, 'jwks': 1.0, 'logout': 0.0
+    }
+    assert structured_logging._parse_sample_rates('') == {}
+    assert structured_logging._parse_sample_rates(None) == {}
+
+
+def test_event_log_is_sampled_per_endpoint(lines, monkeypatch):
+    monkeypatch.setattr(structured_logging, 'SAMPLE_RATES', {'login': 0.1, 'registro': 0.0})
+    monkeypatch.setattr(structured_logging, 'DEFAULT_SAMPLE_RATE', 1.0)
+    login = structured_logging.get_logger('login')
+    registro = structured_logging.get_logger('registro')
+    other = structured_logging.get_logger('logout')
+    assert (login.sample_rate, registro.sample_rate, other.sample_rate) == (0.1, 0.0, 1.0)
+
+    event = {'httpMethod': 'POST', 'body': '{}'}
+    monkeypatch.setattr(structured_logging.random, 'random', lambda: 0.05)
+    for logger in (login, registro, other):
+        logger.log_event(event)
+    monkeypatch.setattr(structured_logging.random, 'random', lambda: 0.5)
+    for logger in (login, registro, other):
+        logger.log_event(event)
+
+    # login sólo por debajo de su tasa, registro nunca y el resto siempre
+    assert [record['endpoint'] for record in logged(lines)] == ['login', 'logout', 'logout']
+
+
+def test_sampling_does_not_apply_to_other_logs(lines, monkeypatch):
+    monkeypatch.setattr(structured_logging, 'SAMPLE_RATES', {'login': 0.0})
+    logger = structured_logging.get_logger('login')
+    logger.log_event({'httpMethod': 'POST'})
+    logger.warning("Intento fallido")
+    assert [record['msg'] for record in logged(lines)] == ["Intento fallido"]
@@ -0,0 +1,129 @@
+import time
+import uuid
+
+import jwt
+import pytest
+
+import auth_helpers
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    auth_helpers.purge_token_cache()
+    yield
+    auth_helpers.purge_token_cache()
+
+
+def token(expires_in=3600, **claims):
+    payload = {'user_id': 'u1', 'user_type': 'cliente', 'jti': uuid.uuid4().hex,
+               'exp': int(time.time()) + expires_in}
+    payload.update(claims)
+    return jwt.encode(payload, auth_helpers._get_jwt_secret(), algorithm='HS256')
+
+
+def stats_delta(before):
+    after = auth_helpers.get_token_cache_stats()
+    return {key: after[key] - before[key] for key in ('hits', 'misses', 'evictions')}
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    calls = []
+    decode = auth_helpers._decode_token_with_reason
+
+    def counting_decode(jwt_token):
+        calls.append(jwt_token)
+        return decode(jwt_token)
+
+    monkeypatch.setattr(auth_helpers, '_decode_token_with_reason', counting_decode)
+    return calls
+
+
+def test_valid_token_is_served_from_cache(decodes):
+    jwt_token = token()
+    before = auth_helpers.get_token_cache_stats()
+    first = auth_helpers.verify_jwt_token(jwt_token)
+    second = auth_helpers.verify_jwt_token(jwt_token)
+    assert first == second and first['user_id'] == 'u1'
+    assert decodes == [jwt_token]
+    assert stats_delta(before) == {'hits': 1, 'misses': 1, 'evictions': 0}
+    assert auth_helpers.get_token_cache_stats()['size'] == 1
+
+    # El llamador recibe una copia: modificarla no altera la cache
+    second['user_type'] = 'staff'
+    assert auth_helpers.verify_jwt_token(jwt_token)['user_type'] == 'cliente'
+
+
+def test_expired_token_is_never_served_from_cache(decodes):
+    jwt_token = token(expires_in=2)
+    assert auth_helpers.verify_jwt_token(jwt_token) is not None
+    assert auth_helpers.is_token_cached(jwt_token)
+    expires_at = jwt.decode(jwt_token, options={'verify_signature': False})['exp']
+    time.sleep(max(0, expires_at - time.time()) + 0.05)
+
+    before = auth_helpers.get_token_cache_stats()
+    assert auth_helpers.verify_jwt_token_with_reason(jwt_token) == (None, auth_helpers.TOKEN_EXPIRED)
+    # La entrada vencida se descarta y el token se vuelve a verificar
+    assert len(decodes) == 2
+    assert not auth_helpers.is_token_cached(jwt_token)
+    assert stats_delta(before) == {'hits': 0, 'misses': 1, 'evictions': 1}
+
+
+def test_revoked_token_leaves_the_cache_immediately(decodes):
+    jwt_token = token()
+    auth_helpers.verify_jwt_token(jwt_token)
+    before = auth_helpers.get_token_cache_stats()
+
+    auth_helpers.revoke_cached_token(jwt_token)
+    assert not auth_helpers.is_token_cached(jwt_token)
+    assert stats_delta(before) == {'hits': 0, 'misses': 0, 'evictions': 1}
+    # El siguiente uso vuelve a verificar la firma en lugar de leer la cache
+    auth_helpers.verify_jwt_token(jwt_token)
+    assert len(decodes) == 2
+    assert stats_delta(before) == {'hits': 0, 'misses': 1, 'evictions': 1}
+
+    # Revocar un token que no está en cache no cuenta una eviction
+    auth_helpers.revoke_cached_token(token())
+    assert stats_delta(before)['evictions'] == 1
+
+
+def test_cache_is_bounded_and_evicts_the_least_recently_used(monkeypatch):
+    monkeypatch.setattr(auth_helpers, 'TOKEN_CACHE_SIZE', 2)
+    first, second, third = token(), token(), token()
+    auth_helpers.verify_jwt_token(first)
+    auth_helpers.verify_jwt_token(second)
+    # Un hit mueve al primero al final: el menos usado pasa a ser el segundo
+    auth_helpers.verify_jwt_token(first)
+    before = auth_helpers.get_token_cache_stats()
+    auth_helpers.verify_jwt_token(third)
+
+    assert [auth_helpers.is_token_cached(t) for t in (first, second, third)] == [True, False, True]
+    assert auth_helpers.get_token_cache_stats()['size'] == 2
+    assert stats_delta(before) == {'hits': 0, 'misses': 1, 'evictions': 1}
+
+
+def test_token_without_exp_is_not_cached():
+    jwt_token = jwt.encode({'user_id': 'u1'}, auth_helpers._get_jwt_secret(), algorithm='HS256')
+    assert auth_helpers.verify_jwt_token(jwt_token) == {'user_id': 'u1'}
+    assert not auth_helpers.is_token_cached(jwt_token)
+
+
+def test_disabled_cache_always_verifies(monkeypatch, decodes):
+    monkeypatch.setattr(auth_helpers, 'TOKEN_CACHE_SIZE', 0)
+    jwt_token = token()
+    assert auth_helpers.verify_jwt_token(jwt_token) is not None
+    assert auth_helpers.verify_jwt_token(jwt_token) is not None
+    assert len(decodes) == 2
+    assert not auth_helpers.is_token_cached(jwt_token)
+
+
+def test_purge_by_predicate_removes_matching_payloads():
+    mine, other = token(user_id='u1'), token(user_id='u2')
+    auth_helpers.verify_jwt_token(mine)
+    auth_helpers.verify_jwt_token(other)
+    before = auth_helpers.get_token_cache_stats()
+
+    assert auth_helpers.purge_token_cache(lambda payload: payload['user_id'] == 'u1') == 1
+    assert not auth_helpers.is_token_cached(mine)
+    assert auth_helpers.is_token_cached(other)
+    assert stats_delta(before)['evictions'] == 1
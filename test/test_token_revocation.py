@@ -0,0 +1,193 @@
+import threading
+import time
+import uuid
+
+import jwt
+import pytest
+
+import auth_helpers
+import LogoutUsuario
+import token_revocation
+import warmup
+from bloom_filter import BloomFilter
+
+REVOKED_TOKENS_TABLE = 'test-t_revoked_tokens'
+
+
+@pytest.fixture
+def revocations(local_dynamodb, monkeypatch):
+    monkeypatch.setenv('REVOKED_TOKENS_TABLE', REVOKED_TOKENS_TABLE)
+    local_dynamodb.create_table(REVOKED_TOKENS_TABLE, 'jti')
+    local_dynamodb.create_index(REVOKED_TOKENS_TABLE, token_revocation.REVOCATION_INDEX, 'bucket', 'revoked_at')
+    token_revocation.reset()
+    auth_helpers.purge_token_cache()
+    yield local_dynamodb
+    token_revocation.wait_for_reload()
+    token_revocation.reset()
+    auth_helpers.purge_token_cache()
+
+
+def put_revocation(db, jti, revoked_at, expires_at):
+    db.Table(REVOKED_TOKENS_TABLE).put_item(Item={
+        'jti': jti,
+        'revoked_at': int(revoked_at * 1000),
+        'bucket': token_revocation._bucket(revoked_at),
+        'expires_at': int(expires_at),
+        'ttl': int(expires_at) + 3600
+    })
+
+
+def token(jti=None):
+    payload = {'user_id': 'u1', 'user_type': 'cliente', 'jti': jti or uuid.uuid4().hex,
+               'exp': int(time.time()) + 3600}
+    return jwt.encode(payload, auth_helpers._get_jwt_secret(), algorithm='HS256')
+
+
+def test_refresh_of_empty_table_advances_watermark(revocations):
+    assert token_revocation.refresh() == 0
+    # Carga completa: un Query por día de LOOKBACK_DAYS
+    assert revocations.round_trips['Query'] == token_revocation.LOOKBACK_DAYS + 1
+    assert token_revocation._state['watermark'] >= int((time.time() - 1) * 1000)
+
+    revocations.reset_counters()
+    assert token_revocation.refresh() == 0
+    # Incremental: desde el refresco anterior (a lo sumo ayer y hoy), no desde 1970
+    assert revocations.round_trips['Query'] <= 2
+
+
+def test_incremental_refresh_loads_revocations_from_other_containers(revocations):
+    token_revocation.refresh()
+    now = time.time()
+    put_revocation(revocations, 'otro-contenedor', now, now + 3600)
+
+    assert token_revocation.refresh() == 1
+    assert 'otro-contenedor' in token_revocation._state['bloom']
+    assert token_revocation.is_revoked('otro-contenedor')
+
+
+def test_refresh_skips_expired_revocations(revocations):
+    now = time.time()
+    put_revocation(revocations, 'expirado', now - 60, now - 1)
+    put_revocation(revocations, 'vigente', now - 60, now + 3600)
+
+    assert token_revocation.refresh(full=True) == 1
+    assert 'vigente' in token_revocation._state['bloom']
+    assert 'expirado' not in token_revocation._state['bloom']
+
+
+def test_logout_then_verify_rejects_token(revocations):
+    jwt_token = token()
+    assert auth_helpers.verify_jwt_token(jwt_token) is not None
+    assert auth_helpers.is_token_cached(jwt_token)
+
+    response = LogoutUsuario.lambda_handler({'headers': {'Authorization': f'Bearer {jwt_token}'}}, None)
+    assert response['statusCode'] == 200
+    assert auth_helpers.verify_jwt_token(jwt_token) is None
+
+    # Otro contenedor (estado vacío) también lo rechaza tras refrescar el filtro
+    token_revocation.reset()
+    auth_helpers.purge_token_cache()
+    assert auth_helpers.verify_jwt_token(jwt_token) is None
+    assert auth_helpers.verify_jwt_token(token()) is not None
+
+
+def test_first_check_does_not_wait_for_the_full_reload(revocations, monkeypatch):
+    now = time.time()
+    put_revocation(revocations, 'revocado', now - 60, now + 3600)
+    release = threading.Event()
+    query_bucket = token_revocation._query_bucket
+
+    def slow_query_bucket(table, bucket, since_ms):
+        release.wait(5)
+        return query_bucket(table, bucket, since_ms)
+
+    monkeypatch.setattr(token_revocation, '_query_bucket', slow_query_bucket)
+    # Mientras carga el filtro en segundo plano se consulta la tabla por jti
+    assert token_revocation.is_revoked('revocado')
+    assert not token_revocation.is_revoked('vigente')
+    assert token_revocation._state['bloom'] is None
+    assert revocations.round_trips['GetItem'] == 2
+
+    release.set()
+    token_revocation.wait_for_reload()
+    assert 'revocado' in token_revocation._state['bloom']
+
+
+def test_full_reload_sizes_the_filter_from_the_count(revocations, monkeypatch):
+    monkeypatch.setattr(token_revocation, 'BLOOM_CAPACITY', 2)
+    now = time.time()
+    for i in range(5):
+        put_revocation(revocations, f'jti-{i}', now - 60, now + 3600)
+
+    assert token_revocation.refresh(full=True) == 5
+    bloom = token_revocation._state['bloom']
+    assert bloom.capacity == 10
+    assert not bloom.is_saturated
+
+
+def test_reload_started_before_reset_is_discarded(revocations, monkeypatch):
+    now = time.time()
+    put_revocation(revocations, 'viejo', now - 60, now + 3600)
+    query_bucket = token_revocation._query_bucket
+
+    def reset_during_query(table, bucket, since_ms):
+        token_revocation.reset()
+        return query_bucket(table, bucket, since_ms)
+
+    monkeypatch.setattr(token_revocation, '_query_bucket', reset_during_query)
+    assert token_revocation.refresh(full=True) == 1
+    assert token_revocation._state['bloom'] is None
+
+
+def test_warmup_loads_the_filter(revocations):
+    now = time.time()
+    put_revocation(revocations, 'revocado', now - 60, now + 3600)
+    warmup.reset()
+    try:
+        assert warmup.prime(('revocation',)) == ['revocation']
+    finally:
+        warmup.reset()
+    assert 'revocado' in token_revocation._state['bloom']
+
+
+def failing_lookup(jti):
+    raise RuntimeError('DynamoDB inaccesible')
+
+
+def test_revocation_errors_fail_open_by_default(revocations, monkeypatch):
+    monkeypatch.setattr(token_revocation, 'is_revoked', failing_lookup)
+    assert token_revocation.REVOCATION_FAIL_MODE == 'open'
+    payload, reason = auth_helpers.verify_jwt_token_with_reason(token())
+    assert (payload['user_id'], reason) == ('u1', None)
+
+
+def test_revocation_errors_fail_closed_when_configured(revocations, monkeypatch):
+    monkeypatch.setattr(token_revocation, 'is_revoked', failing_lookup)
+    monkeypatch.setattr(token_revocation, 'FAIL_CLOSED', True)
+    jwt_token = token()
+    assert auth_helpers.verify_jwt_token_with_reason(jwt_token) == (None, auth_helpers.TOKEN_UNVERIFIABLE)
+    # Un rechazo no definitivo: el mismo token pasa cuando la tabla vuelve
+    monkeypatch.undo()
+    monkeypatch.setenv('REVOKED_TOKENS_TABLE', REVOKED_TOKENS_TABLE)
+    assert auth_helpers.verify_jwt_token(jwt_token) is not None
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    keys = [uuid.uuid4().hex for _ in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    assert len(bloom) == 1000
+    assert not bloom.is_saturated
+    false_positives = sum(1 for _ in range(10000) if uuid.uuid4().hex in bloom)
+    assert false_positives < 300
+
+    bloom.add('uno-más')
+    assert bloom.is_saturated
+
+
+@pytest.mark.parametrize('capacity, error_rate', [(0, 0.01), (100, 0), (100, 1)])
+def test_bloom_filter_rejects_invalid_parameters(capacity, error_rate):
+    with pytest.raises(ValueError):
+        BloomFilter(capacity, error_rate)
@@ -0,0 +1,163 @@
+import http.client
+import json
+import time
+
+import jwt
+import pytest
+
+import ActualizarIndicesUsuarios
+import auth_helpers
+import CrearUsuario
+import ListarUsuarios
+import storage
+from test_local_server import server_port  # noqa: F401
+
+
+def make_user(i, user_type='cliente', staff_tier=None, is_active=True, name=None):
+    item = CrearUsuario.build_user_item(
+        f'u{i:03d}@example.com', 'hash', name or f'Usuario {i}', None, None, user_type, staff_tier,
+        'test', f'2024-01-01T00:{i // 60:02d}:{i % 60:02d}'
+    )
+    item['is_active'] = is_active
+    item.update(storage.user_index_attributes(item))
+    return item
+
+
+@pytest.fixture
+def users(local_dynamodb):
+    items = [make_user(i) for i in range(60)]
+    items += [make_user(100 + i, 'staff', 'admin' if i < 3 else 'trabajador') for i in range(8)]
+    items += [make_user(200, is_active=False), make_user(201, 'staff', 'trabajador', is_active=False)]
+    items += [make_user(300, name='José Álvarez'), make_user(301, name='Josefina Paz')]
+    storage.get_storage().batch_write(storage.USERS, items)
+    local_dynamodb.reset_counters()
+    return local_dynamodb
+
+
+def token(permissions=('manage_all_profiles',), user_type='staff'):
+    payload = {'user_id': 'admin-1', 'user_type': user_type, 'permissions': list(permissions),
+               'exp': int(time.time()) + 3600}
+    return jwt.encode(payload, auth_helpers._get_jwt_secret(), algorithm='HS256')
+
+
+def call(cookie=None, **params):
+    cookie = token() if cookie is None else cookie
+    response = ListarUsuarios.lambda_handler({
+        'httpMethod': 'GET',
+        'headers': {'Cookie': f'auth_token={cookie}'} if cookie else {},
+        'queryStringParameters': params or None,
+        'body': None
+    }, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_requires_admin_permission(users):
+    assert call(cookie='', user_type='cliente')[0] == 401
+    assert call(cookie=token(user_type='cliente'), user_type='cliente')[0] == 403
+    assert call(cookie=token(permissions=('view_customers',)), user_type='cliente')[0] == 403
+
+
+def test_clients_newest_first_with_cursor_pagination(users):
+    status, page = call(user_type='cliente', limit='25')
+    assert status == 200
+    assert page['count'] == 25
+    assert page['users'][0]['email'] == 'u301@example.com'
+    # Una Query por página (con el item extra que indica si hay más), nunca un Scan
+    assert users.round_trips['Query'] == 1
+    assert users.round_trips['Scan'] == 0
+
+    emails = [user['email'] for user in page['users']]
+    while page['next_cursor']:
+        status, page = call(user_type='cliente', limit='25', cursor=page['next_cursor'])
+        emails += [user['email'] for user in page['users']]
+    created = [f'u{i:03d}@example.com' for i in list(range(60)) + [200, 300, 301]]
+    assert emails == sorted(created, key=lambda email: make_user(int(email[1:4]))['created_at'], reverse=True)
+    assert page['count'] == 13
+
+
+def test_exact_last_page_has_no_cursor(users):
+    status, page = call(staff_tier='admin', limit='3')
+    assert [user['staff_tier'] for user in page['users']] == ['admin'] * 3
+    assert page['next_cursor'] is None
+
+
+def test_inactive_accounts_and_sparse_fields(users):
+    status, page = call(status='inactive', fields='email,user_type')
+    assert status == 200
+    assert page['users'] == [
+        {'email': 'u201@example.com', 'user_type': 'staff'},
+        {'email': 'u200@example.com', 'user_type': 'cliente'}
+    ]
+
+
+def test_prefix_search_on_email_and_name(users):
+    status, page = call(user_type='staff', email_prefix='U10')
+    assert [user['email'] for user in page['users']] == [f'u10{i}@example.com' for i in range(8)]
+
+    status, page = call(user_type='cliente', name_prefix='jose')
+    assert [user['name'] for user in page['users']] == ['José Álvarez', 'Josefina Paz']
+    status, page = call(user_type='cliente', name_prefix='José Á', fields='name')
+    assert page['users'] == [{'name': 'José Álvarez'}]
+
+
+@pytest.mark.parametrize('params, error', [
+    ({}, 'invalid_listing_filter'),
+    ({'user_type': 'cliente', 'staff_tier': 'admin'}, 'invalid_listing_filter'),
+    ({'status': 'inactive', 'user_type': 'staff'}, 'invalid_listing_filter'),
+    ({'user_type': 'cliente', 'email_prefix': 'a', 'name_prefix': 'b'}, 'invalid_listing_filter'),
+    ({'user_type': 'cliente', 'limit': '0'}, 'invalid_limit'),
+    ({'user_type': 'cliente', 'limit': 'mil'}, 'invalid_limit'),
+    ({'user_type': 'cliente', 'fields': 'email,password'}, 'invalid_fields'),
+    ({'user_type': 'cliente', 'cursor': 'no-es-un-cursor'}, 'invalid_cursor'),
+])
+def test_invalid_requests(users, params, error):
+    status, body = call(**params)
+    assert status == 400
+    assert body == json.loads(ListarUsuarios.handler_pipeline.ERRORS[error]['body'])
+
+
+def test_cursor_from_another_listing_is_rejected(users):
+    _, page = call(user_type='staff', limit='2')
+    assert call(user_type='cliente', cursor=page['next_cursor'])[0] == 400
+
+
+def test_index_attributes_follow_name_and_status():
+    item = CrearUsuario.build_user_item('a@example.com', 'hash', '  María  José ', None, None, 'cliente', None,
+                                        'web', '2024-01-01T00:00:00')
+    assert item['name_search'] == 'maria jose'
+    assert 'account_status' not in item
+    assert storage.user_index_attributes({'name': 'Ana', 'is_active': False}) == {
+        'name_search': 'ana', 'account_status': storage.INACTIVE_STATUS
+    }
+
+
+def test_backfill_adds_index_attributes_to_existing_users(users):
+    store = storage.get_storage()
+    legacy = [
+        {'email': 'legacy1@example.com', 'user_id': 'l1', 'name': 'Josué Legado', 'user_type': 'cliente',
+         'created_at': '2023-01-01T00:00:00', 'is_active': True},
+        {'email': 'legacy2@example.com', 'user_id': 'l2', 'name': 'Otro', 'user_type': 'cliente',
+         'created_at': '2023-01-02T00:00:00', 'is_active': False},
+    ]
+    store.batch_write(storage.USERS, legacy)
+    assert call(user_type='cliente', name_prefix='josu')[1]['count'] == 0
+
+    report = ActualizarIndicesUsuarios.backfill(store, threads=2)
+    assert report == {'scanned': 74, 'updated': 2, 'errors': 0}
+    assert [u['email'] for u in call(user_type='cliente', name_prefix='josu')[1]['users']] == ['legacy1@example.com']
+    assert 'legacy2@example.com' in [u['email'] for u in call(status='inactive')[1]['users']]
+    # Los usuarios al día no se reescriben
+    assert ActualizarIndicesUsuarios.backfill(store)['updated'] == 0
+
+
+def test_local_server_streams_the_page(users, server_port):  # noqa: F811
+    conn = http.client.HTTPConnection('127.0.0.1', server_port, timeout=5)
+    conn.request('GET', '/auth/users?user_type=cliente&limit=250&fields=email',
+                 headers={'Cookie': f'auth_token={token()}'})
+    response = conn.getresponse()
+    data = response.read().decode()
+    conn.close()
+
+    assert response.status == 200
+    assert response.getheader('Transfer-Encoding') == 'chunked'
+    assert json.loads(data) == call(user_type='cliente', limit='250', fields='email')[1]
@@ -0,0 +1,71 @@
+import json
+import time
+
+import jwt
+import pytest
+
+import auth_helpers
+import ObtenerUsuarios
+import storage
+import user_directory
+
+
+@pytest.fixture
+def users(local_dynamodb):
+    user_directory.clear_cache()
+    storage.get_storage().batch_write(storage.USERS, [
+        {'email': f'u{i}@example.com', 'user_id': f'id-{i}', 'name': f'Usuario {i}',
+         'user_type': 'cliente', 'password': 'hash', 'permissions': [], 'is_active': True}
+        for i in range(200)
+    ])
+    local_dynamodb.reset_counters()
+    yield local_dynamodb
+    user_directory.clear_cache()
+
+
+def token(user_type='staff', permissions=('view_customers',)):
+    payload = {'user_id': 'servicio-pedidos', 'user_type': user_type, 'permissions': list(permissions),
+               'exp': int(time.time()) + 3600}
+    return jwt.encode(payload, auth_helpers._get_jwt_secret(), algorithm='HS256')
+
+
+def call(user_ids, cookie=None):
+    cookie = token() if cookie is None else cookie
+    return ObtenerUsuarios.lambda_handler({
+        'headers': {'Cookie': f'auth_token={cookie}'} if cookie else {},
+        'body': json.dumps({'user_ids': user_ids})
+    }, None)
+
+
+def test_requires_staff_token(users):
+    assert call(['id-1'], cookie='')['statusCode'] == 401
+    assert call(['id-1'], cookie=token(user_type='cliente'))['statusCode'] == 403
+    response = call(['id-1'], cookie=token(permissions=()))
+    assert response['statusCode'] == 403
+    assert response['headers']['Access-Control-Allow-Origin'] == '*'
+
+
+def test_resolves_ids_with_public_fields(users):
+    response = call(['id-3', 'id-7', 'no-existe', 'id-3'])
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['users'] == {
+        'id-3': {'user_id': 'id-3', 'name': 'Usuario 3', 'user_type': 'cliente', 'is_active': True},
+        'id-7': {'user_id': 'id-7', 'name': 'Usuario 7', 'user_type': 'cliente', 'is_active': True}
+    }
+    assert body['not_found'] == ['no-existe']
+
+
+def test_cache_skips_repeated_queries(users):
+    call([f'id-{i}' for i in range(100)])
+    assert users.round_trips['Query'] == 100
+    users.reset_counters()
+
+    body = json.loads(call([f'id-{i}' for i in range(150)] + ['no-existe'])['body'])
+    assert len(body['users']) == 150
+    assert users.round_trips['Query'] == 51
+
+
+def test_rejects_invalid_user_ids(users):
+    for user_ids in ([], 'id-1', [1, 2], [''], ['x'] * (ObtenerUsuarios.USERS_BATCH_MAX_IDS + 1)):
+        assert call(user_ids)['statusCode'] == 400
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import handler_pipeline
+import LoginUsuario
+import metrics
+import storage
+import structured_logging
+import warmup
+
+
+@pytest.fixture(autouse=True)
+def reset_warmup():
+    warmup.reset()
+    yield
+    warmup.reset()
+
+
+def test_detects_warmup_events():
+    assert warmup.is_warmup_event({'warmup': True})
+    assert warmup.is_warmup_event({'source': 'aws.events', 'detail-type': 'Scheduled Event'})
+    assert warmup.is_warmup_event({'source': 'serverless-plugin-warmup'})
+    assert not warmup.is_warmup_event({'body': json.dumps({'warmup': True})})
+    assert not warmup.is_warmup_event({'warmup': 'true', 'email': 'a@example.com'})
+    assert not warmup.is_warmup_event(None)
+
+
+def test_warmup_short_circuits_before_handler(monkeypatch):
+    calls = []
+
+    @handler_pipeline.handler('test')
+    def lambda_handler(body, event, context):
+        calls.append(body)
+        return 200, {}
+
+    logged = []
+    monkeypatch.setattr(structured_logging.Logger, 'log_event', lambda self, event: logged.append(event))
+    response = lambda_handler({'source': 'aws.events'}, None)
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == {'warmup': True, 'primed': []}
+    assert calls == [] and logged == []
+
+
+def test_login_warmup_primes_once(local_dynamodb):
+    first = LoginUsuario.lambda_handler({'warmup': True}, None)
+    assert first['statusCode'] == 200
+    assert json.loads(first['body'])['primed'] == ['storage', 'password_hash', 'jwt']
+    assert local_dynamodb.round_trips['GetItem'] == 1
+
+    second = LoginUsuario.lambda_handler({'warmup': True}, None)
+    assert json.loads(second['body'])['primed'] == []
+    assert local_dynamodb.round_trips['GetItem'] == 1
+
+
+def test_failed_step_is_retried_on_next_ping(monkeypatch):
+    def broken(connect=True):
+        raise RuntimeError('sin red')
+
+    monkeypatch.setitem(warmup.STEPS, 'storage', broken)
+    assert warmup.prime(('storage', 'password_hash')) == ['password_hash']
+    monkeypatch.undo()
+    monkeypatch.setenv('STORAGE_BACKEND', 'memory')
+    storage.reset_storage()
+    assert warmup.prime(('storage', 'password_hash')) == ['storage']
+    storage.reset_storage()
+
+
+def test_offline_priming_leaves_connection_pending(local_dynamodb):
+    # SnapStart: antes del snapshot no se abre la conexión
+    assert warmup.prime(('storage', 'password_hash'), connect=False) == ['storage', 'password_hash']
+    assert local_dynamodb.round_trips['GetItem'] == 0
+    assert warmup.prime(('storage', 'password_hash')) == ['storage']
+    assert local_dynamodb.round_trips['GetItem'] == 1
+
+
+def test_warmup_consumes_cold_start(monkeypatch):
+    monkeypatch.setattr(metrics, '_cold_start', True)
+    handler_pipeline.warmup_response('test', ())
+    assert metrics.consume_cold_start() is False
+
+
+def test_init_hook_primes_with_provisioned_concurrency(monkeypatch):
+    monkeypatch.setenv('AWS_LAMBDA_INITIALIZATION_TYPE', 'provisioned-concurrency')
+    warmup.init_hook(('password_hash',))
+    assert warmup.prime(('password_hash',)) == []
+
+    warmup.reset()
+    monkeypatch.setenv('AWS_LAMBDA_INITIALIZATION_TYPE', 'on-demand')
+    warmup.init_hook(('password_hash',))
+    assert warmup.prime(('password_hash',)) == ['password_hash']
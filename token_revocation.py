@@ -0,0 +1,282 @@
+# token_revocation.py
+"""
+Lista de revocación de tokens JWT (logout real).
+
+- El logout escribe el 'jti' del token en t_revoked_tokens, con TTL igual a
+  la expiración del token.
+- Cada contenedor mantiene un filtro de Bloom con los jti revocados y lo
+  refresca de forma incremental (consulta al índice por día de revocación con
+  revoked_at mayor al último visto) cada REVOCATION_REFRESH_SECONDS.
+- Sólo cuando el filtro indica un posible positivo se hace el get_item.
+
+La carga completa (LOOKBACK_DAYS de revocaciones; ~14 s de CPU con 1M, ver
+benchmarks/bench_revocation.py) nunca corre en el camino del request: la
+hace el warm-up (paso 'revocation') o un hilo en segundo plano, al primer
+chequeo del contenedor, cada REVOCATION_FULL_RELOAD_SECONDS o cuando el
+filtro se satura. Mientras tanto los requests usan el filtro anterior o, sin
+filtro todavía, un get_item por jti. La capacidad del filtro nuevo es el
+doble de lo cargado (mínimo REVOCATION_BLOOM_CAPACITY), así no se satura con
+los incrementales hasta la próxima recarga. En Lambda el hilo sólo avanza
+mientras el contenedor atiende invocaciones (comparte la CPU con ellas).
+
+Si la consulta falla (DynamoDB inaccesible) REVOCATION_FAIL_MODE decide:
+  - 'open' (por defecto): el token se acepta y se registra el error
+    (métrica revocation_check_error). Una caída de DynamoDB no desloguea a
+    todos; un token revocado puede pasar mientras dure, sólo si el filtro no
+    está cargado o da un posible positivo.
+  - 'closed': el token se rechaza como no verificable (TOKEN_UNVERIFIABLE
+    en auth_helpers, un rechazo no definitivo: reintentable y fuera de la
+    cache negativa de /auth/introspect).
+
+Se activa definiendo REVOKED_TOKENS_TABLE.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import dynamo_client
+import structured_logging
+from bloom_filter import BloomFilter
+
+log = structured_logging.get_logger('revocation')
+
+REVOCATION_INDEX = 'bucket-revoked_at-index'
+REFRESH_SECONDS = float(os.environ.get('REVOCATION_REFRESH_SECONDS', '5'))
+FULL_RELOAD_SECONDS = float(os.environ.get('REVOCATION_FULL_RELOAD_SECONDS', '21600'))
+BLOOM_CAPACITY = int(os.environ.get('REVOCATION_BLOOM_CAPACITY', '100000'))
+BLOOM_ERROR_RATE = float(os.environ.get('REVOCATION_BLOOM_ERROR_RATE', '0.001'))
+REVOCATION_FAIL_MODE = os.environ.get('REVOCATION_FAIL_MODE', 'open').lower()
+FAIL_CLOSED = REVOCATION_FAIL_MODE == 'closed'
+# Los tokens duran 24h: revocaciones más antiguas ya no importan
+LOOKBACK_DAYS = 2
+# Solapamiento del refresco incremental (el índice es eventualmente consistente)
+REFRESH_OVERLAP_MS = 10000
+
+_lock = threading.RLock()
+_state = {
+    'bloom': None,
+    'watermark': 0,
+    'last_refresh': 0.0,
+    'last_full_reload': 0.0,
+    # reset() la incrementa: una recarga en curso de antes no reemplaza el estado
+    'generation': 0
+}
+_reload_thread = None
+# Resultados de get_item para posibles positivos: jti -> (revocado, consultado_en)
+_lookups = {}
+
+
+def revoked_tokens_table_name():
+    return os.environ.get('REVOKED_TOKENS_TABLE')
+
+
+def is_enabled():
+    return bool(revoked_tokens_table_name())
+
+
+def _bucket(timestamp):
+    return datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%d')
+
+
+def revoke(jti, expires_at):
+    """
+    Revoca el token (expires_at: 'exp' del token, epoch en segundos)
+    """
+    now = time.time()
+    dynamo_client.get_table(revoked_tokens_table_name()).put_item(Item={
+        'jti': jti,
+        'revoked_at': int(now * 1000),
+        'bucket': _bucket(now),
+        'expires_at': int(expires_at),
+        'ttl': int(expires_at) + 3600
+    })
+    with _lock:
+        if _state['bloom'] is not None:
+            _state['bloom'].add(jti)
+        _lookups[jti] = (True, now)
+
+
+def _query_bucket(table, bucket, since_ms):
+    kwargs = {
+        'IndexName': REVOCATION_INDEX,
+        # 'bucket' es palabra reservada de DynamoDB
+        'KeyConditionExpression': '#bucket = :bucket AND revoked_at > :since',
+        'ExpressionAttributeNames': {'#bucket': 'bucket'},
+        'ExpressionAttributeValues': {':bucket': bucket, ':since': since_ms},
+        'ProjectionExpression': 'jti, revoked_at, expires_at'
+    }
+    while True:
+        response = table.query(**kwargs)
+        for item in response.get('Items', []):
+            yield item
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _revocations(table, first_day, since_ms, now):
+    """
+    (jti, revoked_at) vigentes revocados desde since_ms, un Query por día
+    """
+    day = datetime.utcfromtimestamp(first_day).date()
+    last_day = datetime.utcfromtimestamp(now).date()
+    while day <= last_day:
+        for item in _query_bucket(table, day.isoformat(), since_ms):
+            if int(item.get('expires_at', 0)) >= now:
+                yield item['jti'], int(item['revoked_at'])
+        day += timedelta(days=1)
+
+
+def _forget_negative_lookups():
+    # Hay revocaciones nuevas: descartar los "no revocado" cacheados
+    for jti in [j for j, (revoked, _) in _lookups.items() if not revoked]:
+        del _lookups[jti]
+
+
+def refresh(full=False):
+    """
+    Carga las revocaciones nuevas en el filtro, o lo reconstruye si full o
+    si todavía no hay filtro. Síncrono: en el camino del request sólo corre
+    el incremental (ver _maybe_refresh)
+    """
+    table = dynamo_client.get_table(revoked_tokens_table_name())
+    now = time.time()
+    if full or _state['bloom'] is None:
+        return _full_reload(table, now)
+
+    with _lock:
+        bloom = _state['bloom']
+        since_ms = max(0, _state['watermark'] - REFRESH_OVERLAP_MS)
+        # Nunca más atrás que LOOKBACK_DAYS (un día por Query)
+        first_day = max(since_ms / 1000, now - LOOKBACK_DAYS * 86400)
+        watermark = _state['watermark']
+        loaded = 0
+        for jti, revoked_at in _revocations(table, first_day, since_ms, now):
+            bloom.add(jti)
+            watermark = max(watermark, revoked_at)
+            loaded += 1
+        # El watermark avanza hasta el refresco aunque no haya revocaciones nuevas: el
+        # siguiente incremental consulta sólo desde aquí (menos REFRESH_OVERLAP_MS)
+        _state.update(watermark=max(watermark, int(now * 1000)), last_refresh=now)
+        if loaded:
+            _forget_negative_lookups()
+    return loaded
+
+
+def _full_reload(table, now):
+    """
+    Arma un filtro nuevo con todas las revocaciones vigentes y lo reemplaza.
+    La carga es fuera de _lock: mientras tanto se sigue usando el anterior
+    """
+    generation = _state['generation']
+    jtis = []
+    watermark = 0
+    for jti, revoked_at in _revocations(table, now - LOOKBACK_DAYS * 86400, 0, now):
+        jtis.append(jti)
+        watermark = max(watermark, revoked_at)
+    bloom = BloomFilter(max(BLOOM_CAPACITY, 2 * len(jtis)), BLOOM_ERROR_RATE)
+    for jti in jtis:
+        bloom.add(jti)
+
+    with _lock:
+        if generation != _state['generation']:
+            return len(jtis)
+        # Las revocaciones de este contenedor durante la carga; las de otros las trae el
+        # incremental siguiente (el watermark vuelve al inicio de la carga)
+        for jti, (revoked, _) in _lookups.items():
+            if revoked:
+                bloom.add(jti)
+        _state.update(bloom=bloom, watermark=max(watermark, int(now * 1000)), last_refresh=now,
+                      last_full_reload=now)
+        _forget_negative_lookups()
+    return len(jtis)
+
+
+def _reload_in_background():
+    try:
+        refresh(full=True)
+    except Exception as e:
+        # Se reintenta en el próximo chequeo (a lo sumo cada REFRESH_SECONDS)
+        log.error("Error recargando revocaciones", error=str(e))
+
+
+def _start_reload():
+    """
+    Recarga completa en un hilo (una a la vez por contenedor)
+    """
+    global _reload_thread
+    with _lock:
+        if _reload_thread is not None and _reload_thread.is_alive():
+            return _reload_thread
+        _reload_thread = threading.Thread(target=_reload_in_background, name='revocation-reload', daemon=True)
+        _reload_thread.start()
+        return _reload_thread
+
+
+def wait_for_reload(timeout=None):
+    """
+    Espera la recarga en segundo plano en curso, si hay (pruebas y benchmarks)
+    """
+    thread = _reload_thread
+    if thread is not None:
+        thread.join(timeout)
+
+
+def _maybe_refresh():
+    now = time.time()
+    if now - _state['last_refresh'] < REFRESH_SECONDS:
+        return
+    bloom = _state['bloom']
+    if bloom is None or bloom.is_saturated or now - _state['last_full_reload'] >= FULL_RELOAD_SECONDS:
+        _start_reload()
+    if bloom is None:
+        # Sin filtro todavía: is_revoked consulta la tabla hasta que termine la carga
+        _state['last_refresh'] = now
+        return
+    try:
+        refresh()
+    except Exception as e:
+        # Se mantiene el filtro anterior
+        _state['last_refresh'] = time.time()
+        log.error("Error refrescando revocaciones", error=str(e))
+
+
+def _lookup(jti):
+    now = time.time()
+    cached = _lookups.get(jti)
+    if cached is not None and (cached[0] or now - cached[1] < REFRESH_SECONDS):
+        return cached[0]
+    response = dynamo_client.get_table(revoked_tokens_table_name()).get_item(
+        Key={'jti': jti}, ConsistentRead=True
+    )
+    revoked = 'Item' in response
+    if len(_lookups) >= 10000:
+        _lookups.clear()
+    _lookups[jti] = (revoked, now)
+    return revoked
+
+
+def is_revoked(jti):
+    """
+    True si el token fue revocado. Sólo consulta DynamoDB ante un posible
+    positivo del filtro de Bloom (o mientras se carga el primer filtro).
+    Los errores de DynamoDB se propagan: auth_helpers aplica REVOCATION_FAIL_MODE
+    """
+    if not jti or not is_enabled():
+        return False
+    _maybe_refresh()
+    bloom = _state['bloom']
+    if bloom is not None and jti not in bloom:
+        return False
+    return _lookup(jti)
+
+
+def reset():
+    """
+    Descarta el estado del contenedor (pruebas y benchmarks)
+    """
+    with _lock:
+        _state.update(bloom=None, watermark=0, last_refresh=0.0, last_full_reload=0.0,
+                      generation=_state['generation'] + 1)
+        _lookups.clear()
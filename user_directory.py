@@ -0,0 +1,79 @@
+# user_directory.py
+"""
+Resolución de user_id -> datos públicos del usuario (nombre y tipo) para
+otros servicios (pedidos, inventario).
+
+Las consultas van al índice user_id-index de t_usuarios (storage.query_index,
+proyección mínima) y se cachean por contenedor con un TTL corto. Los ids
+inexistentes también se cachean, así un id inválido repetido no vuelve a
+consultar el índice hasta que expira.
+
+Configuración:
+  USER_CACHE_TTL_SECONDS   vida de cada entrada (30; 0 desactiva la cache)
+  USER_CACHE_SIZE          entradas máximas (LRU, 10000)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+import storage
+
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '30'))
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+
+# Atributos que se exponen de cada usuario
+PUBLIC_ATTRIBUTES = ('user_id', 'name', 'user_type', 'staff_tier', 'is_active')
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def public_user(item):
+    return {name: item[name] for name in PUBLIC_ATTRIBUTES if item.get(name) is not None}
+
+
+def resolve(user_ids, now=None):
+    """
+    Retorna {user_id: datos públicos o None si no existe} para los ids dados
+    """
+    now = time.monotonic() if now is None else now
+    resolved = {}
+    missing = []
+    if USER_CACHE_TTL_SECONDS > 0:
+        with _cache_lock:
+            for user_id in dict.fromkeys(user_ids):
+                entry = _cache.get(user_id)
+                if entry is not None and entry[1] > now:
+                    _cache.move_to_end(user_id)
+                    resolved[user_id] = entry[0]
+                else:
+                    missing.append(user_id)
+    else:
+        missing = list(dict.fromkeys(user_ids))
+    metrics.count('user_cache_hit', len(resolved))
+    if not missing:
+        return resolved
+
+    metrics.count('user_cache_miss', len(missing))
+    with metrics.span('query_users'):
+        items = storage.get_storage().query_index(storage.USERS, storage.USER_ID_INDEX, missing)
+    found = {item['user_id']: public_user(item) for item in items}
+    fetched = {user_id: found.get(user_id) for user_id in missing}
+    resolved.update(fetched)
+
+    if USER_CACHE_TTL_SECONDS > 0:
+        expires_at = now + USER_CACHE_TTL_SECONDS
+        with _cache_lock:
+            for user_id, user in fetched.items():
+                _cache[user_id] = (user, expires_at)
+                _cache.move_to_end(user_id)
+            while len(_cache) > USER_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return resolved
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,139 @@
+# user_listing.py
+"""
+Listados de usuarios del dashboard de administración (GET /auth/users).
+
+Cada listado es un query_range sobre un índice de t_usuarios (storage.INDEXES),
+nunca un Scan de la tabla:
+  - staff por staff_tier:  staff_tier-created_at-index (sparse: sólo staff)
+  - staff o clientes:      user_type-created_at-index
+  - cuentas inactivas:     account_status-created_at-index (sparse)
+  - prefijo de email:      user_type-email-index (begins_with)
+  - prefijo de nombre:     user_type-name_search-index (nombre normalizado)
+Los listados por fecha van de los más nuevos a los más viejos; las búsquedas,
+en orden alfabético.
+
+Paginación por cursor: next_cursor es la clave en el índice del último
+usuario de la página (base64url de JSON). Se pide un item más que el límite
+para saber si hay página siguiente sin devolver un cursor a una página vacía.
+
+La página se serializa de a fragmentos (iter_page_json) a medida que llegan
+las páginas del índice: no se arma la lista de usuarios en memoria. Con un
+runtime que admite respuestas en streaming (local_server) los fragmentos se
+envían al cliente apenas están; en Lambda handler_pipeline los concatena.
+
+Configuración:
+  USER_LIST_DEFAULT_LIMIT   usuarios por página si no se pide limit (50)
+  USER_LIST_MAX_LIMIT       máximo de limit (1000)
+  USER_LIST_CHUNK_ITEMS     usuarios por fragmento de la respuesta (100)
+"""
+import base64
+import binascii
+import json
+import os
+from collections import namedtuple
+
+import handler_pipeline
+import storage
+
+USER_LIST_DEFAULT_LIMIT = int(os.environ.get('USER_LIST_DEFAULT_LIMIT', '50'))
+USER_LIST_MAX_LIMIT = int(os.environ.get('USER_LIST_MAX_LIMIT', '1000'))
+USER_LIST_CHUNK_ITEMS = int(os.environ.get('USER_LIST_CHUNK_ITEMS', '100'))
+
+USER_TYPES = ('cliente', 'staff')
+
+# Atributos que se pueden pedir con fields (los proyecta cada índice de los listados)
+LISTING_FIELDS = ('email',) + storage.LISTING_ATTRIBUTES
+
+# Listado resuelto: índice, valor de su atributo clave, prefijo del atributo de
+# ordenamiento y sentido del orden
+ListingQuery = namedtuple('ListingQuery', ['index', 'value', 'prefix', 'descending'])
+
+
+def resolve_query(user_type=None, staff_tier=None, status=None, email_prefix=None, name_prefix=None):
+    """
+    ListingQuery del listado pedido, o None si la combinación de filtros no
+    tiene un índice que la resuelva
+    """
+    if status is not None:
+        if status != storage.INACTIVE_STATUS or user_type or staff_tier or email_prefix or name_prefix:
+            return None
+        return ListingQuery(storage.ACCOUNT_STATUS_CREATED_INDEX, storage.INACTIVE_STATUS, None, True)
+    if staff_tier:
+        if user_type not in (None, 'staff') or email_prefix or name_prefix:
+            return None
+        return ListingQuery(storage.STAFF_TIER_CREATED_INDEX, staff_tier, None, True)
+    if user_type not in USER_TYPES or (email_prefix and name_prefix):
+        return None
+    if email_prefix:
+        return ListingQuery(storage.USER_TYPE_EMAIL_INDEX, user_type, email_prefix.lower().strip(), False)
+    if name_prefix:
+        prefix = storage.search_text(name_prefix)
+        return ListingQuery(storage.USER_TYPE_NAME_INDEX, user_type, prefix, False) if prefix else None
+    return ListingQuery(storage.USER_TYPE_CREATED_INDEX, user_type, None, True)
+
+
+def encode_cursor(key):
+    raw = json.dumps(key, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor, query):
+    """
+    Clave de inicio (start_key) del cursor, o None si el cursor no es de
+    este listado
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        return None
+    attribute, sort_attribute, _ = storage.INDEXES[storage.USERS][query.index]
+    names = {storage.TABLE_KEYS[storage.USERS], attribute, sort_attribute}
+    if not isinstance(key, dict) or set(key) != names or not all(isinstance(v, str) for v in key.values()):
+        return None
+    if key[attribute] != query.value or (query.prefix and not key[sort_attribute].startswith(query.prefix)):
+        return None
+    return key
+
+
+def parse_fields(fields):
+    """
+    Tupla de atributos pedidos ('name,email'), todos si fields está vacío,
+    o None si alguno no se puede listar
+    """
+    if not fields:
+        return LISTING_FIELDS
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(',')))
+    return names if all(name in LISTING_FIELDS for name in names) else None
+
+
+def iter_page_json(query, limit, start_key=None, fields=LISTING_FIELDS):
+    """
+    Fragmentos del JSON de la página: {"users": [...], "count": n,
+    "next_cursor": cursor o null}. Lee el índice a medida que se consumen
+    """
+    items = storage.get_storage().query_range(
+        storage.USERS, query.index, query.value, prefix=query.prefix, descending=query.descending,
+        start_key=start_key, page_size=min(limit + 1, storage.RANGE_QUERY_PAGE_SIZE)
+    )
+    yield '{"users": ['
+    count = 0
+    last = None
+    next_cursor = None
+    chunk = []
+    try:
+        for item in items:
+            if count == limit:
+                # Hay al menos uno más: la página siguiente empieza después del último enviado
+                next_cursor = encode_cursor(storage.index_key(storage.USERS, query.index, last))
+                break
+            chunk.append(handler_pipeline.json_dumps({name: item[name] for name in fields if name in item}))
+            count += 1
+            last = item
+            if len(chunk) == USER_LIST_CHUNK_ITEMS:
+                yield (', ' if count > len(chunk) else '') + ', '.join(chunk)
+                chunk = []
+    finally:
+        items.close()
+    if chunk:
+        yield (', ' if count > len(chunk) else '') + ', '.join(chunk)
+    yield f'], "count": {count}, "next_cursor": {handler_pipeline.json_dumps(next_cursor)}}}'
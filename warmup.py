@@ -0,0 +1,161 @@
+# warmup.py
+"""
+Eventos de warm-up y priming del contenedor.
+
+Los pings programados (EventBridge con input {"warmup": true}, o el plugin
+serverless-plugin-warmup) se detectan en handler_pipeline antes del log, el
+parseo y las métricas, y en lugar de una respuesta 400 ejecutan prime() con
+los pasos del handler:
+  - 'storage': crea el backend (boto3, cliente, pool HTTP) y abre la
+    conexión a DynamoDB con un GetItem de una clave inexistente
+  - 'password_hash': un hash de prueba con el hasher configurado y el hash
+    fijo del login con email inexistente (password_hasher.verify_dummy)
+  - 'jwt': importa PyJWT/cryptography, firma un token de prueba y lo
+    verifica con auth_helpers si el paquete lo incluye
+  - 'revocation': carga completa del filtro de revocaciones (si
+    REVOKED_TOKENS_TABLE está definida); así el primer request del
+    contenedor no espera la recarga en segundo plano
+
+Cada paso se ejecuta una vez por contenedor; los pings siguientes sólo
+mantienen el contenedor vivo. Un paso que falla se registra y no corta el
+resto (el warm-up nunca responde error).
+
+El mismo priming sirve como hook de inicialización (init_hook, lo registra
+el decorador del handler):
+  - concurrencia aprovisionada (AWS_LAMBDA_INITIALIZATION_TYPE
+    'provisioned-concurrency') o WARMUP_ON_INIT=true: al importar el handler
+  - SnapStart ('snap-start'): los pasos sin red antes del snapshot y la
+    conexión a DynamoDB después de cada restore
+"""
+import os
+import time
+
+import structured_logging
+
+log = structured_logging.get_logger('warmup')
+
+# Orígenes de los eventos de warm-up
+WARMUP_SOURCES = frozenset(['aws.events', 'serverless-plugin-warmup'])
+
+WARMUP_ON_INIT = os.environ.get('WARMUP_ON_INIT', 'false').lower() in ('1', 'true', 'yes')
+
+# Clave que nunca existe: el GetItem sólo abre la conexión (0.5 RCU por contenedor)
+WARMUP_KEY = '__warmup__'
+WARMUP_PASSWORD = 'warmup-password'
+
+_primed = set()
+
+
+def is_warmup_event(event):
+    """
+    True para los pings de warm-up (nunca para un request de API Gateway)
+    """
+    if not isinstance(event, dict):
+        return False
+    return event.get('warmup') is True or event.get('source') in WARMUP_SOURCES
+
+
+def _prime_storage(connect=True):
+    import storage
+
+    backend = storage.get_storage()
+    if connect:
+        backend.get(storage.USERS, {'email': WARMUP_KEY})
+        return True
+    if isinstance(backend, storage.DynamoDBStorage):
+        # Sin red: sólo boto3, el cliente y la tabla
+        backend._table(storage.USERS)
+        return False
+    return True
+
+
+def _prime_password_hash(connect=True):
+    from password_hasher import get_hasher, hash_password
+
+    hash_password(WARMUP_PASSWORD)
+    # El hash fijo de los logins con email inexistente
+    get_hasher().dummy_hash()
+    return True
+
+
+def _prime_jwt(connect=True):
+    import jwt_keys
+
+    token = jwt_keys.sign({'sub': WARMUP_KEY, 'exp': int(time.time()) + 60})
+    try:
+        import auth_helpers
+    except ImportError:
+        # Paquetes que sólo firman (login)
+        return True
+    # Con JWKS_URL la verificación descarga las claves: queda para después del restore
+    if not connect and os.environ.get('JWKS_URL'):
+        return False
+    auth_helpers._decode_token(token)
+    return True
+
+
+def _prime_revocation(connect=True):
+    import token_revocation
+
+    if not token_revocation.is_enabled():
+        return True
+    if not connect:
+        return False
+    token_revocation.refresh(full=True)
+    return True
+
+
+STEPS = {
+    'storage': _prime_storage,
+    'password_hash': _prime_password_hash,
+    'jwt': _prime_jwt,
+    'revocation': _prime_revocation,
+}
+
+
+def prime(steps, connect=True):
+    """
+    Ejecuta los pasos que aún no corrieron en este contenedor y retorna
+    los que se ejecutaron. Con connect=False no se abre ninguna conexión:
+    los pasos que la necesitan quedan pendientes para el próximo prime()
+    """
+    done = []
+    for name in steps:
+        if name in _primed:
+            continue
+        start = time.perf_counter()
+        try:
+            complete = STEPS[name](connect=connect)
+        except Exception as e:
+            log.warning("Error en el priming", step=name, error=str(e))
+            continue
+        log.debug("Priming", step=name, elapsed_ms=round((time.perf_counter() - start) * 1000, 2))
+        if complete:
+            _primed.add(name)
+        done.append(name)
+    return done
+
+
+def init_hook(steps):
+    """
+    Priming en la inicialización del contenedor según su tipo (ver docstring del módulo)
+    """
+    init_type = os.environ.get('AWS_LAMBDA_INITIALIZATION_TYPE')
+    if init_type == 'snap-start':
+        try:
+            from snapshot_restore_py import register_after_restore, register_before_snapshot
+        except ImportError:
+            log.warning("snapshot_restore_py no disponible: sin hooks de SnapStart")
+            return
+        register_before_snapshot(lambda: prime(steps, connect=False))
+        register_after_restore(lambda: prime(steps))
+    elif init_type == 'provisioned-concurrency' or WARMUP_ON_INIT:
+        prime(steps)
+        structured_logging.flush()
+
+
+def reset():
+    """
+    Olvida los pasos ejecutados (pruebas y benchmarks)
+    """
+    _primed.clear()